@@ -1,9 +1,10 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, make_response
-from models import db, User, UserRole, Unit, Module, FacilitatorSkill, SkillLevel, SwapRequest, SwapStatus, Session, Assignment, UnitFacilitator, Unavailability, RecurringPattern
+from models import db, User, UserRole, Unit, Module, FacilitatorSkill, SkillLevel, SwapRequest, SwapStatus, Session, Assignment, UnitFacilitator, Unavailability, UnavailabilityException, UnavailabilityOccurrence, RecurringPattern, expand_unavailability
 from werkzeug.security import generate_password_hash
 from datetime import datetime, time
 from auth import admin_required, get_current_user
 from flask_wtf.csrf import validate_csrf
+from unavailability_import import ImportRowError, import_unavailability, parse_import_request
 import json
 import csv
 import io
@@ -928,11 +929,12 @@ def generate_schedule():
             from models import User, UserRole
             
             # Get facilitators from database
-            facilitators_from_db = User.query.filter_by(role=UserRole.FACILITATOR).all()
+            facilitators_from_db = User.query.filter_by(role=UserRole.FACILITATOR).order_by(User.id).all()
             facilitators = prepare_facilitator_data(facilitators_from_db)
             
-            # Generate assignments using real facilitator data
-            assignments, conflicts = generate_optimal_assignments(facilitators)
+            # Generate assignments using real facilitator data. With no unit filter this covers
+            # every unit, so split it into independent components and solve those in parallel
+            assignments, conflicts = generate_optimal_assignments(facilitators, scoring='compiled', decompose=True)
             
             # Format results for template
             formatted_assignments = []
@@ -1436,7 +1438,12 @@ def update_facilitator_availability(facilitator_id):
     """Update facilitator availability schedule"""
     facilitator = User.query.get_or_404(facilitator_id)
     
-    # Clear existing unavailability for this facilitator
+    # Clear existing unavailability for this facilitator (rule exceptions first; a bulk
+    # delete skips the ORM cascade)
+    rule_ids = db.session.query(Unavailability.id).filter_by(user_id=facilitator_id)
+    UnavailabilityException.query.filter(
+        UnavailabilityException.unavailability_id.in_(rule_ids.scalar_subquery())
+    ).delete(synchronize_session=False)
     Unavailability.query.filter_by(user_id=facilitator_id).delete()
     
     # Add new unavailability slots
@@ -1470,18 +1477,17 @@ def admin_list_unavailability():
     if unit_id:
         q = q.filter(Unavailability.unit_id == unit_id)
     try:
-        if start:
-            start_d = datetime.strptime(start, '%Y-%m-%d').date()
-            q = q.filter(Unavailability.date >= start_d)
-        if end:
-            end_d = datetime.strptime(end, '%Y-%m-%d').date()
-            q = q.filter(Unavailability.date <= end_d)
+        start_d = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+        end_d = datetime.strptime(end, '%Y-%m-%d').date() if end else None
     except ValueError:
         return jsonify({'ok': False, 'error': 'Invalid date format; use YYYY-MM-DD'}), 400
+    q = q.filter(Unavailability.covering(start_d, end_d))
 
-    rows = q.order_by(Unavailability.date.asc(), Unavailability.start_time.asc().nulls_first()).all()
+    rows = q.all()
+    rules = {u.id: u for u in rows}
 
-    def serialize(u: Unavailability):
+    def serialize(o: UnavailabilityOccurrence):
+        u = rules[o.unavailability_id]
         owner = User.query.get(u.user_id)
         unit = Unit.query.get(u.unit_id) if u.unit_id else None
         return {
@@ -1490,17 +1496,18 @@ def admin_list_unavailability():
             'user': f"{owner.first_name} {owner.last_name}".strip() if owner else None,
             'unit_id': u.unit_id,
             'unit': f"{unit.unit_code} {unit.unit_name}" if unit else None,
-            'date': u.date.isoformat(),
-            'is_full_day': bool(u.is_full_day),
-            'start_time': u.start_time.isoformat() if u.start_time else None,
-            'end_time': u.end_time.isoformat() if u.end_time else None,
+            'date': o.date.isoformat(),
+            'is_full_day': o.is_full_day,
+            'start_time': o.start_time.isoformat() if o.start_time else None,
+            'end_time': o.end_time.isoformat() if o.end_time else None,
             'recurring_pattern': u.recurring_pattern.value if u.recurring_pattern else None,
             'recurring_interval': u.recurring_interval,
             'recurring_end_date': u.recurring_end_date.isoformat() if u.recurring_end_date else None,
             'reason': u.reason or ''
         }
 
-    return jsonify({'ok': True, 'items': [serialize(r) for r in rows]})
+    # Recurring rules are expanded into one item per date in the range
+    return jsonify({'ok': True, 'items': [serialize(o) for o in expand_unavailability(rows, start_d, end_d)]})
 
 
 def _parse_hhmm(val: str):
@@ -1592,6 +1599,43 @@ def admin_create_unavailability():
         return jsonify({'ok': False, 'error': f'Failed to create: {e}'}), 500
 
 
+@admin_bp.post('/unavailability/bulk')
+@admin_required
+def admin_bulk_import_unavailability():
+    """
+    Create or update unavailability for any users in a single transaction.
+    JSON {entries: [...]} or a multipart CSV/.ics `file`; each entry names its user
+    (user_id or user_email) and unit_id unless user_id/unit_id are given as options.
+    Options: on_conflict (update|skip), atomic, dry_run.
+    """
+    try:
+        options, rows = parse_import_request(request)
+    except ImportRowError as e:
+        return jsonify({'ok': False, 'error': str(e)}), 400
+
+    defaults = {}
+    for field in ('user_id', 'unit_id'):
+        value = options.get(field)
+        if value in (None, ''):
+            defaults[field] = None
+            continue
+        try:
+            defaults[field] = int(value)
+        except (TypeError, ValueError):
+            return jsonify({'ok': False, 'error': f'Invalid {field}'}), 400
+
+    try:
+        report = import_unavailability(rows, options, **defaults)
+        if report['written']:
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'ok': False, 'error': f'Failed to import: {e}'}), 500
+
+    ok = report['written'] or options['dry_run'] or not report['errors']
+    return jsonify(dict(report, ok=ok)), 200 if ok else 400
+
+
 @admin_bp.put('/unavailability/<int:item_id>')
 @admin_required
 def admin_update_unavailability(item_id):
@@ -307,15 +307,15 @@ class AdvancedSchedulingEngine:
         session_start_time = session.start_time.time()
         session_end_time = session.end_time.time()
 
-        # Find any unavailability on that date for this facilitator
-        blocks = (
-            Unavailability.query
-            .filter(
+        # Find any unavailability on that date for this facilitator (recurring rules expanded)
+        blocks = [
+            occurrence
+            for entry in Unavailability.query.filter(
                 Unavailability.user_id == facilitator.id,
-                Unavailability.date == session_date,
-            )
-            .all()
-        )
+                Unavailability.covering(session_date, session_date),
+            ).all()
+            for occurrence in entry.occurrences(session_date, session_date)
+        ]
 
         # If any full-day block exists -> unavailable
         for b in blocks:
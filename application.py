@@ -343,6 +343,8 @@ def inject_csrf_token():
 
 # File uploads (CSV)
 app.config["MAX_CONTENT_LENGTH"] = 5 * 1024 * 1024  # 5 MB cap
+# Local time zone of the deployment; imported calendar times in UTC or another zone are converted to it
+app.config["APP_TIMEZONE"] = os.getenv("APP_TIMEZONE", "Australia/Perth")
 # Ensure Flask‑WTF accepts header-style CSRF tokens sent by fetch()
 app.config["WTF_CSRF_METHODS"] = ["POST", "PUT", "PATCH", "DELETE"]
 # (Flask‑WTF already reads 'X-CSRFToken' / 'X-CSRF-Token' from headers)
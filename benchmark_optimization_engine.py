@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the optimization engine on synthetic, in-memory problems
+
+Builds units of a given size without touching the database (sessions and unavailability
+go straight into a ConstraintContext) and times the greedy solve. It also replays the
+fairness bookkeeping of each solve two ways:
+
+- legacy: rebuild {facilitator: hours} with get_assigned_hours() for every session and
+  call get_assigned_hours() again for every candidate (what the engine used to do)
+- ledger: the incremental HoursLedger the engine uses now
+
+The legacy replay is quadratic in the number of assignments, so it stops after
+--legacy-budget seconds and reports a lower bound for the speedup.
+
+Usage: python benchmark_optimization_engine.py --sessions 1000 5000 20000
+"""
+
+import argparse
+import random
+import sys
+import time as timer
+from datetime import datetime, timedelta
+
+from models import SkillLevel
+from optimization_engine import (
+    SCORING_BACKENDS,
+    SOLVER_MODES,
+    ConstraintContext,
+    HoursLedger,
+    generate_optimal_assignments,
+    get_assigned_hours
+)
+
+SKILL_MIX = [
+    SkillLevel.PROFICIENT,
+    SkillLevel.HAVE_RUN_BEFORE,
+    SkillLevel.HAVE_SOME_SKILL,
+    SkillLevel.HAVE_SOME_SKILL,
+    SkillLevel.NO_INTEREST
+]
+
+
+def build_synthetic_problem(session_count, facilitator_count=60, module_count=20, seed=0, unit_id=1):
+    """
+    Build (facilitators, context) for a synthetic unit
+    Sessions are spread over weekdays 08:00-18:00 across as many weeks as needed.
+    Session, module and facilitator ids are offset by unit_id so several units can be combined
+    """
+    rng = random.Random(seed)
+    locations = [f"EZONE {floor}.{room:02d}" for floor in range(1, 4) for room in range(1, 6)]
+    first_monday = datetime(2025, 7, 28)
+    sessions_per_day = 24
+
+    sessions = []
+    for i in range(session_count):
+        day_index = i // sessions_per_day
+        week, weekday = divmod(day_index, 5)
+        start = first_monday + timedelta(weeks=week, days=weekday, hours=8 + rng.randint(0, 8))
+        duration = rng.choice([1, 2, 2, 3])
+        end = start + timedelta(hours=duration)
+        module_id = (unit_id - 1) * module_count + rng.randint(1, module_count)
+        sessions.append({
+            'id': 100000 * (unit_id - 1) + i + 1,
+            'module_id': module_id,
+            'unit_id': unit_id,
+            'module_name': f"SYN{unit_id} - Module {module_id}",
+            'day_of_week': start.weekday(),
+            'start_time': start.time(),
+            'end_time': end.time(),
+            'date': start.date(),
+            'start_datetime': start,
+            'end_datetime': end,
+            'duration_hours': float(duration),
+            'required_skill_level': SkillLevel.HAVE_SOME_SKILL,
+            'location': rng.choice(locations),
+            'lead_staff_required': 1,
+            'support_staff_required': rng.choice([0, 0, 1])
+        })
+
+    facilitators = []
+    unavailability = {}
+    all_dates = sorted({s['date'] for s in sessions})
+    for f in range(facilitator_count):
+        facilitator_id = 10000 * unit_id + f + 1
+        facilitators.append({
+            'id': facilitator_id,
+            'name': f"Facilitator {facilitator_id}",
+            'email': f"fac{facilitator_id}@example.com",
+            'min_hours': 0,
+            'max_hours': 20,
+            'skills': {(unit_id - 1) * module_count + m: rng.choice(SKILL_MIX) for m in range(1, module_count + 1)},
+            'availability': {}
+        })
+        # Roughly 5% of days blocked per facilitator
+        for day in rng.sample(all_dates, max(1, len(all_dates) // 20)):
+            unavailability[(facilitator_id, unit_id, day)] = [(True, None, None)]
+
+    return facilitators, ConstraintContext(sessions, unavailability)
+
+
+def build_multi_unit_problem(unit_count, sessions_per_unit, facilitators_per_unit=30, seed=0):
+    """
+    Combine several synthetic units into one all-units problem, like the admin generate_schedule route
+    Each unit has its own facilitator pool; skills are only declared for the unit's own modules
+    """
+    facilitators = []
+    sessions = []
+    unavailability = {}
+    for unit_id in range(1, unit_count + 1):
+        unit_facilitators, context = build_synthetic_problem(
+            sessions_per_unit, facilitators_per_unit, seed=seed + unit_id, unit_id=unit_id
+        )
+        facilitators.extend(unit_facilitators)
+        sessions.extend(context.sessions)
+        unavailability.update(context.unavailability)
+    return facilitators, ConstraintContext(sessions, unavailability)
+
+
+def _group_by_session(assignments):
+    """Assignments grouped per session, in the order the greedy pass created them"""
+    groups = []
+    last_session_id = None
+    for assignment in assignments:
+        if assignment['session']['id'] != last_session_id:
+            groups.append([])
+            last_session_id = assignment['session']['id']
+        groups[-1].append(assignment)
+    return groups
+
+
+def replay_fairness_legacy(facilitators, assignments, budget_seconds):
+    """
+    Replay the old per-session rebuild and per-candidate get_assigned_hours() calls
+    Returns (seconds, sessions_replayed, sessions_total)
+    """
+    groups = _group_by_session(assignments)
+    started = timer.perf_counter()
+    placed = []
+    for replayed, group in enumerate(groups):
+        if timer.perf_counter() - started > budget_seconds:
+            return timer.perf_counter() - started, replayed, len(groups)
+        total_hours_per_facilitator = {f['id']: get_assigned_hours(f, placed) for f in facilitators}
+        for _ in group:
+            min_assigned = min(total_hours_per_facilitator.values())
+            max_assigned = max(total_hours_per_facilitator.values())
+            for facilitator in facilitators:
+                get_assigned_hours(facilitator, placed)
+        placed.extend(group)
+    return timer.perf_counter() - started, len(groups), len(groups)
+
+
+def replay_fairness_ledger(facilitators, assignments, session_limit=None):
+    """Replay the same bookkeeping with HoursLedger (optionally only the first session_limit sessions); returns seconds"""
+    groups = _group_by_session(assignments)[:session_limit]
+    started = timer.perf_counter()
+    ledger = HoursLedger(facilitators)
+    for group in groups:
+        for assignment in group:
+            for facilitator in facilitators:
+                ledger.hours(facilitator['id'])
+                ledger.min_hours
+                ledger.max_hours
+            ledger.add(assignment['facilitator']['id'], assignment['session']['duration_hours'])
+    return timer.perf_counter() - started
+
+
+def run_benchmark(session_counts, facilitator_count, legacy_budget, seed, scoring='scalar', mode='greedy', improve_seconds=0,
+                  units=1, decompose=False, workers=None):
+    print(f"{'sessions':>9} {'solve (s)':>10} {'evals':>10} {'legacy fair (s)':>16} {'ledger fair (s)':>16} {'speedup':>10}")
+    for session_count in session_counts:
+        random.seed(seed)
+        if units > 1:
+            facilitators, context = build_multi_unit_problem(units, session_count // units, facilitator_count // units, seed=seed)
+        else:
+            facilitators, context = build_synthetic_problem(session_count, facilitator_count, seed=seed)
+
+        started = timer.perf_counter()
+        assignments, conflicts = generate_optimal_assignments(
+            facilitators, context=context, scoring=scoring, mode=mode, improve_seconds=improve_seconds,
+            decompose=decompose, workers=workers
+        )
+        solve_seconds = timer.perf_counter() - started
+
+        legacy_seconds, replayed, total = replay_fairness_legacy(facilitators, assignments, legacy_budget)
+        ledger_seconds = replay_fairness_ledger(facilitators, assignments)
+
+        if replayed < total:
+            # Legacy replay was cut off: compare against the ledger on the same prefix of sessions.
+            # Legacy cost grows with every assignment, so this understates the full-run speedup
+            prefix_seconds = replay_fairness_ledger(facilitators, assignments, replayed)
+            legacy_label = f">{legacy_seconds:.1f} ({replayed}/{total})"
+            speedup_label = f">{legacy_seconds / max(prefix_seconds, 1e-9):.0f}x"
+        else:
+            legacy_label = f"{legacy_seconds:.2f}"
+            speedup_label = f"{legacy_seconds / max(ledger_seconds, 1e-9):.0f}x"
+
+        print(f"{session_count:>9} {solve_seconds:>10.2f} {context.stats['candidate_evaluations']:>10} "
+              f"{legacy_label:>16} {ledger_seconds:>16.3f} {speedup_label:>10}")
+        if 'decomposition' in context.stats:
+            print(f"{'':>9} decomposition: {context.stats['decomposition']}")
+        if 'local_search' in context.stats:
+            report = context.stats['local_search']
+            print(f"{'':>9} local search: objective {report['initial_objective']:.2f} -> {report['final_objective']:.2f}, "
+                  f"moves {report['moves']}, stopped at {report['stopped']}")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the optimization engine on synthetic units")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--facilitators", type=int, default=60)
+    parser.add_argument("--legacy-budget", type=float, default=30.0, help="Seconds allowed for each legacy replay")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scoring", choices=list(SCORING_BACKENDS), default="scalar")
+    parser.add_argument("--mode", choices=list(SOLVER_MODES), default="greedy")
+    parser.add_argument("--improve-seconds", type=float, default=0, help="Local search budget after the solve")
+    parser.add_argument("--units", type=int, default=1, help="Split sessions and facilitators over this many units")
+    parser.add_argument("--decompose", action="store_true", help="Solve independent components in parallel")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    run_benchmark(args.sessions, args.facilitators, args.legacy_budget, args.seed, args.scoring, args.mode,
+                  args.improve_seconds, args.units, args.decompose, args.workers)
@@ -1,10 +1,12 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
-from models import db, User, Session, Assignment, SwapRequest, Unavailability, SwapStatus, FacilitatorSkill, SkillLevel, Unit, Module, UnitFacilitator, RecurringPattern
+from models import db, User, Session, Assignment, SwapRequest, Unavailability, UnavailabilityException, expand_unavailability, SwapStatus, FacilitatorSkill, SkillLevel, Unit, Module, UnitFacilitator, RecurringPattern
 from auth import facilitator_required, get_current_user, login_required
 from datetime import datetime, time, date, timedelta
 from utils import role_required
 from models import UserRole
 import json
+from optimization_engine import AVAILABILITY_CACHE
+from unavailability_import import ImportRowError, import_unavailability, parse_import_request
 
 facilitator_bp = Blueprint('facilitator', __name__, url_prefix='/facilitator')
 
@@ -754,20 +756,22 @@ def get_unavailability():
         unit_id=unit_id
     ).all()
     
-    # Serialize unavailability data
+    # Serialize unavailability data, one entry per date (recurring rules are expanded)
     unavailability_data = []
     for unav in unavailabilities:
-        unavailability_data.append({
-            'id': unav.id,
-            'date': unav.date.isoformat(),
-            'start_time': unav.start_time.isoformat() if unav.start_time else None,
-            'end_time': unav.end_time.isoformat() if unav.end_time else None,
-            'is_full_day': unav.is_full_day,
-            'recurring_pattern': unav.recurring_pattern.value if unav.recurring_pattern else None,
-            'recurring_end_date': unav.recurring_end_date.isoformat() if unav.recurring_end_date else None,
-            'recurring_interval': unav.recurring_interval,
-            'reason': unav.reason
-        })
+        for occurrence in unav.occurrences():
+            unavailability_data.append({
+                'id': unav.id,
+                'date': occurrence.date.isoformat(),
+                'start_time': occurrence.start_time.isoformat() if occurrence.start_time else None,
+                'end_time': occurrence.end_time.isoformat() if occurrence.end_time else None,
+                'is_full_day': occurrence.is_full_day,
+                'recurring_pattern': unav.recurring_pattern.value if unav.recurring_pattern else None,
+                'recurring_end_date': unav.recurring_end_date.isoformat() if unav.recurring_end_date else None,
+                'recurring_interval': unav.recurring_interval,
+                'series_start_date': unav.date.isoformat() if unav.is_recurring else None,
+                'reason': unav.reason
+            })
     
     return jsonify({
         'unit': {
@@ -926,10 +930,89 @@ def create_unavailability():
         db.session.rollback()
         return jsonify({"error": "Failed to create unavailability"}), 500
 
+@facilitator_bp.route('/unavailability/bulk', methods=['POST'])
+@facilitator_required
+def bulk_import_unavailability():
+    """
+    Create or update many unavailability entries for one unit in a single transaction
+    
+    Accepts JSON {unit_id, entries: [...]} or a multipart upload of a CSV or .ics `file`
+    with unit_id as a form field. Options: on_conflict (update|skip), atomic (write
+    nothing if any row fails) and dry_run. Rows that fail validation are reported
+    with their row number (CSV line, iCal event number or list position).
+    """
+    user = get_current_user()
+    try:
+        options, rows = parse_import_request(request)
+    except ImportRowError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        unit_id = int(options.get('unit_id'))
+    except (TypeError, ValueError):
+        return jsonify({"error": "unit_id is required"}), 400
+    
+    # Verify user has access to this unit
+    access = UnitFacilitator.query.filter_by(unit_id=unit_id, user_id=user.id).first()
+    if not access:
+        return jsonify({"error": "forbidden"}), 403
+    
+    try:
+        report = import_unavailability(rows, options, user_id=user.id, unit_id=unit_id)
+        if report['written']:
+            # Clear "Available All Days" status, as a single new entry does
+            preferences = {}
+            if user.preferences:
+                try:
+                    preferences = json.loads(user.preferences)
+                except ValueError:
+                    preferences = {}
+            if str(unit_id) in preferences.get('availability_status', {}):
+                del preferences['availability_status'][str(unit_id)]
+                user.preferences = json.dumps(preferences)
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        return jsonify({"error": "Failed to import unavailability"}), 500
+    
+    if report['written']:
+        report['message'] = f"Imported {report['created'] + report['updated']} of {report['total']} entries"
+    elif options['dry_run']:
+        report['message'] = f"{report['valid']} of {report['total']} entries are valid"
+    else:
+        report['message'] = "Nothing was imported"
+    status = 400 if report['errors'] and not report['written'] and not options['dry_run'] else 200
+    return jsonify(report), status
+
+def _occurrence_exception(unavailability, date_str):
+    """
+    The UnavailabilityException for one date of a recurring rule, created if needed
+    Returns (exception, None) or (None, (error response, status))
+    """
+    try:
+        occurrence_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None, (jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400)
+    if not unavailability.is_recurring:
+        return None, (jsonify({"error": "Only recurring unavailability has per-date occurrences"}), 400)
+    if not unavailability.get_recurring_dates(occurrence_date, occurrence_date):
+        return None, (jsonify({"error": "The recurring unavailability does not occur on this date"}), 404)
+    
+    exception = next((e for e in unavailability.exceptions if e.date == occurrence_date), None)
+    if exception is None:
+        exception = UnavailabilityException(date=occurrence_date)
+        unavailability.exceptions.append(exception)
+    return exception, None
+
 @facilitator_bp.route('/unavailability/<int:unavailability_id>', methods=['PUT'])
 @facilitator_required
 def update_unavailability(unavailability_id):
-    """Update an existing unavailability record"""
+    """
+    Update an existing unavailability record
+    
+    With "occurrence_date", only that date of a recurring rule is changed: its time
+    window (start_time/end_time/is_full_day) overrides the rule's for that date
+    """
     user = get_current_user()
     data = request.get_json()
     
@@ -942,6 +1025,25 @@ def update_unavailability(unavailability_id):
     if not unavailability:
         return jsonify({"error": "Unavailability not found"}), 404
     
+    if data.get('occurrence_date'):
+        exception, error = _occurrence_exception(unavailability, data['occurrence_date'])
+        if error:
+            return error
+        is_full_day = data.get('is_full_day', False)
+        try:
+            start_time = datetime.strptime(data['start_time'], '%H:%M').time() if data.get('start_time') else None
+            end_time = datetime.strptime(data['end_time'], '%H:%M').time() if data.get('end_time') else None
+        except ValueError:
+            return jsonify({"error": "Invalid time format. Use HH:MM"}), 400
+        if not is_full_day and (not start_time or not end_time or start_time >= end_time):
+            return jsonify({"error": "End time must be after start time"}), 400
+        exception.is_removed = False
+        exception.is_full_day = is_full_day
+        exception.start_time = None if is_full_day else start_time
+        exception.end_time = None if is_full_day else end_time
+        db.session.commit()
+        return jsonify({"message": "Unavailability updated for this date only"})
+    
     # Update fields
     if 'date' in data:
         unavailability.date = datetime.strptime(data['date'], '%Y-%m-%d').date()
@@ -974,7 +1076,7 @@ def update_unavailability(unavailability_id):
 @facilitator_bp.route('/unavailability/<int:unavailability_id>', methods=['DELETE'])
 @facilitator_required
 def delete_unavailability(unavailability_id):
-    """Delete an unavailability record"""
+    """Delete an unavailability record, or with ?date=YYYY-MM-DD one date of a recurring rule"""
     user = get_current_user()
     
     # Get the unavailability record
@@ -986,6 +1088,14 @@ def delete_unavailability(unavailability_id):
     if not unavailability:
         return jsonify({"error": "Unavailability not found"}), 404
     
+    if request.args.get('date') and unavailability.is_recurring:
+        exception, error = _occurrence_exception(unavailability, request.args.get('date'))
+        if error:
+            return error
+        exception.is_removed = True
+        db.session.commit()
+        return jsonify({"message": "Unavailability deleted for this date only"})
+    
     db.session.delete(unavailability)
     db.session.commit()
     
@@ -1013,7 +1123,12 @@ def clear_all_unavailability():
         return jsonify({"error": "forbidden"}), 403
     
     try:
-        # Delete all unavailability records for this user and unit
+        # Delete all unavailability records for this user and unit (rule exceptions first;
+        # a bulk delete skips the ORM cascade)
+        rule_ids = db.session.query(Unavailability.id).filter_by(user_id=user.id, unit_id=unit_id)
+        UnavailabilityException.query.filter(
+            UnavailabilityException.unavailability_id.in_(rule_ids.scalar_subquery())
+        ).delete(synchronize_session=False)
         deleted_count = Unavailability.query.filter_by(
             user_id=user.id,
             unit_id=unit_id
@@ -1072,7 +1187,6 @@ def generate_recurring_unavailability():
     recurring_end_date = datetime.strptime(data.get('recurring_end_date'), '%Y-%m-%d').date()
     recurring_interval = data.get('recurring_interval', 1)
     
-    # Generate all dates for the recurring pattern
     # IMPORTANT: Always respect unit end date - never generate unavailability beyond unit end date
     effective_end_date = recurring_end_date
     message = None
@@ -1081,63 +1195,44 @@ def generate_recurring_unavailability():
         effective_end_date = access.end_date
         message = f"Recurring pattern will end on {access.end_date.strftime('%d/%m/%Y')} instead of {recurring_end_date.strftime('%d/%m/%Y')} (unit end date)"
     
-    dates = []
-    current_date = base_date
-    
-    while current_date <= effective_end_date:
-        dates.append(current_date)
-        
-        if recurring_pattern == RecurringPattern.DAILY:
-            current_date += timedelta(days=recurring_interval)
-        elif recurring_pattern == RecurringPattern.WEEKLY or recurring_pattern == RecurringPattern.CUSTOM:
-            # CUSTOM is treated as weekly with custom interval
-            current_date += timedelta(weeks=recurring_interval)
-        elif recurring_pattern == RecurringPattern.MONTHLY:
-            # Simple monthly increment
-            year = current_date.year
-            month = current_date.month + recurring_interval
-            if month > 12:
-                year += 1
-                month -= 12
-            try:
-                current_date = current_date.replace(year=year, month=month)
-            except ValueError:
-                current_date = current_date.replace(year=year, month=month, day=1) - timedelta(days=1)
+    start_time = None
+    end_time = None
+    if not data.get('is_full_day', False):
+        start_time = datetime.strptime(data.get('start_time'), '%H:%M').time() if data.get('start_time') else None
+        end_time = datetime.strptime(data.get('end_time'), '%H:%M').time() if data.get('end_time') else None
+    
+    # The rule is stored once and expanded when availability is read (Unavailability.occurrences)
+    rule = Unavailability(
+        user_id=user.id,
+        unit_id=unit_id,
+        date=base_date,
+        start_time=start_time,
+        end_time=end_time,
+        is_full_day=data.get('is_full_day', False),
+        recurring_pattern=recurring_pattern,
+        recurring_end_date=effective_end_date,
+        recurring_interval=recurring_interval,
+        reason=data.get('reason')
+    )
+    dates = rule.get_recurring_dates() if base_date <= effective_end_date else []
     
-    # Create unavailability records for each date
+    # A rule anchored on a date that already has this exact slot takes that entry's place
     created_count = 0
-    for date in dates:
-        # Parse time data for this iteration
-        start_time = None
-        end_time = None
-        if not data.get('is_full_day', False):
-            start_time = datetime.strptime(data.get('start_time'), '%H:%M').time() if data.get('start_time') else None
-            end_time = datetime.strptime(data.get('end_time'), '%H:%M').time() if data.get('end_time') else None
-        
-        # Check if unavailability already exists for this date and time combination
+    if dates:
         existing = Unavailability.query.filter_by(
             user_id=user.id,
             unit_id=unit_id,
-            date=date,
+            date=base_date,
             start_time=start_time,
             end_time=end_time
         ).first()
-        
-        if not existing:
-            unavailability = Unavailability(
-                user_id=user.id,
-                unit_id=unit_id,
-                date=date,
-                start_time=start_time,
-                end_time=end_time,
-                is_full_day=data.get('is_full_day', False),
-                recurring_pattern=recurring_pattern,
-                recurring_end_date=recurring_end_date,
-                recurring_interval=recurring_interval,
-                reason=data.get('reason')
-            )
-            db.session.add(unavailability)
-            created_count += 1
+        if existing and existing.is_recurring:
+            return jsonify({"error": "A recurring unavailability already starts on this date and time"}), 409
+        if existing:
+            db.session.delete(existing)
+            db.session.flush()
+        db.session.add(rule)
+        created_count = 1
     
     # Mark availability as configured since facilitator is setting unavailability
     unit_facilitator = UnitFacilitator.query.filter_by(
@@ -1151,9 +1246,10 @@ def generate_recurring_unavailability():
     db.session.commit()
     
     response_data = {
-        "message": f"Created {created_count} recurring unavailability entries",
+        "message": f"Created recurring unavailability covering {len(dates)} dates",
         "total_dates": len(dates),
-        "created_count": created_count
+        "created_count": created_count,
+        "rule_id": rule.id if created_count else None
     }
     
     # Add warning message if end date was adjusted
@@ -1581,46 +1677,81 @@ def get_swap_requests():
     })
 
 
-def check_facilitator_availability(facilitator_id, session_date, session_start_time, session_end_time, unit_id):
-    """Check if a facilitator is available for a specific session time."""
-    
-    # Check for unavailability conflicts
-    unavailability_conflict = Unavailability.query.filter(
-        Unavailability.user_id == facilitator_id,
-        Unavailability.unit_id == unit_id,
-        Unavailability.date == session_date,
-        db.or_(
-            Unavailability.is_full_day == True,
-            db.and_(
-                Unavailability.start_time <= session_start_time,
-                Unavailability.end_time >= session_end_time
+# Availability statuses of a swap candidate, in order of precedence
+CANDIDATE_UNAVAILABLE = 'unavailable'
+CANDIDATE_DOUBLE_BOOKED = 'double_booked'
+CANDIDATE_NO_INTEREST = 'no_interest'
+CANDIDATE_FREE = 'free'
+
+CANDIDATE_REASONS = {
+    CANDIDATE_UNAVAILABLE: "Facilitator has marked unavailability for this time",
+    CANDIDATE_DOUBLE_BOOKED: "Facilitator has conflicting session assignment",
+    CANDIDATE_NO_INTEREST: "Facilitator has no interest in this module",
+    CANDIDATE_FREE: "Available",
+}
+
+
+def candidate_availability(facilitator_ids, start, end, unit_id, module_id=None):
+    """
+    {facilitator_id: (status, skill_level)} for covering a start..end session of the unit
+    
+    Answered for every candidate at once: unavailability from the unit's compiled bitmaps
+    (busy slots confirmed against the exact entry times), assignments overlapping
+    [start, end) in any unit with one query, and skills for module_id (when given) with one
+    more. Intervals overlap when each starts before the other ends, for unavailability and
+    assignments alike, so sessions containing or inside the window count too. The status is the
+    first of unavailable, double_booked, no_interest that applies, otherwise free;
+    skill_level is the SkillLevel for the module or None.
+    """
+    facilitator_ids = list(facilitator_ids)
+    if not facilitator_ids:
+        return {}
+    
+    free = set(AVAILABILITY_CACHE.unit(unit_id).free_between(facilitator_ids, start, end))
+    booked = {
+        facilitator_id for (facilitator_id,) in (
+            db.session.query(Assignment.facilitator_id)
+            .join(Session, Session.id == Assignment.session_id)
+            .filter(
+                Assignment.facilitator_id.in_(facilitator_ids),
+                Session.start_time < end,
+                Session.end_time > start
             )
+            .distinct()
         )
-    ).first()
-    
-    if unavailability_conflict:
-        return False, "Facilitator has marked unavailability for this time"
-    
-    # Check for existing session assignments at the same time
-    conflicting_assignment = Assignment.query.join(Session).filter(
-        Assignment.facilitator_id == facilitator_id,
-        db.func.date(Session.start_time) == session_date,
-        db.or_(
-            db.and_(
-                db.func.time(Session.start_time) <= session_start_time,
-                db.func.time(Session.end_time) > session_start_time
-            ),
-            db.and_(
-                db.func.time(Session.start_time) < session_end_time,
-                db.func.time(Session.end_time) >= session_end_time
-            )
+    }
+    skills = {}
+    if module_id is not None:
+        skills = dict(
+            db.session.query(FacilitatorSkill.facilitator_id, FacilitatorSkill.skill_level)
+            .filter(FacilitatorSkill.module_id == module_id, FacilitatorSkill.facilitator_id.in_(facilitator_ids))
         )
-    ).first()
     
-    if conflicting_assignment:
-        return False, "Facilitator has conflicting session assignment"
+    statuses = {}
+    for facilitator_id in facilitator_ids:
+        skill_level = skills.get(facilitator_id)
+        if facilitator_id not in free:
+            status = CANDIDATE_UNAVAILABLE
+        elif facilitator_id in booked:
+            status = CANDIDATE_DOUBLE_BOOKED
+        elif skill_level == SkillLevel.NO_INTEREST:
+            status = CANDIDATE_NO_INTEREST
+        else:
+            status = CANDIDATE_FREE
+        statuses[facilitator_id] = (status, skill_level)
+    return statuses
+
+
+def check_facilitator_availability(facilitator_id, session_date, session_start_time, session_end_time, unit_id):
+    """Check if a facilitator is available for a specific session time."""
+    start = datetime.combine(session_date, session_start_time)
+    end = datetime.combine(session_date, session_end_time)
+    if end <= start:
+        # A session ending at or after midnight
+        end += timedelta(days=1)
     
-    return True, "Available"
+    status, _ = candidate_availability([facilitator_id], start, end, unit_id)[facilitator_id]
+    return status == CANDIDATE_FREE, CANDIDATE_REASONS[status]
 
 
 @facilitator_bp.route('/swap-requests/<int:request_id>/facilitator-response', methods=['POST'])
@@ -1741,48 +1872,36 @@ def get_available_facilitators():
         .all()
     )
     
+    # Every candidate's status and skill from the oracle, independent of team size
+    statuses = candidate_availability(
+        [facilitator.id for facilitator in unit_facilitators],
+        session.start_time, session.end_time, unit.id, module.id
+    )
+    
     available_facilitators = []
     
     for facilitator in unit_facilitators:
-        # Check availability for the session time
-        is_available, reason = check_facilitator_availability(
-            facilitator.id,
-            session.start_time.date(),
-            session.start_time.time(),
-            session.end_time.time(),
-            unit.id
-        )
-        
-        # Check if facilitator has required skills for this module
-        has_skills = True
-        skill_level = "No skills recorded"
-        
-        facilitator_skill = FacilitatorSkill.query.filter_by(
-            facilitator_id=facilitator.id,
-            module_id=module.id
-        ).first()
-        
-        if facilitator_skill:
-            skill_level = facilitator_skill.skill_level.value.replace('_', ' ').title()
-            # Only include facilitators with some level of skill (not "no_interest")
-            if facilitator_skill.skill_level.value == 'no_interest':
-                has_skills = False
+        status, facilitator_skill = statuses[facilitator.id]
+        skill_level = facilitator_skill.value.replace('_', ' ').title() if facilitator_skill else "No skills recorded"
         
-        if is_available and has_skills:
+        if status == CANDIDATE_FREE:
             available_facilitators.append({
                 'id': facilitator.id,
                 'name': facilitator.full_name,
                 'email': facilitator.email,
                 'skill_level': skill_level,
-                'reason': 'Available'
+                'status': status,
+                'reason': CANDIDATE_REASONS[status]
             })
-        elif not is_available:
+        elif status != CANDIDATE_NO_INTEREST:
+            # Only facilitators with some level of skill (not "no_interest") are offered
             available_facilitators.append({
                 'id': facilitator.id,
                 'name': facilitator.full_name,
                 'email': facilitator.email,
                 'skill_level': skill_level,
-                'reason': reason,
+                'status': status,
+                'reason': CANDIDATE_REASONS[status],
                 'available': False
             })
     
@@ -1816,32 +1935,32 @@ def list_unavailability():
     if unit_id:
         q = q.filter(Unavailability.unit_id == unit_id)
     try:
-        if start:
-            start_d = datetime.strptime(start, "%Y-%m-%d").date()
-            q = q.filter(Unavailability.date >= start_d)
-        if end:
-            end_d = datetime.strptime(end, "%Y-%m-%d").date()
-            q = q.filter(Unavailability.date <= end_d)
+        start_d = datetime.strptime(start, "%Y-%m-%d").date() if start else None
+        end_d = datetime.strptime(end, "%Y-%m-%d").date() if end else None
     except ValueError:
         return jsonify({"ok": False, "error": "Invalid date format; use YYYY-MM-DD"}), 400
+    q = q.filter(Unavailability.covering(start_d, end_d))
 
-    rows = q.order_by(Unavailability.date.asc(), Unavailability.start_time.asc().nulls_first()).all()
+    rows = q.all()
+    rules = {u.id: u for u in rows}
 
-    def serialize(u):
+    def serialize(o):
+        u = rules[o.unavailability_id]
         return {
             "id": u.id,
             "unit_id": u.unit_id,
-            "date": u.date.isoformat(),
-            "is_full_day": bool(u.is_full_day),
-            "start_time": u.start_time.isoformat() if u.start_time else None,
-            "end_time": u.end_time.isoformat() if u.end_time else None,
+            "date": o.date.isoformat(),
+            "is_full_day": o.is_full_day,
+            "start_time": o.start_time.isoformat() if o.start_time else None,
+            "end_time": o.end_time.isoformat() if o.end_time else None,
             "recurring_pattern": u.recurring_pattern.value if u.recurring_pattern else None,
             "recurring_interval": u.recurring_interval,
             "recurring_end_date": u.recurring_end_date.isoformat() if u.recurring_end_date else None,
             "reason": u.reason or "",
         }
 
-    return jsonify({"ok": True, "items": [serialize(r) for r in rows]})
+    # Recurring rules are expanded into one item per date in the range
+    return jsonify({"ok": True, "items": [serialize(o) for o in expand_unavailability(rows, start_d, end_d)]})
 
 
 def _parse_hhmm(val: str):
@@ -0,0 +1,403 @@
+"""
+Background jobs for long-running coordinator actions (auto-assign)
+
+A job is an AutoAssignJob row plus a callable that runs on a small thread pool inside
+the process that accepted the request. Status and progress live only in the row, so
+any worker process can answer a poll for a job another process is running.
+
+The job callable stages its database writes in db.session and returns; the runner then
+records the outcome on the job row and commits both together, so a job's results appear
+all at once or not at all. The outcome is written only if the row is still RUNNING and
+not flagged for cancelling; otherwise the staged results are dropped. Progress writes happen while the solver runs, before anything
+has been staged, so they never publish part of a result.
+
+Every solver event is also kept in an in-process JobEventLog so a live stream served by
+the same process can relay events as they happen. Cancelling sets a flag on the row
+(seen by the running process at its next progress write) and, in the running process,
+the log's CancellationToken, which the solver checks between sessions. A cancelled job
+discards whatever it staged.
+
+A process that dies (deploy, OOM kill) cannot finish its jobs' rows, so each runner keeps
+a heartbeat on the rows it owns: progress writes and a background thread refresh
+updated_at. An unfinished row whose heartbeat has gone stale, and that no runner in this
+process owns, is orphaned; close_orphaned() finishes it so the unit is not blocked.
+"""
+
+import json
+import logging
+import threading
+import time as timer
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from models import db, AutoAssignJob, JobStatus
+from optimization_engine import CancellationToken, warm_solver_pool
+
+logger = logging.getLogger(__name__)
+
+# Worker threads per process (app.config['AUTO_ASSIGN_JOB_WORKERS'] overrides; 0 runs jobs inline)
+DEFAULT_WORKERS = 2
+
+# Minimum seconds between progress writes; phase changes are written straight away
+PROGRESS_INTERVAL = 0.5
+
+# Events kept per job for live streams, and how long a finished job's log is kept
+EVENT_BUFFER = 2000
+EVENT_LOG_RETENTION = 300
+
+# Seconds between heartbeats on the rows of a runner's jobs, and without one before an
+# unfinished job counts as orphaned (app.config['AUTO_ASSIGN_JOB_STALE_SECONDS'] overrides)
+HEARTBEAT_INTERVAL = 30
+STALE_AFTER = 120
+
+
+def new_job_id():
+    return uuid.uuid4().hex
+
+
+class JobEventLog:
+    """
+    Bounded, sequence-numbered log of one job's events in the process running it
+
+    publish() is called on the job's thread; any number of readers wait in since().
+    """
+
+    def __init__(self, maxlen=EVENT_BUFFER):
+        self.events = deque(maxlen=maxlen)
+        self.seq = 0
+        self.closed_at = None
+        self.cancelled = CancellationToken()
+        self._condition = threading.Condition()
+
+    def publish(self, event):
+        with self._condition:
+            self.seq += 1
+            self.events.append((self.seq, event))
+            self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            self.closed_at = timer.monotonic()
+            self._condition.notify_all()
+
+    @property
+    def closed(self):
+        return self.closed_at is not None
+
+    def since(self, seq, timeout=None):
+        """
+        Wait up to timeout seconds for events after seq
+        Returns ([(seq, event), ...], closed); events that fell out of the buffer are skipped
+        """
+        with self._condition:
+            if self.seq <= seq and not self.closed:
+                self._condition.wait(timeout)
+            return [entry for entry in self.events if entry[0] > seq], self.closed
+
+
+class JobProgress:
+    """
+    Solver listener (see generate_optimal_assignments) that copies progress onto a job row
+
+    'phase' events are written immediately, 'session' and 'objective' events at most
+    once per interval seconds. Writing commits db.session, so nothing is written once the
+    job has staged changes of its own; send the last event before staging (the saving
+    phase in _run_auto_assign) so it still reaches the row.
+    
+    Every event is also published to the job's JobEventLog. cancel_token (the log's, when
+    there is one) is cancelled as soon as a write finds the row's cancel flag set; pass it
+    to the solver so the job stops at its next check.
+    """
+
+    def __init__(self, job, log=None, interval=PROGRESS_INTERVAL):
+        self.job = job
+        self.log = log
+        self.interval = interval
+        self.cancel_token = log.cancelled if log is not None else CancellationToken()
+        self._written = timer.perf_counter()
+
+    def __call__(self, event):
+        if self.log is not None:
+            self.log.publish(event)
+        kind = event.get('event')
+        if kind == 'phase':
+            self.job.phase = event['phase']
+            if event.get('sessions_total') is not None:
+                self.job.sessions_total = event['sessions_total']
+            self.flush()
+            return
+        if kind == 'session':
+            self.job.sessions_processed = event['sessions_processed']
+            self.job.sessions_total = event['sessions_total']
+        elif kind == 'objective':
+            self.job.objective = event['objective']
+        else:
+            return
+        if timer.perf_counter() - self._written >= self.interval:
+            self.flush()
+
+    def flush(self):
+        session = db.session
+        # A cancel request may come from another process, so ask the row itself
+        # (without autoflush, which would hide staged changes from the check below)
+        with session.no_autoflush:
+            cancelled = session.query(AutoAssignJob.cancel_requested).filter_by(id=self.job.id).scalar()
+        if cancelled:
+            # Nothing more is written for a cancelled job; the runner rolls back and closes it
+            self.cancel_token.cancel()
+            return
+        if session.new or session.deleted or any(obj is not self.job for obj in session.dirty):
+            # The job has started staging its results; progress now goes out with them
+            return
+        # Written even when nothing else changed: updated_at is the job's heartbeat
+        self.job.updated_at = datetime.utcnow()
+        session.commit()
+        self._written = timer.perf_counter()
+
+
+class JobRunner:
+    """
+    Local worker pool for AutoAssignJob rows
+
+    submit() must be called inside an app context; each job runs in its own app context
+    on a pool thread. The pool is created on first use with
+    app.config['AUTO_ASSIGN_JOB_WORKERS'] threads (default DEFAULT_WORKERS); with 0
+    workers jobs run inline in submit(), which is handy for tests and debugging.
+    
+    While the pool has jobs queued or running, a heartbeat thread refreshes their rows'
+    updated_at every HEARTBEAT_INTERVAL seconds, so a live job never looks orphaned
+    however long the solver stays quiet.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._logs = {}
+        self._live = {}  # job_id -> app, for jobs queued or running on the pool
+        self._heartbeat = None
+        self._stopping = threading.Event()
+
+    def events(self, job_id):
+        """The JobEventLog of a job submitted in this process, or None"""
+        with self._lock:
+            return self._logs.get(job_id)
+
+    def owns(self, job_id):
+        """True if the job was submitted in this process and has not finished yet"""
+        log = self.events(job_id)
+        return log is not None and not log.closed
+
+    def is_orphaned(self, job, now=None):
+        """True if the job is unfinished, not run by this process and its heartbeat is stale"""
+        if job.is_finished or self.owns(job.id):
+            return False
+        stale_after = current_app.config.get('AUTO_ASSIGN_JOB_STALE_SECONDS', STALE_AFTER)
+        heartbeat = job.updated_at or job.created_at
+        return heartbeat is None or heartbeat < (now or datetime.utcnow()) - timedelta(seconds=stale_after)
+
+    def close_orphaned(self, job, cancelled=False):
+        """
+        Finish an orphaned job and commit: CANCELLED if cancelled (or a cancel was already
+        requested), FAILED otherwise. The cancel flag is set as well, so a runner that was
+        only slow stops at its next progress write, or finds the row closed when it
+        finishes, and discards its work.
+        """
+        logger.warning(f"Job {job.id} has no live runner (last heartbeat {job.updated_at}); closing it")
+        if cancelled or job.cancel_requested:
+            job.cancel_requested = True
+            self._finish_cancelled(job)
+            return
+        job.cancel_requested = True
+        job.status = JobStatus.FAILED
+        job.phase = 'failed'
+        job.error = "The server running this job stopped before it finished; the previous schedule is unchanged"
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+    def cancel(self, job_id):
+        """Stop a job running in this process at its solver's next check (the row flag covers the rest)"""
+        log = self.events(job_id)
+        if log is not None:
+            log.cancelled.cancel()
+        return log is not None
+
+    def _register(self, job_id):
+        now = timer.monotonic()
+        with self._lock:
+            for stale in [key for key, log in self._logs.items()
+                          if log.closed and now - log.closed_at > EVENT_LOG_RETENTION]:
+                del self._logs[stale]
+            log = self._logs[job_id] = JobEventLog()
+        return log
+
+    def _workers(self, app):
+        if self.max_workers is not None:
+            return self.max_workers
+        return app.config.get('AUTO_ASSIGN_JOB_WORKERS', DEFAULT_WORKERS)
+
+    def submit(self, job_id, target, *args):
+        """
+        Run target(job, progress, *args) for the job row job_id
+
+        target stages its writes in db.session and returns (result, ok); result must be
+        JSON-serialisable. Returns a concurrent.futures.Future that resolves once the
+        job row holds the final status.
+        """
+        app = current_app._get_current_object()
+        workers = self._workers(app)
+        log = self._register(job_id)
+        if workers <= 0:
+            future = Future()
+            self._run(app, job_id, target, args, log)
+            future.set_result(job_id)
+            return future
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='auto-assign-job')
+                # Multi-start and decomposed solves fork from it; ready before they need it
+                warm_solver_pool()
+            self._live[job_id] = app
+            if self._heartbeat is None:
+                self._stopping.clear()
+                self._heartbeat = threading.Thread(target=self._beat, name='auto-assign-heartbeat', daemon=True)
+                self._heartbeat.start()
+        return self._executor.submit(self._run, app, job_id, target, args, log)
+
+    def _run(self, app, job_id, target, args, log):
+        with app.app_context():
+            try:
+                self._execute(job_id, target, args, log)
+            finally:
+                log.close()
+                db.session.remove()
+                with self._lock:
+                    self._live.pop(job_id, None)
+        return job_id
+
+    def _beat(self):
+        """Heartbeat thread: refresh updated_at on the rows of this pool's unfinished jobs"""
+        while not self._stopping.wait(HEARTBEAT_INTERVAL):
+            with self._lock:
+                by_app = {}
+                for job_id, app in self._live.items():
+                    by_app.setdefault(app, []).append(job_id)
+            for app, job_ids in by_app.items():
+                with app.app_context():
+                    try:
+                        AutoAssignJob.query.filter(
+                            AutoAssignJob.id.in_(job_ids),
+                            AutoAssignJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING])
+                        ).update({AutoAssignJob.updated_at: datetime.utcnow()}, synchronize_session=False)
+                        db.session.commit()
+                    except Exception:
+                        # A job holding the write lock just delays the beat; the next one retries
+                        db.session.rollback()
+                        logger.exception("Could not write the auto-assign job heartbeat")
+                    finally:
+                        db.session.remove()
+
+    def _execute(self, job_id, target, args, log):
+        job = db.session.get(AutoAssignJob, job_id)
+        if job is None:
+            logger.error(f"Job {job_id} disappeared before it started")
+            return
+        if job.is_finished:
+            # Closed as orphaned while it waited for a worker
+            return
+        if job.cancel_requested or log.cancelled.cancelled:
+            self._finish_cancelled(job)
+            return
+        job.status = JobStatus.RUNNING
+        job.phase = 'starting'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+        log.publish({'event': 'phase', 'phase': 'starting'})
+
+        try:
+            progress = JobProgress(job, log)
+            result, ok = target(job, progress, *args)
+            if progress.cancel_token.cancelled:
+                # Whatever the target staged after (or despite) being cancelled is dropped
+                db.session.rollback()
+                logger.info(f"Job {job_id} cancelled")
+                self._finish_cancelled(db.session.get(AutoAssignJob, job_id), result)
+                return
+            if not ok:
+                # Nothing staged by a failed run may reach the database
+                db.session.rollback()
+            finished = self._claim_finish(
+                job_id,
+                status=JobStatus.SUCCEEDED if ok else JobStatus.FAILED,
+                phase='done' if ok else 'failed',
+                result=json.dumps(result, default=str),
+                error=None if ok else result.get('error'),
+                finished_at=datetime.utcnow()
+            )
+            if not finished:
+                # Cancelled from another process after the last progress write, or closed
+                # as orphaned: the staged schedule is dropped with the status
+                db.session.rollback()
+                job = db.session.get(AutoAssignJob, job_id)
+                if not job.is_finished:
+                    logger.info(f"Job {job_id} cancelled while saving")
+                    self._finish_cancelled(job, result)
+                return
+            # One commit for the job's own writes and its final status
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.exception(f"Job {job_id} failed")
+            job = db.session.get(AutoAssignJob, job_id)
+            if job.is_finished:
+                return
+            job.status = JobStatus.FAILED
+            job.phase = 'failed'
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+
+    @staticmethod
+    def _claim_finish(job_id, **values):
+        """
+        Write the final values onto the job row, in the transaction holding its staged
+        writes, only if it is still RUNNING without a cancel request; False if it is not
+        
+        A conditional UPDATE rather than the loaded row: a cancel accepted by another
+        process, or close_orphaned(), may have changed the row since the last progress write.
+        """
+        claimed = AutoAssignJob.query.filter(
+            AutoAssignJob.id == job_id,
+            AutoAssignJob.status == JobStatus.RUNNING,
+            AutoAssignJob.cancel_requested.is_(False)
+        ).update(values, synchronize_session=False)
+        return claimed == 1
+
+    @staticmethod
+    def _finish_cancelled(job, result=None):
+        """Close a cancelled job; result (what the stopped run returned) is kept for reference"""
+        job.status = JobStatus.CANCELLED
+        if result is not None:
+            job.result = json.dumps(result, default=str)
+        job.phase = 'cancelled'
+        job.error = "Cancelled before the schedule was saved; the previous schedule is unchanged"
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+    def shutdown(self, wait=True):
+        # Waited for outside the lock: finishing jobs take it to leave _live
+        with self._lock:
+            executor, self._executor = self._executor, None
+            heartbeat, self._heartbeat = self._heartbeat, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+        self._stopping.set()
+        if heartbeat is not None and wait:
+            heartbeat.join()
+
+
+JOB_RUNNER = JobRunner()
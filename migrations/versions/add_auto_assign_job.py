@@ -0,0 +1,47 @@
+"""Add auto_assign_job table for background auto-assign runs
+
+Revision ID: add_auto_assign_job
+Revises: add_schedule_state_fields
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_auto_assign_job'
+down_revision = 'add_schedule_state_fields'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'auto_assign_job',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('unit_id', sa.Integer(), nullable=False),
+        sa.Column('created_by', sa.Integer(), nullable=False),
+        sa.Column('status', sa.Enum('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', name='jobstatus'), nullable=False, server_default='QUEUED'),
+        sa.Column('options', sa.Text(), nullable=True),
+        sa.Column('phase', sa.String(length=20), nullable=False, server_default='queued'),
+        sa.Column('sessions_processed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sessions_total', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('objective', sa.Float(), nullable=True),
+        sa.Column('result', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['unit_id'], ['unit.id']),
+        sa.ForeignKeyConstraint(['created_by'], ['user.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_auto_assign_job_unit_id', 'auto_assign_job', ['unit_id'])
+
+
+def downgrade():
+    op.drop_index('ix_auto_assign_job_unit_id', table_name='auto_assign_job')
+    op.drop_table('auto_assign_job')
+    op.execute("DROP TYPE IF EXISTS jobstatus")
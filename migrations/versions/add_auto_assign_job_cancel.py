@@ -0,0 +1,27 @@
+"""Add cancellation to auto_assign_job
+
+Revision ID: add_auto_assign_job_cancel
+Revises: add_auto_assign_job
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_auto_assign_job_cancel'
+down_revision = 'add_auto_assign_job'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("ALTER TYPE jobstatus ADD VALUE IF NOT EXISTS 'CANCELLED'")
+    op.add_column('auto_assign_job', sa.Column('cancel_requested', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade():
+    # PostgreSQL cannot drop an enum value; CANCELLED stays in the jobstatus type
+    op.drop_column('auto_assign_job', 'cancel_requested')
@@ -0,0 +1,25 @@
+"""Add updated_at to unavailability_exception
+
+Revision ID: add_unavailability_exception_updated_at
+Revises: add_unavailability_rules
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_unavailability_exception_updated_at'
+down_revision = 'add_unavailability_rules'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('unavailability_exception', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE unavailability_exception SET updated_at = created_at")
+
+
+def downgrade():
+    op.drop_column('unavailability_exception', 'updated_at')
@@ -0,0 +1,162 @@
+"""Store recurring unavailability as one rule row with per-date exceptions
+
+Revision ID: add_unavailability_rules
+Revises: add_auto_assign_job_cancel
+Create Date: 2026-10-17
+
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_unavailability_rules'
+down_revision = 'add_auto_assign_job_cancel'
+branch_labels = None
+depends_on = None
+
+
+unavailability = sa.table(
+    'unavailability',
+    sa.column('id', sa.Integer), sa.column('user_id', sa.Integer), sa.column('unit_id', sa.Integer),
+    sa.column('date', sa.Date), sa.column('start_time', sa.Time), sa.column('end_time', sa.Time),
+    sa.column('is_full_day', sa.Boolean), sa.column('recurring_pattern', sa.String),
+    sa.column('recurring_end_date', sa.Date), sa.column('recurring_interval', sa.Integer),
+    sa.column('reason', sa.Text), sa.column('created_at', sa.DateTime), sa.column('updated_at', sa.DateTime)
+)
+exception = sa.table(
+    'unavailability_exception',
+    sa.column('unavailability_id', sa.Integer), sa.column('date', sa.Date), sa.column('is_removed', sa.Boolean),
+    sa.column('start_time', sa.Time), sa.column('end_time', sa.Time), sa.column('is_full_day', sa.Boolean)
+)
+
+
+def _recurring_dates(anchor, pattern, interval, until):
+    """
+    Every date of a rule (pattern is the stored name: DAILY, WEEKLY, MONTHLY or CUSTOM),
+    frozen here as the app expanded rules when this migration was written
+    """
+    interval = max(1, interval or 1)
+    last = until if until is not None and until > anchor else anchor
+    if pattern is None or until is None:
+        last = anchor
+    if pattern == 'MONTHLY':
+        dates = []
+        current = anchor
+        while current <= last:
+            dates.append(current)
+            year, month = divmod(current.month - 1 + interval, 12)
+            year, month = current.year + year, month + 1
+            try:
+                current = current.replace(year=year, month=month)
+            except ValueError:
+                # A day the month does not have is clamped to its last day
+                current = datetime(year + month // 12, month % 12 + 1, 1).date() - timedelta(days=1)
+        return dates
+    step = interval if pattern == 'DAILY' else 7 * interval
+    return [anchor + timedelta(days=step * k) for k in range((last - anchor).days // step + 1)]
+
+
+def upgrade():
+    op.create_table(
+        'unavailability_exception',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('unavailability_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('is_removed', sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column('start_time', sa.Time(), nullable=True),
+        sa.Column('end_time', sa.Time(), nullable=True),
+        sa.Column('is_full_day', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['unavailability_id'], ['unavailability.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('unavailability_id', 'date', name='uq_unavailability_exception_date')
+    )
+
+    # Collapse the row-per-occurrence series written by the old generator into rules. Each
+    # series keeps its first row as the rule, ending on its last remaining date; dates the
+    # rule would produce but that have no row (deleted occurrences) become exceptions, so
+    # the effective calendar is unchanged.
+    bind = op.get_bind()
+    series = {}
+    rows = bind.execute(
+        sa.select(unavailability).where(unavailability.c.recurring_pattern.isnot(None)).order_by(unavailability.c.date)
+    )
+    for row in rows:
+        key = (row.user_id, row.unit_id, row.start_time, row.end_time, bool(row.is_full_day),
+               row.recurring_pattern, row.recurring_interval, row.recurring_end_date)
+        series.setdefault(key, []).append(row)
+
+    for key, members in series.items():
+        while members:
+            rule = members[0]
+            lattice = set(_recurring_dates(rule.date, rule.recurring_pattern, rule.recurring_interval,
+                                           rule.recurring_end_date))
+            absorbed = [m for m in members if m.date in lattice]
+            members = [m for m in members if m.date not in lattice]
+            last = max(m.date for m in absorbed)
+            present = {m.date for m in absorbed}
+            missing = [day for day in lattice if day <= last and day not in present]
+
+            bind.execute(unavailability.update().where(unavailability.c.id == rule.id)
+                         .values(recurring_end_date=last))
+            duplicates = [m.id for m in absorbed if m.id != rule.id]
+            if duplicates:
+                bind.execute(unavailability.delete().where(unavailability.c.id.in_(duplicates)))
+            if missing:
+                bind.execute(exception.insert(), [
+                    {'unavailability_id': rule.id, 'date': day, 'is_removed': True} for day in sorted(missing)
+                ])
+
+
+def downgrade():
+    # The old code reads every row as a single date, so each rule goes back to one row per
+    # occurrence: removed occurrences are left out and re-timed ones keep their own window.
+    # The rule row becomes its first remaining occurrence; an occurrence whose slot another
+    # row already holds is not duplicated.
+    bind = op.get_bind()
+    rows = bind.execute(sa.select(unavailability)).all()
+    taken = {(r.user_id, r.unit_id, r.date, r.start_time, r.end_time) for r in rows}
+    overrides = {}
+    for e in bind.execute(sa.select(exception)):
+        overrides.setdefault(e.unavailability_id, {})[e.date] = e
+
+    for rule in rows:
+        if rule.recurring_pattern is None:
+            continue
+        taken.discard((rule.user_id, rule.unit_id, rule.date, rule.start_time, rule.end_time))
+        occurrences = []
+        for day in _recurring_dates(rule.date, rule.recurring_pattern, rule.recurring_interval, rule.recurring_end_date):
+            override = overrides.get(rule.id, {}).get(day)
+            if override is not None and override.is_removed:
+                continue
+            if override is not None:
+                window = (override.start_time, override.end_time, bool(override.is_full_day))
+            else:
+                window = (rule.start_time, rule.end_time, bool(rule.is_full_day))
+            slot = (rule.user_id, rule.unit_id, day, window[0], window[1])
+            if slot in taken:
+                continue
+            taken.add(slot)
+            occurrences.append({
+                'user_id': rule.user_id, 'unit_id': rule.unit_id, 'date': day,
+                'start_time': window[0], 'end_time': window[1], 'is_full_day': window[2],
+                'recurring_pattern': rule.recurring_pattern, 'recurring_end_date': rule.recurring_end_date,
+                'recurring_interval': rule.recurring_interval, 'reason': rule.reason,
+                'created_at': rule.created_at, 'updated_at': rule.updated_at
+            })
+
+        if not occurrences:
+            bind.execute(unavailability.delete().where(unavailability.c.id == rule.id))
+            continue
+        first, rest = occurrences[0], occurrences[1:]
+        bind.execute(unavailability.update().where(unavailability.c.id == rule.id).values(
+            date=first['date'], start_time=first['start_time'], end_time=first['end_time'],
+            is_full_day=first['is_full_day']
+        ))
+        if rest:
+            bind.execute(unavailability.insert(), rest)
+
+    op.drop_table('unavailability_exception')
@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from collections import namedtuple
 from datetime import datetime, timedelta
 from enum import Enum
 
@@ -39,6 +40,14 @@ class ScheduleStatus(Enum):
     PUBLISHED = "published"
     UNPUBLISHED = "unpublished"
 
+# Add enum for background job states
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
 # Add new models for units and modules
 class Unit(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -210,7 +219,62 @@ class UnitFacilitator(db.Model):
 
 # Availability model deprecated and removed. Use Unavailability entries (date-based blocks)
 
+def recurring_dates(anchor, pattern, interval, until, start=None, end=None):
+    """
+    Dates of a recurrence rule starting on anchor and ending on until (inclusive), limited
+    to the optional [start, end] window
+    
+    Daily and weekly (and CUSTOM, i.e. every `interval` weeks) rules jump straight to the
+    first date in the window. Monthly rules step month by month; a day missing from the
+    target month is clamped to its last day and the clamped day carries forward.
+    The anchor always occurs, even if until is before it.
+    """
+    interval = max(1, interval or 1)
+    last = until if until is not None and until > anchor else anchor
+    if end is not None:
+        last = min(last, end)
+    if pattern is None or until is None:
+        last = min(last, anchor)
+    
+    if pattern == RecurringPattern.MONTHLY and until is not None:
+        dates = []
+        current = anchor
+        while current <= last:
+            if start is None or current >= start:
+                dates.append(current)
+            year, month = divmod(current.month - 1 + interval, 12)
+            year, month = current.year + year, month + 1
+            try:
+                current = current.replace(year=year, month=month)
+            except ValueError:
+                next_month = datetime(year + month // 12, month % 12 + 1, 1).date()
+                current = next_month - timedelta(days=1)
+        return dates
+    
+    step = interval if pattern == RecurringPattern.DAILY else 7 * interval
+    first = 0
+    if start is not None and start > anchor:
+        first = -(-(start - anchor).days // step)
+    count = (last - anchor).days // step + 1 if last >= anchor else 0
+    return [anchor + timedelta(days=step * k) for k in range(first, count)]
+
+
+# One effective unavailable window of an Unavailability entry; the same attribute names as
+# the row, so readers can treat a plain entry and an expanded occurrence alike
+UnavailabilityOccurrence = namedtuple(
+    'UnavailabilityOccurrence',
+    'unavailability_id user_id unit_id date start_time end_time is_full_day reason'
+)
+
+
 class Unavailability(db.Model):
+    """
+    A date-based unavailable block, or a recurrence rule when recurring_pattern is set
+    
+    A rule is stored once (anchor date, pattern, interval, end date, time window) and
+    expanded lazily with occurrences(); UnavailabilityException rows remove or re-time
+    single occurrences.
+    """
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     unit_id = db.Column(db.Integer, db.ForeignKey('unit.id'), nullable=False)
@@ -228,6 +292,9 @@ class Unavailability(db.Model):
     # Relationships
     user = db.relationship('User', backref='unavailabilities')
     unit = db.relationship('Unit', backref='unavailabilities')
+    # Loaded with one extra query per Unavailability query, so expanding rules never goes row by row
+    exceptions = db.relationship('UnavailabilityException', backref='unavailability',
+                                 cascade='all, delete-orphan', lazy='selectin')
     
     # Constraints
     __table_args__ = (
@@ -245,37 +312,68 @@ class Unavailability(db.Model):
         """Check if this unavailability is part of a recurring pattern"""
         return self.recurring_pattern is not None
     
-    def get_recurring_dates(self):
-        """Generate all dates for this recurring unavailability pattern"""
+    def get_recurring_dates(self, start=None, end=None):
+        """Generate all dates for this recurring unavailability pattern, optionally only those in [start, end]"""
         if not self.is_recurring or not self.recurring_end_date:
-            return [self.date]
-        
-        dates = [self.date]
-        current_date = self.date
-        
-        while current_date < self.recurring_end_date:
-            if self.recurring_pattern == RecurringPattern.DAILY:
-                current_date = current_date + timedelta(days=self.recurring_interval)
-            elif self.recurring_pattern == RecurringPattern.WEEKLY or self.recurring_pattern == RecurringPattern.CUSTOM:
-                # CUSTOM is treated as weekly with custom interval
-                current_date = current_date + timedelta(weeks=self.recurring_interval)
-            elif self.recurring_pattern == RecurringPattern.MONTHLY:
-                # Simple monthly increment (doesn't handle month-end edge cases)
-                year = current_date.year
-                month = current_date.month + self.recurring_interval
-                if month > 12:
-                    year += 1
-                    month -= 12
-                try:
-                    current_date = current_date.replace(year=year, month=month)
-                except ValueError:
-                    # Handle month-end edge cases
-                    current_date = current_date.replace(year=year, month=month, day=1) - timedelta(days=1)
-            
-            if current_date <= self.recurring_end_date:
-                dates.append(current_date)
-        
-        return dates
+            return recurring_dates(self.date, None, 1, None, start, end)
+        return recurring_dates(self.date, self.recurring_pattern, self.recurring_interval,
+                               self.recurring_end_date, start, end)
+    
+    def occurrences(self, start=None, end=None):
+        """
+        The effective unavailable windows of this entry in [start, end] as
+        UnavailabilityOccurrence tuples, with the exceptions of a rule applied
+        """
+        overrides = {exception.date: exception for exception in self.exceptions} if self.is_recurring else {}
+        result = []
+        for day in self.get_recurring_dates(start, end):
+            window = overrides.get(day, self)
+            if window is not self and window.is_removed:
+                continue
+            result.append(UnavailabilityOccurrence(self.id, self.user_id, self.unit_id, day, window.start_time,
+                                                   window.end_time, bool(window.is_full_day), self.reason))
+        return result
+    
+    @classmethod
+    def covering(cls, start, end):
+        """Filter for entries that may have an occurrence between start and end (inclusive; None = open)"""
+        single = [cls.date >= start] if start is not None else []
+        rule = [cls.recurring_pattern.isnot(None)]
+        if start is not None:
+            rule.append(cls.recurring_end_date >= start)
+        if end is not None:
+            single.append(cls.date <= end)
+            rule.append(cls.date <= end)
+        return db.or_(db.and_(db.true(), *single), db.and_(*rule))
+
+
+def expand_unavailability(entries, start=None, end=None):
+    """Occurrences of many Unavailability entries in [start, end], sorted by date and time"""
+    occurrences = [occurrence for entry in entries for occurrence in entry.occurrences(start, end)]
+    occurrences.sort(key=lambda o: (o.date, o.start_time is not None, o.start_time or datetime.min.time()))
+    return occurrences
+
+
+class UnavailabilityException(db.Model):
+    """Per-date override of a recurring Unavailability: the occurrence is removed, or replaced by this window"""
+    __tablename__ = 'unavailability_exception'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    unavailability_id = db.Column(db.Integer, db.ForeignKey('unavailability.id', ondelete='CASCADE'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    is_removed = db.Column(db.Boolean, nullable=False, default=True)
+    start_time = db.Column(db.Time, nullable=True)
+    end_time = db.Column(db.Time, nullable=True)
+    is_full_day = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('unavailability_id', 'date', name='uq_unavailability_exception_date'),
+    )
+    
+    def __repr__(self):
+        return f'<UnavailabilityException {self.unavailability_id} {self.date} ({"removed" if self.is_removed else "moved"})>'
 
 class Assignment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -350,3 +448,55 @@ class Notification(db.Model):
     def __repr__(self):
         return f'<Notification {self.user.email} - {self.message[:20]}>'
 
+class AutoAssignJob(db.Model):
+    """
+    One background auto-assign run. The row is the only shared state, so any
+    worker process can answer status and progress polls for a job another one runs.
+    """
+    __tablename__ = "auto_assign_job"
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    unit_id = db.Column(db.Integer, db.ForeignKey('unit.id'), nullable=False, index=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    status = db.Column(db.Enum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    options = db.Column(db.Text, nullable=True)  # JSON string of the solver options
+    
+    # Progress, updated while the job runs
+    phase = db.Column(db.String(20), default='queued', nullable=False)
+    sessions_processed = db.Column(db.Integer, default=0, nullable=False)
+    sessions_total = db.Column(db.Integer, default=0, nullable=False)
+    objective = db.Column(db.Float, nullable=True)
+    cancel_requested = db.Column(db.Boolean, default=False, nullable=False)
+    
+    result = db.Column(db.Text, nullable=True)  # JSON string of the auto-assign response
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    unit = db.relationship('Unit', backref=db.backref('auto_assign_jobs', lazy=True, cascade='all, delete-orphan'))
+    creator = db.relationship('User', foreign_keys=[created_by])
+    
+    @property
+    def is_finished(self):
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED)
+    
+    def progress(self):
+        """Status and progress fields as a JSON-ready dict"""
+        return {
+            'job_id': self.id,
+            'unit_id': self.unit_id,
+            'status': self.status.value,
+            'phase': self.phase,
+            'sessions_processed': self.sessions_processed,
+            'sessions_total': self.sessions_total,
+            'objective': self.objective,
+            'cancel_requested': self.cancel_requested,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<AutoAssignJob {self.id} unit={self.unit_id} ({self.status.value}, {self.phase})>'
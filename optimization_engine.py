@@ -15,16 +15,86 @@ SOFT CONSTRAINTS (optimized for):
 """
 
 import csv
+import hashlib
 import io
+import json
+import multiprocessing
+import os
 import random
-from datetime import datetime, time
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+import time as timer
+from datetime import date, datetime, time, timedelta
+from enum import Enum
 from models import User, UserRole, FacilitatorSkill, SkillLevel, db
 
+# NumPy is optional: it is only needed for the vectorized scoring backend
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 # Tunable weights for scoring function
 W_AVAILABILITY = 0.4
 W_FAIRNESS = 0.4  # Increased fairness weight
 W_SKILL = 0.2     # Reduced skill weight to balance with fairness
 
+# Solver modes accepted by generate_optimal_assignments()
+SOLVER_MODES = ('greedy', 'assignment')
+
+# Scoring backends for the greedy pass accepted by generate_optimal_assignments()
+SCORING_BACKENDS = ('scalar', 'vectorized', 'compiled')
+
+# Upper bound on the local-search budget a request may ask for (seconds)
+MAX_IMPROVE_SECONDS = 30
+
+# Upper bound on the number of seeded solves a multi-start request may ask for
+MAX_STARTS = 16
+
+# Upper bound on the time limit an auto-assign request may ask for (seconds)
+MAX_TIME_LIMIT = 600
+
+# Local search budget used to rebalance hours after a decomposed solve (seconds)
+DEFAULT_REBALANCE_SECONDS = 1.0
+
+# How often a multi-start or decomposed solve checks its CancellationToken while worker
+# processes run (seconds)
+CANCEL_POLL_SECONDS = 0.05
+
+# Start method of the solver process pools. Solves start from job and request threads, and
+# forking a multithreaded process can copy locks held by other threads (logging, the
+# caches, the DB pool) into the child and deadlock it, so workers come from a forkserver
+# (spawn where there is none)
+POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# Granularity of the compiled availability bitmaps (minutes)
+AVAILABILITY_SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // AVAILABILITY_SLOT_MINUTES
+
+# Heat-maps memoised per compiled unit (distinct facilitator lists and date ranges)
+HEATMAP_MEMO_SIZE = 8
+
+# Bump when solver behaviour changes so fingerprints (and spilled cache files) from older code never match
+SOLVER_CACHE_VERSION = 3
+
+# Default churn penalty of a repair: the cost of handing one of the previous schedule's
+# slots to someone else, both when released slots are re-solved and in the LocalSearch
+# objective. Capped by MAX_CHURN_PENALTY below the unfilled-slot costs, so keeping
+# someone never beats filling a slot
+REPAIR_KEEP_BONUS = 1.0
+
+# Costs used by the assignment solver mode: leaving a lead slot empty must always be
+# worse than leaving a support slot empty, and both dominate skill/fairness costs
+UNFILLED_LEAD_COST = 1000.0
+UNFILLED_SUPPORT_COST = 100.0
+MAX_CHURN_PENALTY = UNFILLED_SUPPORT_COST / 2
+_INFEASIBLE_COST = 1e9
+
 # Skill level to score mapping (matches models.py SkillLevel enum)
 SKILL_SCORES = {
     SkillLevel.PROFICIENT: 1.0,
@@ -36,18 +106,27 @@ SKILL_SCORES = {
 def get_real_sessions(unit_id=None):
     """
     Get real sessions from database instead of dummy data
-    If unit_id is provided, only get sessions from that specific unit
+    If unit_id is provided, only get sessions from that specific unit (or, for a list
+    of ids, from those units)
+    Sessions come in id order, so a seeded solve sees the same order on every database
     """
     from models import Session, Module, Unit
+    from sqlalchemy.orm import contains_eager
     
     sessions_data = []
     
     # Query sessions from database, optionally filtered by unit
-    query = Session.query.join(Module).join(Unit)
-    if unit_id is not None:
+    # Module and unit are populated from the join so building module_name does not lazy-load per session
+    query = (
+        Session.query.join(Module).join(Unit)
+        .options(contains_eager(Session.module).contains_eager(Module.unit))
+    )
+    if isinstance(unit_id, (list, tuple, set, frozenset)):
+        query = query.filter(Unit.id.in_(unit_id))
+    elif unit_id is not None:
         query = query.filter(Unit.id == unit_id)
     
-    db_sessions = query.all()
+    db_sessions = query.order_by(Session.id).all()
     
     for session in db_sessions:
         # Calculate duration directly from datetime objects
@@ -56,6 +135,7 @@ def get_real_sessions(unit_id=None):
         sessions_data.append({
             'id': session.id,
             'module_id': session.module_id,  # Add module_id for skill matching
+            'unit_id': session.module.unit_id,  # Unit the unavailability lookup is scoped to
             'module_name': f"{session.module.unit.unit_code} - {session.module.module_name}",
             'day_of_week': session.day_of_week if session.day_of_week is not None else 0,
             'start_time': session.start_time.time(),
@@ -81,13 +161,17 @@ def prepare_facilitator_data(facilitators_from_db):
     Convert database facilitator objects to optimization-friendly format
     This function is called from the Flask route with database objects
     """
+    # Load every facilitator's skills in one query instead of lazy-loading them one facilitator at a time
+    skills_by_facilitator = {}
+    facilitator_ids = [facilitator.id for facilitator in facilitators_from_db if hasattr(facilitator, 'facilitator_skills')]
+    if facilitator_ids:
+        for skill in FacilitatorSkill.query.filter(FacilitatorSkill.facilitator_id.in_(facilitator_ids)).all():
+            skills_by_facilitator.setdefault(skill.facilitator_id, {})[skill.module_id] = skill.skill_level
+    
     facilitator_data = []
     for facilitator in facilitators_from_db:
         # Get facilitator skills
-        skills = {}
-        if hasattr(facilitator, 'facilitator_skills'):
-            for skill in facilitator.facilitator_skills:
-                skills[skill.module_id] = skill.skill_level
+        skills = dict(skills_by_facilitator.get(facilitator.id, {}))
         
         # Deprecated: slot-based weekly availability removed. Using unavailability model instead.
         availability = {}
@@ -104,14 +188,206 @@ def prepare_facilitator_data(facilitators_from_db):
     
     return facilitator_data
 
-def check_availability(facilitator, session):
+def restrict_to_member_units(facilitators, sessions, unit_ids_by_facilitator):
+    """
+    Copies of the facilitator dicts that can only take sessions of units they belong to
+    For co-solves over several units: modules of the other units are marked NO_INTEREST,
+    the hard constraint every solver path and index already honours.
+    unit_ids_by_facilitator maps facilitator id -> set of unit ids
+    """
+    modules_by_unit = {}
+    for session in sessions:
+        modules_by_unit.setdefault(session.get('unit_id'), set()).add(session.get('module_id'))
+    
+    restricted = []
+    for facilitator in facilitators:
+        member_of = unit_ids_by_facilitator.get(facilitator['id'], set())
+        skills = dict(facilitator.get('skills', {}))
+        for unit_id, module_ids in modules_by_unit.items():
+            if unit_id not in member_of:
+                skills.update((module_id, SkillLevel.NO_INTEREST) for module_id in module_ids)
+        restricted.append(dict(facilitator, skills=skills))
+    return restricted
+
+@contextmanager
+def count_queries(counter, key):
+    """
+    Count the SQL statements executed inside the block into counter[key]
+    Does nothing outside a Flask app context (e.g. pure in-memory solves)
+    """
+    from flask import has_app_context
+    
+    counter.setdefault(key, 0)
+    if not has_app_context():
+        yield counter
+        return
+    
+    from sqlalchemy import event
+    engine = db.engine
+    
+    def _on_execute(*args, **kwargs):
+        counter[key] += 1
+    
+    event.listen(engine, 'before_cursor_execute', _on_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', _on_execute)
+
+class ConstraintContext:
+    """
+    Preloaded, in-memory view of the data the hard constraints need for one solve
+    
+    Sessions and unavailability for the unit are bulk-loaded up front so that
+    availability checks during candidate evaluation never go back to the database.
+    The context holds only plain Python data so it can be built by hand in tests.
+    
+    Attributes:
+        sessions: Session dictionaries in the get_real_sessions() format
+        unavailability: {(user_id, unit_id, date): [(is_full_day, start_time, end_time), ...]}
+        busy: {user_id: [(start_datetime, end_datetime, location, session_id), ...]} fixed
+              commitments outside the solve (other units' assignments); a facilitator is
+              unavailable for any session overlapping one of them
+        busy_index: FacilitatorIntervalIndex over busy, for O(log n) overlap checks
+        stats: Query counters for the preload and the candidate evaluation phases
+        rejections: RejectionLog filled in by the last solve's candidate scan (None before a solve)
+    """
+    
+    def __init__(self, sessions, unavailability=None, busy=None):
+        self.sessions = sessions
+        self.unavailability = unavailability or {}
+        self.busy = busy or {}
+        self.busy_index = FacilitatorIntervalIndex()
+        for facilitator_id, intervals in self.busy.items():
+            for start, end, location, session_id in intervals:
+                self.busy_index.add(facilitator_id, start, end, location, session_id)
+        self.stats = {
+            'preload_queries': 0,
+            'candidate_queries': 0,
+            'candidate_evaluations': 0
+        }
+        self.rejections = None
+    
+    @classmethod
+    def load(cls, facilitators, unit_id=None, cross_unit=False):
+        """
+        Bulk-load sessions and unavailability for the given facilitators
+        If unit_id is None, sessions and unavailability from every unit are loaded; a list
+        of unit ids loads those units together (a co-solve)
+        
+        With cross_unit, the facilitators' assignments in every other unit are loaded in
+        the same pass (one query) as busy intervals, so nobody is double-booked across units
+        """
+        from models import Unavailability, Assignment, Session, Module
+        
+        unit_ids = None
+        if isinstance(unit_id, (list, tuple, set, frozenset)):
+            unit_ids = list(unit_id)
+        elif unit_id is not None:
+            unit_ids = [unit_id]
+        
+        counter = {}
+        with count_queries(counter, 'preload_queries'):
+            sessions = get_real_sessions(unit_id)
+            
+            unavailability = {}
+            busy = {}
+            facilitator_ids = [f['id'] for f in facilitators]
+            session_dates = [s['date'] for s in sessions if s.get('date')]
+            if facilitator_ids and session_dates:
+                # Recurring rules are expanded over the sessions' date range only
+                first_day, last_day = min(session_dates), max(session_dates)
+                query = Unavailability.query.filter(Unavailability.user_id.in_(facilitator_ids))
+                query = query.filter(Unavailability.covering(first_day, last_day))
+                if unit_ids is not None:
+                    query = query.filter(Unavailability.unit_id.in_(unit_ids))
+                
+                for entry in query.all():
+                    for occurrence in entry.occurrences(first_day, last_day):
+                        key = (entry.user_id, entry.unit_id, occurrence.date)
+                        unavailability.setdefault(key, []).append(
+                            (occurrence.is_full_day, occurrence.start_time, occurrence.end_time)
+                        )
+                
+                if cross_unit and unit_ids is not None:
+                    rows = (
+                        db.session.query(Assignment.facilitator_id, Session.id, Session.start_time,
+                                         Session.end_time, Session.location)
+                        .join(Session, Assignment.session_id == Session.id)
+                        .join(Module, Session.module_id == Module.id)
+                        .filter(Assignment.facilitator_id.in_(facilitator_ids))
+                        .filter(~Module.unit_id.in_(unit_ids))
+                    )
+                    for facilitator_id, session_id, start, end, location in rows:
+                        busy.setdefault(facilitator_id, []).append((start, end, location or 'TBA', session_id))
+        
+        context = cls(sessions, unavailability, busy)
+        context.stats['preload_queries'] = counter['preload_queries']
+        if cross_unit:
+            context.stats['busy_intervals'] = sum(len(intervals) for intervals in busy.values())
+        return context
+    
+    def is_available(self, facilitator_id, session):
+        """
+        Return 1.0 if the facilitator has no unavailability overlapping the session, 0.0 otherwise
+        Same rules as check_availability(), answered from the preloaded entries; busy
+        intervals from other units count as unavailability
+        """
+        if self.busy and self.busy_index.has_overlap(facilitator_id, session.get('start_datetime'), session.get('end_datetime')):
+            return 0.0
+        
+        session_date = session.get('date')
+        session_start_time = session.get('start_time')
+        session_end_time = session.get('end_time')
+        
+        if not session_date or not session_start_time or not session_end_time:
+            return 1.0
+        
+        entries = self.unavailability.get((facilitator_id, session.get('unit_id'), session_date))
+        if not entries:
+            return 1.0
+        
+        for is_full_day, unavail_start, unavail_end in entries:
+            if is_full_day:
+                return 0.0
+            if unavail_start and unavail_end:
+                if session_start_time < unavail_end and session_end_time > unavail_start:
+                    return 0.0
+        
+        return 1.0
+    
+    def busy_cells(self, sessions, column_of):
+        """
+        Yield (row, column) for every session in sessions that overlaps a busy interval of
+        the facilitator at column_of[facilitator id]
+        For the matrix backends, which only visit cells the unavailability map can clear
+        """
+        if not self.busy:
+            return
+        by_start = FacilitatorIntervalIndex()
+        for row, session in enumerate(sessions):
+            by_start.add(None, session.get('start_datetime'), session.get('end_datetime'), payload=row)
+        for facilitator_id in self.busy_index.facilitator_ids():
+            column = column_of.get(facilitator_id)
+            if column is None:
+                continue
+            for start, end, _, _ in self.busy_index.intervals(facilitator_id):
+                for entry in by_start.overlapping(None, start, end):
+                    yield entry[3], column
+
+def check_availability(facilitator, session, context=None):
     """
     Check if facilitator is available for the session time
     Returns 1.0 if available, 0.0 if not (hard constraint)
     Now properly checks database unavailability data
+    
+    If a ConstraintContext is given, the check is answered in memory without querying;
+    otherwise from the unit's cached availability bitmaps (AVAILABILITY_CACHE)
     """
-    from models import Unavailability, Module
-    from datetime import datetime
+    if context is not None:
+        return context.is_available(facilitator['id'], session)
+    
+    from models import Module
     
     # Get session date and time information
     session_date = session.get('date')
@@ -128,46 +404,533 @@ def check_availability(facilitator, session):
         return 1.0
     
     # Get the unit ID from the module
-    module = Module.query.get(module_id)
-    if not module:
+    unit_id = session.get('unit_id')
+    if unit_id is None:
+        module = Module.query.get(module_id)
+        if not module:
+            return 1.0
+        unit_id = module.unit_id
+    
+    # Bit-range test over the facilitator's compiled unavailability in the unit
+    if AVAILABILITY_CACHE.unit(unit_id).is_free(facilitator['id'], session_date, session_start_time, session_end_time):
         return 1.0
+    return 0.0
+
+def slot_range(day, start_time=None, end_time=None):
+    """
+    Half-open [first, last) range of availability slots covering start_time..end_time on day
     
-    unit_id = module.unit_id
+    Slots are numbered from date.min, so ranges of different days and facilitators line
+    up. Without a start or end time the whole day is covered; times off the
+    AVAILABILITY_SLOT_MINUTES grid are rounded outward, so a range can share a slot with
+    an occurrence it does not overlap (see AvailabilityBitmap.blocking()).
+    """
+    base = day.toordinal() * SLOTS_PER_DAY
+    if start_time is None or end_time is None:
+        return base, base + SLOTS_PER_DAY
+    first = (start_time.hour * 60 + start_time.minute) // AVAILABILITY_SLOT_MINUTES
+    end_minutes = end_time.hour * 60 + end_time.minute + (1 if end_time.second or end_time.microsecond else 0)
+    last = -(-end_minutes // AVAILABILITY_SLOT_MINUTES)
+    return base + first, base + max(first, last)
+
+def datetime_slot_range(start, end):
+    """Half-open [first, last) range of availability slots covering start..end (datetimes, may span days)"""
+    first = slot_range(start.date(), start.time(), start.time())[0]
+    if end <= start:
+        return first, first
+    last = slot_range(end.date(), time.min, end.time())[1]
+    return first, last
+
+def time_window(day, start_time=None, end_time=None):
+    """Exact [start, end) datetimes of start_time..end_time on day (the whole day without times)"""
+    if start_time is None or end_time is None:
+        return datetime.combine(day, time.min), datetime.combine(day + timedelta(days=1), time.min)
+    return datetime.combine(day, start_time), datetime.combine(day, end_time)
+
+class AvailabilityBitmap:
+    """
+    Compiled unavailability of one facilitator in one unit
+    
+    Bit n of `bits` is set when slot `origin + n` (see slot_range()) is unavailable:
+    full-day occurrences set the whole day, timed ones the slots they touch. "Is the
+    facilitator free for this session?" is then one shift and mask. Slots are rounded
+    outward, so a set bit only means an occurrence may overlap: the occurrences are kept
+    with their exact windows, and blocking() confirms a hit against them.
+    """
     
-    # Check if facilitator has any unavailability for this specific date and time
-    unavailability = Unavailability.query.filter_by(
-        user_id=facilitator['id'],
-        unit_id=unit_id,
-        date=session_date
-    ).first()
+    __slots__ = ('origin', 'bits', 'occurrences')
     
-    if not unavailability:
-        # No unavailability entry means facilitator is available
-        return 1.0
+    def __init__(self, occurrences=()):
+        self.origin = 0
+        self.bits = 0
+        self.occurrences = []
+        ranges = []
+        for occurrence in occurrences:
+            if occurrence.is_full_day:
+                first, last = slot_range(occurrence.date)
+            elif occurrence.start_time and occurrence.end_time:
+                first, last = slot_range(occurrence.date, occurrence.start_time, occurrence.end_time)
+            else:
+                continue
+            if last > first:
+                ranges.append((first, last))
+                window = time_window(occurrence.date, *((None, None) if occurrence.is_full_day
+                                                        else (occurrence.start_time, occurrence.end_time)))
+                self.occurrences.append((first, last, window, occurrence))
+        if ranges:
+            self.origin = min(first for first, _ in ranges)
+            for first, last in ranges:
+                self.bits |= ((1 << (last - first)) - 1) << (first - self.origin)
+    
+    def is_free(self, first, last):
+        """True if no slot in [first, last) is unavailable (False may still be a slot shared without overlap)"""
+        low, high = max(first - self.origin, 0), last - self.origin
+        if not self.bits or high <= low:
+            return True
+        return not (self.bits >> low) & ((1 << (high - low)) - 1)
+    
+    def blocking(self, first, last, start=None, end=None):
+        """
+        The occurrences sharing a slot with [first, last), or, given the exact start..end
+        datetimes of the range, only those overlapping it
+        """
+        return [
+            occurrence for low, high, window, occurrence in self.occurrences
+            if low < last and high > first and (start is None or (window[0] < end and window[1] > start))
+        ]
+    
+    def slots(self):
+        """Every unavailable slot number, in order"""
+        bits, offset = self.bits, self.origin
+        while bits:
+            lowest = bits & -bits
+            yield offset + lowest.bit_length() - 1
+            bits ^= lowest
+    
+    def __bool__(self):
+        return bool(self.bits)
+
+class UnitAvailability:
+    """
+    Compiled availability of one unit: an AvailabilityBitmap per facilitator with entries
+    
+    The transposed view is kept alongside: `columns` maps each unavailable slot to a
+    bitset of facilitator positions, so "who is free at T?" is an OR over T's slots and
+    one AND NOT, however many facilitators the unit has. `version` is a digest of the
+    rows, so every process compiling the same entries reports the same version; results
+    derived from the rows (heatmap()) are memoised until a row changes.
+    """
+    
+    def __init__(self, unit_id):
+        self.unit_id = unit_id
+        self.rows = {}       # facilitator_id -> AvailabilityBitmap (only facilitators with entries)
+        self.positions = {}  # facilitator_id -> bit position in the columns
+        self.columns = {}    # slot -> bitset of facilitator positions unavailable in that slot
+        self.stamps = {}     # facilitator_id -> database stamp the rows were compiled from (AvailabilityCache)
+        self._version = None
+        self._derived = OrderedDict()
+    
+    @property
+    def version(self):
+        """Digest of the compiled rows; changes exactly when some facilitator's availability does"""
+        if self._version is None:
+            digest = hashlib.sha256()
+            for facilitator_id in sorted(self.rows):
+                bitmap = self.rows[facilitator_id]
+                digest.update(f'{facilitator_id}:{bitmap.origin}:'.encode('utf-8'))
+                digest.update(bitmap.bits.to_bytes((bitmap.bits.bit_length() + 7) // 8, 'little'))
+                digest.update(b';')
+            self._version = digest.hexdigest()[:16]
+        return self._version
+    
+    def set_row(self, facilitator_id, bitmap):
+        """Replace one facilitator's bitmap, updating the columns it touches"""
+        self._version = None
+        self._derived.clear()
+        flag = 1 << self.positions.setdefault(facilitator_id, len(self.positions))
+        previous = self.rows.pop(facilitator_id, None)
+        if previous is not None:
+            for slot in previous.slots():
+                remaining = self.columns[slot] & ~flag
+                if remaining:
+                    self.columns[slot] = remaining
+                else:
+                    del self.columns[slot]
+        if bitmap:
+            self.rows[facilitator_id] = bitmap
+            for slot in bitmap.slots():
+                self.columns[slot] = self.columns.get(slot, 0) | flag
+    
+    def is_free(self, facilitator_id, day, start_time=None, end_time=None):
+        """True if the facilitator has no unavailability overlapping the time (the whole day without times)"""
+        bitmap = self.rows.get(facilitator_id)
+        if bitmap is None:
+            return True
+        first, last = slot_range(day, start_time, end_time)
+        return bitmap.is_free(first, last) or not bitmap.blocking(first, last, *time_window(day, start_time, end_time))
+    
+    def blocking(self, facilitator_id, day, start_time=None, end_time=None):
+        """The facilitator's occurrences overlapping the time"""
+        bitmap = self.rows.get(facilitator_id)
+        if bitmap is None:
+            return []
+        return bitmap.blocking(*slot_range(day, start_time, end_time), *time_window(day, start_time, end_time))
+    
+    def free_facilitators(self, facilitator_ids, day, start_time=None, end_time=None):
+        """The ids in facilitator_ids (order kept) with no unavailability overlapping the time"""
+        return self.free_in_slots(facilitator_ids, *slot_range(day, start_time, end_time),
+                                  *time_window(day, start_time, end_time))
+    
+    def free_between(self, facilitator_ids, start, end):
+        """free_facilitators() for a start..end datetime window, which may cross midnight"""
+        return self.free_in_slots(facilitator_ids, *datetime_slot_range(start, end), start, end)
+    
+    def free_in_slots(self, facilitator_ids, first, last, start=None, end=None):
+        """
+        The ids in facilitator_ids (order kept) free in every slot of [first, last)
+        
+        Given the exact start..end datetimes of the range, a facilitator whose slots are
+        busy is still free unless one of their occurrences overlaps start..end.
+        """
+        busy = 0
+        for slot in range(first, last):
+            busy |= self.columns.get(slot, 0)
+        if not busy:
+            return list(facilitator_ids)
+        return [
+            facilitator_id for facilitator_id in facilitator_ids
+            if facilitator_id not in self.positions or not busy >> self.positions[facilitator_id] & 1
+            or (start is not None and not self.rows[facilitator_id].blocking(first, last, start, end))
+        ]
+
+    def heatmap(self, facilitator_ids, first_day, last_day):
+        """
+        Availability of facilitator_ids over the days first_day..last_day, as (free, counts)
+        
+        free maps each facilitator to an int whose bit n is set when slot n of the range is
+        free; counts[n] is how many of the facilitators are free in slot n. Computed in one
+        pass over the rows and the unavailable slots, and memoised (the HEATMAP_MEMO_SIZE most
+        recent) until the next set_row().
+        """
+        key = (tuple(facilitator_ids), first_day, last_day)
+        cached = self._derived.get(key)
+        if cached is not None:
+            self._derived.move_to_end(key)
+            return cached
+        
+        first = slot_range(first_day)[0]
+        length = slot_range(last_day)[1] - first
+        everything = (1 << length) - 1
+        free = {}
+        members = 0
+        for facilitator_id in facilitator_ids:
+            bitmap = self.rows.get(facilitator_id)
+            if bitmap is None:
+                free[facilitator_id] = everything
+                continue
+            members |= 1 << self.positions[facilitator_id]
+            offset = bitmap.origin - first
+            window = bitmap.bits << offset if offset >= 0 else bitmap.bits >> -offset
+            free[facilitator_id] = everything & ~window
+        
+        counts = [len(free)] * length
+        if members:
+            for slot, column in self.columns.items():
+                busy = column & members
+                if busy and first <= slot < first + length:
+                    counts[slot - first] -= busy.bit_count()
+        
+        result = self._derived[key] = (free, counts)
+        if len(self._derived) > HEATMAP_MEMO_SIZE:
+            self._derived.popitem(last=False)
+        return result
+
+class AvailabilityCache:
+    """
+    Per-process cache of UnitAvailability, compiled from the Unavailability table on first use
+    
+    Units are keyed by database URL and unit id. Once per database transaction, unit()
+    compares a stamp per facilitator read from the database (how many entries and
+    exceptions they have and when they last changed, one grouped query) with the stamps
+    the unit was compiled from, and reloads only the facilitators whose stamp moved, so
+    writes made by other processes are picked up and an edit never recompiles the whole
+    unit. mark_stale() flags one (unit, facilitator) pair for reload within the current
+    transaction; rebuild_availability_on_writes() wires both to database writes.
+    """
+    
+    def __init__(self):
+        self.units = {}
+        self.stale = {}
+        self.stats = {'builds': 0, 'rebuilds': 0, 'hits': 0, 'invalidations': 0}
+        self._lock = threading.RLock()
+    
+    @staticmethod
+    def _key(unit_id):
+        return str(db.engine.url), unit_id
+    
+    def unit(self, unit_id):
+        """The compiled availability of the unit, built or brought up to date as needed"""
+        key = self._key(unit_id)
+        checked = db.session.info.setdefault('availability_checked', set())
+        with self._lock:
+            compiled = self.units.get(key)
+            if compiled is None:
+                self.stale.pop(key, None)
+                compiled = UnitAvailability(unit_id)
+                compiled.stamps = self._stamps(unit_id)
+                self._load(compiled)
+                self.units[key] = compiled
+                checked.add(key)
+                self.stats['builds'] += 1
+                return compiled
+            
+            stale = self.stale.pop(key, set())
+            if key not in checked:
+                stamps = self._stamps(unit_id)
+                stale |= {
+                    facilitator_id for facilitator_id in stamps.keys() | compiled.stamps.keys()
+                    if stamps.get(facilitator_id) != compiled.stamps.get(facilitator_id)
+                }
+                compiled.stamps = stamps
+                checked.add(key)
+            if stale:
+                self._load(compiled, stale)
+                self.stats['rebuilds'] += 1
+            else:
+                self.stats['hits'] += 1
+            return compiled
+    
+    @staticmethod
+    def _stamps(unit_id):
+        """facilitator_id -> (entries, last entry change, exceptions, last exception change) in the unit"""
+        from sqlalchemy import func
+        from models import Unavailability, UnavailabilityException
+        
+        rows = db.session.query(
+            Unavailability.user_id,
+            func.count(Unavailability.id.distinct()),
+            func.max(Unavailability.updated_at),
+            func.count(UnavailabilityException.id),
+            func.max(UnavailabilityException.updated_at),
+        ).outerjoin(
+            UnavailabilityException, UnavailabilityException.unavailability_id == Unavailability.id
+        ).filter(Unavailability.unit_id == unit_id).group_by(Unavailability.user_id)
+        return {user_id: tuple(stamp) for user_id, *stamp in rows}
+    
+    @staticmethod
+    def _load(compiled, facilitator_ids=None):
+        from models import Unavailability
+        
+        query = Unavailability.query.filter(Unavailability.unit_id == compiled.unit_id)
+        if facilitator_ids is not None:
+            query = query.filter(Unavailability.user_id.in_(facilitator_ids))
+        occurrences = {facilitator_id: [] for facilitator_id in facilitator_ids or ()}
+        for entry in query.all():
+            occurrences.setdefault(entry.user_id, []).extend(entry.occurrences())
+        for facilitator_id, entries in occurrences.items():
+            compiled.set_row(facilitator_id, AvailabilityBitmap(entries))
+    
+    def mark_stale(self, unit_id, facilitator_id):
+        """Rebuild the facilitator's row of the unit on its next use"""
+        key = self._key(unit_id)
+        with self._lock:
+            if key in self.units:
+                self.stale.setdefault(key, set()).add(facilitator_id)
+    
+    def invalidate(self):
+        """Drop every compiled unit"""
+        with self._lock:
+            self.units.clear()
+            self.stale.clear()
+            self.stats['invalidations'] += 1
+
+def rebuild_availability_on_writes(cache):
+    """
+    Mark the (unit, facilitator) pairs touched by a flush stale in `cache`; bulk inserts,
+    updates and deletes of unavailability, whose rows are not known, invalidate the whole cache
+    
+    Pairs are marked again after commit, so a row rebuilt from another session in between
+    does not keep the data from before the commit. Commits and rollbacks also end the
+    session's transaction, so its next unit() call checks the database stamps again.
+    """
+    from sqlalchemy import event, inspect
+    from sqlalchemy.orm import Session as OrmSession
+    from models import Unavailability, UnavailabilityException
+    
+    def _touched(session, instance):
+        if isinstance(instance, Unavailability):
+            # An entry moved to another unit or facilitator leaves its old row stale too
+            attributes = inspect(instance).attrs
+            units = {instance.unit_id, *attributes.unit_id.history.deleted}
+            users = {instance.user_id, *attributes.user_id.history.deleted}
+            return {(unit_id, facilitator_id) for unit_id in units for facilitator_id in users}
+        if isinstance(instance, UnavailabilityException):
+            key = inspect(Unavailability).identity_key_from_primary_key((instance.unavailability_id,))
+            parent = session.identity_map.get(key)
+            return {(parent.unit_id, parent.user_id)} if parent is not None else None
+        return set()
+    
+    def _after_flush(session, flush_context):
+        pending = session.info.setdefault('availability_pending', set())
+        for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+            pairs = _touched(session, instance)
+            if pairs is None:
+                pending.add(None)
+            else:
+                pending.update(pairs)
+        _apply(pending)
+    
+    def _apply(pending):
+        if None in pending:
+            cache.invalidate()
+        for pair in pending - {None}:
+            cache.mark_stale(*pair)
+    
+    def _after_commit(session):
+        session.info.pop('availability_checked', None)
+        _apply(session.info.pop('availability_pending', set()))
+    
+    def _after_rollback(session, previous_transaction):
+        session.info.pop('availability_checked', None)
+        session.info.pop('availability_pending', None)
+    
+    def _on_bulk(orm_execute_state):
+        mapper = orm_execute_state.bind_mapper
+        if (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete) and mapper is not None \
+                and mapper.class_ in (Unavailability, UnavailabilityException):
+            session = orm_execute_state.session
+            session.info.setdefault('availability_pending', set()).add(None)
+            _apply({None})
+    
+    event.listen(OrmSession, 'after_flush', _after_flush)
+    event.listen(OrmSession, 'after_commit', _after_commit)
+    event.listen(OrmSession, 'after_soft_rollback', _after_rollback)
+    event.listen(OrmSession, 'do_orm_execute', _on_bulk)
+    return _after_flush
+
+# Shared compiled availability used by check_availability() and the routes
+AVAILABILITY_CACHE = AvailabilityCache()
+rebuild_availability_on_writes(AVAILABILITY_CACHE)
+
+class FacilitatorIntervalIndex:
+    """
+    Per-facilitator sorted interval index for time and location conflict checks
+    
+    Each facilitator's intervals are kept in a list sorted by start time (bisect-backed),
+    together with the longest interval seen for that facilitator. An overlap query only
+    has to look at intervals starting between (start - longest) and end, so queries cost
+    O(log n) plus the handful of overlapping entries instead of a scan of every assignment.
+    
+    Works with any comparable start/end values that support subtraction
+    (datetimes, or plain numbers such as epoch minutes).
+    """
+    
+    def __init__(self):
+        self._starts = {}        # facilitator_id -> sorted list of start values
+        self._entries = {}       # facilitator_id -> list of (start, end, location, payload) in the same order
+        self._max_duration = {}  # facilitator_id -> longest interval added for that facilitator
+    
+    @classmethod
+    def from_assignments(cls, assignments):
+        """Build an index from engine assignment dictionaries"""
+        index = cls()
+        for assignment in assignments:
+            session = assignment['session']
+            index.add(
+                assignment['facilitator']['id'],
+                session.get('start_datetime'),
+                session.get('end_datetime'),
+                session.get('location', 'TBA'),
+                session.get('id')
+            )
+        return index
+    
+    def add(self, facilitator_id, start, end, location='TBA', payload=None):
+        """Insert an interval for the facilitator; intervals without start/end are ignored"""
+        if start is None or end is None:
+            return
+        
+        starts = self._starts.setdefault(facilitator_id, [])
+        entries = self._entries.setdefault(facilitator_id, [])
+        position = bisect_right(starts, start)
+        starts.insert(position, start)
+        entries.insert(position, (start, end, location, payload))
+        
+        duration = end - start
+        longest = self._max_duration.get(facilitator_id)
+        if longest is None or duration > longest:
+            self._max_duration[facilitator_id] = duration
+    
+    def remove(self, facilitator_id, start, end, payload=None):
+        """Remove one matching interval; returns True if something was removed"""
+        starts = self._starts.get(facilitator_id)
+        if not starts or start is None:
+            return False
+        
+        entries = self._entries[facilitator_id]
+        for position in range(bisect_left(starts, start), bisect_right(starts, start)):
+            entry = entries[position]
+            if entry[1] == end and (payload is None or entry[3] == payload):
+                del starts[position]
+                del entries[position]
+                return True
+        return False
     
-    # Check if it's a full day unavailability
-    if unavailability.is_full_day:
-        return 0.0  # Not available for full day
+    def intervals(self, facilitator_id):
+        """All (start, end, location, payload) entries for the facilitator, sorted by start"""
+        return list(self._entries.get(facilitator_id, []))
     
-    # Check if the session time conflicts with the unavailability time block
-    if unavailability.start_time and unavailability.end_time:
-        session_start = session_start_time
-        session_end = session_end_time
-        unavail_start = unavailability.start_time
-        unavail_end = unavailability.end_time
+    def overlapping(self, facilitator_id, start, end):
+        """Entries for the facilitator that overlap the half-open interval [start, end)"""
+        starts = self._starts.get(facilitator_id)
+        if not starts or start is None or end is None:
+            return []
         
-        # Check if sessions overlap
-        if (session_start < unavail_end and session_end > unavail_start):
-            return 0.0  # Conflict detected
+        entries = self._entries[facilitator_id]
+        # Anything starting at or after `end` cannot overlap, and anything starting
+        # more than the longest duration before `start` has already finished
+        low = bisect_right(starts, start - self._max_duration[facilitator_id])
+        high = bisect_left(starts, end)
+        return [entry for entry in entries[low:high] if entry[1] > start]
+    
+    def has_overlap(self, facilitator_id, start, end):
+        """True if the facilitator already has an interval overlapping [start, end)"""
+        return bool(self.overlapping(facilitator_id, start, end))
     
-    # If we get here, no conflict was found
-    return 1.0
+    def has_location_conflict(self, facilitator_id, start, end, location='TBA'):
+        """True if an overlapping interval is in a different (known) location"""
+        if location == 'TBA':
+            return False
+        for entry in self.overlapping(facilitator_id, start, end):
+            entry_location = entry[2]
+            if entry_location != location and entry_location != 'TBA':
+                return True
+        return False
+    
+    def overlapping_pairs(self, facilitator_id):
+        """
+        Yield (earlier, later) entry pairs where the later interval starts before the earlier one ends
+        Sweeps the sorted list, so the cost is O(n + number of pairs)
+        """
+        entries = self._entries.get(facilitator_id, [])
+        for i, current in enumerate(entries):
+            for j in range(i + 1, len(entries)):
+                following = entries[j]
+                if following[0] >= current[1]:
+                    break
+                yield current, following
+    
+    def facilitator_ids(self):
+        return list(self._entries.keys())
 
-def check_time_conflict(facilitator, session, current_assignments):
+def check_time_conflict(facilitator, session, current_assignments, interval_index=None):
     """
     Check if facilitator is already assigned to another session at the same time
     Returns True if there's a conflict (facilitator is double-booked)
     Returns False if no conflict (facilitator can be assigned)
+    
+    If a FacilitatorIntervalIndex over the current assignments is given, it is used
+    instead of scanning current_assignments
     """
     # Get the session's datetime information
     session_start_dt = session.get('start_datetime')
@@ -176,6 +939,9 @@ def check_time_conflict(facilitator, session, current_assignments):
     if not session_start_dt or not session_end_dt:
         return False  # Can't check conflicts without datetime info
     
+    if interval_index is not None:
+        return interval_index.has_overlap(facilitator['id'], session_start_dt, session_end_dt)
+    
     # Check against all current assignments for this facilitator
     for assignment in current_assignments:
         if assignment['facilitator']['id'] == facilitator['id']:
@@ -192,11 +958,14 @@ def check_time_conflict(facilitator, session, current_assignments):
     
     return False  # No conflict
 
-def check_location_conflict(facilitator, session, current_assignments):
+def check_location_conflict(facilitator, session, current_assignments, interval_index=None):
     """
     Check if facilitator is already assigned to another session at the same time in a different location
     Returns True if there's a location conflict (facilitator can't be in two places at once)
     Returns False if no location conflict (same location or no time overlap)
+    
+    If a FacilitatorIntervalIndex over the current assignments is given, it is used
+    instead of scanning current_assignments
     """
     # Get the session's datetime and location information
     session_start_dt = session.get('start_datetime')
@@ -206,6 +975,9 @@ def check_location_conflict(facilitator, session, current_assignments):
     if not session_start_dt or not session_end_dt:
         return False  # Can't check conflicts without datetime info
     
+    if interval_index is not None:
+        return interval_index.has_location_conflict(facilitator['id'], session_start_dt, session_end_dt, session_location)
+    
     # Check against all current assignments for this facilitator
     for assignment in current_assignments:
         if assignment['facilitator']['id'] == facilitator['id']:
@@ -260,6 +1032,77 @@ def get_assigned_hours(facilitator, current_assignments):
             total_hours += assignment['session']['duration_hours']
     return total_hours
 
+class HoursLedger:
+    """
+    Running total of assigned hours per facilitator for the fairness term
+    
+    Replaces re-walking the assignment list with get_assigned_hours(). Every facilitator
+    in the pool starts at 0 hours. The min and max used for fairness normalisation are
+    cached; a Counter of hour values lets the min be repaired when the last facilitator
+    at the minimum moves up, so updates are O(1) amortised.
+    """
+    
+    def __init__(self, facilitators=(), assignments=()):
+        self._hours = {}
+        self._value_counts = Counter()
+        self._min = 0
+        self._max = 0
+        for facilitator in facilitators:
+            self.register(facilitator['id'])
+        for assignment in assignments:
+            self.add(assignment['facilitator']['id'], assignment['session']['duration_hours'])
+    
+    def register(self, facilitator_id):
+        """Add a facilitator with 0 hours if they are not already tracked"""
+        if facilitator_id in self._hours:
+            return
+        self._hours[facilitator_id] = 0
+        self._value_counts[0] += 1
+        if len(self._hours) == 1:
+            self._min = self._max = 0
+        else:
+            self._min = min(self._min, 0)
+    
+    def add(self, facilitator_id, hours):
+        """Record hours for a facilitator (negative hours remove them again)"""
+        self.register(facilitator_id)
+        old_hours = self._hours[facilitator_id]
+        new_hours = old_hours + hours
+        self._hours[facilitator_id] = new_hours
+        
+        self._value_counts[old_hours] -= 1
+        if not self._value_counts[old_hours]:
+            del self._value_counts[old_hours]
+        self._value_counts[new_hours] += 1
+        
+        if new_hours > self._max:
+            self._max = new_hours
+        elif old_hours == self._max and old_hours not in self._value_counts:
+            self._max = max(self._value_counts)
+        
+        if new_hours < self._min:
+            self._min = new_hours
+        elif old_hours == self._min and old_hours not in self._value_counts:
+            self._min = min(self._value_counts)
+    
+    def hours(self, facilitator_id):
+        return self._hours.get(facilitator_id, 0)
+    
+    @property
+    def min_hours(self):
+        return self._min
+    
+    @property
+    def max_hours(self):
+        return self._max
+    
+    def as_dict(self):
+        """Plain {facilitator_id: hours} copy, the shape calculate_facilitator_score() used to take"""
+        return dict(self._hours)
+    
+    def __len__(self):
+        return len(self._hours)
+
 def check_skill_constraint(facilitator, session):
     """
     Check if facilitator has "no interest" in this session (hard constraint)
@@ -278,28 +1121,241 @@ def check_skill_constraint(facilitator, session):
     # This is safer than blocking assignments due to missing data
     return True
 
-def calculate_facilitator_score(facilitator, session, current_assignments, total_hours_per_facilitator=None):
+# Rejection reasons recorded per (session, facilitator) by the candidate scan, as bit flags.
+# Listed in the order diagnostics report them
+REJECT_TIME_CONFLICT = 1
+REJECT_LOCATION_CONFLICT = 2
+REJECT_NO_INTEREST = 4
+REJECT_UNAVAILABLE = 8
+REJECTION_REASONS = {
+    REJECT_TIME_CONFLICT: 'time_conflict',
+    REJECT_LOCATION_CONFLICT: 'location_conflict',
+    REJECT_NO_INTEREST: 'no_interest',
+    REJECT_UNAVAILABLE: 'unavailable'
+}
+_REJECTION_MESSAGES = {
+    REJECT_TIME_CONFLICT: "is already assigned to another session at this time",
+    REJECT_LOCATION_CONFLICT: "is already assigned to a different location at this time",
+    REJECT_NO_INTEREST: "has no interest in this module",
+    REJECT_UNAVAILABLE: "is unavailable at this time"
+}
+
+def rejection_mask(facilitator, session, current_assignments, interval_index=None, context=None):
+    """
+    Every hard constraint that rules the facilitator out of the session, as REJECT_* bits (0 = eligible)
+    The location check only runs when there is a time overlap, since it cannot fail otherwise
+    """
+    mask = 0
+    if check_time_conflict(facilitator, session, current_assignments, interval_index):
+        mask |= REJECT_TIME_CONFLICT
+        if check_location_conflict(facilitator, session, current_assignments, interval_index):
+            mask |= REJECT_LOCATION_CONFLICT
+    if not check_skill_constraint(facilitator, session):
+        mask |= REJECT_NO_INTEREST
+    if check_availability(facilitator, session, context) == 0.0:
+        mask |= REJECT_UNAVAILABLE
+    return mask
+
+class RejectionLog:
+    """
+    Per-(session, facilitator) rejection bitmasks recorded by the solver's candidate scan
+    
+    Each scanned session gets a bytearray with one REJECT_* mask per facilitator, in the
+    order of the facilitator list the solve was given. A session's row holds the state at
+    its scan, so the "No facilitators found" diagnostics and the per-session eligibility
+    breakdown are read from here without evaluating any constraint again.
+    
+    Facilitators the ModuleEligibilityIndex rules out are recorded as REJECT_NO_INTEREST
+    alone, without evaluating their other constraints. A lead scan that stops early
+    leaves the lower tiers it skipped at 0, which only happens once the slot is filled.
+    """
+    
+    def __init__(self, facilitator_ids):
+        self.facilitator_ids = list(facilitator_ids)
+        self._column = {facilitator_id: column for column, facilitator_id in enumerate(self.facilitator_ids)}
+        self._rows = {}
+    
+    def row(self, session_id):
+        """The session's mask row (one byte per facilitator), created zeroed on first use"""
+        row = self._rows.get(session_id)
+        if row is None:
+            row = self._rows[session_id] = bytearray(len(self.facilitator_ids))
+        return row
+    
+    def record(self, session_id, facilitator_id, mask):
+        self.row(session_id)[self._column[facilitator_id]] = mask
+    
+    def mask(self, session_id, facilitator_id):
+        row = self._rows.get(session_id)
+        return row[self._column[facilitator_id]] if row is not None else 0
+    
+    def masks(self, session_id):
+        """{facilitator_id: mask} for every facilitator ruled out of the session"""
+        row = self._rows.get(session_id, b'')
+        return {self.facilitator_ids[column]: mask for column, mask in enumerate(row) if mask}
+    
+    def summary(self, session_id):
+        """
+        Eligibility breakdown for one session: how many facilitators were eligible and how
+        many each reason ruled out (a facilitator can count towards several reasons)
+        """
+        row = self._rows.get(session_id, b'')
+        summary = {'facilitators': len(row), 'eligible': row.count(0)}
+        for bit, name in REJECTION_REASONS.items():
+            summary[name] = sum(1 for mask in row if mask & bit)
+        return summary
+    
+    def summaries(self):
+        return {session_id: self.summary(session_id) for session_id in self._rows}
+    
+    def describe(self, session, facilitators, limit=3):
+        """Build the "No facilitators found" conflict message for a session nobody could staff"""
+        conflict_reasons = []
+        row = self._rows.get(session['id'], b'')
+        for facilitator in facilitators:
+            column = self._column.get(facilitator['id'])
+            mask = row[column] if column is not None and column < len(row) else 0
+            for bit in REJECTION_REASONS:
+                if mask & bit:
+                    conflict_reasons.append(f"{facilitator['name']} {_REJECTION_MESSAGES[bit]}")
+                    break
+        
+        if conflict_reasons:
+            return f"No facilitators found for {session['module_name']} ({format_session_time(session)}) - Reasons: {'; '.join(conflict_reasons[:limit])}"
+        return f"No facilitators found for {session['module_name']} ({format_session_time(session)})"
+    
+    def update(self, other):
+        """Take over every session row of another log over the same facilitators"""
+        if other.facilitator_ids != self.facilitator_ids:
+            raise ValueError("Rejection logs cover different facilitators")
+        self._rows.update(other._rows)
+    
+    def to_data(self):
+        """JSON-serialisable form (masks as hex strings) for worker results and the solve cache"""
+        return {
+            'facilitator_ids': list(self.facilitator_ids),
+            'sessions': [[session_id, row.hex()] for session_id, row in self._rows.items()]
+        }
+    
+    @classmethod
+    def from_data(cls, data):
+        log = cls(data['facilitator_ids'])
+        for session_id, masks in data['sessions']:
+            log._rows[session_id] = bytearray.fromhex(masks)
+        return log
+    
+    def __contains__(self, session_id):
+        return session_id in self._rows
+    
+    def __len__(self):
+        return len(self._rows)
+
+# Skill tiers of the eligibility index, best first; None holds facilitators who have not
+# declared the module (allowed, scored like NO_INTEREST)
+SKILL_TIERS = (SkillLevel.PROFICIENT, SkillLevel.HAVE_RUN_BEFORE, SkillLevel.HAVE_SOME_SKILL, None)
+
+class ModuleEligibilityIndex:
+    """
+    Inverted index from module_id to the facilitators allowed to run it, split by skill tier
+    
+    Built once per solve from the facilitators' declared skills. Facilitators are stored as
+    positions in the facilitator list; NO_INTEREST facilitators are kept apart so a slot
+    scan never visits them. ceiling() bounds the score any facilitator in a tier can reach
+    (full availability and fairness, lead bonus, +5% noise), which lets a lead scan that
+    walks the tiers best-first stop once no lower tier can beat its best candidate.
+    """
+    
+    def __init__(self, facilitators):
+        self.facilitator_count = len(facilitators)
+        self._declared = {}
+        for position, facilitator in enumerate(facilitators):
+            for module_id, skill_level in facilitator.get('skills', {}).items():
+                self._declared.setdefault(module_id, {}).setdefault(skill_level, []).append(position)
+        self._cache = {}
+    
+    def _entry(self, module_id):
+        entry = self._cache.get(module_id)
+        if entry is None:
+            declared = self._declared.get(module_id, {})
+            seen = {position for positions in declared.values() for position in positions}
+            tiers = tuple(
+                declared.get(level, []) if level is not None
+                else [position for position in range(self.facilitator_count) if position not in seen]
+                for level in SKILL_TIERS
+            )
+            entry = self._cache[module_id] = (tiers, declared.get(SkillLevel.NO_INTEREST, []))
+        return entry
+    
+    def tiers(self, module_id):
+        """Eligible facilitator positions for the module, one list per SKILL_TIERS entry"""
+        return self._entry(module_id)[0]
+    
+    def eligible(self, module_id):
+        """Every eligible facilitator position for the module, in list order"""
+        return sorted(position for tier in self.tiers(module_id) for position in tier)
+    
+    def no_interest(self, module_id):
+        """Positions of facilitators who declared NO_INTEREST in the module"""
+        return self._entry(module_id)[1]
+    
+    @staticmethod
+    def ceiling(tier, lead):
+        """Highest noisy score a facilitator of SKILL_TIERS[tier] can reach for a slot"""
+        skill = SKILL_SCORES.get(SKILL_TIERS[tier], 0.0)
+        return (W_AVAILABILITY + W_FAIRNESS + W_SKILL * skill + (skill * 0.1 if lead else 0.0)) * 1.05
+    
+    def slot_candidates(self, module_id, lead):
+        """
+        Candidate groups for one slot as (positions, ceiling) pairs, in scan order
+        Leads walk the tiers best-first; supports, which fairness decides, get one group.
+        Positions are copies, ready to be shuffled
+        """
+        tiers = self.tiers(module_id)
+        if lead:
+            return [(list(positions), self.ceiling(tier, True)) for tier, positions in enumerate(tiers) if positions]
+        return [([position for positions in tiers for position in positions], float('inf'))]
+
+def _rejection_log(context, facilitators):
+    """The context's RejectionLog for this facilitator list, started fresh if there is none"""
+    log = context.rejections
+    if log is None or log.facilitator_ids != [f['id'] for f in facilitators]:
+        log = context.rejections = RejectionLog(f['id'] for f in facilitators)
+    return log
+
+def calculate_facilitator_score(facilitator, session, current_assignments, total_hours_per_facilitator=None, context=None, ledger=None):
     """
     Calculate the score for assigning a facilitator to a session
     Uses the formula: (W_avail × availability_match) + (W_fair × fairness_factor) + (W_skill × skill_score)
+    Pass a ConstraintContext to answer the availability check without database queries
+    Pass an HoursLedger to take assigned hours and the fairness min/max from it instead of
+    walking current_assignments and total_hours_per_facilitator
     """
     # Skill constraint check (hard constraint - no interest = cannot be assigned)
     if not check_skill_constraint(facilitator, session):
         return 0.0  # Hard constraint violation - no interest in this session
     
     # Availability check (hard constraint)
-    availability_match = check_availability(facilitator, session)
+    availability_match = check_availability(facilitator, session, context)
     if availability_match == 0.0:
         return 0.0  # Hard constraint violation
     
     # Enhanced fairness calculation
-    assigned_hours = get_assigned_hours(facilitator, current_assignments)
+    if ledger is not None:
+        assigned_hours = ledger.hours(facilitator['id'])
+        fairness_pool = ledger
+    else:
+        assigned_hours = get_assigned_hours(facilitator, current_assignments)
+        fairness_pool = total_hours_per_facilitator
     
     # Calculate fairness based on relative distribution
-    if total_hours_per_facilitator and len(total_hours_per_facilitator) > 1:
+    if fairness_pool and len(fairness_pool) > 1:
         # Find the minimum assigned hours among all facilitators
-        min_assigned = min(total_hours_per_facilitator.values())
-        max_assigned = max(total_hours_per_facilitator.values())
+        if ledger is not None:
+            min_assigned = ledger.min_hours
+            max_assigned = ledger.max_hours
+        else:
+            min_assigned = min(total_hours_per_facilitator.values())
+            max_assigned = max(total_hours_per_facilitator.values())
         
         if max_assigned > min_assigned:
             # Normalize fairness: facilitators with fewer hours get higher scores
@@ -321,7 +1377,299 @@ def calculate_facilitator_score(facilitator, session, current_assignments, total
     
     return score
 
-def generate_optimal_assignments(facilitators, unit_id=None):
+class VectorizedScorer:
+    """
+    NumPy scoring backend for the greedy pass (scoring='vectorized')
+    
+    Builds, once per solve, a module × facilitator skill-score matrix from SKILL_SCORES,
+    a module × facilitator "not NO_INTEREST" mask and a session × facilitator availability
+    mask from the ConstraintContext. Each slot's candidate column is then computed with
+    the same formula as calculate_facilitator_score() (plus the lead skill bonus) in a
+    single array expression.
+    """
+    
+    def __init__(self, facilitators, sessions, context):
+        if np is None:
+            raise ImportError("NumPy is required for scoring='vectorized' (pip install numpy)")
+        
+        self.column = {f['id']: i for i, f in enumerate(facilitators)}
+        facilitator_count = len(facilitators)
+        
+        module_ids = list(dict.fromkeys(s.get('module_id') for s in sessions))
+        self.module_row = {module_id: i for i, module_id in enumerate(module_ids)}
+        self.skill = np.zeros((len(module_ids), facilitator_count))
+        self.skill_allowed = np.ones((len(module_ids), facilitator_count), dtype=bool)
+        for column, facilitator in enumerate(facilitators):
+            for module_id, skill_level in facilitator.get('skills', {}).items():
+                row = self.module_row.get(module_id)
+                if row is None:
+                    continue
+                self.skill[row, column] = SKILL_SCORES.get(skill_level, 0.0)
+                self.skill_allowed[row, column] = skill_level != SkillLevel.NO_INTEREST
+        
+        # Availability mask: everyone is available unless an unavailability entry blocks the session
+        self.session_row = {id(session): i for i, session in enumerate(sessions)}
+        self.available = np.ones((len(sessions), facilitator_count), dtype=bool)
+        sessions_by_day = {}
+        for row, session in enumerate(sessions):
+            sessions_by_day.setdefault((session.get('unit_id'), session.get('date')), []).append(row)
+        for (facilitator_id, unit_id, day), entries in context.unavailability.items():
+            column = self.column.get(facilitator_id)
+            if column is None:
+                continue
+            for row in sessions_by_day.get((unit_id, day), []):
+                if context.is_available(facilitator_id, sessions[row]) == 0.0:
+                    self.available[row, column] = False
+        for row, column in context.busy_cells(sessions, self.column):
+            self.available[row, column] = False
+        
+        # Fairness state mirrors the HoursLedger the greedy pass keeps
+        self.hours = np.zeros(facilitator_count)
+        targets = np.array([(f['min_hours'] + f['max_hours']) / 2 for f in facilitators], dtype=float)
+        self.target_hours = np.where(targets == 0, 10.0, targets)
+        self.rng = np.random.default_rng(random.getrandbits(64))
+    
+    def add_hours(self, facilitator_id, hours):
+        self.hours[self.column[facilitator_id]] += hours
+    
+    def session_scores(self, session, lead=False):
+        """Deterministic candidate column for a session: 0.0 where a hard constraint fails"""
+        module_row = self.module_row[session.get('module_id')]
+        skill_scores = self.skill[module_row]
+        eligible = self.skill_allowed[module_row] & self.available[self.session_row[id(session)]]
+        
+        if len(self.hours) > 1:
+            min_assigned = self.hours.min()
+            max_assigned = self.hours.max()
+            if max_assigned > min_assigned:
+                fairness = 1.0 - ((self.hours - min_assigned) / (max_assigned - min_assigned))
+            else:
+                fairness = np.ones_like(self.hours)
+        else:
+            fairness = np.maximum(0, 1 - (self.hours / self.target_hours))
+        
+        scores = (W_AVAILABILITY * 1.0) + (W_FAIRNESS * fairness) + (W_SKILL * skill_scores)
+        scores = np.where(eligible, scores, 0.0)
+        if lead:
+            scores = np.where(scores > 0, scores + (skill_scores * 0.1), 0.0)
+        return scores
+    
+    def noisy_session_scores(self, session, lead=False):
+        """session_scores() with the same ±5% random variation the scalar path applies"""
+        scores = self.session_scores(session, lead)
+        return scores * (1 + self.rng.uniform(-0.05, 0.05, size=scores.shape))
+
+# Epoch used for the integer minute timestamps in CompiledProblem (sessions use naive datetimes)
+_EPOCH = datetime(1970, 1, 1)
+
+# Small-int skill codes for the CompiledProblem skill matrix; 0 means the facilitator has
+# not declared the module, which is allowed and scores like NO_INTEREST
+SKILL_CODES = {
+    SkillLevel.NO_INTEREST: 1,
+    SkillLevel.HAVE_SOME_SKILL: 2,
+    SkillLevel.HAVE_RUN_BEFORE: 3,
+    SkillLevel.PROFICIENT: 4
+}
+_SKILL_LEVEL_BY_CODE = {code: level for level, code in SKILL_CODES.items()}
+_CODE_SCORES = tuple(
+    SKILL_SCORES.get(_SKILL_LEVEL_BY_CODE.get(code), 0.0) for code in range(len(SKILL_CODES) + 1)
+)
+
+class CompiledProblem:
+    """
+    Integer-indexed, array-backed form of one solve's sessions and facilitators
+    
+    Sessions and facilitators are numbered 0..n-1 in input order. Per-session data lives in
+    parallel arrays (start/end as epoch minutes, duration, module index, location id,
+    staffing), modules and locations are interned into small tables, skills form a
+    module × facilitator bytearray of SKILL_CODES and availability a session × facilitator
+    bytearray answered from the ConstraintContext once. The greedy hot loop then only does
+    integer indexing instead of dict lookups.
+    
+    session_dict(), facilitator_dict() and assignment_dicts() rebuild the usual dictionary
+    shape for calculate_metrics() and generate_schedule_report_csv().
+    """
+    
+    __slots__ = (
+        'session_ids', 'timed', 'start_minute', 'end_minute', 'duration', 'module_index',
+        'location_id', 'day_of_week', 'required_skill', 'lead_required', 'support_required',
+        'module_ids', 'module_names', 'module_units', 'locations',
+        'facilitator_ids', 'facilitator_names', 'facilitator_emails', 'min_hours', 'max_hours',
+        'skill', 'available', '_session_cache', '_facilitator_cache'
+    )
+    
+    def __init__(self, facilitators, sessions, context=None):
+        session_count = len(sessions)
+        facilitator_count = len(facilitators)
+        
+        self.session_ids = array('q')
+        self.timed = bytearray(session_count)
+        self.start_minute = array('q')
+        self.end_minute = array('q')
+        self.duration = array('d')
+        self.module_index = array('l')
+        self.location_id = array('l')
+        self.day_of_week = bytearray(session_count)
+        self.required_skill = bytearray(session_count)
+        self.lead_required = array('l')
+        self.support_required = array('l')
+        self.module_ids = []
+        self.module_names = []
+        self.module_units = []
+        self.locations = []
+        
+        module_row = {}
+        location_row = {}
+        minute = timedelta(minutes=1)
+        for i, session in enumerate(sessions):
+            self.session_ids.append(session['id'])
+            start, end = session.get('start_datetime'), session.get('end_datetime')
+            if start and end:
+                self.timed[i] = 1
+                self.start_minute.append((start - _EPOCH) // minute)
+                self.end_minute.append((end - _EPOCH) // minute)
+            else:
+                self.start_minute.append(0)
+                self.end_minute.append(0)
+            self.duration.append(session['duration_hours'])
+            
+            module_id = session.get('module_id')
+            if module_id not in module_row:
+                module_row[module_id] = len(self.module_ids)
+                self.module_ids.append(module_id)
+                self.module_names.append(session.get('module_name'))
+                self.module_units.append(session.get('unit_id'))
+            self.module_index.append(module_row[module_id])
+            
+            location = session.get('location', 'TBA')
+            if location not in location_row:
+                location_row[location] = len(self.locations)
+                self.locations.append(location)
+            self.location_id.append(location_row[location])
+            
+            self.day_of_week[i] = session.get('day_of_week') or 0
+            self.required_skill[i] = SKILL_CODES.get(session.get('required_skill_level', SkillLevel.HAVE_SOME_SKILL), 0)
+            self.lead_required.append(session.get('lead_staff_required', 1))
+            self.support_required.append(session.get('support_staff_required', 0))
+        
+        self.facilitator_ids = array('q', (f['id'] for f in facilitators))
+        self.facilitator_names = [f.get('name') for f in facilitators]
+        self.facilitator_emails = [f.get('email') for f in facilitators]
+        self.min_hours = array('d', (f['min_hours'] for f in facilitators))
+        self.max_hours = array('d', (f['max_hours'] for f in facilitators))
+        
+        # skill[module * facilitator_count + facilitator]
+        self.skill = bytearray(len(self.module_ids) * facilitator_count)
+        for column, facilitator in enumerate(facilitators):
+            for module_id, skill_level in facilitator.get('skills', {}).items():
+                row = module_row.get(module_id)
+                if row is not None:
+                    self.skill[row * facilitator_count + column] = SKILL_CODES.get(skill_level, 0)
+        
+        # available[session * facilitator_count + facilitator]; only entries in the
+        # unavailability map and busy intervals can clear a cell, so everything else starts available
+        self.available = bytearray(b'\x01') * (session_count * facilitator_count)
+        if context is not None and (context.unavailability or context.busy):
+            column_of = {f['id']: column for column, f in enumerate(facilitators)}
+            sessions_by_day = {}
+            for row, session in enumerate(sessions):
+                sessions_by_day.setdefault((session.get('unit_id'), session.get('date')), []).append(row)
+            for facilitator_id, unit_id, day in context.unavailability:
+                column = column_of.get(facilitator_id)
+                if column is None:
+                    continue
+                for row in sessions_by_day.get((unit_id, day), ()):
+                    if context.is_available(facilitator_id, sessions[row]) == 0.0:
+                        self.available[row * facilitator_count + column] = 0
+            for row, column in context.busy_cells(sessions, column_of):
+                self.available[row * facilitator_count + column] = 0
+        
+        self._session_cache = {}
+        self._facilitator_cache = {}
+    
+    @property
+    def session_count(self):
+        return len(self.session_ids)
+    
+    @property
+    def facilitator_count(self):
+        return len(self.facilitator_ids)
+    
+    def skill_code(self, session_index, facilitator_index):
+        return self.skill[self.module_index[session_index] * len(self.facilitator_ids) + facilitator_index]
+    
+    def session_dict(self, index):
+        """Rebuild session `index` in the get_real_sessions() dictionary shape (cached)"""
+        session = self._session_cache.get(index)
+        if session is not None:
+            return session
+        
+        module = self.module_index[index]
+        if self.timed[index]:
+            start = _EPOCH + timedelta(minutes=self.start_minute[index])
+            end = _EPOCH + timedelta(minutes=self.end_minute[index])
+            timing = {
+                'start_time': start.time(), 'end_time': end.time(), 'date': start.date(),
+                'start_datetime': start, 'end_datetime': end
+            }
+        else:
+            timing = {'start_time': None, 'end_time': None, 'date': None, 'start_datetime': None, 'end_datetime': None}
+        session = {
+            'id': self.session_ids[index],
+            'module_id': self.module_ids[module],
+            'unit_id': self.module_units[module],
+            'module_name': self.module_names[module],
+            'day_of_week': self.day_of_week[index],
+            **timing,
+            'duration_hours': self.duration[index],
+            'required_skill_level': _SKILL_LEVEL_BY_CODE.get(self.required_skill[index]),
+            'location': self.locations[self.location_id[index]],
+            'lead_staff_required': self.lead_required[index],
+            'support_staff_required': self.support_required[index]
+        }
+        self._session_cache[index] = session
+        return session
+    
+    def facilitator_dict(self, index):
+        """Rebuild facilitator `index` in the prepare_facilitator_data() shape (cached)"""
+        facilitator = self._facilitator_cache.get(index)
+        if facilitator is not None:
+            return facilitator
+        
+        facilitator_count = len(self.facilitator_ids)
+        skills = {}
+        for module, module_id in enumerate(self.module_ids):
+            code = self.skill[module * facilitator_count + index]
+            if code:
+                skills[module_id] = _SKILL_LEVEL_BY_CODE[code]
+        facilitator = {
+            'id': self.facilitator_ids[index],
+            'name': self.facilitator_names[index],
+            'email': self.facilitator_emails[index],
+            'min_hours': self.min_hours[index],
+            'max_hours': self.max_hours[index],
+            'skills': skills,
+            'availability': {}
+        }
+        self._facilitator_cache[index] = facilitator
+        return facilitator
+    
+    def assignment_dicts(self, rows, facilitators=None, sessions=None):
+        """
+        Convert (session_index, facilitator_index, role, score) rows to engine assignment dictionaries
+        If the source facilitator/session lists are given their dictionaries are reused,
+        otherwise they are rebuilt from the arrays
+        """
+        facilitator_at = facilitators.__getitem__ if facilitators is not None else self.facilitator_dict
+        session_at = sessions.__getitem__ if sessions is not None else self.session_dict
+        return [
+            {'facilitator': facilitator_at(f), 'session': session_at(s), 'score': score, 'role': role}
+            for s, f, role, score in rows
+        ]
+
+def generate_optimal_assignments(facilitators, unit_id=None, context=None, scoring='scalar', mode='greedy', improve_seconds=0,
+                                 seed=None, starts=1, workers=None, decompose=False, cache=None, listener=None,
+                                 deadline=None, cancel=None):
     """
     Main function to generate optimal facilitator-to-session assignments
     Uses enhanced fairness algorithm to ensure equal distribution of hours
@@ -330,14 +1678,699 @@ def generate_optimal_assignments(facilitators, unit_id=None):
     Args:
         facilitators: List of facilitator data dictionaries
         unit_id: Optional unit ID to filter sessions (if None, gets sessions from all units)
+        context: Optional preloaded ConstraintContext; loaded here if not given.
+                 Query counts for the solve are recorded in context.stats
+        scoring: 'scalar' (default) scores one candidate at a time; 'vectorized' uses the
+                 NumPy VectorizedScorer backend (requires numpy); 'compiled' runs the same
+                 scalar pass over a CompiledProblem (same schedule, less memory, faster)
+        mode: 'greedy' (default) runs the randomised greedy pass; 'assignment' solves each
+              time-overlap clique as a linear assignment problem (see SOLVER_MODES)
+        improve_seconds: wall-clock budget for the LocalSearch improvement pass (0 = off);
+                         its report is stored in context.stats['local_search']
+        seed: seed for the solver's random choices; the same seed and inputs give the
+              same schedule (as long as local search stops at its local optimum)
+        starts: number of seeded solves (seed, seed+1, ...) to run; the best by
+                objective_key() is returned and the winning seed stored in context.stats['seed']
+        workers: process count for multi-start and decomposition (default: one per CPU)
+        decompose: split the problem with find_independent_components() and solve the
+                   parts in parallel; improve_seconds (default 1s here) then rebalances
+                   hours across the parts. Ignored when starts > 1
+        cache: optional SolveCache; seeded solves whose problem_fingerprint() is cached
+               return the stored result without solving (context.stats['cache'] says which)
+        listener: optional callable receiving progress events as dicts, each with an
+                  'event' key:
+                      'phase'       'solving' or 'improving' ('sessions_total'; 'budget'
+                                    seconds for improving)
+                      'session'     one session done ('session_id', 'sessions_processed',
+                                    'sessions_total', slots 'filled' of 'required')
+                      'slot_failed' a slot left open ('session_id', 'role', 'slot', 'message')
+                      'objective'   an accepted LocalSearch move ('objective', 'elapsed',
+                                    'operator', 'eta' = seconds left of the budget)
+                  Called on the solving thread; without a listener no event is built
+        deadline: optional time.monotonic() value by which the solve must return
+        cancel: optional CancellationToken; cancelling it stops the solve at its next check
+                When either triggers, the best schedule found so far is returned and
+                context.stats['partial'] = {'reason': 'deadline' or 'cancelled',
+                'phase': 'solving' or 'improving', 'unfinished_sessions': [ids of
+                sessions never scheduled]}. Unfinished sessions get no conflicts, and a
+                partial result is never cached
+    
+    Returns (assignments, conflicts) in the same shape for every mode
     """
-    sessions = get_real_sessions(unit_id)
+    if scoring not in SCORING_BACKENDS:
+        raise ValueError(f"Unknown scoring backend: {scoring}")
+    if mode not in SOLVER_MODES:
+        raise ValueError(f"Unknown solver mode: {mode}")
     
     if not facilitators:
         return [], ["No facilitators found in database"]
     
-    assignments = []
-    conflicts = []
+    if context is None:
+        context = ConstraintContext.load(facilitators, unit_id)
+    sessions = context.sessions
+    
+    if cache is not None and seed is not None:
+        key = problem_fingerprint(
+            facilitators, context, scoring=scoring, mode=mode, improve_seconds=improve_seconds,
+            seed=seed, starts=starts, decompose=decompose
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            context.stats['cache'] = 'hit'
+            assignments, conflicts = _restore_cached_result(cached, facilitators, context)
+            if listener is not None:
+                listener({'event': 'phase', 'phase': 'solving', 'sessions_total': len(sessions)})
+                _emit_sessions_done(listener, sessions, assignments)
+            return assignments, conflicts
+        assignments, conflicts = generate_optimal_assignments(
+            facilitators, unit_id, context, scoring, mode, improve_seconds, seed, starts, workers, decompose,
+            listener=listener, deadline=deadline, cancel=cancel
+        )
+        if 'partial' not in context.stats:
+            cache.put(key, _cacheable_result(assignments, conflicts, context))
+        context.stats['cache'] = 'miss'
+        return assignments, conflicts
+    
+    if listener is not None:
+        listener({'event': 'phase', 'phase': 'solving', 'sessions_total': len(sessions)})
+    if starts > 1:
+        return _run_multistart(facilitators, context, seed, starts, workers, mode, scoring, improve_seconds, listener,
+                               deadline, cancel)
+    if decompose:
+        return _run_decomposed(facilitators, context, seed, workers, mode, scoring,
+                               improve_seconds or DEFAULT_REBALANCE_SECONDS, listener, deadline, cancel)
+    
+    context.rejections = RejectionLog(f['id'] for f in facilitators)
+    with count_queries(context.stats, 'candidate_queries'), seeded_random(seed):
+        if mode == 'assignment':
+            assignments, conflicts = _run_clique_assignment(facilitators, sessions, context, listener=listener,
+                                                            deadline=deadline, cancel=cancel)
+        else:
+            assignments, conflicts = _run_greedy_assignment(facilitators, sessions, context, scoring, listener,
+                                                            deadline, cancel)
+        
+        if improve_seconds > 0 and assignments and 'partial' not in context.stats:
+            if listener is not None:
+                listener({'event': 'phase', 'phase': 'improving', 'sessions_total': len(sessions), 'budget': improve_seconds})
+            assignments, context.stats['local_search'] = improve_assignments(
+                assignments, facilitators, context, time_budget=improve_seconds, seed=random.getrandbits(32),
+                listener=listener, deadline=deadline, cancel=cancel
+            )
+            _mark_interrupted_search(context)
+    
+    if seed is not None:
+        context.stats['seed'] = seed
+    return assignments, conflicts
+
+def _emit_sessions_done(listener, sessions, assignments, processed=0, total=None):
+    """
+    Send 'session' and 'slot_failed' events for sessions, counting on from processed
+    Used by the paths that finish several sessions at once; staffing is read off
+    assignments. Returns the new processed count
+    """
+    total = len(sessions) if total is None else total
+    staffed = Counter((id(a['session']), a['role']) for a in assignments)
+    for session in sessions:
+        processed += 1
+        required = {'lead': session.get('lead_staff_required', 1), 'support': session.get('support_staff_required', 0)}
+        listener({'event': 'session', 'session_id': session['id'], 'sessions_processed': processed, 'sessions_total': total,
+                  'filled': staffed[(id(session), 'lead')] + staffed[(id(session), 'support')],
+                  'required': required['lead'] + required['support']})
+        for role, needed in required.items():
+            for slot in range(staffed[(id(session), role)], needed):
+                listener({'event': 'slot_failed', 'session_id': session['id'], 'role': role, 'slot': slot,
+                          'message': f"Could not assign {role} staff {slot + 1}/{needed} for {session['module_name']} ({format_session_time(session)})"})
+    return processed
+
+class CancellationToken:
+    """
+    Thread-safe flag for stopping a solve from another thread
+    Pass it as generate_optimal_assignments(cancel=...); the solver checks it between
+    sessions (cliques in assignment mode, runs in multi-start) and between local search moves
+    """
+    
+    def __init__(self):
+        self._event = threading.Event()
+    
+    def cancel(self):
+        self._event.set()
+    
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+def stop_reason(deadline=None, cancel=None):
+    """'cancelled' or 'deadline' once a solve with these limits has to stop, else None"""
+    if cancel is not None and cancel.cancelled:
+        return 'cancelled'
+    if deadline is not None and timer.monotonic() >= deadline:
+        return 'deadline'
+    return None
+
+def _mark_partial(context, reason, phase, unfinished=()):
+    """Record in context.stats that a solve stopped early, leaving the unfinished sessions unscheduled"""
+    partial = context.stats.setdefault('partial', {'reason': reason, 'phase': phase, 'unfinished_sessions': []})
+    partial['unfinished_sessions'].extend(session['id'] for session in unfinished)
+    return partial
+
+def _mark_interrupted_search(context):
+    """Flag a complete schedule whose LocalSearch pass a deadline or cancellation cut short"""
+    stopped = context.stats['local_search']['stopped']
+    if stopped in ('deadline', 'cancelled'):
+        _mark_partial(context, stopped, 'improving')
+
+def new_seed():
+    """Fresh solver seed for callers that want a reproducible run but were not given a seed"""
+    return random.SystemRandom().randrange(2 ** 31)
+
+@contextmanager
+def seeded_random(seed):
+    """
+    Seed the module-level random generator for the duration of a solve
+    The caller's random state is restored afterwards; seed=None leaves it untouched
+    """
+    if seed is None:
+        yield
+        return
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        yield
+    finally:
+        random.setstate(state)
+
+def schedule_objective(assignments, sessions):
+    """
+    The single objective multi-start compares schedules by
+    
+    Returns {'unfilled_slots', 'hours_std_dev', 'skill_score'}: slots left empty, the
+    spread of hours across assigned facilitators (as in calculate_metrics) and the
+    mean skill score of the assignments
+    """
+    demand = sum(s.get('lead_staff_required', 1) + s.get('support_staff_required', 0) for s in sessions)
+    
+    hours = {}
+    for assignment in assignments:
+        fac_id = assignment['facilitator']['id']
+        hours[fac_id] = hours.get(fac_id, 0) + assignment['session']['duration_hours']
+    hours_list = list(hours.values())
+    mean = sum(hours_list) / len(hours_list) if hours_list else 0
+    std_dev = (sum((h - mean) ** 2 for h in hours_list) / len(hours_list)) ** 0.5 if hours_list else 0
+    
+    skill = sum(get_skill_score(a['facilitator'], a['session']) for a in assignments)
+    return {
+        'unfilled_slots': max(0, demand - len(assignments)),
+        'hours_std_dev': std_dev,
+        'skill_score': skill / len(assignments) if assignments else 0.0
+    }
+
+def objective_key(objective):
+    """Sort key for schedule_objective() results: fewer unfilled slots, then fairer hours, then higher skill"""
+    return (objective['unfilled_slots'], round(objective['hours_std_dev'], 9), -round(objective['skill_score'], 9))
+
+def snapshot_problem(facilitators, context, sessions=None):
+    """
+    Picklable copy of a solve's inputs for worker processes
+    Only plain dicts, tuples, dates and enums - never live SQLAlchemy objects.
+    `sessions` restricts the snapshot to a subset of context.sessions
+    """
+    return {
+        'facilitators': [
+            {key: facilitator[key] for key in ('id', 'name', 'email', 'min_hours', 'max_hours', 'skills', 'availability') if key in facilitator}
+            for facilitator in facilitators
+        ],
+        'sessions': [dict(session) for session in (context.sessions if sessions is None else sessions)],
+        'unavailability': dict(context.unavailability),
+        'busy': dict(context.busy)
+    }
+
+def _solve_snapshot(snapshot, seed, mode, scoring, improve_seconds, deadline=None, cancel=None):
+    """
+    One seeded solve of a snapshot (runs in a worker process)
+    Assignments come back as (session position, facilitator position, role, score) so
+    the parent can rebuild them around its own session and facilitator dicts.
+    cancel only reaches in-process solves; worker processes stop at the deadline
+    """
+    facilitators = snapshot['facilitators']
+    context = ConstraintContext(snapshot['sessions'], snapshot['unavailability'], snapshot.get('busy'))
+    assignments, conflicts = generate_optimal_assignments(
+        facilitators, context=context, scoring=scoring, mode=mode, improve_seconds=improve_seconds, seed=seed,
+        deadline=deadline, cancel=cancel
+    )
+    
+    session_position = {id(session): position for position, session in enumerate(context.sessions)}
+    facilitator_position = {id(facilitator): position for position, facilitator in enumerate(facilitators)}
+    return {
+        'seed': seed,
+        'assignments': [
+            (session_position[id(a['session'])], facilitator_position[id(a['facilitator'])], a.get('role', 'lead'), a['score'])
+            for a in assignments
+        ],
+        'conflicts': conflicts,
+        'objective': schedule_objective(assignments, context.sessions),
+        'stats': context.stats,
+        'rejections': context.rejections.to_data()
+    }
+
+def _pool_context():
+    """multiprocessing context of the solver pools (POOL_START_METHOD)"""
+    context = multiprocessing.get_context(POOL_START_METHOD)
+    if POOL_START_METHOD == 'forkserver':
+        # Imported once in the server, before it has any threads, instead of in every worker
+        context.set_forkserver_preload(['optimization_engine'])
+    return context
+
+_pool_warming = None
+_pool_warming_lock = threading.Lock()
+
+def _start_pool_worker():
+    pool = ProcessPoolExecutor(max_workers=1, mp_context=_pool_context())
+    try:
+        pool.submit(int).result()
+    finally:
+        pool.shutdown()
+
+def warm_solver_pool(wait=False):
+    """
+    Start the forkserver the solver pools fork their workers from, in the background
+    
+    Starting it (and importing this module in it) takes about a second, which the first
+    pooled solve of a process would otherwise spend before it can notice a cancel.
+    Idempotent; wait=True blocks until the server is ready.
+    """
+    global _pool_warming
+    if POOL_START_METHOD != 'forkserver':
+        return
+    with _pool_warming_lock:
+        if _pool_warming is None:
+            _pool_warming = threading.Thread(target=_start_pool_worker, name='solver-forkserver', daemon=True)
+            _pool_warming.start()
+    if wait:
+        _pool_warming.join()
+
+def _solve_snapshots(jobs, workers, mode, scoring, improve_seconds, deadline=None, cancel=None):
+    """
+    Run _solve_snapshot() for each (snapshot, seed) job, in a process pool when workers > 1
+    
+    Jobs not started (or, once cancelled, not finished) by the time the deadline passes or
+    the token is cancelled come back as None. A cancelled pool is abandoned without
+    waiting; runs already inside a worker finish there and are discarded.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        return [
+            None if stop_reason(deadline, cancel) else
+            _solve_snapshot(snapshot, seed, mode, scoring, improve_seconds, deadline, cancel)
+            for snapshot, seed in jobs
+        ]
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=_pool_context())
+    try:
+        futures = [pool.submit(_solve_snapshot, snapshot, seed, mode, scoring, improve_seconds, deadline) for snapshot, seed in jobs]
+        pending = set(futures)
+        while pending:
+            _, pending = wait(pending, timeout=CANCEL_POLL_SECONDS if cancel is not None else None,
+                              return_when=FIRST_COMPLETED)
+            if stop_reason(None, cancel):
+                break
+        return [future.result() if future.done() and not future.cancelled() else None for future in futures]
+    finally:
+        pool.shutdown(wait=not stop_reason(None, cancel), cancel_futures=True)
+
+def _normalise_for_hash(value):
+    """Convert solver inputs into JSON-serialisable data with a stable ordering"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return sorted(([_normalise_for_hash(k), _normalise_for_hash(v)] for k, v in value.items()), key=repr)
+    if isinstance(value, (list, tuple)):
+        return [_normalise_for_hash(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_normalise_for_hash(item) for item in value), key=repr)
+    return value
+
+def problem_fingerprint(facilitators, context, **options):
+    """
+    SHA-256 content hash of everything a solve depends on
+    
+    Covers the sessions, facilitator data (skills, hour limits), unavailability, busy
+    intervals from other units, the scoring weights and the solver options passed as
+    keyword arguments (mode, seed, ...).
+    Equal fingerprints mean the solver sees exactly the same problem.
+    """
+    payload = {
+        'version': SOLVER_CACHE_VERSION,
+        'weights': [W_AVAILABILITY, W_FAIRNESS, W_SKILL, UNFILLED_LEAD_COST, UNFILLED_SUPPORT_COST],
+        'skill_scores': SKILL_SCORES,
+        'sessions': sorted(context.sessions, key=lambda s: (s.get('unit_id') or 0, s['id'])),
+        'facilitators': sorted(facilitators, key=lambda f: f['id']),
+        'unavailability': context.unavailability,
+        'busy': context.busy,
+        'options': options
+    }
+    encoded = json.dumps(_normalise_for_hash(payload), separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+def seed_from_fingerprint(fingerprint):
+    """Deterministic seed for a problem, so re-running unchanged inputs reproduces (and can reuse) the result"""
+    return int(fingerprint[:8], 16)
+
+def _cacheable_result(assignments, conflicts, context):
+    """Compact, JSON-serialisable form of a solve: ids instead of dicts, plus the stats worth replaying"""
+    return {
+        'assignments': [(a['session']['id'], a['facilitator']['id'], a.get('role', 'lead'), a['score']) for a in assignments],
+        'conflicts': list(conflicts),
+        'stats': {key: context.stats[key] for key in ('seed', 'local_search', 'multistart', 'decomposition') if key in context.stats},
+        'rejections': context.rejections.to_data() if context.rejections is not None else None
+    }
+
+def _restore_cached_result(cached, facilitators, context):
+    """Rebuild (assignments, conflicts) from _cacheable_result() around the caller's dicts"""
+    facilitator_by_id = {f['id']: f for f in facilitators}
+    session_by_id = {s['id']: s for s in context.sessions}
+    assignments = [
+        {
+            'facilitator': facilitator_by_id[facilitator_id],
+            'session': session_by_id[session_id],
+            'score': score,
+            'role': role
+        }
+        for session_id, facilitator_id, role, score in cached['assignments']
+    ]
+    context.stats.update(cached['stats'])
+    if cached.get('rejections'):
+        context.rejections = RejectionLog.from_data(cached['rejections'])
+    return assignments, list(cached['conflicts'])
+
+class SolveCache:
+    """
+    Bounded LRU cache of solver results keyed by problem_fingerprint()
+    
+    Up to max_entries results are kept in memory. Entries evicted from memory are
+    written as JSON into spill_dir (when given), which holds at most max_spilled files;
+    a disk hit is promoted back into memory. JSON rather than pickle, so a file planted
+    in the spill directory can never execute code. invalidate() empties both levels and is wired to
+    database writes by invalidate_on_writes().
+    """
+    
+    def __init__(self, max_entries=32, spill_dir=None, max_spilled=256):
+        self.max_entries = max_entries
+        self.spill_dir = spill_dir
+        self.max_spilled = max_spilled
+        self.entries = OrderedDict()
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'invalidations': 0}
+        self._lock = threading.Lock()
+    
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, f"{key}.json")
+    
+    def get(self, key):
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return self.entries[key]
+            if self.spill_dir:
+                try:
+                    with open(self._spill_path(key), 'r', encoding='utf-8') as handle:
+                        value = json.load(handle)
+                except (OSError, ValueError):
+                    value = None
+                if value is not None:
+                    self.stats['disk_hits'] += 1
+                    self._remember(key, value)
+                    return value
+            self.stats['misses'] += 1
+            return None
+    
+    def put(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+    
+    def _remember(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            old_key, old_value = self.entries.popitem(last=False)
+            self._spill(old_key, old_value)
+    
+    def _spill(self, key, value):
+        if not self.spill_dir:
+            return
+        try:
+            os.makedirs(self.spill_dir, mode=0o700, exist_ok=True)
+            temp_path = self._spill_path(key) + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as handle:
+                json.dump(value, handle)
+            os.replace(temp_path, self._spill_path(key))
+            
+            spilled = sorted(
+                (entry for entry in os.scandir(self.spill_dir) if entry.name.endswith('.json')),
+                key=lambda entry: entry.stat().st_mtime
+            )
+            for entry in spilled[:max(0, len(spilled) - self.max_spilled)]:
+                os.remove(entry.path)
+        except OSError:
+            # The disk level is best effort; the in-memory cache keeps working without it
+            pass
+    
+    def invalidate(self):
+        """Drop every cached result, in memory and on disk"""
+        with self._lock:
+            self.entries.clear()
+            self.stats['invalidations'] += 1
+            if self.spill_dir and os.path.isdir(self.spill_dir):
+                for entry in os.scandir(self.spill_dir):
+                    if entry.name.endswith('.json'):
+                        try:
+                            os.remove(entry.path)
+                        except OSError:
+                            pass
+    
+    def __len__(self):
+        return len(self.entries)
+
+def invalidate_on_writes(cache):
+    """
+    Invalidate `cache` whenever a flush or a bulk statement writes to a table the solver
+    reads (sessions, modules, skills, unavailability and unit membership)
+    
+    Users are not watched: logins and profile edits write to them all the time, and the
+    solver inputs they hold (role, hour limits) are part of problem_fingerprint(), so an
+    edited facilitator gets a new key rather than a stale result.
+    """
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session as OrmSession
+    from models import Session, Module, Unavailability, UnavailabilityException, UnitFacilitator
+    
+    watched = (Session, Module, FacilitatorSkill, Unavailability, UnavailabilityException, UnitFacilitator)
+    
+    def _after_flush(session, flush_context):
+        for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(instance, watched):
+                cache.invalidate()
+                return
+    
+    def _on_bulk(orm_execute_state):
+        # Bulk INSERT/UPDATE/DELETE statements bypass the flush
+        mapper = orm_execute_state.bind_mapper
+        if (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete) \
+                and mapper is not None and issubclass(mapper.class_, watched):
+            cache.invalidate()
+    
+    event.listen(OrmSession, 'after_flush', _after_flush)
+    event.listen(OrmSession, 'do_orm_execute', _on_bulk)
+    return _after_flush
+
+# Shared cache used by the auto-assign route
+SOLVE_CACHE = SolveCache(spill_dir=os.path.join(tempfile.gettempdir(), 'facilitator_solve_cache'))
+invalidate_on_writes(SOLVE_CACHE)
+
+def find_independent_components(facilitators, sessions, context=None):
+    """
+    Split sessions into groups that share no hard constraint
+    
+    Two sessions are linked when they overlap in time and some facilitator is eligible
+    (skill and availability) for both - only then can a choice in one block a choice in
+    the other. Components are the connected closure of those links; apart from the
+    fairness term they can be solved independently.
+    
+    Returns a list of session lists, largest first
+    """
+    parent = list(range(len(sessions)))
+    
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    timed = sorted(
+        (i for i, s in enumerate(sessions) if s.get('start_datetime') and s.get('end_datetime')),
+        key=lambda i: sessions[i]['start_datetime']
+    )
+    for facilitator in facilitators:
+        # Sweep this facilitator's eligible sessions in start order; each run of chained
+        # overlaps is one connected block of the interval graph
+        anchor, block_end = None, None
+        for i in timed:
+            session = sessions[i]
+            if not check_skill_constraint(facilitator, session) or check_availability(facilitator, session, context) == 0.0:
+                continue
+            if anchor is not None and session['start_datetime'] < block_end:
+                parent[find(i)] = find(anchor)
+                block_end = max(block_end, session['end_datetime'])
+            else:
+                anchor, block_end = i, session['end_datetime']
+    
+    groups = {}
+    for i, session in enumerate(sessions):
+        groups.setdefault(find(i), []).append(session)
+    return sorted(groups.values(), key=len, reverse=True)
+
+def _run_decomposed(facilitators, context, seed, workers, mode, scoring, rebalance_seconds, listener=None,
+                    deadline=None, cancel=None):
+    """
+    Decomposed solve behind generate_optimal_assignments(decompose=True)
+    
+    Independent components are packed into one batch per worker (largest first onto the
+    lightest batch), each batch is solved in its own process, and the merged schedule
+    gets a short LocalSearch pass to rebalance hours across batches. Batches that never
+    ran before a deadline or cancellation are reported as unfinished.
+    """
+    if seed is None:
+        seed = new_seed()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    components = find_independent_components(facilitators, context.sessions, context)
+    batch_count = max(1, min(workers, len(components)))
+    batches = [[] for _ in range(batch_count)]
+    for component in components:
+        min(batches, key=len).extend(component)
+    batches = [batch for batch in batches if batch]
+    
+    jobs = [(snapshot_problem(facilitators, context, batch), seed + offset) for offset, batch in enumerate(batches)]
+    runs = _solve_snapshots(jobs, workers, mode, scoring, 0, deadline, cancel)
+    
+    assignments, conflicts = [], []
+    context.rejections = RejectionLog(f['id'] for f in facilitators)
+    for batch, run in zip(batches, runs):
+        if run is None:
+            _mark_partial(context, stop_reason(deadline, cancel) or 'cancelled', 'solving', batch)
+            continue
+        if 'partial' in run['stats']:
+            unfinished = set(run['stats']['partial']['unfinished_sessions'])
+            _mark_partial(context, run['stats']['partial']['reason'], 'solving',
+                          [session for session in batch if session['id'] in unfinished])
+        assignments.extend(
+            {
+                'facilitator': facilitators[facilitator_position],
+                'session': batch[session_position],
+                'score': score,
+                'role': role
+            }
+            for session_position, facilitator_position, role, score in run['assignments']
+        )
+        conflicts.extend(run['conflicts'])
+        context.rejections.update(RejectionLog.from_data(run['rejections']))
+        context.stats['candidate_evaluations'] += run['stats']['candidate_evaluations']
+    
+    context.stats['decomposition'] = {
+        'components': len(components),
+        'largest_component': len(components[0]) if components else 0,
+        'batches': len(batches),
+        'workers': min(workers, len(batches)) if batches else 0
+    }
+    if listener is not None:
+        _emit_sessions_done(listener, [session for batch, run in zip(batches, runs) if run is not None for session in batch],
+                            assignments)
+    if rebalance_seconds > 0 and assignments and 'partial' not in context.stats:
+        if listener is not None:
+            listener({'event': 'phase', 'phase': 'improving', 'sessions_total': len(context.sessions), 'budget': rebalance_seconds})
+        assignments, context.stats['local_search'] = improve_assignments(
+            assignments, facilitators, context, time_budget=rebalance_seconds, seed=seed, listener=listener,
+            deadline=deadline, cancel=cancel
+        )
+        _mark_interrupted_search(context)
+    context.stats['seed'] = seed
+    return assignments, conflicts
+
+def _run_multistart(facilitators, context, seed, starts, workers, mode, scoring, improve_seconds, listener=None,
+                    deadline=None, cancel=None):
+    """
+    Multi-start behind generate_optimal_assignments(starts=N)
+    Runs seeds seed, seed+1, ... seed+N-1 over a ProcessPoolExecutor (or in-process for a
+    single worker) and keeps the best run by objective_key(). After a deadline or
+    cancellation the best of the runs that finished is kept
+    """
+    if seed is None:
+        seed = new_seed()
+    seeds = [seed + offset for offset in range(starts)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, starts))
+    
+    snapshot = snapshot_problem(facilitators, context)
+    runs = _solve_snapshots([(snapshot, run_seed) for run_seed in seeds], workers, mode, scoring, improve_seconds,
+                            deadline, cancel)
+    finished = [run for run in runs if run is not None]
+    if not finished:
+        context.rejections = RejectionLog(f['id'] for f in facilitators)
+        _mark_partial(context, stop_reason(deadline, cancel) or 'cancelled', 'solving', context.sessions)
+        return [], []
+    
+    # min() keeps the first (lowest) seed on ties, so the choice is reproducible too
+    best = min(finished, key=lambda run: objective_key(run['objective']))
+    if 'partial' in best['stats']:
+        context.stats['partial'] = best['stats']['partial']
+    elif len(finished) < len(runs):
+        # A complete schedule, but not every start got to run
+        _mark_partial(context, stop_reason(deadline, cancel) or 'cancelled', 'solving')
+    
+    assignments = [
+        {
+            'facilitator': facilitators[facilitator_position],
+            'session': context.sessions[session_position],
+            'score': score,
+            'role': role
+        }
+        for session_position, facilitator_position, role, score in best['assignments']
+    ]
+    if listener is not None:
+        _emit_sessions_done(listener, context.sessions, assignments)
+    
+    for run in finished:
+        context.stats['candidate_evaluations'] += run['stats']['candidate_evaluations']
+    if 'local_search' in best['stats']:
+        context.stats['local_search'] = best['stats']['local_search']
+    context.rejections = RejectionLog.from_data(best['rejections'])
+    context.stats['seed'] = best['seed']
+    context.stats['multistart'] = {
+        'starts': starts,
+        'workers': workers,
+        'seed': best['seed'],
+        'objective': best['objective'],
+        'runs': [dict(run['objective'], seed=run['seed']) for run in finished]
+    }
+    return assignments, best['conflicts']
+
+def _run_greedy_assignment(facilitators, sessions, context, scoring='scalar', listener=None, deadline=None, cancel=None):
+    """
+    Greedy pass behind generate_optimal_assignments()
+    All hard-constraint checks are answered from the ConstraintContext. The deadline and
+    cancellation token are checked before each session
+    """
+    if scoring == 'compiled':
+        return _run_compiled_greedy(facilitators, sessions, context, listener, deadline, cancel)
+    
+    assignments = []
+    conflicts = []
+    interval_index = FacilitatorIntervalIndex()
+    ledger = HoursLedger(facilitators)
+    scorer = VectorizedScorer(facilitators, sessions, context) if scoring == 'vectorized' else None
+    eligibility = ModuleEligibilityIndex(facilitators) if scorer is None else None
+    rejections = _rejection_log(context, facilitators)
     
     # Add randomization: shuffle sessions to vary the assignment order
     # This creates different but still optimal solutions on each run
@@ -347,162 +2380,1323 @@ def generate_optimal_assignments(facilitators, unit_id=None):
     # Sort sessions by priority (longer sessions first, then by required skill level)
     # But add small random variation to break ties
     sorted_sessions = sorted(sessions_copy, key=lambda s: (-s['duration_hours'], -SKILL_SCORES.get(s['required_skill_level'], 0), random.random()))
+    limited = deadline is not None or cancel is not None
     
-    for session in sorted_sessions:
+    for processed, session in enumerate(sorted_sessions, 1):
+        if limited:
+            reason = stop_reason(deadline, cancel)
+            if reason:
+                _mark_partial(context, reason, 'solving', sorted_sessions[processed - 1:])
+                break
+        
         # Get staffing requirements from session
         lead_staff_needed = session.get('lead_staff_required', 1)
         support_staff_needed = session.get('support_staff_required', 0)
         total_staff_needed = lead_staff_needed + support_staff_needed
         
-        # Calculate current hours per facilitator for fairness calculation
-        total_hours_per_facilitator = {}
-        for facilitator in facilitators:
-            total_hours_per_facilitator[facilitator['id']] = get_assigned_hours(facilitator, assignments)
-        
         # Track assigned facilitators for this session
         session_assignments = []
         
-        # First, assign lead staff (prefer higher skill levels)
-        for lead_slot in range(lead_staff_needed):
-            best_facilitator = None
-            best_score = 0.0
-            
-            # Shuffle facilitators to add variation in selection order
-            shuffled_facilitators = facilitators.copy()
-            random.shuffle(shuffled_facilitators)
-            
-            # Find the best available facilitator for this lead role
-            for facilitator in shuffled_facilitators:
-                # Skip if already assigned to this session
-                if any(a['facilitator']['id'] == facilitator['id'] for a in session_assignments):
-                    continue
-                
-                # Check for time conflicts (hard constraint)
-                if check_time_conflict(facilitator, session, assignments):
-                    continue
-                
-                # Check for location conflicts (hard constraint)
-                if check_location_conflict(facilitator, session, assignments):
-                    continue
-                
-                score = calculate_facilitator_score(
-                    facilitator, 
-                    session, 
-                    assignments, 
-                    total_hours_per_facilitator
-                )
-                
-                # Bonus for lead roles: prefer higher skill levels
-                skill_score = get_skill_score(facilitator, session)
-                score = score + (skill_score * 0.1)  # Add 10% bonus based on skill
-                
-                # Add small random variation (±5%) to introduce diversity while maintaining quality
-                score = score * (1 + random.uniform(-0.05, 0.05))
-                
-                if score > best_score:
-                    best_score = score
-                    best_facilitator = facilitator
+        # First, assign lead staff (prefer higher skill levels), then support staff
+        slots = [('lead', slot, lead_staff_needed) for slot in range(lead_staff_needed)]
+        slots += [('support', slot, support_staff_needed) for slot in range(support_staff_needed)]
+        
+        for role, slot, slots_needed in slots:
+            best_facilitator, best_score = _select_best_facilitator(
+                role, session, facilitators, session_assignments, assignments,
+                interval_index, ledger, context, scorer, rejections, eligibility
+            )
             
-            # Assign lead if found
             if best_facilitator and best_score > 0:
                 assignment = {
                     'facilitator': best_facilitator,
                     'session': session,
                     'score': best_score,
-                    'role': 'lead'
+                    'role': role
                 }
                 session_assignments.append(assignment)
                 assignments.append(assignment)
+                interval_index.add(best_facilitator['id'], session.get('start_datetime'), session.get('end_datetime'), session.get('location', 'TBA'), session['id'])
+                ledger.add(best_facilitator['id'], session['duration_hours'])
+                if scorer is not None:
+                    scorer.add_hours(best_facilitator['id'], session['duration_hours'])
             else:
-                # Could not fill this lead position
-                conflict_msg = f"Could not assign lead staff {lead_slot + 1}/{lead_staff_needed} for {session['module_name']} ({format_session_time(session)})"
+                # Could not fill this position
+                conflict_msg = f"Could not assign {role} staff {slot + 1}/{slots_needed} for {session['module_name']} ({format_session_time(session)})"
                 conflicts.append(conflict_msg)
+                if listener is not None:
+                    listener({'event': 'slot_failed', 'session_id': session['id'], 'role': role, 'slot': slot, 'message': conflict_msg})
         
-        # Second, assign support staff
-        for support_slot in range(support_staff_needed):
-            best_facilitator = None
-            best_score = 0.0
+        # If no facilitators were assigned at all, give the reasons recorded by the scan
+        if not session_assignments and total_staff_needed > 0:
+            conflicts.append(rejections.describe(session, facilitators))
+        
+        if listener is not None:
+            listener({'event': 'session', 'session_id': session['id'], 'sessions_processed': processed,
+                      'sessions_total': len(sorted_sessions), 'filled': len(session_assignments), 'required': total_staff_needed})
+    
+    return assignments, conflicts
+
+def _run_compiled_greedy(facilitators, sessions, context, listener=None, deadline=None, cancel=None):
+    """
+    Greedy pass over a CompiledProblem (scoring='compiled')
+    Makes the same random draws in the same order as the scalar pass, so a seeded solve
+    returns the same schedule; only the data access in the candidate loop changes
+    """
+    problem = CompiledProblem(facilitators, sessions, context)
+    eligibility = ModuleEligibilityIndex(facilitators)
+    rejections = _rejection_log(context, facilitators)
+    facilitator_count = problem.facilitator_count
+    duration = problem.duration
+    timed = problem.timed
+    start_minute = problem.start_minute
+    end_minute = problem.end_minute
+    module_index = problem.module_index
+    skill = problem.skill
+    available = problem.available
+    locations = problem.locations
+    no_interest = SKILL_CODES[SkillLevel.NO_INTEREST]
+    targets = [(problem.min_hours[f] + problem.max_hours[f]) / 2 or 10 for f in range(facilitator_count)]
+    
+    assignments = []
+    conflicts = []
+    # Keyed by facilitator index with epoch-minute intervals. A location conflict needs a
+    # time overlap, so the overlap check alone decides eligibility here
+    interval_index = FacilitatorIntervalIndex()
+    ledger = HoursLedger()
+    for f in range(facilitator_count):
+        ledger.register(f)
+    evaluations = 0
+    
+    order = list(range(problem.session_count))
+    random.shuffle(order)
+    order = sorted(order, key=lambda i: (-duration[i], -_CODE_SCORES[problem.required_skill[i]], random.random()))
+    limited = deadline is not None or cancel is not None
+    
+    for processed, i in enumerate(order, 1):
+        if limited:
+            reason = stop_reason(deadline, cancel)
+            if reason:
+                _mark_partial(context, reason, 'solving', [sessions[j] for j in order[processed - 1:]])
+                break
+        session = sessions[i]
+        lead_staff_needed = problem.lead_required[i]
+        support_staff_needed = problem.support_required[i]
+        is_timed = timed[i]
+        start, end = start_minute[i], end_minute[i]
+        skill_row = module_index[i] * facilitator_count
+        available_row = i * facilitator_count
+        location = locations[problem.location_id[i]]
+        masks = rejections.row(session['id'])
+        for f in eligibility.no_interest(session.get('module_id')):
+            masks[f] = REJECT_NO_INTEREST
+        staffed = set()
+        
+        slots = [('lead', slot, lead_staff_needed) for slot in range(lead_staff_needed)]
+        slots += [('support', slot, support_staff_needed) for slot in range(support_staff_needed)]
+        
+        for role, slot, slots_needed in slots:
+            best, best_score = None, 0.0
             
-            # Shuffle facilitators to add variation in selection order
-            shuffled_facilitators = facilitators.copy()
-            random.shuffle(shuffled_facilitators)
+            for candidates, ceiling in eligibility.slot_candidates(session.get('module_id'), role == 'lead'):
+                if best_score >= ceiling:
+                    break
+                random.shuffle(candidates)
+                for f in candidates:
+                    if f in staffed:
+                        continue
+                    code = skill[skill_row + f]
+                    mask = (REJECT_NO_INTEREST if code == no_interest else 0) | (0 if available[available_row + f] else REJECT_UNAVAILABLE)
+                    if is_timed and interval_index.has_overlap(f, start, end):
+                        mask |= REJECT_TIME_CONFLICT
+                        if interval_index.has_location_conflict(f, start, end, location):
+                            mask |= REJECT_LOCATION_CONFLICT
+                        masks[f] = mask
+                        continue
+                    masks[f] = mask
+                    
+                    evaluations += 1
+                    if mask:
+                        score = 0.0
+                    else:
+                        assigned_hours = ledger.hours(f)
+                        if facilitator_count > 1:
+                            min_assigned, max_assigned = ledger.min_hours, ledger.max_hours
+                            if max_assigned > min_assigned:
+                                fairness_factor = 1.0 - ((assigned_hours - min_assigned) / (max_assigned - min_assigned))
+                            else:
+                                fairness_factor = 1.0
+                        else:
+                            fairness_factor = max(0, 1 - (assigned_hours / targets[f]))
+                        score = (W_AVAILABILITY * 1.0) + (W_FAIRNESS * fairness_factor) + (W_SKILL * _CODE_SCORES[code])
+                        if role == 'lead':
+                            score = score + (_CODE_SCORES[code] * 0.1)
+                    
+                    score = score * (1 + random.uniform(-0.05, 0.05))
+                    if score > best_score:
+                        best_score = score
+                        best = f
             
-            # Find the best available facilitator for this support role
-            for facilitator in shuffled_facilitators:
-                # Skip if already assigned to this session
-                if any(a['facilitator']['id'] == facilitator['id'] for a in session_assignments):
-                    continue
-                
-                # Check for time conflicts (hard constraint)
-                if check_time_conflict(facilitator, session, assignments):
-                    continue
-                
-                # Check for location conflicts (hard constraint)
-                if check_location_conflict(facilitator, session, assignments):
-                    continue
-                
-                score = calculate_facilitator_score(
-                    facilitator, 
-                    session, 
-                    assignments, 
-                    total_hours_per_facilitator
-                )
-                
-                # Add small random variation (±5%) to introduce diversity while maintaining quality
-                score = score * (1 + random.uniform(-0.05, 0.05))
-                
-                if score > best_score:
-                    best_score = score
-                    best_facilitator = facilitator
-            
-            # Assign support if found
-            if best_facilitator and best_score > 0:
-                assignment = {
-                    'facilitator': best_facilitator,
-                    'session': session,
-                    'score': best_score,
-                    'role': 'support'
-                }
-                session_assignments.append(assignment)
+            if best is not None and best_score > 0:
+                staffed.add(best)
+                assignment = {'facilitator': facilitators[best], 'session': session, 'score': best_score, 'role': role}
                 assignments.append(assignment)
+                if is_timed:
+                    interval_index.add(best, start, end, location)
+                ledger.add(best, duration[i])
             else:
-                # Could not fill this support position
-                conflict_msg = f"Could not assign support staff {support_slot + 1}/{support_staff_needed} for {session['module_name']} ({format_session_time(session)})"
-                conflicts.append(conflict_msg)
+                conflicts.append(f"Could not assign {role} staff {slot + 1}/{slots_needed} for {session['module_name']} ({format_session_time(session)})")
+                if listener is not None:
+                    listener({'event': 'slot_failed', 'session_id': session['id'], 'role': role, 'slot': slot, 'message': conflicts[-1]})
         
-        # If no facilitators were assigned at all, provide detailed reasons
-        if not session_assignments and total_staff_needed > 0:
-            conflict_reasons = []
-            
-            # Check why no facilitator was suitable
-            for facilitator in facilitators:
-                # Check time conflicts
-                if check_time_conflict(facilitator, session, assignments):
-                    conflict_reasons.append(f"{facilitator['name']} is already assigned to another session at this time")
-                
-                # Check location conflicts
-                elif check_location_conflict(facilitator, session, assignments):
-                    conflict_reasons.append(f"{facilitator['name']} is already assigned to a different location at this time")
-                
-                # Check skill constraints
-                elif not check_skill_constraint(facilitator, session):
-                    module_id = session.get('module_id')
-                    if 'skills' in facilitator and module_id in facilitator['skills']:
-                        conflict_reasons.append(f"{facilitator['name']} has no interest in this module")
-                
-                # Check availability constraints
-                elif check_availability(facilitator, session) == 0.0:
-                    conflict_reasons.append(f"{facilitator['name']} is unavailable at this time")
-            
-            if conflict_reasons:
-                conflict_msg = f"No facilitators found for {session['module_name']} ({format_session_time(session)}) - Reasons: {'; '.join(conflict_reasons[:3])}"
+        if not staffed and lead_staff_needed + support_staff_needed > 0:
+            conflicts.append(rejections.describe(session, facilitators))
+        
+        if listener is not None:
+            listener({'event': 'session', 'session_id': session['id'], 'sessions_processed': processed,
+                      'sessions_total': len(order), 'filled': len(staffed), 'required': lead_staff_needed + support_staff_needed})
+    
+    context.stats['candidate_evaluations'] += evaluations
+    return assignments, conflicts
+
+def _select_best_facilitator(role, session, facilitators, session_assignments, assignments,
+                             interval_index, ledger, context, scorer=None, rejections=None, eligibility=None):
+    """
+    Pick the best facilitator for one lead or support slot of a session
+    Returns (facilitator, score), or (None, 0.0) if nobody can take the slot
+    Each candidate's rejection_mask() is recorded in `rejections` when given
+    
+    With a ModuleEligibilityIndex only facilitators allowed to run the module are scanned,
+    lead slots tier by tier (best first) until no lower tier can beat the best score
+    """
+    if scorer is not None:
+        return _select_best_facilitator_vectorized(role, session, facilitators, session_assignments,
+                                                   assignments, interval_index, context, scorer, rejections)
+    
+    best_facilitator = None
+    best_score = 0.0
+    
+    if eligibility is None:
+        groups = [(list(range(len(facilitators))), float('inf'))]
+    else:
+        groups = eligibility.slot_candidates(session.get('module_id'), role == 'lead')
+        if rejections is not None:
+            for position in eligibility.no_interest(session.get('module_id')):
+                rejections.record(session['id'], facilitators[position]['id'], REJECT_NO_INTEREST)
+    
+    # Find the best available facilitator for this role
+    for candidates, ceiling in groups:
+        if best_score >= ceiling:
+            break
+        # Shuffle candidates to add variation in selection order
+        random.shuffle(candidates)
+        facilitator, score = _scan_candidates(role, session, facilitators, candidates, session_assignments,
+                                              assignments, interval_index, ledger, context, rejections)
+        if score > best_score:
+            best_score = score
+            best_facilitator = facilitator
+    
+    return best_facilitator, best_score
+
+def _scan_candidates(role, session, facilitators, candidates, session_assignments, assignments,
+                     interval_index, ledger, context, rejections):
+    """Score the facilitators at the given positions for one slot; returns the best (facilitator, score)"""
+    best_facilitator = None
+    best_score = 0.0
+    
+    for position in candidates:
+        facilitator = facilitators[position]
+        # Skip if already assigned to this session
+        if any(a['facilitator']['id'] == facilitator['id'] for a in session_assignments):
+            continue
+        
+        # Every hard constraint at once; time and location conflicts rule the candidate out here,
+        # skill and availability failures score 0.0 below
+        mask = rejection_mask(facilitator, session, assignments, interval_index, context)
+        if rejections is not None:
+            rejections.record(session['id'], facilitator['id'], mask)
+        if mask & (REJECT_TIME_CONFLICT | REJECT_LOCATION_CONFLICT):
+            continue
+        
+        context.stats['candidate_evaluations'] += 1
+        score = 0.0 if mask else calculate_facilitator_score(
+            facilitator, 
+            session, 
+            assignments, 
+            context=context,
+            ledger=ledger
+        )
+        
+        # Bonus for lead roles: prefer higher skill levels
+        # Only for eligible facilitators, so the bonus cannot lift a hard-constraint violation above 0
+        if role == 'lead' and score > 0:
+            skill_score = get_skill_score(facilitator, session)
+            score = score + (skill_score * 0.1)  # Add 10% bonus based on skill
+        
+        # Add small random variation (±5%) to introduce diversity while maintaining quality
+        score = score * (1 + random.uniform(-0.05, 0.05))
+        
+        if score > best_score:
+            best_score = score
+            best_facilitator = facilitator
+    
+    return best_facilitator, best_score
+
+def _select_best_facilitator_vectorized(role, session, facilitators, session_assignments, assignments,
+                                        interval_index, context, scorer, rejections=None):
+    """
+    Vectorized counterpart of _select_best_facilitator()
+    Scores every facilitator in one NumPy expression, then walks candidates from the
+    highest noisy score down and returns the first one without a time/location conflict
+    
+    Skill and availability rejections are recorded for every facilitator from the scorer's
+    masks; time and location conflicts only for the candidates the walk reached
+    """
+    noisy_scores = scorer.noisy_session_scores(session, role == 'lead')
+    for assigned in session_assignments:
+        noisy_scores[scorer.column[assigned['facilitator']['id']]] = 0.0
+    context.stats['candidate_evaluations'] += len(facilitators)
+    
+    row = None
+    if rejections is not None and not session_assignments:
+        module_row = scorer.module_row[session.get('module_id')]
+        masks = np.where(scorer.skill_allowed[module_row], 0, REJECT_NO_INTEREST) \
+            | np.where(scorer.available[scorer.session_row[id(session)]], 0, REJECT_UNAVAILABLE)
+        row = rejections.row(session['id'])
+        row[:] = masks.astype(np.uint8).tobytes()
+    
+    for column in np.argsort(-noisy_scores, kind='stable'):
+        score = float(noisy_scores[column])
+        if score <= 0:
+            break
+        facilitator = facilitators[column]
+        if check_time_conflict(facilitator, session, assignments, interval_index):
+            if row is not None:
+                row[column] |= REJECT_TIME_CONFLICT
+                if check_location_conflict(facilitator, session, assignments, interval_index):
+                    row[column] |= REJECT_LOCATION_CONFLICT
+            continue
+        return facilitator, score
+    
+    return None, 0.0
+
+def solve_linear_assignment(cost):
+    """
+    Minimum-cost assignment of rows to distinct columns (Hungarian algorithm, O(n²m))
+    
+    Args:
+        cost: n × m list of lists with n <= m
+    
+    Returns a list giving the column chosen for each row
+    """
+    n = len(cost)
+    if n == 0:
+        return []
+    m = len(cost[0])
+    if n > m:
+        raise ValueError("solve_linear_assignment needs at least as many columns as rows")
+    
+    inf = float('inf')
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    owner = [0] * (m + 1)  # owner[j] = row (1-based) currently matched to column j
+    way = [0] * (m + 1)
+    
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        min_value = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            row = cost[i0 - 1]
+            u_i0 = u[i0]
+            delta = inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    reduced = row[j - 1] - u_i0 - v[j]
+                    if reduced < min_value[j]:
+                        min_value[j] = reduced
+                        way[j] = j0
+                    if min_value[j] < delta:
+                        delta = min_value[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_value[j] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while True:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+            if j0 == 0:
+                break
+    
+    result = [-1] * n
+    for j in range(1, m + 1):
+        if owner[j]:
+            result[owner[j] - 1] = j - 1
+    return result
+
+def group_sessions_into_cliques(sessions):
+    """
+    Partition sessions into groups whose time intervals all overlap each other
+    
+    Sessions are swept in start order; a session joins the current group while it starts
+    before the earliest end in the group, so every group shares a common instant and a
+    facilitator can take at most one slot per group. Sessions without datetimes form
+    groups of their own.
+    """
+    timed = [s for s in sessions if s.get('start_datetime') and s.get('end_datetime')]
+    untimed = [s for s in sessions if not (s.get('start_datetime') and s.get('end_datetime'))]
+    timed.sort(key=lambda s: (s['start_datetime'], s['end_datetime'], s['id']))
+    
+    groups = []
+    group_end = None
+    for session in timed:
+        if groups and session['start_datetime'] < group_end:
+            groups[-1].append(session)
+            group_end = min(group_end, session['end_datetime'])
+        else:
+            groups.append([session])
+            group_end = session['end_datetime']
+    
+    groups.extend([session] for session in untimed)
+    return groups
+
+def max_staffing(demands, candidates):
+    """
+    Most slots that can be staffed when session i needs demands[i] distinct facilitators
+    out of candidates[i] and no facilitator can take more than one slot overall
+    
+    This is the max flow of source -> session (capacity = demand) -> facilitator
+    (capacity 1) -> sink, found with augmenting paths (Kuhn's algorithm with session
+    capacities). Returns the number of slots staffed per session.
+    """
+    holder = {}
+    
+    def augment(session, seen):
+        for facilitator in candidates[session]:
+            if facilitator in seen:
+                continue
+            seen.add(facilitator)
+            current = holder.get(facilitator)
+            if current is None or augment(current, seen):
+                holder[facilitator] = session
+                return True
+        return False
+    
+    staffed = [0] * len(demands)
+    for session, demand in enumerate(demands):
+        for _ in range(demand):
+            # A session that cannot be augmented now never can be later in the same pass
+            if not augment(session, set()):
+                break
+            staffed[session] += 1
+    return staffed
+
+def _maximal_overlap_windows(sessions):
+    """
+    Maximal groups of sessions that all run at a common instant (maximal cliques of the
+    interval graph), found with a start/end sweep. Sessions without a proper time range
+    are windows of their own
+    """
+    timed = [s for s in sessions if s.get('start_datetime') and s.get('end_datetime') and s['end_datetime'] > s['start_datetime']]
+    timed_ids = {id(s) for s in timed}
+    windows = [[s] for s in sessions if id(s) not in timed_ids]
+    
+    # Ends sort before starts at the same instant: back-to-back sessions do not overlap
+    events = sorted(
+        [(s['start_datetime'], 1, position) for position, s in enumerate(timed)]
+        + [(s['end_datetime'], 0, position) for position, s in enumerate(timed)]
+    )
+    active = {}
+    growing = False
+    for _, is_start, position in events:
+        if is_start:
+            active[position] = True
+            growing = True
+        else:
+            if growing:
+                windows.append([timed[p] for p in active])
+            growing = False
+            del active[position]
+    return windows
+
+def analyse_feasibility(facilitators, context):
+    """
+    Fast pre-solve check for slots no schedule can fill
+    
+    Every session's candidates are the facilitators the ModuleEligibilityIndex allows and
+    the ConstraintContext shows as available. Two bounds are reported:
+    - sessions: a session needing more staff than it has candidates
+    - windows: sessions running at a common instant compete for the same people, so at
+      most max_staffing() of their slots can be filled (the Hall condition per window)
+    unfillable_slots adds up the shortfall of session-disjoint windows, largest first, and
+    is a lower bound on the unfilled slots of any schedule. Nothing here is a heuristic:
+    a feasible result means no window is short, not that the greedy pass will fill every slot.
+    """
+    started = timer.perf_counter()
+    sessions = context.sessions
+    eligibility = ModuleEligibilityIndex(facilitators)
+    
+    eligible_by_module = {}
+    candidates = {}
+    for session in sessions:
+        module_id = session.get('module_id')
+        if module_id not in eligible_by_module:
+            eligible_by_module[module_id] = eligibility.eligible(module_id)
+        candidates[id(session)] = [
+            position for position in eligible_by_module[module_id]
+            if context.is_available(facilitators[position]['id'], session) == 1.0
+        ]
+    
+    def demand_of(session):
+        return session.get('lead_staff_required', 1) + session.get('support_staff_required', 0)
+    
+    short_sessions = []
+    for session in sessions:
+        leads = session.get('lead_staff_required', 1)
+        demand = demand_of(session)
+        fillable = min(demand, len(candidates[id(session)]))
+        if fillable < demand:
+            # Lead slots are filled first, so the missing people come off the support slots first
+            unfillable_lead = max(0, leads - fillable)
+            short_sessions.append({
+                'session_id': session['id'],
+                'module_name': session.get('module_name'),
+                'time': format_session_time(session),
+                'lead_required': leads,
+                'support_required': session.get('support_staff_required', 0),
+                'eligible_facilitators': len(candidates[id(session)]),
+                'unfillable_lead': unfillable_lead,
+                'unfillable_support': demand - fillable - unfillable_lead
+            })
+    
+    windows = _maximal_overlap_windows(sessions)
+    short_windows = []
+    for window in windows:
+        demands = [demand_of(session) for session in window]
+        staffed = max_staffing(demands, [candidates[id(session)] for session in window])
+        shortfall = sum(demands) - sum(staffed)
+        if shortfall > 0:
+            timed = all(s.get('start_datetime') and s.get('end_datetime') for s in window)
+            short_windows.append({
+                'start': max(s['start_datetime'] for s in window).isoformat() if timed else None,
+                'end': min(s['end_datetime'] for s in window).isoformat() if timed else None,
+                'session_ids': [session['id'] for session in window],
+                'demand': sum(demands),
+                'max_staffed': sum(staffed),
+                'shortfall': shortfall
+            })
+    
+    # Disjoint windows are independent sub-problems, so their shortfalls add up
+    unfillable_slots = 0
+    counted = set()
+    for window in sorted(short_windows, key=lambda w: -w['shortfall']):
+        if counted.isdisjoint(window['session_ids']):
+            counted.update(window['session_ids'])
+            unfillable_slots += window['shortfall']
+    
+    return {
+        'feasible': not short_windows,
+        'total_slots': sum(demand_of(session) for session in sessions),
+        'unfillable_slots': unfillable_slots,
+        'sessions': short_sessions,
+        'windows': short_windows,
+        'windows_checked': len(windows),
+        'elapsed_ms': round((timer.perf_counter() - started) * 1000, 2)
+    }
+
+def _run_clique_assignment(facilitators, sessions, context, fixed=(), slot_counts=None, keep_bonus=None, listener=None,
+                           deadline=None, cancel=None):
+    """
+    Assignment-problem solver mode behind generate_optimal_assignments(mode='assignment')
+    
+    Sessions are split into time-overlap cliques (group_sessions_into_cliques) and solved
+    in time order. Within a clique every lead and support slot is a row and every
+    facilitator a column, priced at minus the greedy pass's score (calculate_facilitator_score
+    plus the lead bonus) with fairness frozen at the start of the clique. The Hungarian
+    algorithm finds the cheapest complete matching, with one "unfilled" column per slot
+    priced at UNFILLED_LEAD_COST/UNFILLED_SUPPORT_COST. Cliques are solved exactly;
+    decisions are not revisited across cliques.
+    
+    Repair uses three extra arguments:
+        fixed: assignments that stay in place (they block time and count towards hours)
+        slot_counts: {id(session): (leads, supports)} open slots to fill instead of the
+                     session's full requirement
+        keep_bonus: {(id(session), facilitator id, role): bonus} taken off the cost of
+                    giving a slot back to the facilitator who held it
+    
+    listener gets the 'session' and 'slot_failed' events of each clique once it is solved.
+    The deadline and cancellation token are checked before each clique
+    
+    Returns (new assignments, conflicts)
+    """
+    assignments = []
+    conflicts = []
+    interval_index = FacilitatorIntervalIndex.from_assignments(fixed)
+    ledger = HoursLedger(facilitators, fixed)
+    keep_bonus = keep_bonus or {}
+    eligibility = ModuleEligibilityIndex(facilitators)
+    rejections = _rejection_log(context, facilitators)
+    
+    already_staffed = {}
+    for assignment in fixed:
+        already_staffed.setdefault(id(assignment['session']), set()).add(assignment['facilitator']['id'])
+    
+    processed = 0
+    cliques = group_sessions_into_cliques(sessions)
+    for position, clique in enumerate(cliques):
+        reason = stop_reason(deadline, cancel)
+        if reason:
+            _mark_partial(context, reason, 'solving', [session for rest in cliques[position:] for session in rest])
+            break
+        
+        # Rows: every slot in the clique, leads first within each session
+        rows = []
+        for session in clique:
+            if slot_counts is None:
+                leads, supports = session.get('lead_staff_required', 1), session.get('support_staff_required', 0)
             else:
-                conflict_msg = f"No facilitators found for {session['module_name']} ({format_session_time(session)})"
-            
-            conflicts.append(conflict_msg)
+                leads, supports = slot_counts.get(id(session), (0, 0))
+            for slot in range(leads):
+                rows.append((session, 'lead', slot, leads))
+            for slot in range(supports):
+                rows.append((session, 'support', slot, supports))
+        if not rows:
+            if listener is not None:
+                processed = _emit_sessions_done(listener, clique, (), processed, len(sessions))
+            continue
+        
+        # Eligible facilitators per session (hard constraints)
+        eligible = {}
+        for session in clique:
+            session_eligible = []
+            masks = rejections.row(session['id'])
+            for column in eligibility.no_interest(session.get('module_id')):
+                masks[column] = REJECT_NO_INTEREST
+            for column in eligibility.eligible(session.get('module_id')):
+                facilitator = facilitators[column]
+                if facilitator['id'] in already_staffed.get(id(session), ()):
+                    continue
+                masks[column] = rejection_mask(facilitator, session, assignments, interval_index, context)
+                if not masks[column]:
+                    session_eligible.append(column)
+            eligible[id(session)] = session_eligible
+        
+        # Same per-candidate score as the greedy pass, frozen at the start of the clique
+        session_scores = {}
+        for session in clique:
+            base_scores = {
+                column: calculate_facilitator_score(facilitators[column], session, assignments, context=context, ledger=ledger)
+                for column in eligible[id(session)]
+            }
+            lead_scores = {
+                column: score + get_skill_score(facilitators[column], session) * 0.1
+                for column, score in base_scores.items()
+            }
+            session_scores[(id(session), False)] = base_scores
+            session_scores[(id(session), True)] = lead_scores
+        
+        columns = sorted({column for session_eligible in eligible.values() for column in session_eligible})
+        column_position = {column: position for position, column in enumerate(columns)}
+        width = len(columns) + len(rows)
+        
+        cost = []
+        for session, role, slot, slots_needed in rows:
+            row = [_INFEASIBLE_COST] * width
+            for column in eligible[id(session)]:
+                facilitator = facilitators[column]
+                context.stats['candidate_evaluations'] += 1
+                row[column_position[column]] = -session_scores[(id(session), role == 'lead')][column] \
+                    - keep_bonus.get((id(session), facilitator['id'], role), 0.0)
+            unfilled_cost = UNFILLED_LEAD_COST if role == 'lead' else UNFILLED_SUPPORT_COST
+            for dummy in range(len(columns), width):
+                row[dummy] = unfilled_cost
+            cost.append(row)
+        
+        chosen = solve_linear_assignment(cost)
+        
+        # Record results
+        filled = []
+        for (session, role, slot, slots_needed), position in zip(rows, chosen):
+            if position < len(columns):
+                filled.append({
+                    'facilitator': facilitators[columns[position]],
+                    'session': session,
+                    'score': session_scores[(id(session), role == 'lead')][columns[position]],
+                    'role': role
+                })
+        
+        for assignment in filled:
+            session = assignment['session']
+            assignments.append(assignment)
+            already_staffed.setdefault(id(session), set()).add(assignment['facilitator']['id'])
+            interval_index.add(assignment['facilitator']['id'], session.get('start_datetime'), session.get('end_datetime'), session.get('location', 'TBA'), session['id'])
+            ledger.add(assignment['facilitator']['id'], session['duration_hours'])
+        
+        for (session, role, slot, slots_needed), position in zip(rows, chosen):
+            if position >= len(columns):
+                conflicts.append(f"Could not assign {role} staff {slot + 1}/{slots_needed} for {session['module_name']} ({format_session_time(session)})")
+        
+        for session in clique:
+            total_staff_needed = session.get('lead_staff_required', 1) + session.get('support_staff_required', 0)
+            if not already_staffed.get(id(session)) and total_staff_needed > 0:
+                # Masks were recorded before the clique was solved; facilitators it placed
+                # on overlapping sessions are only ruled out now
+                for facilitator in {id(a['facilitator']): a['facilitator'] for a in filled}.values():
+                    rejections.record(session['id'], facilitator['id'],
+                                      rejection_mask(facilitator, session, assignments, interval_index, context))
+                conflicts.append(rejections.describe(session, facilitators))
+        
+        if listener is not None:
+            processed = _emit_sessions_done(listener, clique, filled, processed, len(sessions))
     
     return assignments, conflicts
 
+def repair_assignments(facilitators, existing, context, churn_penalty=REPAIR_KEEP_BONUS, improve_seconds=0.0,
+                       seed=None, deadline=None, cancel=None):
+    """
+    Re-solve only what changed since the last solve
+    
+    Args:
+        facilitators: Current facilitator pool (prepare_facilitator_data format)
+        existing: Previous assignments as {'session_id', 'facilitator_id', 'role'} dicts
+        context: ConstraintContext with the unit's current sessions and unavailability
+        churn_penalty: Cost of giving one of the previous slots to someone else
+        improve_seconds: LocalSearch budget for improving the repaired schedule (0 = off)
+        seed, deadline, cancel: Passed to the LocalSearch pass
+    
+    The previous schedule is the warm start. Every existing assignment is re-checked
+    against the current data (session and facilitator still present, skill,
+    availability, staffing numbers, overlaps) and kept if still valid. The freed and
+    newly created slots are then filled around the kept assignments with the clique
+    solver. Only if some slot is still open are the assignments of sessions overlapping
+    it (its conflict neighbourhood) released and re-solved together with it, with
+    churn_penalty favouring the previous holders. The optional LocalSearch pass pays
+    churn_penalty for every previous slot it hands to someone else, so it only changes
+    an assignment for a larger gain in skill or fairness.
+    
+    Returns (assignments, conflicts, report); context.rejections covers the re-solved
+    sessions. report['changed_assignments'] counts the slots whose holder changed
+    """
+    facilitator_by_id = {f['id']: f for f in facilitators}
+    session_by_id = {s['id']: s for s in context.sessions}
+    context.rejections = RejectionLog(f['id'] for f in facilitators)
+    
+    def start_of(row):
+        session = session_by_id.get(row['session_id'])
+        return (session is None, session and session.get('start_datetime') or datetime.min, row['session_id'], row.get('role') != 'lead')
+    
+    # 1. Keep every assignment that is still valid
+    kept = []
+    invalidated = []
+    interval_index = FacilitatorIntervalIndex()
+    staffed = {}
+    for row in sorted(existing, key=start_of):
+        session = session_by_id.get(row['session_id'])
+        facilitator = facilitator_by_id.get(row['facilitator_id'])
+        role = row.get('role') or 'lead'
+        reason = None
+        if session is None:
+            reason = "session is no longer scheduled"
+        elif facilitator is None:
+            reason = "facilitator is no longer in the unit"
+        elif not check_skill_constraint(facilitator, session):
+            reason = "facilitator has no interest in this module"
+        elif check_availability(facilitator, session, context) == 0.0:
+            reason = "facilitator is unavailable at this time"
+        else:
+            required = session.get('lead_staff_required', 1) if role == 'lead' else session.get('support_staff_required', 0)
+            holders = staffed.setdefault((id(session), role), [])
+            if len(holders) >= required:
+                reason = f"session needs fewer {role} staff"
+            elif any(holder == facilitator['id'] for r in ('lead', 'support') for holder in staffed.get((id(session), r), ())):
+                reason = "facilitator is already on this session"
+            elif check_time_conflict(facilitator, session, kept, interval_index):
+                reason = "overlaps another assignment"
+        if reason:
+            invalidated.append(dict(row, reason=reason))
+            continue
+        
+        staffed[(id(session), role)].append(facilitator['id'])
+        interval_index.add(facilitator['id'], session.get('start_datetime'), session.get('end_datetime'), session.get('location', 'TBA'), session['id'])
+        kept.append({'facilitator': facilitator, 'session': session, 'score': 0.0, 'role': role})
+    
+    def open_slots(assignments):
+        counts = Counter((id(a['session']), a['role']) for a in assignments)
+        slots = {}
+        for session in context.sessions:
+            leads = max(0, session.get('lead_staff_required', 1) - counts[(id(session), 'lead')])
+            supports = max(0, session.get('support_staff_required', 0) - counts[(id(session), 'support')])
+            if leads or supports:
+                slots[id(session)] = (leads, supports)
+        return slots
+    
+    # 2. Fill freed and new slots around the kept assignments
+    freed = open_slots(kept)
+    freed_sessions = [s for s in context.sessions if id(s) in freed]
+    with count_queries(context.stats, 'candidate_queries'):
+        added, conflicts = _run_clique_assignment(facilitators, freed_sessions, context, fixed=kept, slot_counts=freed)
+    assignments = kept + added
+    
+    # 3. Release and re-solve the neighbourhood of anything still open
+    released = []
+    still_open = open_slots(assignments)
+    if still_open:
+        open_sessions = [s for s in context.sessions if id(s) in still_open]
+        # One shared timeline holding the open sessions; anything overlapping it is a neighbour
+        neighbourhood = FacilitatorIntervalIndex()
+        for session in open_sessions:
+            neighbourhood.add(0, session.get('start_datetime'), session.get('end_datetime'))
+        released = [
+            a for a in assignments
+            if id(a['session']) not in still_open
+            and neighbourhood.has_overlap(0, a['session'].get('start_datetime'), a['session'].get('end_datetime'))
+        ]
+        if released:
+            released_ids = {id(a) for a in released}
+            remaining = [a for a in assignments if id(a) not in released_ids]
+            slot_counts = dict(still_open)
+            bonus = {}
+            for assignment in released:
+                leads, supports = slot_counts.get(id(assignment['session']), (0, 0))
+                if assignment['role'] == 'lead':
+                    leads += 1
+                else:
+                    supports += 1
+                slot_counts[id(assignment['session'])] = (leads, supports)
+                bonus[(id(assignment['session']), assignment['facilitator']['id'], assignment['role'])] = churn_penalty
+            resolve_sessions = [s for s in context.sessions if id(s) in slot_counts]
+            with count_queries(context.stats, 'candidate_queries'):
+                resolved, conflicts = _run_clique_assignment(
+                    facilitators, resolve_sessions, context, fixed=remaining, slot_counts=slot_counts, keep_bonus=bonus
+                )
+            assignments = remaining + resolved
+    
+    # Scores for kept assignments, against the final hours
+    ledger = HoursLedger(facilitators, assignments)
+    for assignment in kept:
+        assignment['score'] = calculate_facilitator_score(assignment['facilitator'], assignment['session'], assignments, context=context, ledger=ledger)
+        if assignment['role'] == 'lead':
+            assignment['score'] += get_skill_score(assignment['facilitator'], assignment['session']) * 0.1
+    
+    before = {(row['session_id'], row['facilitator_id'], row.get('role') or 'lead') for row in existing}
+    if improve_seconds > 0 and assignments:
+        assignments, context.stats['local_search'] = improve_assignments(
+            assignments, facilitators, context, improve_seconds, seed, deadline=deadline, cancel=cancel,
+            anchors=before, churn_penalty=churn_penalty
+        )
+        _mark_interrupted_search(context)
+    
+    after = {(a['session']['id'], a['facilitator']['id'], a['role']) for a in assignments}
+    removed = sorted(before - after)
+    added = sorted(after - before)
+    # A slot handed from one facilitator to another is one change, not a removal plus an addition
+    removed_per_slot = Counter((session_id, role) for session_id, _, role in removed)
+    added_per_slot = Counter((session_id, role) for session_id, _, role in added)
+    report = {
+        'kept': len(before & after),
+        'invalidated': invalidated,
+        'freed_slots': sum(leads + supports for leads, supports in freed.values()),
+        'released_neighbours': len(released),
+        'removed': removed,
+        'added': added,
+        'changed_assignments': sum(max(removed_per_slot[slot], added_per_slot[slot])
+                                   for slot in removed_per_slot.keys() | added_per_slot.keys()),
+        'changed_facilitators': sorted({key[1] for key in before ^ after}),
+        'churn_penalty': churn_penalty
+    }
+    return assignments, conflicts, report
+
+# Edit types accepted by simulate_schedule()
+WHAT_IF_EDITS = ('add_facilitator', 'remove_facilitator', 'unavailable', 'move_sessions', 'set_staffing')
+
+_WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+def _parse_date(value, field):
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"{field} must be a date (YYYY-MM-DD)")
+
+def _parse_time(value, field):
+    if isinstance(value, time):
+        return value
+    try:
+        return time.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"{field} must be a time (HH:MM)")
+
+def _edit_sessions(edit, sessions):
+    """Sessions an edit targets: explicit session_ids, or every session matching weekday/module_id"""
+    if edit.get('session_ids') is not None:
+        wanted = {int(session_id) for session_id in edit['session_ids']}
+        return [s for s in sessions if s['id'] in wanted]
+    weekday = edit.get('weekday')
+    if weekday is not None and str(weekday).lower() not in _WEEKDAYS:
+        raise ValueError(f"Unknown weekday '{weekday}'")
+    if weekday is None and edit.get('module_id') is None:
+        raise ValueError(f"{edit['type']} needs session_ids, weekday or module_id")
+    return [
+        s for s in sessions
+        if (weekday is None or (s.get('date') and s['date'].weekday() == _WEEKDAYS.index(str(weekday).lower())))
+        and (edit.get('module_id') is None or s.get('module_id') == int(edit['module_id']))
+    ]
+
+def apply_what_if_edits(facilitators, context, edits):
+    """
+    Copies of a solve's inputs with hypothetical edits applied; the originals are untouched
+    
+    Edits are dicts with a 'type' from WHAT_IF_EDITS:
+        add_facilitator    {'count', 'name', 'skill' (level for every module) or 'skills'
+                            {module_id: level}, 'min_hours', 'max_hours'}; new facilitators
+                            get negative ids
+        remove_facilitator {'facilitator_id'}
+        unavailable        {'facilitator_id', 'date' or 'from'/'to', optional 'start_time'/'end_time'}
+        move_sessions      {'session_ids' or 'weekday'/'module_id', 'days' to shift by,
+                            optional new 'start_time' (duration is kept)}
+        set_staffing       {'session_ids' or 'weekday'/'module_id', 'lead', 'support'}
+    
+    Returns (facilitators, ConstraintContext); raises ValueError for an invalid edit
+    """
+    facilitators = [dict(f, skills=dict(f.get('skills', {}))) for f in facilitators]
+    sessions = [dict(s) for s in context.sessions]
+    unavailability = {key: list(entries) for key, entries in context.unavailability.items()}
+    module_ids = sorted({s.get('module_id') for s in sessions if s.get('module_id') is not None})
+    unit_ids = sorted({s.get('unit_id') for s in sessions}, key=lambda unit_id: unit_id or 0)
+    next_id = min([0] + [f['id'] for f in facilitators]) - 1
+    
+    for position, edit in enumerate(edits, 1):
+        kind = edit.get('type')
+        try:
+            if kind == 'add_facilitator':
+                skills = {int(module_id): SkillLevel(level) for module_id, level in (edit.get('skills') or {}).items()}
+                if not skills:
+                    level = SkillLevel(edit.get('skill', SkillLevel.HAVE_SOME_SKILL.value))
+                    skills = {module_id: level for module_id in module_ids}
+                for number in range(int(edit.get('count', 1))):
+                    facilitators.append({
+                        'id': next_id,
+                        'name': edit.get('name') or f"New facilitator {-next_id}",
+                        'email': None,
+                        'min_hours': float(edit.get('min_hours', 0)),
+                        'max_hours': float(edit.get('max_hours', 20)),
+                        'skills': dict(skills),
+                        'availability': {}
+                    })
+                    next_id -= 1
+            elif kind == 'remove_facilitator':
+                facilitator_id = int(edit['facilitator_id'])
+                if not any(f['id'] == facilitator_id for f in facilitators):
+                    raise ValueError(f"facilitator {facilitator_id} is not in the unit")
+                facilitators = [f for f in facilitators if f['id'] != facilitator_id]
+            elif kind == 'unavailable':
+                facilitator_id = int(edit['facilitator_id'])
+                first = _parse_date(edit.get('date', edit.get('from')), 'date')
+                last = _parse_date(edit['to'], 'to') if edit.get('to') else first
+                if last < first:
+                    raise ValueError("to is before from")
+                start = _parse_time(edit['start_time'], 'start_time') if edit.get('start_time') else None
+                end = _parse_time(edit['end_time'], 'end_time') if edit.get('end_time') else None
+                entry = (start is None or end is None, start, end)
+                day = first
+                while day <= last:
+                    for unit_id in unit_ids:
+                        unavailability.setdefault((facilitator_id, unit_id, day), []).append(entry)
+                    day += timedelta(days=1)
+            elif kind == 'move_sessions':
+                days = int(edit.get('days', 0))
+                new_start = _parse_time(edit['start_time'], 'start_time') if edit.get('start_time') else None
+                for session in _edit_sessions(edit, sessions):
+                    begin, finish = session.get('start_datetime'), session.get('end_datetime')
+                    if begin is None or finish is None:
+                        continue
+                    moved = begin + timedelta(days=days)
+                    if new_start is not None:
+                        moved = datetime.combine(moved.date(), new_start)
+                    moved_end = moved + (finish - begin)
+                    session.update({
+                        'start_datetime': moved, 'end_datetime': moved_end,
+                        'date': moved.date(), 'start_time': moved.time(), 'end_time': moved_end.time(),
+                        'day_of_week': moved.weekday()
+                    })
+            elif kind == 'set_staffing':
+                for session in _edit_sessions(edit, sessions):
+                    if edit.get('lead') is not None:
+                        session['lead_staff_required'] = max(0, int(edit['lead']))
+                    if edit.get('support') is not None:
+                        session['support_staff_required'] = max(0, int(edit['support']))
+            else:
+                raise ValueError(f"unknown edit type '{kind}'. Expected one of: {', '.join(WHAT_IF_EDITS)}")
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Edit {position} ({kind}): missing or invalid field {e}")
+        except ValueError as e:
+            raise ValueError(f"Edit {position} ({kind}): {e}")
+    
+    return facilitators, ConstraintContext(sessions, unavailability, context.busy)
+
+def schedule_summary(assignments, sessions):
+    """schedule_objective() plus the hours range and the skill mix, for comparing two schedules"""
+    summary = schedule_objective(assignments, sessions)
+    metrics = calculate_metrics(assignments)
+    summary.update({
+        'assignments': len(assignments),
+        'min_hours': metrics['fairness_metrics'].get('min_hours', 0),
+        'max_hours': metrics['fairness_metrics'].get('max_hours', 0),
+        'skill_mix': metrics['skill_distribution']
+    })
+    return summary
+
+def simulate_schedule(facilitators, context, existing, edits):
+    """
+    What-if analysis: apply hypothetical edits and re-solve incrementally, in memory only
+    
+    existing holds the current assignments as {'session_id', 'facilitator_id', 'role'}
+    dicts. The edits (see apply_what_if_edits) are applied to copies of the inputs, then
+    repair_assignments() keeps every assignment that is still valid and fills what the
+    edits freed or added. Nothing is written anywhere.
+    
+    Returns {'baseline', 'simulated', 'delta', 'changes', 'conflicts', 'elapsed_ms'};
+    baseline and simulated are schedule_summary() results and delta their difference
+    (skill_mix by level)
+    """
+    started = timer.perf_counter()
+    facilitator_by_id = {f['id']: f for f in facilitators}
+    session_by_id = {s['id']: s for s in context.sessions}
+    current = [
+        {'facilitator': facilitator_by_id[row['facilitator_id']], 'session': session_by_id[row['session_id']],
+         'score': 0.0, 'role': row.get('role') or 'lead'}
+        for row in existing
+        if row['facilitator_id'] in facilitator_by_id and row['session_id'] in session_by_id
+    ]
+    baseline = schedule_summary(current, context.sessions)
+    
+    edited_facilitators, edited_context = apply_what_if_edits(facilitators, context, edits)
+    assignments, conflicts, report = repair_assignments(edited_facilitators, existing, edited_context)
+    simulated = schedule_summary(assignments, edited_context.sessions)
+    
+    delta = {key: simulated[key] - baseline[key]
+             for key in ('unfilled_slots', 'hours_std_dev', 'skill_score', 'assignments', 'min_hours', 'max_hours')}
+    delta['skill_mix'] = {
+        level: simulated['skill_mix'].get(level, 0) - baseline['skill_mix'].get(level, 0)
+        for level in sorted(set(simulated['skill_mix']) | set(baseline['skill_mix']))
+    }
+    new_ids = {f['id'] for f in edited_facilitators} - set(facilitator_by_id)
+    return {
+        'baseline': baseline,
+        'simulated': simulated,
+        'delta': delta,
+        'changes': {
+            'kept': report['kept'],
+            'added': len(report['added']),
+            'removed': len(report['removed']),
+            'changed_facilitators': report['changed_facilitators'],
+            'new_facilitator_hours': {
+                facilitator_id: sum(a['session']['duration_hours'] for a in assignments if a['facilitator']['id'] == facilitator_id)
+                for facilitator_id in sorted(new_ids, reverse=True)
+            }
+        },
+        'conflicts': conflicts,
+        'elapsed_ms': round((timer.perf_counter() - started) * 1000, 1)
+    }
+
+class LocalSearch:
+    """
+    Anytime improvement pass over a finished assignment set
+    
+    Objective (higher is better):
+        Σ assignments (W_SKILL × skill + lead bonus)  −  W_FAIRNESS × Σ facilitators (hours − mean)²
+            −  churn_penalty × (anchored assignments no longer with their anchor)
+    
+    anchors is a set of (session id, facilitator id, role) from a previous schedule; an
+    assignment that starts out matching one is anchored to that facilitator. The churn
+    term is 0 unless a penalty is given (see repair_assignments).
+    
+    Total hours never change (every operator keeps each slot filled), so the mean is
+    fixed and each operator's effect on the objective is an O(1) delta. Feasibility is
+    checked against a FacilitatorIntervalIndex (O(log n)) only for improving moves.
+    
+    Operators:
+        move     - hand one assignment to another facilitator
+        swap     - two facilitators trade one assignment each
+        exchange - 2-exchange chain: a moves f → g while g's one clashing assignment moves g → h
+    """
+    
+    OPERATORS = ('move', 'swap', 'exchange')
+    EPSILON = 1e-9
+    
+    def __init__(self, assignments, facilitators, context=None, seed=None, listener=None, anchors=(), churn_penalty=0.0):
+        self.facilitators = {f['id']: f for f in facilitators}
+        self.context = context
+        self.listener = listener
+        self._deadline = None
+        self.rng = random.Random(seed)
+        self.assignments = [dict(a) for a in assignments]
+        self.churn_penalty = churn_penalty
+        self.anchor = {
+            position: a['facilitator']['id']
+            for position, a in enumerate(self.assignments)
+            if (a['session']['id'], a['facilitator']['id'], a.get('role') or 'lead') in anchors
+        } if churn_penalty else {}
+        
+        self.ledger = HoursLedger(facilitators, self.assignments)
+        self.mean_hours = sum(self.ledger.as_dict().values()) / max(1, len(self.ledger))
+        
+        self.index = FacilitatorIntervalIndex()
+        self.by_facilitator = {fid: set() for fid in self.facilitators}
+        self.session_staff = {}
+        self._eligible = {}
+        for position, assignment in enumerate(self.assignments):
+            self._place(position, assignment['facilitator']['id'])
+        
+        self.objective = self.full_objective()
+        self.changed = set()
+        self.report = {
+            'moves': {op: 0 for op in self.OPERATORS},
+            'initial_objective': self.objective,
+            'trajectory': [],
+            'stopped': None
+        }
+    
+    # --- objective -------------------------------------------------------
+    
+    def _reward(self, facilitator_id, assignment):
+        skill_score = get_skill_score(self.facilitators[facilitator_id], assignment['session'])
+        return W_SKILL * skill_score + (skill_score * 0.1 if assignment.get('role') == 'lead' else 0.0)
+    
+    def _churn(self, position, facilitator_id):
+        """Churn cost of assignment `position` being held by facilitator_id"""
+        anchor = self.anchor.get(position)
+        return self.churn_penalty if anchor is not None and anchor != facilitator_id else 0.0
+    
+    def _fairness_delta(self, facilitator_id, hours_delta):
+        """Objective change from the fairness term when facilitator_id gains hours_delta hours"""
+        offset = self.ledger.hours(facilitator_id) - self.mean_hours
+        return -W_FAIRNESS * (2 * offset * hours_delta + hours_delta ** 2)
+    
+    def full_objective(self):
+        """Recompute the objective from scratch (used for the initial value and in tests)"""
+        reward = sum(self._reward(a['facilitator']['id'], a) for a in self.assignments)
+        penalty = sum((h - self.mean_hours) ** 2 for h in self.ledger.as_dict().values())
+        churn = sum(self._churn(position, a['facilitator']['id']) for position, a in enumerate(self.assignments))
+        return reward - W_FAIRNESS * penalty - churn
+    
+    # --- bookkeeping -----------------------------------------------------
+    
+    def _place(self, position, facilitator_id):
+        assignment = self.assignments[position]
+        session = assignment['session']
+        self.by_facilitator.setdefault(facilitator_id, set()).add(position)
+        self.session_staff.setdefault(id(session), set()).add(facilitator_id)
+        self.index.add(facilitator_id, session.get('start_datetime'), session.get('end_datetime'), session.get('location', 'TBA'), position)
+    
+    def _reassign(self, position, facilitator_id):
+        """Move one assignment to facilitator_id, keeping ledger, index and lookups in step"""
+        assignment = self.assignments[position]
+        session = assignment['session']
+        old_id = assignment['facilitator']['id']
+        self.by_facilitator[old_id].discard(position)
+        self.session_staff[id(session)].discard(old_id)
+        self.index.remove(old_id, session.get('start_datetime'), session.get('end_datetime'), position)
+        self.ledger.add(old_id, -session['duration_hours'])
+        
+        assignment['facilitator'] = self.facilitators[facilitator_id]
+        self._place(position, facilitator_id)
+        self.ledger.add(facilitator_id, session['duration_hours'])
+        self.changed.add(position)
+    
+    def _eligible_for(self, facilitator_id, session):
+        """Hard constraints that do not depend on the rest of the schedule (cached)"""
+        key = (facilitator_id, id(session))
+        eligible = self._eligible.get(key)
+        if eligible is None:
+            facilitator = self.facilitators[facilitator_id]
+            eligible = check_skill_constraint(facilitator, session) and \
+                check_availability(facilitator, session, self.context) == 1.0
+            self._eligible[key] = eligible
+        return eligible
+    
+    def _can_take(self, facilitator_id, session, releasing=()):
+        """True if facilitator_id can take session once the assignments in `releasing` leave them"""
+        if facilitator_id in self.session_staff.get(id(session), ()) and not any(
+            self.assignments[p]['session'] is session for p in releasing
+        ):
+            return False
+        if not self._eligible_for(facilitator_id, session):
+            return False
+        clashes = self.index.overlapping(facilitator_id, session.get('start_datetime'), session.get('end_datetime'))
+        return all(entry[3] in releasing for entry in clashes)
+    
+    def _accept(self, operator, delta, started):
+        self.objective += delta
+        self.report['moves'][operator] += 1
+        point = {
+            'elapsed': round(timer.perf_counter() - started, 4),
+            'objective': self.objective,
+            'operator': operator
+        }
+        self.report['trajectory'].append(point)
+        if self.listener is not None:
+            self.listener(dict(point, event='objective', eta=round(max(0.0, self._deadline - timer.perf_counter()), 2)))
+    
+    # --- operators -------------------------------------------------------
+    
+    def _try_move(self, position, started):
+        assignment = self.assignments[position]
+        session, old_id = assignment['session'], assignment['facilitator']['id']
+        duration = session['duration_hours']
+        base = self._fairness_delta(old_id, -duration) - self._reward(old_id, assignment) + self._churn(position, old_id)
+        
+        candidates = []
+        for facilitator_id in self.facilitators:
+            if facilitator_id == old_id:
+                continue
+            delta = base + self._reward(facilitator_id, assignment) + self._fairness_delta(facilitator_id, duration) \
+                - self._churn(position, facilitator_id)
+            if delta > self.EPSILON:
+                candidates.append((delta, facilitator_id))
+        
+        for delta, facilitator_id in sorted(candidates, reverse=True):
+            if self._can_take(facilitator_id, session):
+                self._reassign(position, facilitator_id)
+                self._accept('move', delta, started)
+                return True
+        return False
+    
+    def _try_swap(self, position, started):
+        first = self.assignments[position]
+        session_a, f_id = first['session'], first['facilitator']['id']
+        duration_a = session_a['duration_hours']
+        
+        for g_id in self.rng.sample(list(self.facilitators), len(self.facilitators)):
+            if g_id == f_id or not self._eligible_for(g_id, session_a):
+                continue
+            for other in list(self.by_facilitator.get(g_id, ())):
+                second = self.assignments[other]
+                session_b = second['session']
+                if session_b is session_a:
+                    continue
+                shift = second['session']['duration_hours'] - duration_a
+                delta = (
+                    self._reward(g_id, first) + self._reward(f_id, second)
+                    - self._reward(f_id, first) - self._reward(g_id, second)
+                    + self._fairness_delta(f_id, shift) + self._fairness_delta(g_id, -shift)
+                    + self._churn(position, f_id) + self._churn(other, g_id)
+                    - self._churn(position, g_id) - self._churn(other, f_id)
+                )
+                if delta <= self.EPSILON:
+                    continue
+                if self._can_take(g_id, session_a, (other,)) and self._can_take(f_id, session_b, (position,)):
+                    self._reassign(position, g_id)
+                    self._reassign(other, f_id)
+                    self._accept('swap', delta, started)
+                    return True
+        return False
+    
+    def _try_exchange(self, position, started):
+        first = self.assignments[position]
+        session_a, f_id = first['session'], first['facilitator']['id']
+        duration_a = session_a['duration_hours']
+        
+        for g_id in self.rng.sample(list(self.facilitators), len(self.facilitators)):
+            if g_id == f_id or g_id in self.session_staff.get(id(session_a), ()) or not self._eligible_for(g_id, session_a):
+                continue
+            clashes = self.index.overlapping(g_id, session_a.get('start_datetime'), session_a.get('end_datetime'))
+            if len(clashes) != 1:
+                continue
+            other = clashes[0][3]
+            second = self.assignments[other]
+            session_b = second['session']
+            duration_b = session_b['duration_hours']
+            partial = (
+                self._reward(g_id, first) - self._reward(f_id, first) - self._reward(g_id, second)
+                + self._fairness_delta(f_id, -duration_a) + self._fairness_delta(g_id, duration_a - duration_b)
+                + self._churn(position, f_id) - self._churn(position, g_id) + self._churn(other, g_id)
+            )
+            for h_id in self.facilitators:
+                if h_id in (f_id, g_id):
+                    continue
+                delta = partial + self._reward(h_id, second) + self._fairness_delta(h_id, duration_b) - self._churn(other, h_id)
+                if delta > self.EPSILON and self._can_take(h_id, session_b):
+                    self._reassign(other, h_id)
+                    self._reassign(position, g_id)
+                    self._accept('exchange', delta, started)
+                    return True
+        return False
+    
+    # --- driver ----------------------------------------------------------
+    
+    def run(self, time_budget, deadline=None, cancel=None):
+        """
+        Improve until no operator finds an improving move, time_budget seconds pass, the
+        time.monotonic() deadline passes or cancel (a CancellationToken) is cancelled
+        Returns (assignments, report)
+        """
+        started = timer.perf_counter()
+        self.report['stopped'] = 'budget'
+        if deadline is not None and deadline - timer.monotonic() < time_budget:
+            time_budget = max(0.0, deadline - timer.monotonic())
+            self.report['stopped'] = 'deadline'
+        end = self._deadline = started + time_budget
+        
+        while timer.perf_counter() < end:
+            improved = False
+            order = list(range(len(self.assignments)))
+            self.rng.shuffle(order)
+            for position in order:
+                if timer.perf_counter() >= end:
+                    break
+                if cancel is not None and cancel.cancelled:
+                    self.report['stopped'] = 'cancelled'
+                    break
+                if self._try_move(position, started) or self._try_swap(position, started) or self._try_exchange(position, started):
+                    improved = True
+            else:
+                if not improved:
+                    self.report['stopped'] = 'local_optimum'
+                    break
+                continue
+            break
+        
+        # Refresh the per-assignment score of anything that changed hands
+        for position in self.changed:
+            assignment = self.assignments[position]
+            facilitator, session = assignment['facilitator'], assignment['session']
+            score = calculate_facilitator_score(facilitator, session, self.assignments, context=self.context, ledger=self.ledger)
+            if assignment.get('role') == 'lead' and score > 0:
+                score += get_skill_score(facilitator, session) * 0.1
+            assignment['score'] = score
+        
+        self.report['final_objective'] = self.objective
+        self.report['changed_assignments'] = len(self.changed)
+        self.report['elapsed'] = round(timer.perf_counter() - started, 4)
+        return self.assignments, self.report
+
+def improve_assignments(assignments, facilitators, context=None, time_budget=1.0, seed=None, listener=None,
+                        deadline=None, cancel=None, anchors=(), churn_penalty=0.0):
+    """
+    Run the LocalSearch improvement pass on a finished schedule
+    
+    Returns (improved_assignments, report); the input list is not modified. The report
+    holds the initial/final objective, accepted moves per operator, why the search
+    stopped ('local_optimum', 'budget', 'deadline' or 'cancelled') and the objective
+    trajectory. listener, if given, gets an 'objective' event for every accepted move.
+    anchors and churn_penalty make changes to a previous schedule cost (see LocalSearch).
+    """
+    search = LocalSearch(assignments, facilitators, context, seed, listener, anchors, churn_penalty)
+    return search.run(time_budget, deadline, cancel)
+
 def format_session_time(session):
     """
     Format session timing for display
@@ -633,16 +3827,19 @@ def generate_schedule_report_csv(assignments, unit_name="Unit", total_facilitato
     fairness = metrics['fairness_metrics']
     
     # Get unavailability data from database
-    from models import Unavailability, User, Module, FacilitatorSkill
+    from models import Unavailability, User, Module, FacilitatorSkill, expand_unavailability
     
     # Get all facilitators who have assignments
     facilitator_ids = set(a['facilitator']['id'] for a in assignments)
     facilitator_unavailabilities = {}
+    recurring_patterns = {}
     
-    for fac_id in facilitator_ids:
-        # Get unavailabilities for this facilitator
-        unavailabilities = Unavailability.query.filter_by(user_id=fac_id).all()
-        facilitator_unavailabilities[fac_id] = unavailabilities
+    # Unavailability of these facilitators, one entry per date (recurring rules expanded)
+    entries = Unavailability.query.filter(Unavailability.user_id.in_(facilitator_ids)).all() if facilitator_ids else []
+    for entry in entries:
+        recurring_patterns[entry.id] = entry.recurring_pattern
+    for occurrence in expand_unavailability(entries):
+        facilitator_unavailabilities.setdefault(occurrence.user_id, []).append(occurrence)
     
     # Build facilitator statistics
     facilitator_stats = {}
@@ -911,8 +4108,8 @@ def generate_schedule_report_csv(assignments, unit_name="Unit", total_facilitato
                     detail = f"{unavail.date} {unavail.start_time.strftime('%H:%M')}-{unavail.end_time.strftime('%H:%M')}"
                 
                 # Add recurring info if applicable
-                if unavail.recurring_pattern:
-                    detail += f" (Recurring: {unavail.recurring_pattern.value})"
+                if recurring_patterns.get(unavail.unavailability_id):
+                    detail += f" (Recurring: {recurring_patterns[unavail.unavailability_id].value})"
                 
                 unavail_details.append(detail)
             
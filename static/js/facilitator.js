@@ -2724,10 +2724,10 @@ function updateRecentUnavailabilityList() {
                     ${recurringInfo}
                 </div>
                 <div class="item-actions">
-                    <button class="edit-btn" onclick="editUnavailability(${unav.id})">
+                    <button class="edit-btn" onclick="editUnavailability(${unav.id}, '${unav.date}')">
                         <span class="material-icons">edit</span>
                     </button>
-                    <button class="delete-btn" onclick="deleteUnavailability(${unav.id})">
+                    <button class="delete-btn" onclick="deleteUnavailability(${unav.id}, '${unav.date}')">
                         <span class="material-icons">delete</span>
                     </button>
                 </div>
@@ -2764,9 +2764,9 @@ function navigateCalendar(direction) {
     }, 100);
 }
 
-function editUnavailability(unavailabilityId) {
-    // Find the unavailability record
-    const unav = unavailabilityData.find(u => u.id === unavailabilityId);
+function editUnavailability(unavailabilityId, date) {
+    // Find the unavailability record (a recurring rule has one entry per date)
+    const unav = unavailabilityData.find(u => u.id === unavailabilityId && (!date || u.date === date));
     if (!unav) return;
     
     // Open the modal with existing data
@@ -2778,12 +2778,15 @@ function editUnavailability(unavailabilityId) {
     }, 100);
 }
 
-function deleteUnavailability(unavailabilityId) {
+function deleteUnavailability(unavailabilityId, date) {
     if (!confirm('Are you sure you want to delete this unavailability?')) {
         return;
     }
     
-    fetch(`/facilitator/unavailability/${unavailabilityId}`, {
+    // For a recurring rule only the chosen date is removed
+    const unav = unavailabilityData.find(u => u.id === unavailabilityId && u.date === date);
+    const query = unav && unav.recurring_pattern ? `?date=${encodeURIComponent(date)}` : '';
+    fetch(`/facilitator/unavailability/${unavailabilityId}${query}`, {
         method: 'DELETE',
         headers: {
             'X-CSRFToken': window.csrfToken
@@ -4375,6 +4375,7 @@ async function autoAssignFacilitators() {
   if (!autoAssignBtn) return;
 
   // Check validation status first
+  let allowPartial = false;
   try {
     const validationUrl = withUnitId(window.FLASK_ROUTES.AUTO_ASSIGN_TEMPLATE.replace('auto_assign', 'auto_assign/validation'), unitId);
     const validationResponse = await fetch(validationUrl, {
@@ -4402,6 +4403,25 @@ async function autoAssignFacilitators() {
       alert(errorMessage);
       return;
     }
+
+    const feasibility = validationData.feasibility;
+    if (feasibility && !feasibility.feasible) {
+      let warning = `At least ${feasibility.unfillable_slots} of ${feasibility.total_slots} slots cannot be filled with the current facilitators.`;
+      if (feasibility.sessions.length > 0) {
+        warning += '\n\nSessions without enough eligible, available facilitators:';
+        feasibility.sessions.slice(0, 10).forEach(session => {
+          warning += `\n• ${session.module_name} (${session.time}) - ${session.eligible_facilitators} eligible`;
+        });
+      }
+      if (feasibility.windows.length > 0) {
+        warning += `\n\n${feasibility.windows.length} time window(s) have more overlapping slots than available facilitators.`;
+      }
+      warning += '\n\nRun auto-assignment anyway and leave these slots empty?';
+      if (!confirm(warning)) {
+        return;
+      }
+      allowPartial = true;
+    }
   } catch (error) {
     console.error('Validation check error:', error);
     alert('Could not verify prerequisites. Please try again.');
@@ -4414,16 +4434,7 @@ async function autoAssignFacilitators() {
   autoAssignBtn.innerHTML = '<span class="material-icons">hourglass_empty</span>Running Algorithm...';
 
   try {
-    const url = withUnitId(window.FLASK_ROUTES.AUTO_ASSIGN_TEMPLATE, unitId);
-    const response = await fetch(url, {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-        'X-CSRFToken': window.CSRF_TOKEN
-      }
-    });
-
-    const data = await response.json();
+    const data = await runAutoAssignJob(unitId, { allow_partial: allowPartial }, autoAssignBtn);
 
     if (data.ok) {
       // Show success message with details
@@ -4442,7 +4453,20 @@ async function autoAssignFacilitators() {
           message += `\n• ${conflict}`;
         });
       }
-      
+
+      if (data.eligibility) {
+        const noneEligible = Object.values(data.eligibility).filter(summary => summary.eligible === 0);
+        if (noneEligible.length > 0) {
+          message += `\n\n${noneEligible.length} session(s) had no eligible facilitator:`;
+          ['time_conflict', 'no_interest', 'unavailable'].forEach(reason => {
+            const count = noneEligible.filter(summary => summary[reason] > 0).length;
+            if (count > 0) {
+              message += `\n• ${reason.replace('_', ' ')}: ${count}`;
+            }
+          });
+        }
+      }
+
       if (data.metrics) {
         message += `\n\nMetrics:`;
         message += `\n• Average Score: ${data.metrics.avg_score}`;
@@ -4493,6 +4517,8 @@ async function autoAssignFacilitators() {
         showCsvDownloadButton(data.csv_download_url);
       }
       
+    } else if (data.cancelled) {
+      alert(`Auto-assignment cancelled. ${data.error || ''}`);
     } else {
       alert(`Auto-assignment failed: ${data.error}`);
     }
@@ -4502,11 +4528,129 @@ async function autoAssignFacilitators() {
     alert('Failed to auto-assign facilitators. Please try again.');
   } finally {
     // Restore button state
+    hideAutoAssignCancelButton();
     autoAssignBtn.disabled = false;
     autoAssignBtn.innerHTML = originalText;
   }
 }
 
+// Submit auto-assign as a background job and follow its event stream, showing
+// progress on the button. Resolves with the job's auto-assign response.
+async function runAutoAssignJob(unitId, options, autoAssignBtn) {
+  const submitUrl = withUnitId(window.FLASK_ROUTES.AUTO_ASSIGN_TEMPLATE.replace('auto_assign', 'auto_assign/jobs'), unitId);
+  const response = await fetch(submitUrl, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      'X-CSRFToken': window.CSRF_TOKEN
+    },
+    body: JSON.stringify(options)
+  });
+  const submitted = await response.json();
+  if (!submitted.ok) {
+    return submitted;
+  }
+
+  showAutoAssignCancelButton(submitted.cancel_url);
+  const setStatus = (text) => {
+    autoAssignBtn.innerHTML = `<span class="material-icons">hourglass_empty</span>${text}`;
+  };
+  const phaseLabels = {
+    starting: 'Starting...',
+    loading: 'Loading unit data...',
+    checking: 'Checking feasibility...',
+    solving: 'Solving...',
+    improving: 'Improving schedule...',
+    saving: 'Saving assignments...'
+  };
+  let failedSlots = 0;
+
+  await new Promise((resolve) => {
+    const source = new EventSource(submitted.events_url);
+    const finish = () => {
+      source.close();
+      resolve();
+    };
+    source.addEventListener('phase', (event) => {
+      const data = JSON.parse(event.data);
+      setStatus(phaseLabels[data.phase] || data.phase);
+    });
+    source.addEventListener('session', (event) => {
+      const data = JSON.parse(event.data);
+      let text = `Solving ${data.sessions_processed}/${data.sessions_total} sessions`;
+      if (failedSlots > 0) text += `, ${failedSlots} slot(s) unfilled`;
+      if (data.eta !== null && data.eta !== undefined) text += ` (~${Math.ceil(data.eta)}s left)`;
+      setStatus(text);
+    });
+    source.addEventListener('slot_failed', () => {
+      failedSlots += 1;
+    });
+    source.addEventListener('objective', (event) => {
+      const data = JSON.parse(event.data);
+      setStatus(`Improving schedule: objective ${data.objective.toFixed(2)} (at most ${Math.ceil(data.eta)}s left)`);
+    });
+    // Sent instead of the events above when the job runs in another server process
+    source.addEventListener('progress', (event) => {
+      const data = JSON.parse(event.data);
+      let text = phaseLabels[data.phase] || data.phase;
+      if (data.sessions_total > 0) text += ` ${data.sessions_processed}/${data.sessions_total} sessions`;
+      setStatus(text);
+    });
+    source.addEventListener('done', finish);
+    source.onerror = () => {
+      // The browser reconnects on its own unless the stream is closed for good
+      if (source.readyState === EventSource.CLOSED) finish();
+    };
+  });
+
+  const statusResponse = await fetch(submitted.status_url);
+  const status = await statusResponse.json();
+  if (status.result) {
+    return status.result;
+  }
+  const job = status.job || {};
+  return { ok: false, cancelled: job.status === 'cancelled', error: job.error || `Job ${job.status}` };
+}
+
+function showAutoAssignCancelButton(cancelUrl) {
+  const autoAssignBtn = document.querySelector('.auto-assign-btn');
+  if (!autoAssignBtn) return;
+
+  let cancelBtn = document.getElementById('auto-assign-cancel-btn');
+  if (!cancelBtn) {
+    cancelBtn = document.createElement('button');
+    cancelBtn.id = 'auto-assign-cancel-btn';
+    cancelBtn.className = 'btn btn-secondary ml-2';
+    cancelBtn.style.cssText = 'margin-left: 10px; display: inline-flex; align-items: center; gap: 5px;';
+    autoAssignBtn.parentNode.insertBefore(cancelBtn, autoAssignBtn.nextSibling);
+  }
+  cancelBtn.innerHTML = '<span class="material-icons">cancel</span>Cancel';
+  cancelBtn.disabled = false;
+  cancelBtn.style.display = 'inline-flex';
+  cancelBtn.onclick = async () => {
+    cancelBtn.disabled = true;
+    cancelBtn.innerHTML = '<span class="material-icons">hourglass_empty</span>Cancelling...';
+    try {
+      await fetch(cancelUrl, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'X-CSRFToken': window.CSRF_TOKEN
+        }
+      });
+    } catch (error) {
+      console.error('Cancel auto-assign error:', error);
+    }
+  };
+}
+
+function hideAutoAssignCancelButton() {
+  const cancelBtn = document.getElementById('auto-assign-cancel-btn');
+  if (cancelBtn) {
+    cancelBtn.style.display = 'none';
+  }
+}
+
 function showCsvDownloadButton(downloadUrl) {
   // Find or create a container for the download button
   const autoAssignBtn = document.querySelector('.auto-assign-btn');
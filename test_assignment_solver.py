@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test script for the assignment-problem solver mode of the optimization engine.
+
+This test verifies:
+1. solve_linear_assignment() finds the optimum of small cost matrices (brute force)
+2. group_sessions_into_cliques() only groups sessions that all overlap
+3. mode='assignment' respects the hard constraints and staffs a clique the greedy pass cannot
+4. 1000 sessions solve within a few seconds
+"""
+
+import sys
+import os
+import random
+import time as timer
+from datetime import datetime, timedelta
+from itertools import permutations
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import SkillLevel
+from benchmark_optimization_engine import build_synthetic_problem
+from optimization_engine import (
+    ConstraintContext,
+    check_availability,
+    check_skill_constraint,
+    generate_optimal_assignments,
+    group_sessions_into_cliques,
+    solve_linear_assignment
+)
+
+
+def _session(session_id, module_id, start, hours, location='EZONE 1.01'):
+    end = start + timedelta(hours=hours)
+    return {
+        'id': session_id,
+        'module_id': module_id,
+        'unit_id': 1,
+        'module_name': f"Module {module_id}",
+        'day_of_week': start.weekday(),
+        'start_time': start.time(),
+        'end_time': end.time(),
+        'date': start.date(),
+        'start_datetime': start,
+        'end_datetime': end,
+        'duration_hours': float(hours),
+        'required_skill_level': SkillLevel.HAVE_SOME_SKILL,
+        'location': location,
+        'lead_staff_required': 1,
+        'support_staff_required': 0
+    }
+
+
+def _facilitator(facilitator_id, skills):
+    return {
+        'id': facilitator_id,
+        'name': f"Facilitator {facilitator_id}",
+        'email': f"fac{facilitator_id}@example.com",
+        'min_hours': 0,
+        'max_hours': 20,
+        'skills': skills,
+        'availability': {}
+    }
+
+
+def test_hungarian_matches_brute_force():
+    """Test the Hungarian algorithm against every permutation on small matrices"""
+    print("\n" + "="*80)
+    print("TEST 1: solve_linear_assignment() vs brute force")
+    print("="*80)
+
+    rng = random.Random(9)
+    for _ in range(200):
+        rows = rng.randint(1, 5)
+        cols = rng.randint(rows, 6)
+        cost = [[rng.choice([rng.uniform(-2, 2), 1e9]) for _ in range(cols)] for _ in range(rows)]
+        chosen = solve_linear_assignment(cost)
+        assert len(set(chosen)) == rows, "❌ FAILED: a column was used twice"
+        got = sum(cost[r][c] for r, c in enumerate(chosen))
+        best = min(sum(cost[r][c] for r, c in enumerate(perm)) for perm in permutations(range(cols), rows))
+        assert abs(got - best) < 1e-6, f"❌ FAILED: {got} is not the optimum {best}"
+    print("  ✅ PASSED: 200 random matrices solved optimally")
+
+
+def test_cliques_share_an_instant():
+    """Test that every clique has a common instant and that cliques cover all sessions"""
+    print("\n" + "="*80)
+    print("TEST 2: group_sessions_into_cliques()")
+    print("="*80)
+
+    _, context = build_synthetic_problem(300, facilitator_count=5, seed=3)
+    cliques = group_sessions_into_cliques(context.sessions)
+    assert sum(len(c) for c in cliques) == len(context.sessions), "❌ FAILED: sessions lost or duplicated"
+    for clique in cliques:
+        latest_start = max(s['start_datetime'] for s in clique)
+        earliest_end = min(s['end_datetime'] for s in clique)
+        assert latest_start < earliest_end, "❌ FAILED: clique contains non-overlapping sessions"
+    print(f"  ✅ PASSED: {len(cliques)} cliques, all pairwise overlapping")
+
+
+def test_assignment_mode_staffs_tight_clique():
+    """Test a clique where taking the best candidate first leaves a lead slot empty"""
+    print("\n" + "="*80)
+    print("TEST 3: mode='assignment' vs mode='greedy' on a tight clique")
+    print("="*80)
+
+    start = datetime(2025, 8, 4, 9, 0)
+    # The longer session is placed first by the greedy pass and grabs the proficient facilitator
+    sessions = [_session(1, 1, start, 3), _session(2, 2, start + timedelta(hours=1), 1, 'EZONE 2.15')]
+    facilitators = [
+        _facilitator(1, {1: SkillLevel.PROFICIENT, 2: SkillLevel.PROFICIENT}),
+        _facilitator(2, {1: SkillLevel.HAVE_SOME_SKILL, 2: SkillLevel.NO_INTEREST}),
+    ]
+
+    greedy, greedy_conflicts = generate_optimal_assignments(facilitators, context=ConstraintContext(sessions, {}))
+    assigned, conflicts = generate_optimal_assignments(facilitators, context=ConstraintContext(sessions, {}), mode='assignment')
+    print(f"  Greedy: {len(greedy)} assignments, {len(greedy_conflicts)} conflicts")
+    print(f"  Assignment: {len(assigned)} assignments, {len(conflicts)} conflicts")
+
+    assert len(assigned) == 2 and not conflicts, "❌ FAILED: assignment mode should staff both sessions"
+    by_session = {a['session']['id']: a['facilitator']['id'] for a in assigned}
+    assert by_session == {1: 2, 2: 1}, f"❌ FAILED: unexpected assignment {by_session}"
+    assert all(a['role'] == 'lead' and a['score'] > 0 for a in assigned)
+    print("  ✅ PASSED: both lead slots filled")
+
+
+def test_assignment_mode_constraints_and_speed():
+    """Test hard constraints and run time on 1000 sessions"""
+    print("\n" + "="*80)
+    print("TEST 4: mode='assignment' on 1000 sessions")
+    print("="*80)
+
+    facilitators, context = build_synthetic_problem(1000, facilitator_count=60, seed=1)
+    started = timer.perf_counter()
+    assignments, conflicts = generate_optimal_assignments(facilitators, context=context, mode='assignment')
+    elapsed = timer.perf_counter() - started
+    print(f"  Assignments: {len(assignments)}, conflicts: {len(conflicts)}, {elapsed:.2f}s")
+    assert elapsed < 10, "❌ FAILED: assignment mode took too long"
+
+    per_facilitator = {}
+    for assignment in assignments:
+        facilitator, session = assignment['facilitator'], assignment['session']
+        assert check_skill_constraint(facilitator, session), "❌ FAILED: NO_INTEREST facilitator assigned"
+        assert check_availability(facilitator, session, context) == 1.0, "❌ FAILED: unavailable facilitator assigned"
+        per_facilitator.setdefault(facilitator['id'], []).append(session)
+
+    for sessions in per_facilitator.values():
+        sessions.sort(key=lambda s: s['start_datetime'])
+        for earlier, later in zip(sessions, sessions[1:]):
+            assert later['start_datetime'] >= earlier['end_datetime'], "❌ FAILED: facilitator double-booked"
+    print("  ✅ PASSED: no skill, availability or overlap violations")
+
+
+if __name__ == "__main__":
+    try:
+        test_hungarian_matches_brute_force()
+        test_cliques_share_an_instant()
+        test_assignment_mode_staffs_tight_clique()
+        test_assignment_mode_constraints_and_speed()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
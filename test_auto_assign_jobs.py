@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Test script for background auto-assign jobs.
+
+This test verifies:
+1. Submitting a job returns its id at once and the worker thread runs it to completion,
+   with phase, sessions processed and result readable through the status endpoints
+2. The solver listener reports phases, every processed session and LocalSearch objectives,
+   and attaching it does not change the schedule
+3. A job that fails part-way leaves the previous schedule untouched
+4. A second job for a unit with one still running is refused
+5. A job row left QUEUED/RUNNING by a process that died (stale heartbeat) does not block
+   the unit: a new submit closes it as failed, and cancelling it closes it at once
+6. A cancel accepted by another process after the job's last progress write, or the job
+   being closed as orphaned meanwhile, discards the staged schedule and keeps that status
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from models import (
+    db, User, UserRole, Unit, Module, Session, Assignment, UnitFacilitator,
+    FacilitatorSkill, SkillLevel, AutoAssignJob, JobStatus
+)
+from benchmark_optimization_engine import build_synthetic_problem
+from optimization_engine import generate_optimal_assignments
+from jobs import JobRunner, new_job_id
+from unitcoordinator_routes import unitcoordinator_bp, _auto_assign_job
+
+
+def _build_app(db_path):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['AUTO_ASSIGN_JOB_WORKERS'] = 1
+    db.init_app(app)
+    app.register_blueprint(unitcoordinator_bp)
+    app.add_url_rule('/login', 'login', lambda: 'login')
+    with app.app_context():
+        db.create_all()
+        coordinator = User(email='uc@example.com', first_name='Unit', last_name='Coordinator', role=UserRole.UNIT_COORDINATOR)
+        db.session.add(coordinator)
+        db.session.commit()
+        unit = Unit(unit_code='CITS3200', unit_name='Jobs', year=2025, semester='S2', created_by=coordinator.id)
+        db.session.add(unit)
+        db.session.commit()
+        modules = [Module(unit_id=unit.id, module_name=f"Lab {i}", module_type='lab') for i in (1, 2)]
+        db.session.add_all(modules)
+        db.session.commit()
+
+        facilitators = []
+        for i in range(6):
+            facilitator = User(email=f'fac{i}@example.com', first_name='Fac', last_name=str(i), role=UserRole.FACILITATOR)
+            db.session.add(facilitator)
+            facilitators.append(facilitator)
+        db.session.commit()
+        for i, facilitator in enumerate(facilitators):
+            db.session.add(UnitFacilitator(unit_id=unit.id, user_id=facilitator.id))
+            for module in modules:
+                level = SkillLevel.PROFICIENT if (i + module.id) % 2 else SkillLevel.HAVE_SOME_SKILL
+                db.session.add(FacilitatorSkill(facilitator_id=facilitator.id, module_id=module.id, skill_level=level))
+
+        start = datetime(2025, 8, 4, 9, 0)
+        for i in range(20):
+            begin = start + timedelta(days=i // 4, hours=2 * (i % 4))
+            db.session.add(Session(module_id=modules[i % 2].id, session_type='lab', start_time=begin,
+                                   end_time=begin + timedelta(hours=2), location='Lab A'))
+        db.session.commit()
+        db.session.add(Assignment(session_id=1, facilitator_id=facilitators[0].id, role='lead'))
+        db.session.commit()
+        ids = (coordinator.id, unit.id)
+    return app, ids
+
+
+def _client(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as flask_session:
+        flask_session['user_id'] = user_id
+    return client
+
+
+def test_job_runs_in_background():
+    """Test submit -> progress polling -> committed result"""
+    print("\n" + "="*80)
+    print("TEST 1: Background job and status endpoints")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='auto_assign_jobs_')
+    try:
+        app, (coordinator_id, unit_id) = _build_app(os.path.join(workdir, 'jobs.db'))
+        client = _client(app, coordinator_id)
+
+        response = client.post(f'/unitcoordinator/units/{unit_id}/auto_assign/jobs', json={'improve_seconds': 0.2})
+        assert response.status_code == 202, f"❌ FAILED: submit returned {response.status_code}"
+        job_id = response.get_json()['job_id']
+        print(f"  Submitted job {job_id}")
+
+        deadline = time.time() + 60
+        phases = []
+        while True:
+            job = client.get(f'/unitcoordinator/units/{unit_id}/auto_assign/jobs/{job_id}/progress').get_json()['job']
+            if not phases or phases[-1] != job['phase']:
+                phases.append(job['phase'])
+            if job['status'] in ('succeeded', 'failed'):
+                break
+            assert time.time() < deadline, "❌ FAILED: job did not finish"
+            time.sleep(0.05)
+        print(f"  Phases seen: {phases}")
+
+        status = client.get(f'/unitcoordinator/units/{unit_id}/auto_assign/jobs/{job_id}').get_json()
+        assert status['job']['status'] == 'succeeded', f"❌ FAILED: {status['job']['error']}"
+        assert status['job']['phase'] == 'done'
+        assert status['job']['sessions_processed'] == status['job']['sessions_total'] == 20
+        assert status['result']['ok'] and 'csv_report' not in status['result']
+        with client.session_transaction() as flask_session:
+            assert f'schedule_report_{unit_id}' in flask_session, "❌ FAILED: CSV report not handed to the session"
+
+        with app.app_context():
+            saved = Assignment.query.count()
+            assert saved == len(status['result']['assignments']) == 20, f"❌ FAILED: {saved} rows saved"
+        print(f"  ✅ PASSED: {saved} assignments committed by the job")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_listener_events():
+    """Test the solver listener protocol"""
+    print("\n" + "="*80)
+    print("TEST 2: Solver listener events")
+    print("="*80)
+
+    for mode in ('greedy', 'assignment'):
+        facilitators, context = build_synthetic_problem(120, facilitator_count=8, seed=4)
+        events = []
+        assignments, _ = generate_optimal_assignments(
+            facilitators, context=context, seed=3, mode=mode, scoring='compiled' if mode == 'greedy' else 'scalar',
+            improve_seconds=0.3, listener=events.append
+        )
+        phases = [e['phase'] for e in events if e['event'] == 'phase']
+        processed = [e['sessions_processed'] for e in events if e['event'] == 'session']
+        objectives = [e['objective'] for e in events if e['event'] == 'objective']
+        print(f"  {mode}: phases {phases}, {len(processed)} session events, {len(objectives)} objective events")
+        assert phases == ['solving', 'improving']
+        assert processed == list(range(1, 121)), f"❌ FAILED: {mode} did not report every session once"
+        assert objectives == sorted(objectives), "❌ FAILED: accepted moves must not lower the objective"
+
+        facilitators, context = build_synthetic_problem(120, facilitator_count=8, seed=4)
+        quiet, _ = generate_optimal_assignments(
+            facilitators, context=context, seed=3, mode=mode, scoring='compiled' if mode == 'greedy' else 'scalar'
+        )
+        noisy_facilitators, noisy_context = build_synthetic_problem(120, facilitator_count=8, seed=4)
+        noisy, _ = generate_optimal_assignments(
+            noisy_facilitators, context=noisy_context, seed=3, mode=mode,
+            scoring='compiled' if mode == 'greedy' else 'scalar', listener=lambda event: None
+        )
+        assert [(a['session']['id'], a['facilitator']['id']) for a in quiet] == \
+            [(a['session']['id'], a['facilitator']['id']) for a in noisy], "❌ FAILED: listener changed the schedule"
+    print("  ✅ PASSED: phases, per-session progress and objectives reported")
+
+
+def test_failed_job_keeps_schedule():
+    """Test that nothing a failing job staged is committed"""
+    print("\n" + "="*80)
+    print("TEST 3: Atomic results")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='auto_assign_jobs_')
+    try:
+        app, (coordinator_id, unit_id) = _build_app(os.path.join(workdir, 'jobs.db'))
+        runner = JobRunner(max_workers=0)
+
+        def failing_target(job, progress, options):
+            for assignment in Assignment.query.all():
+                db.session.delete(assignment)
+            db.session.add(Assignment(session_id=2, facilitator_id=3, role='lead'))
+            progress({'event': 'phase', 'phase': 'saving'})
+            raise RuntimeError("disk full")
+
+        with app.app_context():
+            for target, expected in ((failing_target, "disk full"), (_auto_assign_job, None)):
+                job = AutoAssignJob(id=new_job_id(), unit_id=unit_id, created_by=coordinator_id)
+                db.session.add(job)
+                db.session.commit()
+                runner.submit(job.id, target, {'mode': 'greedy', 'improve_seconds': 0, 'starts': 1, 'seed': 1,
+                                               'repair': False, 'allow_partial': False})
+                db.session.expire_all()
+                job = db.session.get(AutoAssignJob, job.id)
+                print(f"  {target.__name__}: {job.status.value}, phase {job.phase}, error {job.error!r}")
+                if expected:
+                    assert job.status == JobStatus.FAILED and job.error == expected
+                    rows = [(a.session_id, a.facilitator_id) for a in Assignment.query.all()]
+                    assert rows == [(1, 2)], f"❌ FAILED: a failed job changed the schedule: {rows}"
+                else:
+                    assert job.status == JobStatus.SUCCEEDED and Assignment.query.count() == 20
+        print("  ✅ PASSED: failed job rolled back, successful job committed")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_one_job_per_unit():
+    """Test that a unit with a job in flight refuses another"""
+    print("\n" + "="*80)
+    print("TEST 4: One running job per unit")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='auto_assign_jobs_')
+    try:
+        app, (coordinator_id, unit_id) = _build_app(os.path.join(workdir, 'jobs.db'))
+        with app.app_context():
+            running = AutoAssignJob(id=new_job_id(), unit_id=unit_id, created_by=coordinator_id, status=JobStatus.RUNNING)
+            db.session.add(running)
+            db.session.commit()
+            running_id = running.id
+
+        client = _client(app, coordinator_id)
+        response = client.post(f'/unitcoordinator/units/{unit_id}/auto_assign/jobs', json={})
+        assert response.status_code == 409 and response.get_json()['job_id'] == running_id
+        assert client.get(f'/unitcoordinator/units/{unit_id}/auto_assign/jobs/unknown').status_code == 404
+        print("  ✅ PASSED: second job refused with the running job's id")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_orphaned_job_is_recovered():
+    """Test that a job whose runner died stops blocking its unit"""
+    print("\n" + "="*80)
+    print("TEST 5: Orphaned jobs")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='auto_assign_jobs_')
+    try:
+        app, (coordinator_id, unit_id) = _build_app(os.path.join(workdir, 'jobs.db'))
+        app.config['AUTO_ASSIGN_JOB_STALE_SECONDS'] = 60
+        long_ago = datetime.utcnow() - timedelta(minutes=10)
+        with app.app_context():
+            # Rows a killed worker left behind: no runner here owns them, no recent heartbeat
+            orphans = {}
+            for status in (JobStatus.RUNNING, JobStatus.QUEUED):
+                job = AutoAssignJob(id=new_job_id(), unit_id=unit_id, created_by=coordinator_id, status=status,
+                                    created_at=long_ago, updated_at=long_ago)
+                db.session.add(job)
+                orphans[status] = job.id
+            db.session.commit()
+
+        client = _client(app, coordinator_id)
+        base = f'/unitcoordinator/units/{unit_id}/auto_assign/jobs'
+        response = client.post(f'{base}/{orphans[JobStatus.QUEUED]}/cancel')
+        assert response.status_code == 200 and response.get_json()['job']['status'] == JobStatus.CANCELLED.value, \
+            "❌ FAILED: cancelling an orphaned job left it open"
+
+        response = client.post(base, json={})
+        assert response.status_code == 202, "❌ FAILED: an orphaned job still blocks the unit"
+        new_id = response.get_json()['job_id']
+        with app.app_context():
+            orphan = db.session.get(AutoAssignJob, orphans[JobStatus.RUNNING])
+            assert orphan.status == JobStatus.FAILED and orphan.finished_at and 'stopped' in orphan.error
+            assert orphan.cancel_requested
+        deadline = time.time() + 60
+        while client.get(f'{base}/{new_id}/progress').get_json()['job']['status'] not in ('succeeded', 'failed'):
+            assert time.time() < deadline, "❌ FAILED: job did not finish"
+            time.sleep(0.05)
+
+        # A job with a fresh heartbeat in another process still blocks, and cancel only flags it
+        with app.app_context():
+            live = AutoAssignJob(id=new_job_id(), unit_id=unit_id, created_by=coordinator_id, status=JobStatus.RUNNING)
+            db.session.add(live)
+            db.session.commit()
+            live_id = live.id
+        assert client.post(base, json={}).status_code == 409
+        body = client.post(f'{base}/{live_id}/cancel').get_json()
+        assert body['job']['status'] == JobStatus.RUNNING.value and body['job']['cancel_requested']
+        print("  ✅ PASSED: orphaned rows closed, live ones still respected")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_late_cancel_discards_results():
+    """Test that a job cancelled or closed while it saves does not commit"""
+    print("\n" + "="*80)
+    print("TEST 6: Cancelled while saving")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='auto_assign_jobs_')
+    try:
+        db_path = os.path.join(workdir, 'jobs.db')
+        app, (coordinator_id, unit_id) = _build_app(db_path)
+        runner = JobRunner(max_workers=0)
+        # Another worker process, writing to the job row through its own connection
+        elsewhere = sa.create_engine(f'sqlite:///{db_path}')
+        jobs = AutoAssignJob.__table__
+        closes = {
+            JobStatus.CANCELLED: {'cancel_requested': True},
+            JobStatus.FAILED: {'cancel_requested': True, 'status': JobStatus.FAILED, 'phase': 'failed',
+                               'error': 'The server running this job stopped', 'finished_at': datetime.utcnow()},
+        }
+
+        with app.app_context():
+            for expected, values in closes.items():
+                def target(job, progress, options):
+                    for assignment in Assignment.query.all():
+                        db.session.delete(assignment)
+                    db.session.add(Assignment(session_id=2, facilitator_id=3, role='lead'))
+                    progress({'event': 'phase', 'phase': 'saving'})
+                    with elsewhere.begin() as connection:
+                        connection.execute(jobs.update().where(jobs.c.id == job.id).values(**values))
+                    return {'ok': True}, True
+
+                job = AutoAssignJob(id=new_job_id(), unit_id=unit_id, created_by=coordinator_id)
+                db.session.add(job)
+                db.session.commit()
+                runner.submit(job.id, target, {})
+                db.session.expire_all()
+                job = db.session.get(AutoAssignJob, job.id)
+                print(f"  {expected.value} elsewhere: {job.status.value}, phase {job.phase}")
+                assert job.status == expected, f"❌ FAILED: the runner overwrote a {expected.value} job"
+                assert expected != JobStatus.FAILED or 'stopped' in job.error
+                rows = [(a.session_id, a.facilitator_id) for a in Assignment.query.all()]
+                assert rows == [(1, 2)], f"❌ FAILED: a cancelled job changed the schedule: {rows}"
+        elsewhere.dispose()
+        print("  ✅ PASSED: late cancels and orphan closes win over the runner")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    try:
+        test_job_runs_in_background()
+        test_listener_events()
+        test_failed_job_keeps_schedule()
+        test_one_job_per_unit()
+        test_orphaned_job_is_recovered()
+        test_late_cancel_discards_results()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Test script for compiled availability bitmaps.
+
+This test verifies:
+1. A bit-range test gives the same answer as the ConstraintContext overlap rule for
+   full-day, timed and recurring entries, and "who is free" matches asking one by one
+2. Times off the 15-minute grid are rounded outward in the bitmaps, never reporting a
+   blocked session free, and a hit is confirmed against the exact times, so off-grid
+   times that only share a slot are not a conflict
+3. The cache compiles a unit once; an edit through the routes rebuilds only the edited
+   facilitator's row, and a bulk delete invalidates the cache
+4. check_availability, the swap availability check and the UC conflict list answer from
+   the bitmaps
+5. Writes made outside this process's session events (another worker, raw SQL on another
+   engine) are picked up on the next lookup, rebuilding only the changed facilitators
+"""
+
+import sys
+import os
+import random
+import shutil
+import tempfile
+from datetime import date, datetime, time, timedelta
+
+import sqlalchemy as sa
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import db, Session, Unavailability, UnavailabilityException, UnavailabilityOccurrence
+from facilitator_routes import facilitator_bp, check_facilitator_availability
+from optimization_engine import (
+    AVAILABILITY_CACHE, AvailabilityBitmap, ConstraintContext, UnitAvailability, check_availability,
+    count_queries, get_real_sessions, slot_range
+)
+from test_auto_assign_jobs import _build_app, _client
+
+
+def _occurrence(user_id, day, start=None, end=None):
+    return UnavailabilityOccurrence(None, user_id, 1, day, start, end, start is None, None)
+
+
+def test_bitmap_matches_overlap_rule():
+    """Test the bit-range test and the transposed view against the context"""
+    print("\n" + "="*80)
+    print("TEST 1: Bit-range tests")
+    print("="*80)
+
+    rng = random.Random(7)
+    first_day = date(2025, 8, 4)
+    occurrences = {}
+    for user_id in range(1, 41):
+        for _ in range(rng.randint(0, 12)):
+            day = first_day + timedelta(days=rng.randint(0, 27))
+            if rng.random() < 0.2:
+                entry = _occurrence(user_id, day)
+            else:
+                start = rng.randint(28, 76)
+                end = start + rng.randint(1, 16)
+                entry = _occurrence(user_id, day, time(start // 4, start % 4 * 15), time(end // 4, end % 4 * 15))
+            occurrences.setdefault(user_id, []).append(entry)
+
+    unit = UnitAvailability(1)
+    unavailability = {}
+    for user_id, entries in occurrences.items():
+        unit.set_row(user_id, AvailabilityBitmap(entries))
+        for o in entries:
+            unavailability.setdefault((user_id, 1, o.date), []).append((o.is_full_day, o.start_time, o.end_time))
+    context = ConstraintContext([], unavailability)
+
+    checked = 0
+    for _ in range(500):
+        day = first_day + timedelta(days=rng.randint(0, 27))
+        start = rng.randint(28, 80)
+        begin, finish = time(start // 4, start % 4 * 15), time((start + 8) // 4, (start + 8) % 4 * 15)
+        session = {'date': day, 'start_time': begin, 'end_time': finish, 'unit_id': 1}
+        expected = [u for u in range(1, 41) if context.is_available(u, session) == 1.0]
+        assert [u for u in range(1, 41) if unit.is_free(u, day, begin, finish)] == expected, \
+            f"❌ FAILED: bitmap disagrees with the overlap rule on {day} {begin}"
+        assert unit.free_facilitators(range(1, 41), day, begin, finish) == expected
+        checked += 1
+    print(f"  {checked} sessions checked against 40 facilitators")
+
+    # Replacing a row updates the transposed view
+    unit.set_row(1, AvailabilityBitmap([_occurrence(1, first_day)]))
+    assert unit.free_facilitators([1], first_day, time(9), time(10)) == []
+    unit.set_row(1, AvailabilityBitmap())
+    assert unit.free_facilitators([1], first_day, time(9), time(10)) == [1] and 1 not in unit.rows
+    assert not any(column & 1 for column in unit.columns.values())
+    print("  ✅ PASSED: bit-range and who-is-free answers match the overlap rule")
+
+
+def test_off_grid_times():
+    """Test that times off the grid are rounded outward and confirmed exactly"""
+    print("\n" + "="*80)
+    print("TEST 2: Off-grid times")
+    print("="*80)
+
+    day = date(2025, 8, 4)
+    first, last = slot_range(day, time(9, 5), time(9, 50))
+    assert last - first == 4 and slot_range(day)[1] - slot_range(day)[0] == 96
+    bitmap = AvailabilityBitmap([_occurrence(2, day, time(9, 5), time(9, 50))])
+    assert not bitmap.is_free(*slot_range(day, time(9, 45), time(11)))
+    assert bitmap.is_free(*slot_range(day, time(10), time(11)))
+    assert bitmap.is_free(*slot_range(day + timedelta(days=1), time(9), time(10)))
+    assert len(bitmap.blocking(*slot_range(day, time(8), time(9, 15)))) == 1
+    print("  ✅ PASSED: partial slots count as unavailable")
+
+    # 9:00-10:05 and 10:10-11:00 share the 10:00 slot without overlapping
+    unit = UnitAvailability(1)
+    unit.set_row(2, AvailabilityBitmap([_occurrence(2, day, time(9), time(10, 5))]))
+    context = ConstraintContext([], {(2, 1, day): [(False, time(9), time(10, 5))]})
+    for begin, finish, free in ((time(10, 10), time(11), True), (time(10), time(10, 10), False),
+                                (time(8), time(9, 1), False), (time(8, 50), time(9), True)):
+        session = {'date': day, 'start_time': begin, 'end_time': finish, 'unit_id': 1}
+        assert (context.is_available(2, session) == 1.0) == free
+        assert unit.is_free(2, day, begin, finish) == free, f"❌ FAILED: {begin}-{finish} should be free={free}"
+        assert unit.free_facilitators([2], day, begin, finish) == ([2] if free else [])
+        assert unit.free_between([2], datetime.combine(day, begin), datetime.combine(day, finish)) == ([2] if free else [])
+        assert len(unit.blocking(2, day, begin, finish)) == (0 if free else 1)
+    print("  ✅ PASSED: adjacent off-grid times are not a conflict")
+
+
+def test_cache_rebuilds_incrementally():
+    """Test the compile-once cache and its incremental rebuilds"""
+    print("\n" + "="*80)
+    print("TEST 3: Cached and incrementally rebuilt")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='bitmaps_')
+    try:
+        app, (_, unit_id) = _build_app(os.path.join(workdir, 'bitmaps.db'))
+        app.register_blueprint(facilitator_bp)
+        with app.app_context():
+            first_day = db.session.get(Session, 1).start_time.date()
+            for user_id in (3, 4):
+                db.session.add(Unavailability(user_id=user_id, unit_id=unit_id, date=first_day, is_full_day=True))
+            db.session.commit()
+
+            builds = AVAILABILITY_CACHE.stats['builds']
+            compiled = AVAILABILITY_CACHE.unit(unit_id)
+            untouched = compiled.rows[4]
+            counter = {}
+            with count_queries(counter, 'queries'):
+                assert AVAILABILITY_CACHE.unit(unit_id) is compiled
+            assert AVAILABILITY_CACHE.stats['builds'] == builds + 1 and counter['queries'] == 0
+        print(f"  Built once, cached lookups run {counter['queries']} queries")
+
+        client = _client(app, 3)
+        rule_id = client.post('/facilitator/unavailability/generate-recurring', json={
+            'unit_id': unit_id, 'date': (first_day + timedelta(days=1)).isoformat(), 'recurring_pattern': 'daily',
+            'recurring_end_date': (first_day + timedelta(days=3)).isoformat(), 'is_full_day': False,
+            'start_time': '09:00', 'end_time': '10:00'
+        }).get_json()['rule_id']
+        with app.app_context():
+            rebuilds = AVAILABILITY_CACHE.stats['rebuilds']
+            compiled = AVAILABILITY_CACHE.unit(unit_id)
+            assert AVAILABILITY_CACHE.stats['rebuilds'] == rebuilds + 1
+            assert compiled.rows[4] is untouched, "❌ FAILED: an edit recompiled other facilitators"
+            assert not compiled.is_free(3, first_day + timedelta(days=2), time(9, 30), time(11))
+
+        assert client.delete(f'/facilitator/unavailability/{rule_id}?date={(first_day + timedelta(days=2)).isoformat()}').status_code == 200
+        with app.app_context():
+            compiled = AVAILABILITY_CACHE.unit(unit_id)
+            assert compiled.is_free(3, first_day + timedelta(days=2), time(9, 30), time(11))
+            assert not compiled.is_free(3, first_day + timedelta(days=3), time(9, 30), time(11))
+
+            invalidations = AVAILABILITY_CACHE.stats['invalidations']
+            Unavailability.query.filter_by(user_id=4).delete()
+            db.session.commit()
+            assert AVAILABILITY_CACHE.stats['invalidations'] > invalidations
+            assert AVAILABILITY_CACHE.unit(unit_id).is_free(4, first_day)
+        print("  ✅ PASSED: only the edited facilitator is rebuilt, bulk deletes invalidate")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_readers_use_bitmaps():
+    """Test the engine, swap and UC conflict checks"""
+    print("\n" + "="*80)
+    print("TEST 4: Availability readers")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='bitmaps_')
+    try:
+        app, (coordinator_id, unit_id) = _build_app(os.path.join(workdir, 'bitmaps.db'))
+        with app.app_context():
+            session = db.session.get(Session, 1)
+            day, start, end = session.start_time.date(), session.start_time.time(), session.end_time.time()
+            # Facilitator 2 holds session 1 and is away for its second half only
+            db.session.add(Unavailability(user_id=2, unit_id=unit_id, date=day, start_time=time(10), end_time=time(12)))
+            db.session.commit()
+
+            sessions = {s['id']: s for s in get_real_sessions(unit_id)}
+            AVAILABILITY_CACHE.unit(unit_id)
+            counter = {}
+            with count_queries(counter, 'queries'):
+                answers = [check_availability({'id': 2}, s) for s in sessions.values()]
+            print(f"  {len(answers)} check_availability calls, {counter['queries']} queries")
+            assert counter['queries'] == 0 and answers.count(0.0) == 2
+            assert check_facilitator_availability(2, day, start, end, unit_id)[0] is False, \
+                "❌ FAILED: a partial overlap was reported free for a swap"
+            assert check_facilitator_availability(3, day, start, end, unit_id)[0] is True
+
+        body = _client(app, coordinator_id).get(f'/unitcoordinator/units/{unit_id}/conflicts').get_json()
+        flagged = [c for c in body['conflicts'] if c['type'] == 'unavailability_conflict']
+        assert [c['session']['id'] for c in flagged] == [1] and flagged[0]['unavailability']['start_time'] == '10:00:00'
+        print("  ✅ PASSED: partial overlaps are conflicts everywhere, no per-check queries")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_writes_from_other_processes():
+    """Test that the database stamps catch writes the session events never saw"""
+    print("\n" + "="*80)
+    print("TEST 5: Writes from another process")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='bitmaps_')
+    try:
+        app, (_, unit_id) = _build_app(os.path.join(workdir, 'bitmaps.db'))
+        with app.app_context():
+            session = db.session.get(Session, 1)
+            day, start, end = session.start_time.date(), session.start_time.time(), session.end_time.time()
+            db.session.add(Unavailability(user_id=4, unit_id=unit_id, date=day + timedelta(days=1), is_full_day=True))
+            db.session.commit()
+            compiled = AVAILABILITY_CACHE.unit(unit_id)
+            untouched = compiled.rows[4]
+            assert compiled.is_free(3, day, start, end)
+            url = str(db.engine.url)
+
+        # Another worker: its own engine, no ORM session, so none of this process's listeners fire
+        other = sa.create_engine(url)
+        table, exceptions = Unavailability.__table__, UnavailabilityException.__table__
+        now = datetime.utcnow()
+        with other.begin() as connection:
+            entry_id = connection.execute(table.insert().values(
+                user_id=3, unit_id=unit_id, date=day, start_time=time(10), end_time=time(10, 30), is_full_day=False,
+                recurring_pattern='DAILY', recurring_interval=1, recurring_end_date=day + timedelta(days=2),
+                created_at=now, updated_at=now
+            )).inserted_primary_key[0]
+
+        with app.app_context():
+            rebuilds = AVAILABILITY_CACHE.stats['rebuilds']
+            compiled = AVAILABILITY_CACHE.unit(unit_id)
+            assert not compiled.is_free(3, day, start, end), "❌ FAILED: a write from another process was not seen"
+            assert AVAILABILITY_CACHE.stats['rebuilds'] == rebuilds + 1 and compiled.rows[4] is untouched
+            sessions = {s['id']: s for s in get_real_sessions(unit_id)}
+            assert check_availability({'id': 3}, sessions[1]) == 0.0
+
+        # A removed occurrence, then the exception edited in place
+        with other.begin() as connection:
+            connection.execute(exceptions.insert().values(
+                unavailability_id=entry_id, date=day, is_removed=True, created_at=now, updated_at=now))
+        with app.app_context():
+            assert AVAILABILITY_CACHE.unit(unit_id).is_free(3, day, start, end)
+            assert not AVAILABILITY_CACHE.unit(unit_id).is_free(3, day + timedelta(days=1), start, end)
+        with other.begin() as connection:
+            connection.execute(exceptions.update().where(exceptions.c.unavailability_id == entry_id)
+                               .values(is_removed=False, start_time=time(8), end_time=time(9, 30)))
+        with app.app_context():
+            assert not AVAILABILITY_CACHE.unit(unit_id).is_free(3, day, start, end)
+            assert AVAILABILITY_CACHE.unit(unit_id).is_free(3, day, time(11), time(13))
+
+        with other.begin() as connection:
+            connection.execute(table.delete().where(table.c.user_id == 4))
+        with app.app_context():
+            assert AVAILABILITY_CACHE.unit(unit_id).is_free(4, day + timedelta(days=1))
+        other.dispose()
+        print("  ✅ PASSED: inserts, exception edits and deletes from elsewhere are seen on the next lookup")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    try:
+        test_bitmap_matches_overlap_rule()
+        test_off_grid_times()
+        test_cache_rebuilds_incrementally()
+        test_readers_use_bitmaps()
+        test_writes_from_other_processes()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test script for the unit availability heat-map.
+
+This test verifies:
+1. UnitAvailability.heatmap() agrees slot by slot with is_free(), and is memoised (a
+   bounded number of ranges) until a row changes; version depends only on the rows
+2. The endpoint snaps to whole weeks, decodes to the expected free slots and headcounts,
+   rejects bad ranges, and serves a repeat request from the cache
+3. unit_unavailability loads the entry owners in one query, however many there are
+"""
+
+import sys
+import os
+import base64
+import shutil
+import tempfile
+from datetime import date, time, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import db, Session, Unavailability, UnavailabilityOccurrence
+from optimization_engine import AVAILABILITY_CACHE, HEATMAP_MEMO_SIZE, AvailabilityBitmap, UnitAvailability, count_queries, slot_range
+from test_auto_assign_jobs import _build_app, _client
+
+
+def _decode(encoded, length):
+    bits = int.from_bytes(base64.b64decode(encoded), 'little')
+    return [bool(bits >> n & 1) for n in range(length)]
+
+
+def _expand(runs):
+    return [value for value, count in runs for _ in range(count)]
+
+
+def test_heatmap_matches_bitmaps():
+    """Test the matrix and headcounts against single lookups"""
+    print("\n" + "="*80)
+    print("TEST 1: Heat-map from the compiled rows")
+    print("="*80)
+
+    monday = date(2025, 8, 4)
+    unit = UnitAvailability(1)
+    unit.set_row(1, AvailabilityBitmap([UnavailabilityOccurrence(None, 1, 1, monday, None, None, True, None)]))
+    unit.set_row(2, AvailabilityBitmap([UnavailabilityOccurrence(None, 2, 1, monday, time(9), time(11), False, None),
+                                        UnavailabilityOccurrence(None, 2, 1, monday - timedelta(days=3), None, None, True, None)]))
+    # Facilitator 4 has entries but is not asked about
+    unit.set_row(4, AvailabilityBitmap([UnavailabilityOccurrence(None, 4, 1, monday, None, None, True, None)]))
+
+    free, counts = unit.heatmap([1, 2, 3], monday, monday + timedelta(days=1))
+    first = slot_range(monday)[0]
+    assert len(counts) == 192
+    for n in range(len(counts)):
+        day, slot = monday + timedelta(days=n // 96), n % 96
+        start = time(slot // 4, slot % 4 * 15)
+        end = time((slot + 1) // 4, (slot + 1) % 4 * 15) if slot < 95 else time(23, 59, 59)
+        expected = [f for f in (1, 2, 3) if unit.is_free(f, day, start, end)]
+        assert [f for f in (1, 2, 3) if free[f] >> n & 1] == expected, f"❌ FAILED: slot {n} disagrees"
+        assert counts[n] == len(expected)
+    assert counts[36:44] == [1] * 8 and counts[96:] == [3] * 96 and first % 96 == 0
+
+    assert unit.heatmap([1, 2, 3], monday, monday + timedelta(days=1)) is unit.heatmap([1, 2, 3], monday, monday + timedelta(days=1))
+    version = unit.version
+    unit.set_row(3, AvailabilityBitmap([UnavailabilityOccurrence(None, 3, 1, monday + timedelta(days=1), None, None, True, None)]))
+    assert unit.version != version and unit.heatmap([1, 2, 3], monday, monday + timedelta(days=1))[1][96:] == [2] * 96
+
+    # Compiled again from the same entries (another worker, a restart) -> same version
+    again = UnitAvailability(1)
+    for facilitator_id in (4, 3, 2, 1):
+        again.set_row(facilitator_id, unit.rows[facilitator_id])
+    assert again.version == unit.version
+
+    for weeks in range(HEATMAP_MEMO_SIZE * 2):
+        unit.heatmap([1, 2, 3], monday + timedelta(weeks=weeks), monday + timedelta(weeks=weeks, days=6))
+    assert len(unit._derived) == HEATMAP_MEMO_SIZE, "❌ FAILED: memoised heat-maps are not bounded"
+    print("  ✅ PASSED: matrix and headcounts match, memo bounded and dropped on change")
+
+
+def test_heatmap_endpoint():
+    """Test the endpoint's encoding, range handling and caching"""
+    print("\n" + "="*80)
+    print("TEST 2: Heat-map endpoint")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='heatmap_')
+    try:
+        app, (coordinator_id, unit_id) = _build_app(os.path.join(workdir, 'heatmap.db'))
+        client = _client(app, coordinator_id)
+        url = f'/unitcoordinator/units/{unit_id}/availability_heatmap'
+        with app.app_context():
+            first_day = db.session.get(Session, 1).start_time.date()
+            db.session.add(Unavailability(user_id=2, unit_id=unit_id, date=first_day, start_time=time(9), end_time=time(11)))
+            db.session.add(Unavailability(user_id=3, unit_id=unit_id, date=first_day + timedelta(days=2), is_full_day=True))
+            db.session.commit()
+
+        assert client.get(f'{url}?start=tomorrow').status_code == 400
+        assert client.get(f'{url}?start=2025-08-10&end=2025-08-01').status_code == 400
+        assert client.get(f'{url}?start=2025-01-06&end=2025-12-28').status_code == 400
+
+        # A Wednesday expands to its whole week
+        body = client.get(f'{url}?start={(first_day + timedelta(days=2)).isoformat()}').get_json()
+        assert body['ok'] and body['start'] == '2025-08-04' and body['end'] == '2025-08-10' and body['slots'] == 7 * 96
+        rows = {f['id']: _decode(f['free'], body['slots']) for f in body['facilitators']}
+        counts = _expand(body['free_counts'])
+        print(f"  {len(rows)} facilitators, {len(body['free_counts'])} runs for {len(counts)} slots")
+        assert sorted(rows) == [2, 3, 4, 5, 6, 7] and len(counts) == body['slots']
+        assert [n for n, is_free in enumerate(rows[2]) if not is_free] == list(range(36, 44))
+        assert not any(rows[3][192:288]) and all(rows[3][:192])
+        assert counts[36:44] == [5] * 8 and counts[192:288] == [5] * 96 and counts[0] == 6
+        assert all(counts[n] == sum(row[n] for row in rows.values()) for n in range(len(counts)))
+
+        with app.app_context():
+            rebuilds = AVAILABILITY_CACHE.stats['rebuilds'] + AVAILABILITY_CACHE.stats['builds']
+            counter = {}
+            with count_queries(counter, 'queries'):
+                again = client.get(f'{url}?start=2025-08-04').get_json()
+        assert again['free_counts'] == body['free_counts'] and again['version'] == body['version']
+        # The one unavailability query is the stamp check
+        assert counter['queries'] <= 4 and AVAILABILITY_CACHE.stats['rebuilds'] + AVAILABILITY_CACHE.stats['builds'] == rebuilds, \
+            "❌ FAILED: a repeat request reloaded the unavailability"
+        print(f"  Repeat request: {counter['queries']} queries")
+
+        with app.app_context():
+            db.session.add(Unavailability(user_id=4, unit_id=unit_id, date=first_day, is_full_day=True))
+            db.session.commit()
+        changed = client.get(f'{url}?start=2025-08-04').get_json()
+        assert changed['version'] != body['version'] and _expand(changed['free_counts'])[0] == 5
+
+        # A fresh compile (another worker, a restart) reports the same version
+        with app.app_context():
+            AVAILABILITY_CACHE.invalidate()
+        assert client.get(f'{url}?start=2025-08-04').get_json()['version'] == changed['version']
+        print("  ✅ PASSED: weeks snapped, matrix decoded, cache follows edits")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_unit_unavailability_owners():
+    """Test that the listing no longer queries each owner"""
+    print("\n" + "="*80)
+    print("TEST 3: unit_unavailability owners")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='heatmap_')
+    try:
+        app, (coordinator_id, unit_id) = _build_app(os.path.join(workdir, 'heatmap.db'))
+        client = _client(app, coordinator_id)
+        url = f'/unitcoordinator/units/{unit_id}/unavailability'
+        queries = []
+        for owners in ((2,), (2, 3, 4, 5, 6, 7)):
+            with app.app_context():
+                for user_id in owners:
+                    db.session.add(Unavailability(user_id=user_id, unit_id=unit_id, date=date(2025, 8, 4), is_full_day=True))
+                db.session.commit()
+                counter = {}
+                with count_queries(counter, 'queries'):
+                    items = client.get(url).get_json()['items']
+                queries.append(counter['queries'])
+            assert {item['user_id'] for item in items} >= set(owners) and all(item['user'] for item in items)
+        print(f"  Queries with 1 and 6 owners: {queries}")
+        assert queries[0] == queries[1], "❌ FAILED: owners are still loaded one by one"
+        print("  ✅ PASSED: one query for all owners")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    try:
+        test_heatmap_matches_bitmaps()
+        test_heatmap_endpoint()
+        test_unit_unavailability_owners()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
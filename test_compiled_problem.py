@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test script for the compiled, array-backed problem model.
+
+This test verifies:
+1. CompiledProblem adapters rebuild the session and facilitator dictionaries unchanged
+2. calculate_metrics() gives the same result on rebuilt assignment dictionaries
+3. scoring='compiled' returns exactly the scalar schedule for the same seed, including unfilled slots
+4. The compiled model needs far less memory per session than the session dictionaries
+"""
+
+import sys
+import os
+import tracemalloc
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_optimization_engine import build_synthetic_problem
+from optimization_engine import (
+    CompiledProblem,
+    calculate_metrics,
+    generate_optimal_assignments
+)
+
+
+def _signature(assignments):
+    return [(a['session']['id'], a['facilitator']['id'], a['role'], a['score']) for a in assignments]
+
+
+def test_adapters_round_trip():
+    """Test that the dict adapters reproduce the input dictionaries"""
+    print("\n" + "="*80)
+    print("TEST 1: CompiledProblem dictionary adapters")
+    print("="*80)
+
+    facilitators, context = build_synthetic_problem(300, facilitator_count=12, seed=1)
+    problem = CompiledProblem(facilitators, context.sessions, context)
+    assert problem.session_count == 300 and problem.facilitator_count == 12
+
+    for index, session in enumerate(context.sessions):
+        assert problem.session_dict(index) == session, f"❌ FAILED: session {session['id']} changed in the round trip"
+    for index, facilitator in enumerate(facilitators):
+        assert problem.facilitator_dict(index) == facilitator, f"❌ FAILED: facilitator {facilitator['id']} changed"
+
+    blocked = sum(1 for cell in problem.available if not cell)
+    expected = sum(
+        1 for session in context.sessions for facilitator in facilitators
+        if context.is_available(facilitator['id'], session) == 0.0
+    )
+    assert blocked == expected, "❌ FAILED: availability matrix disagrees with the ConstraintContext"
+    print(f"  ✅ PASSED: dictionaries rebuilt unchanged, {blocked} unavailable cells")
+
+
+def test_metrics_from_rebuilt_assignments():
+    """Test calculate_metrics() on assignments rebuilt purely from the arrays"""
+    print("\n" + "="*80)
+    print("TEST 2: calculate_metrics() through the adapter")
+    print("="*80)
+
+    facilitators, context = build_synthetic_problem(200, facilitator_count=10, seed=2)
+    assignments, _ = generate_optimal_assignments(facilitators, context=context, seed=4, scoring='compiled')
+    problem = CompiledProblem(facilitators, context.sessions, context)
+    session_index = {s['id']: i for i, s in enumerate(context.sessions)}
+    facilitator_index = {f['id']: i for i, f in enumerate(facilitators)}
+    rows = [
+        (session_index[a['session']['id']], facilitator_index[a['facilitator']['id']], a['role'], a['score'])
+        for a in assignments
+    ]
+
+    rebuilt = problem.assignment_dicts(rows)
+    assert calculate_metrics(rebuilt) == calculate_metrics(assignments), "❌ FAILED: metrics differ on rebuilt dictionaries"
+    reused = problem.assignment_dicts(rows, facilitators, context.sessions)
+    assert all(a['session'] is context.sessions[row[0]] for a, row in zip(reused, rows))
+    print("  ✅ PASSED: same metrics from rebuilt and original dictionaries")
+
+
+def test_compiled_matches_scalar():
+    """Test that the compiled greedy pass makes exactly the scalar decisions"""
+    print("\n" + "="*80)
+    print("TEST 3: scoring='compiled' vs scoring='scalar'")
+    print("="*80)
+
+    # The second problem is short of facilitators, so it also exercises the unstaffed diagnostics
+    for session_count, facilitator_count in ((400, 20), (300, 4)):
+        results = []
+        for scoring in ('scalar', 'compiled'):
+            facilitators, context = build_synthetic_problem(session_count, facilitator_count=facilitator_count, seed=3)
+            assignments, conflicts = generate_optimal_assignments(facilitators, context=context, seed=9, scoring=scoring)
+            assert all(a['facilitator'] in facilitators for a in assignments)
+            results.append((_signature(assignments), conflicts, context.stats['candidate_evaluations']))
+        print(f"  {session_count} sessions, {facilitator_count} facilitators: "
+              f"{len(results[0][0])} assignments, {len(results[0][1])} conflicts")
+        assert results[0] == results[1], "❌ FAILED: compiled pass diverged from the scalar pass"
+    print("  ✅ PASSED: identical schedules, conflicts and evaluation counts")
+
+
+def test_memory_per_session():
+    """Test that the compiled model is much smaller than the session dictionaries"""
+    print("\n" + "="*80)
+    print("TEST 4: Memory per session")
+    print("="*80)
+
+    session_count = 2000
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        facilitators, context = build_synthetic_problem(session_count, facilitator_count=60, seed=5)
+        dict_bytes = tracemalloc.get_traced_memory()[0] - before
+
+        before = tracemalloc.get_traced_memory()[0]
+        problem = CompiledProblem(facilitators, context.sessions, context)
+        compiled_bytes = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    print(f"  Dictionaries: {dict_bytes / session_count:.0f} B/session, compiled: {compiled_bytes / session_count:.0f} B/session")
+    assert problem.session_count == session_count
+    assert compiled_bytes * 3 < dict_bytes, "❌ FAILED: compiled model is not substantially smaller"
+    print("  ✅ PASSED: compiled model under a third of the dictionary footprint")
+
+
+if __name__ == "__main__":
+    try:
+        test_adapters_round_trip()
+        test_metrics_from_rebuilt_assignments()
+        test_compiled_matches_scalar()
+        test_memory_per_session()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
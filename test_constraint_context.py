@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test script for the preloaded ConstraintContext used by the optimization engine.
+
+This test verifies:
+1. Availability answered from the context matches the check_availability() rules
+2. Loading a unit's context takes a fixed number of queries
+3. The greedy pass runs without any per-candidate SQL queries
+"""
+
+import sys
+import os
+from datetime import datetime, date, time, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from models import db, User, UserRole, Unit, Module, Session, Unavailability, FacilitatorSkill, SkillLevel
+from optimization_engine import (
+    ConstraintContext,
+    check_availability,
+    generate_optimal_assignments,
+    prepare_facilitator_data
+)
+
+
+def _make_app():
+    """Standalone in-memory app so the test never touches the dev database"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def _seed_unit(facilitator_count=6, session_count=12):
+    """Create a unit with one module, some sessions and facilitators; return (unit, facilitators, sessions)"""
+    uc = User(email='uc@example.com', first_name='Unit', last_name='Coordinator', role=UserRole.UNIT_COORDINATOR)
+    db.session.add(uc)
+    db.session.flush()
+
+    unit = Unit(unit_code='CITS3200', unit_name='Professional Computing', year=2025, semester='S2', created_by=uc.id)
+    db.session.add(unit)
+    db.session.flush()
+
+    module = Module(unit_id=unit.id, module_name='Lab A', module_type='lab')
+    db.session.add(module)
+    db.session.flush()
+
+    facilitators = []
+    for i in range(facilitator_count):
+        facilitator = User(email=f'fac{i}@example.com', first_name='Fac', last_name=str(i), role=UserRole.FACILITATOR)
+        db.session.add(facilitator)
+        facilitators.append(facilitator)
+    db.session.flush()
+
+    for facilitator in facilitators:
+        db.session.add(FacilitatorSkill(facilitator_id=facilitator.id, module_id=module.id, skill_level=SkillLevel.PROFICIENT))
+
+    sessions = []
+    first_day = datetime(2025, 8, 4, 9, 0)
+    for i in range(session_count):
+        start = first_day + timedelta(days=i // 2, hours=(i % 2) * 3)
+        session = Session(module_id=module.id, start_time=start, end_time=start + timedelta(hours=2), location='EZONE 1.01')
+        db.session.add(session)
+        sessions.append(session)
+
+    db.session.commit()
+    return unit, facilitators, sessions
+
+
+def test_context_availability_rules():
+    """Test that ConstraintContext.is_available applies full-day and timed blocks"""
+    print("\n" + "="*80)
+    print("TEST 1: ConstraintContext.is_available()")
+    print("="*80)
+
+    day = date(2025, 8, 4)
+    session = {
+        'id': 1,
+        'module_id': 10,
+        'unit_id': 5,
+        'date': day,
+        'start_time': time(9, 0),
+        'end_time': time(11, 0)
+    }
+    context = ConstraintContext([session], {
+        (1, 5, day): [(True, None, None)],
+        (2, 5, day): [(False, time(11, 0), time(12, 0))],
+        # Second block on the same day overlaps; every entry for the date must be considered
+        (3, 5, day): [(False, time(7, 0), time(8, 0)), (False, time(10, 0), time(10, 30))],
+    })
+
+    assert context.is_available(1, session) == 0.0, "❌ FAILED: full day block should make facilitator unavailable"
+    assert context.is_available(2, session) == 1.0, "❌ FAILED: adjacent block should not conflict"
+    assert context.is_available(3, session) == 0.0, "❌ FAILED: overlapping block later in the day was missed"
+    assert context.is_available(4, session) == 1.0, "❌ FAILED: facilitator without entries should be available"
+    assert check_availability({'id': 1}, session, context) == 0.0, "❌ FAILED: check_availability should use the context"
+    print("  ✅ PASSED: full day, adjacent, overlapping and empty cases")
+
+
+def test_solve_makes_no_candidate_queries():
+    """Test that the greedy pass answers every hard constraint without SQL"""
+    print("\n" + "="*80)
+    print("TEST 2: generate_optimal_assignments() with a preloaded context")
+    print("="*80)
+
+    app = _make_app()
+    with app.app_context():
+        db.create_all()
+        unit, facilitators_from_db, sessions = _seed_unit()
+
+        # Block the first facilitator for the whole first day
+        blocked = facilitators_from_db[0]
+        db.session.add(Unavailability(user_id=blocked.id, unit_id=unit.id, date=sessions[0].start_time.date(), is_full_day=True))
+        db.session.commit()
+
+        facilitators = prepare_facilitator_data(facilitators_from_db)
+        context = ConstraintContext.load(facilitators, unit.id)
+        print(f"  Preload queries: {context.stats['preload_queries']}")
+        assert context.stats['preload_queries'] <= 3, "❌ FAILED: context should load with a handful of queries"
+
+        assignments, conflicts = generate_optimal_assignments(facilitators, unit.id, context=context)
+        print(f"  Assignments: {len(assignments)}, conflicts: {len(conflicts)}")
+        print(f"  Candidate evaluations: {context.stats['candidate_evaluations']}")
+        print(f"  Candidate queries: {context.stats['candidate_queries']}")
+
+        assert len(assignments) == len(sessions), "❌ FAILED: every session should get a lead"
+        assert context.stats['candidate_evaluations'] > 0
+        assert context.stats['candidate_queries'] == 0, "❌ FAILED: candidate evaluation should not query the database"
+
+        blocked_day = sessions[0].start_time.date()
+        for assignment in assignments:
+            if assignment['session']['date'] == blocked_day:
+                assert assignment['facilitator']['id'] != blocked.id, "❌ FAILED: unavailable facilitator was assigned"
+        print("  ✅ PASSED: zero per-candidate queries and unavailability respected")
+
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    try:
+        test_context_availability_rules()
+        test_solve_makes_no_candidate_queries()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
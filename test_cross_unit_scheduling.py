@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Test script for cross-unit scheduling.
+
+This test verifies:
+1. Busy intervals block overlapping sessions on every solver path, with the same schedule
+   from the scalar and compiled backends and no per-candidate queries
+2. ConstraintContext.load(cross_unit=True) loads other units' assignments in one query
+3. Auto-assign with cross_unit never double-books a facilitator who works in another unit
+4. Co-solving two units schedules both in one pass, each facilitator only in their own units
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import db, User, UserRole, Unit, Module, Session, Assignment, UnitFacilitator, FacilitatorSkill, SkillLevel
+from benchmark_optimization_engine import build_synthetic_problem
+from optimization_engine import ConstraintContext, generate_optimal_assignments, prepare_facilitator_data
+from test_auto_assign_jobs import _build_app, _client
+
+
+def _add_second_unit(coordinator_id):
+    """Unit B: ten sessions at the same times as unit A's first ten, staffed by facilitators 2-5"""
+    unit = Unit(unit_code='CITS3401', unit_name='Other', year=2025, semester='S2', created_by=coordinator_id)
+    db.session.add(unit)
+    db.session.commit()
+    module = Module(unit_id=unit.id, module_name='Workshop', module_type='workshop')
+    only_here = User(email='other@example.com', first_name='Only', last_name='B', role=UserRole.FACILITATOR)
+    db.session.add_all([module, only_here])
+    db.session.commit()
+
+    for user_id in (2, 3, 4, 5, only_here.id):
+        db.session.add(UnitFacilitator(unit_id=unit.id, user_id=user_id))
+        db.session.add(FacilitatorSkill(facilitator_id=user_id, module_id=module.id, skill_level=SkillLevel.PROFICIENT))
+    start = datetime(2025, 8, 4, 9, 0)
+    for i in range(10):
+        begin = start + timedelta(days=i // 4, hours=2 * (i % 4))
+        session = Session(module_id=module.id, session_type='workshop', start_time=begin,
+                          end_time=begin + timedelta(hours=2), location='Lab B')
+        db.session.add(session)
+        db.session.flush()
+        db.session.add(Assignment(session_id=session.id, facilitator_id=2 + i % 4, role='lead'))
+    db.session.commit()
+    return unit.id, only_here.id
+
+
+def _double_bookings():
+    """(facilitator, session, session) triples where one person holds two overlapping sessions"""
+    rows = (
+        db.session.query(Assignment.facilitator_id, Session.id, Session.start_time, Session.end_time)
+        .join(Session, Assignment.session_id == Session.id)
+        .order_by(Assignment.facilitator_id, Session.start_time)
+        .all()
+    )
+    clashes = []
+    for previous, current in zip(rows, rows[1:]):
+        if previous[0] == current[0] and current[2] < previous[3]:
+            clashes.append((current[0], previous[1], current[1]))
+    return clashes
+
+
+def test_busy_intervals_in_solver():
+    """Test that fixed busy intervals are honoured by every path"""
+    print("\n" + "="*80)
+    print("TEST 1: Busy intervals in the solver")
+    print("="*80)
+
+    facilitators, base = build_synthetic_problem(300, facilitator_count=10, seed=5)
+    # Half the facilitators are busy elsewhere during every other session
+    busy = {}
+    for position, session in enumerate(base.sessions):
+        if position % 2 == 0:
+            for facilitator in facilitators[:5]:
+                busy.setdefault(facilitator['id'], []).append(
+                    (session['start_datetime'], session['end_datetime'], 'Elsewhere', 10000 + position))
+    blocked = {(facilitator_id, session['id'])
+               for facilitator_id, intervals in busy.items()
+               for start, end, _, _ in intervals
+               for session in base.sessions
+               if session['start_datetime'] < end and session['end_datetime'] > start}
+
+    schedules = {}
+    for mode, scoring in (('greedy', 'scalar'), ('greedy', 'compiled'), ('greedy', 'vectorized'), ('assignment', 'scalar')):
+        try:
+            context = ConstraintContext(base.sessions, base.unavailability, busy)
+            assignments, _ = generate_optimal_assignments(facilitators, context=context, seed=3, mode=mode, scoring=scoring)
+        except ImportError:
+            print(f"  {mode}/{scoring}: skipped (numpy not installed)")
+            continue
+        placed = {(a['facilitator']['id'], a['session']['id']) for a in assignments}
+        print(f"  {mode}/{scoring}: {len(assignments)} assignments, {len(placed & blocked)} on busy time")
+        assert not placed & blocked, f"❌ FAILED: {mode}/{scoring} assigned someone busy in another unit"
+        assert context.stats['candidate_queries'] == 0
+        schedules[(mode, scoring)] = sorted(placed)
+    assert schedules[('greedy', 'scalar')] == schedules[('greedy', 'compiled')], \
+        "❌ FAILED: compiled backend sees different busy time"
+    print("  ✅ PASSED: busy time respected, no queries during the solve")
+
+
+def test_busy_intervals_bulk_load():
+    """Test the cross-unit preload"""
+    print("\n" + "="*80)
+    print("TEST 2: Bulk-loaded busy intervals")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='cross_unit_')
+    try:
+        app, (coordinator_id, unit_id) = _build_app(os.path.join(workdir, 'units.db'))
+        with app.app_context():
+            _add_second_unit(coordinator_id)
+            facilitators = prepare_facilitator_data(User.query.filter(User.id.in_([2, 3, 4, 5, 6, 7])).all())
+            local = ConstraintContext.load(facilitators, unit_id)
+            shared = ConstraintContext.load(facilitators, unit_id, cross_unit=True)
+            print(f"  Preload queries: {local.stats['preload_queries']} -> {shared.stats['preload_queries']}, "
+                  f"{shared.stats['busy_intervals']} busy intervals")
+            assert shared.stats['preload_queries'] == local.stats['preload_queries'] + 1
+            assert shared.stats['busy_intervals'] == 10 and sorted(shared.busy) == [2, 3, 4, 5]
+            assert not local.busy
+        print("  ✅ PASSED: other units' assignments loaded with one extra query")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_cross_unit_auto_assign():
+    """Test that auto-assign keeps clear of other units' commitments"""
+    print("\n" + "="*80)
+    print("TEST 3: Cross-unit auto-assign")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='cross_unit_')
+    try:
+        app, (coordinator_id, unit_id) = _build_app(os.path.join(workdir, 'units.db'))
+        with app.app_context():
+            other_unit_id, _ = _add_second_unit(coordinator_id)
+        client = _client(app, coordinator_id)
+
+        body = client.post(f'/unitcoordinator/units/{unit_id}/auto_assign',
+                           json={'cross_unit': True, 'allow_partial': True}).get_json()
+        assert body['ok'] and body['cross_unit'] and body['solver_stats']['busy_intervals'] == 10, body.get('error')
+        with app.app_context():
+            clashes = _double_bookings()
+            kept = Assignment.query.join(Session).join(Module).filter(Module.unit_id == other_unit_id).count()
+        print(f"  {len(body['assignments'])} assignments, {len(clashes)} double bookings, {kept} unit B rows kept")
+        assert not clashes, f"❌ FAILED: double-booked across units: {clashes}"
+        assert kept == 10, "❌ FAILED: the other unit's schedule was touched"
+        print("  ✅ PASSED: nobody double-booked across units")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_co_solve_units():
+    """Test scheduling two units in one pass"""
+    print("\n" + "="*80)
+    print("TEST 4: Co-solving units")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='cross_unit_')
+    try:
+        app, (coordinator_id, unit_id) = _build_app(os.path.join(workdir, 'units.db'))
+        with app.app_context():
+            other_unit_id, only_b = _add_second_unit(coordinator_id)
+        client = _client(app, coordinator_id)
+        url = f'/unitcoordinator/units/{unit_id}/auto_assign'
+
+        assert client.post(url, json={'co_units': [999]}).status_code == 400
+        body = client.post(url, json={'co_units': [other_unit_id], 'allow_partial': True}).get_json()
+        assert body['ok'] and body['units'] == [unit_id, other_unit_id], body.get('error')
+
+        with app.app_context():
+            clashes = _double_bookings()
+            per_unit = dict(
+                db.session.query(Module.unit_id, db.func.count(Assignment.id))
+                .join(Session, Session.module_id == Module.id).join(Assignment, Assignment.session_id == Session.id)
+                .group_by(Module.unit_id).all()
+            )
+            strays = (
+                Assignment.query.join(Session).join(Module)
+                .filter(Module.unit_id == unit_id, Assignment.facilitator_id == only_b).count()
+            )
+        print(f"  Assignments per unit: {per_unit}, {len(clashes)} double bookings")
+        assert per_unit == {unit_id: 20, other_unit_id: 10}
+        assert not clashes, f"❌ FAILED: co-solve double-booked {clashes}"
+        assert strays == 0, "❌ FAILED: a facilitator was given a unit they do not belong to"
+        print("  ✅ PASSED: both units scheduled together without clashes")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    try:
+        test_busy_intervals_in_solver()
+        test_busy_intervals_bulk_load()
+        test_cross_unit_auto_assign()
+        test_co_solve_units()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test script for decomposing a solve into independent components.
+
+This test verifies:
+1. find_independent_components() never separates two sessions that overlap and share an eligible facilitator
+2. A facilitator pool with no overlap between units splits along unit lines
+3. A decomposed solve (in worker processes) respects the hard constraints and reports its components
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import SkillLevel
+from benchmark_optimization_engine import build_multi_unit_problem
+from optimization_engine import (
+    ConstraintContext,
+    check_availability,
+    check_skill_constraint,
+    find_independent_components,
+    generate_optimal_assignments
+)
+
+
+def test_linked_sessions_share_a_component():
+    """Test components against a brute-force check of every linked pair"""
+    print("\n" + "="*80)
+    print("TEST 1: find_independent_components() keeps linked sessions together")
+    print("="*80)
+
+    facilitators, context = build_multi_unit_problem(3, 60, facilitators_per_unit=8, seed=1)
+    components = find_independent_components(facilitators, context.sessions, context)
+    component_of = {id(s): n for n, component in enumerate(components) for s in component}
+    assert len(component_of) == len(context.sessions), "❌ FAILED: sessions lost or duplicated"
+
+    sessions = context.sessions
+    for i, first in enumerate(sessions):
+        for second in sessions[i + 1:]:
+            if not (first['start_datetime'] < second['end_datetime'] and second['start_datetime'] < first['end_datetime']):
+                continue
+            shared = any(
+                check_skill_constraint(f, first) and check_skill_constraint(f, second)
+                and check_availability(f, first, context) == 1.0 and check_availability(f, second, context) == 1.0
+                for f in facilitators
+            )
+            if shared:
+                assert component_of[id(first)] == component_of[id(second)], "❌ FAILED: linked sessions split apart"
+    print(f"  ✅ PASSED: {len(components)} components, no linked pair split")
+
+
+def test_disjoint_pools_split_by_unit():
+    """Test that units whose facilitators cannot cover each other's sessions are separated"""
+    print("\n" + "="*80)
+    print("TEST 2: Disjoint facilitator pools")
+    print("="*80)
+
+    start = datetime(2025, 8, 4, 9, 0)
+    sessions = []
+    facilitators = []
+    for unit_id, module_id in ((1, 11), (2, 22)):
+        for i in range(3):
+            begin = start + timedelta(hours=i)
+            sessions.append({
+                'id': unit_id * 10 + i, 'module_id': module_id, 'unit_id': unit_id,
+                'module_name': f"Module {module_id}", 'date': begin.date(),
+                'start_time': begin.time(), 'end_time': (begin + timedelta(hours=2)).time(),
+                'start_datetime': begin, 'end_datetime': begin + timedelta(hours=2),
+                'duration_hours': 2.0, 'location': 'TBA', 'lead_staff_required': 1, 'support_staff_required': 0
+            })
+        other = 22 if module_id == 11 else 11
+        facilitators.append({
+            'id': unit_id, 'name': f"Facilitator {unit_id}", 'min_hours': 0, 'max_hours': 20,
+            'skills': {module_id: SkillLevel.PROFICIENT, other: SkillLevel.NO_INTEREST}
+        })
+
+    components = find_independent_components(facilitators, sessions, ConstraintContext(sessions, {}))
+    units = sorted(sorted({s['unit_id'] for s in component}) for component in components)
+    assert units == [[1], [2]], f"❌ FAILED: expected one component per unit, got {units}"
+    print("  ✅ PASSED: overlapping sessions with disjoint pools are independent")
+
+
+def test_decomposed_solve():
+    """Test a decomposed solve through the process pool"""
+    print("\n" + "="*80)
+    print("TEST 3: generate_optimal_assignments(decompose=True)")
+    print("="*80)
+
+    facilitators, context = build_multi_unit_problem(2, 120, facilitators_per_unit=10, seed=2)
+    assignments, conflicts = generate_optimal_assignments(
+        facilitators, context=context, decompose=True, workers=2, improve_seconds=0.5, seed=3
+    )
+    info = context.stats['decomposition']
+    print(f"  Decomposition: {info}")
+    print(f"  Assignments: {len(assignments)}, conflicts: {len(conflicts)}")
+    assert info['batches'] == 2 and info['components'] >= 2
+    assert 'local_search' in context.stats, "❌ FAILED: merge step should rebalance hours"
+
+    per_facilitator = {}
+    for assignment in assignments:
+        facilitator, session = assignment['facilitator'], assignment['session']
+        assert facilitator in facilitators and session in context.sessions
+        assert check_skill_constraint(facilitator, session), "❌ FAILED: NO_INTEREST facilitator assigned"
+        assert check_availability(facilitator, session, context) == 1.0, "❌ FAILED: unavailable facilitator assigned"
+        per_facilitator.setdefault(facilitator['id'], []).append(session)
+    for sessions in per_facilitator.values():
+        sessions.sort(key=lambda s: s['start_datetime'])
+        for earlier, later in zip(sessions, sessions[1:]):
+            assert later['start_datetime'] >= earlier['end_datetime'], "❌ FAILED: facilitator double-booked across batches"
+    print("  ✅ PASSED: merged schedule is feasible")
+
+
+if __name__ == "__main__":
+    try:
+        test_linked_sessions_share_a_component()
+        test_disjoint_pools_split_by_unit()
+        test_decomposed_solve()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
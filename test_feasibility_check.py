@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test script for the pre-solve feasibility analysis.
+
+This test verifies:
+1. max_staffing() matches a brute-force maximum on small random instances
+2. A session short of eligible facilitators and an overcrowded time window are both reported
+3. unfillable_slots never exceeds what the solvers actually leave unfilled
+4. A large unit is analysed in well under a second
+"""
+
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+from itertools import product
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import SkillLevel
+from benchmark_optimization_engine import build_synthetic_problem
+from optimization_engine import (
+    ConstraintContext,
+    analyse_feasibility,
+    generate_optimal_assignments,
+    max_staffing
+)
+
+
+def _brute_force(demands, candidates):
+    """Try every facilitator -> session (or nothing) choice"""
+    facilitators = sorted({f for c in candidates for f in c})
+    best = 0
+    for choice in product([None] + list(range(len(demands))), repeat=len(facilitators)):
+        counts = [0] * len(demands)
+        valid = True
+        for facilitator, session in zip(facilitators, choice):
+            if session is None:
+                continue
+            if facilitator not in candidates[session]:
+                valid = False
+                break
+            counts[session] += 1
+        if valid:
+            best = max(best, sum(min(count, demand) for count, demand in zip(counts, demands)))
+    return best
+
+
+def test_max_staffing_is_optimal():
+    """Test the augmenting-path flow against brute force"""
+    print("\n" + "="*80)
+    print("TEST 1: max_staffing() vs brute force")
+    print("="*80)
+
+    rng = random.Random(0)
+    for _ in range(150):
+        session_count = rng.randint(1, 3)
+        demands = [rng.randint(0, 3) for _ in range(session_count)]
+        candidates = [sorted(rng.sample(range(5), rng.randint(0, 5))) for _ in range(session_count)]
+        staffed = max_staffing(demands, candidates)
+        assert all(s <= d for s, d in zip(staffed, demands))
+        assert sum(staffed) == _brute_force(demands, candidates), f"❌ FAILED: {demands} {candidates} -> {staffed}"
+    print("  ✅ PASSED: 150 random instances optimal")
+
+
+def test_short_session_and_window():
+    """Test the per-session and the per-window bounds on a hand-built unit"""
+    print("\n" + "="*80)
+    print("TEST 2: Short session and overcrowded window")
+    print("="*80)
+
+    start = datetime(2025, 8, 4, 9, 0)
+
+    def session(session_id, module_id, offset, leads=1, supports=0):
+        begin = start + timedelta(hours=offset)
+        return {
+            'id': session_id, 'module_id': module_id, 'unit_id': 1, 'module_name': f"Module {module_id}",
+            'date': begin.date(), 'start_time': begin.time(), 'end_time': (begin + timedelta(hours=2)).time(),
+            'start_datetime': begin, 'end_datetime': begin + timedelta(hours=2), 'duration_hours': 2.0,
+            'location': 'TBA', 'lead_staff_required': leads, 'support_staff_required': supports
+        }
+
+    # Sessions 1-3 overlap at 10:00; only three people, one of whom cannot run module 20
+    sessions = [session(1, 10, 0), session(2, 10, 1), session(3, 20, 1, supports=1), session(4, 20, 5, leads=3)]
+    facilitators = [
+        {'id': i, 'name': f"F{i}", 'min_hours': 0, 'max_hours': 20,
+         'skills': {10: SkillLevel.PROFICIENT, 20: SkillLevel.NO_INTEREST if i == 3 else SkillLevel.HAVE_SOME_SKILL}}
+        for i in (1, 2, 3)
+    ]
+    report = analyse_feasibility(facilitators, ConstraintContext(sessions, {}))
+    print(f"  Report: unfillable {report['unfillable_slots']}/{report['total_slots']}, "
+          f"{len(report['sessions'])} short sessions, {len(report['windows'])} short windows, {report['elapsed_ms']} ms")
+
+    assert not report['feasible']
+    assert [(s['session_id'], s['unfillable_lead'], s['unfillable_support']) for s in report['sessions']] == [(4, 1, 0)]
+    assert [(w['session_ids'], w['demand'], w['max_staffed']) for w in report['windows']] == [([1, 2, 3], 4, 3), ([4], 3, 2)]
+    assert report['unfillable_slots'] == 2, "❌ FAILED: disjoint window shortfalls should add up"
+    print("  ✅ PASSED: both bounds reported")
+
+
+def test_bound_is_sound():
+    """Test that no solver does better than the reported lower bound"""
+    print("\n" + "="*80)
+    print("TEST 3: Lower bound vs solver results")
+    print("="*80)
+
+    for session_count, facilitator_count in ((300, 4), (600, 8)):
+        facilitators, context = build_synthetic_problem(session_count, facilitator_count=facilitator_count, seed=6)
+        report = analyse_feasibility(facilitators, context)
+        for mode in ('greedy', 'assignment'):
+            _, conflicts = generate_optimal_assignments(facilitators, context=context, seed=1, mode=mode)
+            unfilled = sum(1 for conflict in conflicts if conflict.startswith("Could not assign"))
+            print(f"  {session_count} sessions / {facilitator_count} facilitators, {mode}: "
+                  f"bound {report['unfillable_slots']}, unfilled {unfilled}")
+            assert report['unfillable_slots'] <= unfilled, "❌ FAILED: bound exceeds an actual schedule"
+        assert report['unfillable_slots'] > 0
+    print("  ✅ PASSED: bound never above a real schedule's unfilled slots")
+
+
+def test_analysis_is_fast():
+    """Test the analysis time on a large feasible unit"""
+    print("\n" + "="*80)
+    print("TEST 4: Analysis time")
+    print("="*80)
+
+    facilitators, context = build_synthetic_problem(2000, facilitator_count=60, seed=7)
+    report = analyse_feasibility(facilitators, context)
+    print(f"  {report['windows_checked']} windows in {report['elapsed_ms']} ms, feasible: {report['feasible']}")
+    assert report['feasible'] and report['unfillable_slots'] == 0
+    assert report['elapsed_ms'] < 1000, "❌ FAILED: pre-check is too slow"
+    print("  ✅ PASSED: feasible unit analysed quickly")
+
+
+if __name__ == "__main__":
+    try:
+        test_max_staffing_is_optimal()
+        test_short_session_and_window()
+        test_bound_is_sound()
+        test_analysis_is_fast()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
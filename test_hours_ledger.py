@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test script for HoursLedger, the running hours total behind the fairness term.
+
+This test verifies:
+1. Hours, min and max stay equal to a full recomputation after every update
+2. calculate_facilitator_score() gives the same score with a ledger as with the hours dict
+"""
+
+import sys
+import os
+import random
+from datetime import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import SkillLevel
+from optimization_engine import HoursLedger, calculate_facilitator_score, get_assigned_hours
+
+
+def test_ledger_matches_recomputation():
+    """Test min/max/hours against a brute-force recompute after random updates"""
+    print("\n" + "="*80)
+    print("TEST 1: HoursLedger vs recomputation")
+    print("="*80)
+
+    rng = random.Random(3)
+    facilitators = [{'id': i} for i in range(1, 9)]
+    ledger = HoursLedger(facilitators)
+    hours = {f['id']: 0 for f in facilitators}
+
+    for _ in range(500):
+        fac_id = rng.randint(1, 8)
+        delta = rng.choice([1.0, 2.0, 3.0, -1.0]) if hours[fac_id] >= 1 else rng.choice([1.0, 2.0])
+        ledger.add(fac_id, delta)
+        hours[fac_id] += delta
+
+        assert ledger.hours(fac_id) == hours[fac_id]
+        assert ledger.min_hours == min(hours.values()), "❌ FAILED: cached min drifted"
+        assert ledger.max_hours == max(hours.values()), "❌ FAILED: cached max drifted"
+    assert ledger.as_dict() == hours
+    print("  ✅ PASSED: 500 random updates keep hours, min and max exact")
+
+
+def test_score_with_ledger_matches_dict():
+    """Test that the ledger path of calculate_facilitator_score matches the dict path"""
+    print("\n" + "="*80)
+    print("TEST 2: calculate_facilitator_score() with a ledger")
+    print("="*80)
+
+    session = {'id': 99, 'module_id': 101, 'start_time': time(9, 0), 'end_time': time(11, 0), 'duration_hours': 2.0}
+    facilitators = [
+        {'id': i, 'min_hours': 0, 'max_hours': 20, 'skills': {101: SkillLevel.HAVE_RUN_BEFORE}}
+        for i in range(1, 5)
+    ]
+    assignments = [
+        {'facilitator': facilitators[0], 'session': {'duration_hours': 3.0}},
+        {'facilitator': facilitators[1], 'session': {'duration_hours': 1.0}},
+        {'facilitator': facilitators[0], 'session': {'duration_hours': 2.0}},
+    ]
+    ledger = HoursLedger(facilitators, assignments)
+    hours_dict = {f['id']: get_assigned_hours(f, assignments) for f in facilitators}
+
+    for facilitator in facilitators:
+        expected = calculate_facilitator_score(facilitator, session, assignments, hours_dict)
+        got = calculate_facilitator_score(facilitator, session, assignments, ledger=ledger)
+        assert abs(expected - got) < 1e-12, f"❌ FAILED: score mismatch for facilitator {facilitator['id']}"
+    print("  ✅ PASSED: ledger and dict scoring agree")
+
+
+if __name__ == "__main__":
+    try:
+        test_ledger_matches_recomputation()
+        test_score_with_ledger_matches_dict()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test script for FacilitatorIntervalIndex, the sorted per-facilitator interval
+structure behind the engine's time and location conflict checks.
+
+This test verifies:
+1. Overlap and location-conflict queries agree with a brute-force scan
+2. Removing intervals keeps the index consistent
+3. check_time_conflict()/check_location_conflict() give the same answer with and without the index
+"""
+
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from optimization_engine import (
+    FacilitatorIntervalIndex,
+    check_time_conflict,
+    check_location_conflict
+)
+
+LOCATIONS = ['EZONE 1.01', 'EZONE 2.15', 'TBA']
+
+
+def _random_intervals(rng, count):
+    base = datetime(2025, 8, 4, 8, 0)
+    intervals = []
+    for _ in range(count):
+        start = base + timedelta(minutes=15 * rng.randint(0, 400))
+        end = start + timedelta(minutes=15 * rng.randint(1, 16))
+        intervals.append((rng.randint(1, 4), start, end, rng.choice(LOCATIONS)))
+    return intervals
+
+
+def test_overlap_matches_brute_force():
+    """Test that overlapping() returns exactly the intervals a full scan finds"""
+    print("\n" + "="*80)
+    print("TEST 1: FacilitatorIntervalIndex.overlapping() vs brute force")
+    print("="*80)
+
+    rng = random.Random(42)
+    intervals = _random_intervals(rng, 300)
+    index = FacilitatorIntervalIndex()
+    for i, (fac_id, start, end, location) in enumerate(intervals):
+        index.add(fac_id, start, end, location, i)
+
+    for fac_id, start, end, location in _random_intervals(rng, 300):
+        expected = sorted(
+            i for i, (f, s, e, _) in enumerate(intervals)
+            if f == fac_id and start < e and end > s
+        )
+        got = sorted(entry[3] for entry in index.overlapping(fac_id, start, end))
+        assert got == expected, f"❌ FAILED: overlap mismatch for facilitator {fac_id} {start}-{end}"
+
+        expected_location = any(
+            f == fac_id and start < e and end > s and loc != location and loc != 'TBA' and location != 'TBA'
+            for f, s, e, loc in intervals
+        )
+        assert index.has_location_conflict(fac_id, start, end, location) == expected_location, \
+            "❌ FAILED: location conflict mismatch"
+    print("  ✅ PASSED: 300 random queries match the brute-force scan")
+
+
+def test_remove_and_pairs():
+    """Test remove() and overlapping_pairs()"""
+    print("\n" + "="*80)
+    print("TEST 2: remove() and overlapping_pairs()")
+    print("="*80)
+
+    base = datetime(2025, 8, 4, 9, 0)
+    index = FacilitatorIntervalIndex()
+    index.add(1, base, base + timedelta(hours=3), 'A', 'long')
+    index.add(1, base + timedelta(hours=1), base + timedelta(hours=2), 'A', 'inner')
+    index.add(1, base + timedelta(hours=4), base + timedelta(hours=5), 'A', 'later')
+
+    pairs = [(a[3], b[3]) for a, b in index.overlapping_pairs(1)]
+    assert pairs == [('long', 'inner')], f"❌ FAILED: unexpected pairs {pairs}"
+
+    # A short query inside the long interval must still find it
+    found = [entry[3] for entry in index.overlapping(1, base + timedelta(hours=2, minutes=30), base + timedelta(hours=2, minutes=45))]
+    assert found == ['long'], f"❌ FAILED: contained query missed the long interval: {found}"
+
+    assert index.remove(1, base, base + timedelta(hours=3), 'long')
+    assert not index.remove(1, base, base + timedelta(hours=3), 'long')
+    assert not index.has_overlap(1, base + timedelta(hours=2, minutes=30), base + timedelta(hours=2, minutes=45))
+    print("  ✅ PASSED: pairs, contained intervals and removal")
+
+
+def test_engine_checks_use_index():
+    """Test that the engine conflict checks agree with and without an index"""
+    print("\n" + "="*80)
+    print("TEST 3: check_time_conflict()/check_location_conflict() with an index")
+    print("="*80)
+
+    rng = random.Random(7)
+    assignments = []
+    for i, (fac_id, start, end, location) in enumerate(_random_intervals(rng, 120)):
+        assignments.append({
+            'facilitator': {'id': fac_id},
+            'session': {'id': i, 'start_datetime': start, 'end_datetime': end, 'location': location}
+        })
+    index = FacilitatorIntervalIndex.from_assignments(assignments)
+
+    for fac_id, start, end, location in _random_intervals(rng, 120):
+        facilitator = {'id': fac_id}
+        session = {'start_datetime': start, 'end_datetime': end, 'location': location}
+        assert check_time_conflict(facilitator, session, assignments) == \
+            check_time_conflict(facilitator, session, assignments, index)
+        assert check_location_conflict(facilitator, session, assignments) == \
+            check_location_conflict(facilitator, session, assignments, index)
+    print("  ✅ PASSED: indexed and list-scan checks agree")
+
+
+if __name__ == "__main__":
+    try:
+        test_overlap_matches_brute_force()
+        test_remove_and_pairs()
+        test_engine_checks_use_index()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
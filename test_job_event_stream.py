@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Test script for the live auto-assign event stream and job cancellation.
+
+This test verifies:
+1. The solver listener reports every unfilled slot and per-session staffing on every path,
+   and LocalSearch objective events carry a shrinking ETA
+2. The SSE endpoint relays a running job's events, with an ETA on session progress, and
+   ends with the final status
+3. A job followed from another process is streamed from its row
+4. Cancelling (in-process or through the row) stops the solve at its next session and keeps
+   the old schedule
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import db, Assignment, AutoAssignJob, JobStatus
+from benchmark_optimization_engine import build_synthetic_problem
+from optimization_engine import generate_optimal_assignments
+from jobs import JobRunner, new_job_id
+from test_auto_assign_jobs import _build_app, _client
+
+
+def _parse_stream(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_engine_events():
+    """Test slot_failed, session staffing and objective ETA events"""
+    print("\n" + "="*80)
+    print("TEST 1: Solver events on every path")
+    print("="*80)
+
+    for mode, scoring, starts in (('greedy', 'scalar', 1), ('greedy', 'compiled', 1), ('assignment', 'scalar', 1), ('greedy', 'compiled', 2)):
+        facilitators, context = build_synthetic_problem(200, facilitator_count=5, seed=8)
+        events = []
+        assignments, conflicts = generate_optimal_assignments(
+            facilitators, context=context, seed=2, mode=mode, scoring=scoring, starts=starts, workers=1,
+            listener=events.append
+        )
+        failed = [e['message'] for e in events if e['event'] == 'slot_failed']
+        unfilled = [c for c in conflicts if c.startswith("Could not assign")]
+        sessions = [e for e in events if e['event'] == 'session']
+        print(f"  {mode}/{scoring} x{starts}: {len(sessions)} session events, {len(failed)} failed slots")
+        assert sorted(failed) == sorted(unfilled), f"❌ FAILED: {mode}/{scoring} slot_failed events differ from conflicts"
+        assert sum(e['filled'] for e in sessions) == len(assignments)
+        assert sum(e['required'] - e['filled'] for e in sessions) == len(unfilled)
+
+    facilitators, context = build_synthetic_problem(200, facilitator_count=12, seed=8)
+    events = []
+    generate_optimal_assignments(facilitators, context=context, seed=2, improve_seconds=0.5, listener=events.append)
+    improving = [e for e in events if e['event'] == 'phase' and e['phase'] == 'improving']
+    etas = [e['eta'] for e in events if e['event'] == 'objective']
+    assert improving and improving[0]['budget'] == 0.5
+    assert etas and all(0 <= eta <= 0.5 for eta in etas) and etas == sorted(etas, reverse=True)
+    print(f"  ✅ PASSED: failed slots and staffing match the result, {len(etas)} objective events with ETA")
+
+
+def test_event_stream_relay():
+    """Test the SSE endpoint for a job running in this process"""
+    print("\n" + "="*80)
+    print("TEST 2: Live stream of a running job")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='auto_assign_events_')
+    try:
+        app, (coordinator_id, unit_id) = _build_app(os.path.join(workdir, 'jobs.db'))
+        client = _client(app, coordinator_id)
+        submitted = client.post(f'/unitcoordinator/units/{unit_id}/auto_assign/jobs', json={'improve_seconds': 0.3}).get_json()
+        response = client.get(submitted['events_url'])
+        assert response.mimetype == 'text/event-stream'
+        events = _parse_stream(response.get_data(as_text=True))
+
+        kinds = [kind for kind, _ in events]
+        phases = [data['phase'] for kind, data in events if kind == 'phase']
+        print(f"  Phases: {phases}, {kinds.count('session')} coalesced session events")
+        assert phases[:4] == ['starting', 'loading', 'checking', 'solving'] and phases[-1] == 'saving'
+        sessions = [data for kind, data in events if kind == 'session']
+        assert sessions and sessions[-1]['sessions_processed'] == 20 and 'eta' in sessions[-1]
+        assert kinds[-1] == 'done' and events[-1][1]['status'] == 'succeeded'
+        print("  ✅ PASSED: solver events relayed, stream closed with the final status")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_event_stream_from_row():
+    """Test the row-polling stream used for jobs run by another process"""
+    print("\n" + "="*80)
+    print("TEST 3: Stream of a job run elsewhere")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='auto_assign_events_')
+    try:
+        app, (coordinator_id, unit_id) = _build_app(os.path.join(workdir, 'jobs.db'))
+        with app.app_context():
+            job = AutoAssignJob(id=new_job_id(), unit_id=unit_id, created_by=coordinator_id, status=JobStatus.SUCCEEDED,
+                                phase='done', sessions_processed=20, sessions_total=20, objective=1.5)
+            db.session.add(job)
+            db.session.commit()
+            job_id = job.id
+
+        client = _client(app, coordinator_id)
+        events = _parse_stream(client.get(f'/unitcoordinator/units/{unit_id}/auto_assign/jobs/{job_id}/events').get_data(as_text=True))
+        print(f"  Events: {[kind for kind, _ in events]}")
+        assert [kind for kind, _ in events] == ['progress', 'done']
+        assert events[0][1]['sessions_processed'] == 20 and events[0][1]['objective'] == 1.5
+        print("  ✅ PASSED: progress read from the job row")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_cancellation():
+    """Test in-process and row-based cancellation"""
+    print("\n" + "="*80)
+    print("TEST 4: Cancelling a job")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='auto_assign_events_')
+    try:
+        app, (coordinator_id, unit_id) = _build_app(os.path.join(workdir, 'jobs.db'))
+        runner = JobRunner(max_workers=0)
+
+        def solve_until(cancel):
+            def target(job, progress, options):
+                facilitators, context = build_synthetic_problem(300, facilitator_count=10, seed=1)
+                for assignment in Assignment.query.all():
+                    db.session.delete(assignment)
+
+                def listener(event):
+                    progress(event)
+                    if event['event'] == 'session' and event['sessions_processed'] == 50:
+                        cancel(job)
+                        # Force the next progress write instead of waiting for the interval
+                        progress({'event': 'phase', 'phase': 'solving'})
+                generate_optimal_assignments(facilitators, context=context, seed=1, listener=listener,
+                                             cancel=progress.cancel_token)
+                return {"ok": True, "partial": context.stats.get('partial')}, True
+            return target
+
+        def in_process(job):
+            runner.cancel(job.id)
+
+        def from_row(job):
+            AutoAssignJob.query.filter_by(id=job.id).update({'cancel_requested': True})
+
+        with app.app_context():
+            for cancel in (in_process, from_row):
+                job = AutoAssignJob(id=new_job_id(), unit_id=unit_id, created_by=coordinator_id)
+                db.session.add(job)
+                db.session.commit()
+                runner.submit(job.id, solve_until(cancel), {})
+                db.session.expire_all()
+                job = db.session.get(AutoAssignJob, job.id)
+                print(f"  {cancel.__name__}: {job.status.value}, phase {job.phase}")
+                assert job.status == JobStatus.CANCELLED, f"❌ FAILED: {cancel.__name__} did not stop the job"
+                assert Assignment.query.count() == 1, "❌ FAILED: a cancelled job changed the schedule"
+                partial = json.loads(job.result)['partial']
+                assert partial['reason'] == 'cancelled' and len(partial['unfinished_sessions']) == 250, \
+                    f"❌ FAILED: {cancel.__name__} did not stop the solver at the next session"
+
+        client = _client(app, coordinator_id)
+        with app.app_context():
+            queued = AutoAssignJob(id=new_job_id(), unit_id=unit_id, created_by=coordinator_id)
+            db.session.add(queued)
+            db.session.commit()
+            queued_id = queued.id
+        response = client.post(f'/unitcoordinator/units/{unit_id}/auto_assign/jobs/{queued_id}/cancel')
+        assert response.status_code == 200 and response.get_json()['job']['cancel_requested']
+        with app.app_context():
+            runner.submit(queued_id, solve_until(lambda job: None), {})
+            assert db.session.get(AutoAssignJob, queued_id).status == JobStatus.CANCELLED
+        assert client.post(f'/unitcoordinator/units/{unit_id}/auto_assign/jobs/{queued_id}/cancel').status_code == 409
+        print("  ✅ PASSED: running and queued jobs cancelled, schedule untouched")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    try:
+        test_engine_events()
+        test_event_stream_relay()
+        test_event_stream_from_row()
+        test_cancellation()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
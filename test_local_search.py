@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for the LocalSearch improvement pass run after the greedy assignment.
+
+This test verifies:
+1. The incrementally tracked objective equals a full recomputation after the search
+2. Improved schedules still respect skill, availability and overlap constraints
+3. The objective trajectory only increases and the search stops at a local optimum
+4. improve_seconds wires the pass into generate_optimal_assignments()
+"""
+
+import sys
+import os
+import random
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_optimization_engine import build_synthetic_problem
+from optimization_engine import (
+    LocalSearch,
+    calculate_metrics,
+    check_availability,
+    check_skill_constraint,
+    generate_optimal_assignments,
+    improve_assignments
+)
+
+
+def _assert_feasible(assignments, context):
+    per_facilitator = {}
+    for assignment in assignments:
+        facilitator, session = assignment['facilitator'], assignment['session']
+        assert check_skill_constraint(facilitator, session), "❌ FAILED: NO_INTEREST facilitator assigned"
+        assert check_availability(facilitator, session, context) == 1.0, "❌ FAILED: unavailable facilitator assigned"
+        per_facilitator.setdefault(facilitator['id'], []).append(session)
+
+    for sessions in per_facilitator.values():
+        sessions.sort(key=lambda s: s['start_datetime'])
+        for earlier, later in zip(sessions, sessions[1:]):
+            assert later['start_datetime'] >= earlier['end_datetime'], "❌ FAILED: facilitator double-booked"
+
+
+def test_incremental_objective_matches_recompute():
+    """Test that O(1) deltas add up to the recomputed objective"""
+    print("\n" + "="*80)
+    print("TEST 1: Incremental objective vs full recomputation")
+    print("="*80)
+
+    random.seed(2)
+    facilitators, context = build_synthetic_problem(200, facilitator_count=12, seed=2)
+    assignments, _ = generate_optimal_assignments(facilitators, context=context, mode='assignment')
+
+    search = LocalSearch(assignments, facilitators, context, seed=1)
+    improved, report = search.run(time_budget=10)
+    print(f"  Objective {report['initial_objective']:.3f} -> {report['final_objective']:.3f}, moves {report['moves']}")
+
+    assert abs(search.full_objective() - report['final_objective']) < 1e-6, "❌ FAILED: tracked objective drifted"
+    assert report['final_objective'] >= report['initial_objective']
+    assert len(improved) == len(assignments), "❌ FAILED: slots were dropped"
+    _assert_feasible(improved, context)
+    print("  ✅ PASSED: deltas exact and schedule still feasible")
+
+
+def test_trajectory_and_local_optimum():
+    """Test that the trajectory is monotone and a small problem reaches a local optimum"""
+    print("\n" + "="*80)
+    print("TEST 2: Trajectory and early stop")
+    print("="*80)
+
+    random.seed(5)
+    facilitators, context = build_synthetic_problem(120, facilitator_count=10, seed=5)
+    assignments, _ = generate_optimal_assignments(facilitators, context=context)
+    before = calculate_metrics(assignments)['fairness_metrics']['hours_std_dev']
+
+    improved, report = improve_assignments(assignments, facilitators, context, time_budget=30, seed=0)
+    after = calculate_metrics(improved)['fairness_metrics']['hours_std_dev']
+    print(f"  Stopped: {report['stopped']} after {report['elapsed']}s, {len(report['trajectory'])} improving moves")
+    print(f"  Hours std dev: {before:.3f} -> {after:.3f}")
+
+    objectives = [report['initial_objective']] + [point['objective'] for point in report['trajectory']]
+    assert all(b > a for a, b in zip(objectives, objectives[1:])), "❌ FAILED: trajectory is not strictly improving"
+    assert report['stopped'] == 'local_optimum', "❌ FAILED: small problem should reach a local optimum"
+    assert assignments[0] is not improved[0], "❌ FAILED: input assignments should not be modified"
+    print("  ✅ PASSED: monotone trajectory, stopped at a local optimum")
+
+
+def test_generate_with_improvement():
+    """Test the improve_seconds option of generate_optimal_assignments()"""
+    print("\n" + "="*80)
+    print("TEST 3: generate_optimal_assignments(improve_seconds=...)")
+    print("="*80)
+
+    random.seed(8)
+    facilitators, context = build_synthetic_problem(150, facilitator_count=12, seed=8)
+    assignments, conflicts = generate_optimal_assignments(facilitators, context=context, improve_seconds=2)
+    report = context.stats['local_search']
+    print(f"  Objective {report['initial_objective']:.3f} -> {report['final_objective']:.3f}")
+    assert report['final_objective'] >= report['initial_objective']
+    _assert_feasible(assignments, context)
+    print("  ✅ PASSED: report recorded in context.stats")
+
+
+if __name__ == "__main__":
+    try:
+        test_incremental_objective_matches_recompute()
+        test_trajectory_and_local_optimum()
+        test_generate_with_improvement()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
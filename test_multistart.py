@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test script for multi-start solving over a process pool.
+
+This test verifies:
+1. snapshot_problem() output survives pickling
+2. A seeded solve is reproducible and leaves the caller's random state alone
+3. Multi-start keeps the best run by objective_key() and reports the winning seed
+4. The process pool and the in-process path return the same schedule, and its workers are
+   not forked from the (multithreaded) caller
+"""
+
+import sys
+import os
+import pickle
+import random
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_optimization_engine import build_synthetic_problem
+from optimization_engine import (
+    _pool_context,
+    generate_optimal_assignments,
+    objective_key,
+    schedule_objective,
+    snapshot_problem
+)
+
+
+def _signature(assignments):
+    return [(a['session']['id'], a['facilitator']['id'], a['role']) for a in assignments]
+
+
+def test_snapshot_is_picklable():
+    """Test that the worker snapshot round-trips through pickle"""
+    print("\n" + "="*80)
+    print("TEST 1: snapshot_problem() pickling")
+    print("="*80)
+
+    facilitators, context = build_synthetic_problem(50, facilitator_count=6, seed=1)
+    snapshot = snapshot_problem(facilitators, context)
+    restored = pickle.loads(pickle.dumps(snapshot))
+    assert restored['sessions'] == context.sessions
+    assert restored['unavailability'] == context.unavailability
+    assert [f['id'] for f in restored['facilitators']] == [f['id'] for f in facilitators]
+    print("  ✅ PASSED: snapshot pickles without loss")
+
+
+def test_seeded_solve_is_reproducible():
+    """Test that the same seed gives the same schedule"""
+    print("\n" + "="*80)
+    print("TEST 2: Reproducible seeded solve")
+    print("="*80)
+
+    random.seed(99)
+    state = random.getstate()
+    runs = []
+    for _ in range(2):
+        facilitators, context = build_synthetic_problem(200, facilitator_count=15, seed=2)
+        assignments, _ = generate_optimal_assignments(facilitators, context=context, seed=1234)
+        runs.append(_signature(assignments))
+        assert context.stats['seed'] == 1234
+    assert runs[0] == runs[1], "❌ FAILED: same seed gave different schedules"
+    assert random.getstate() == state, "❌ FAILED: seeded solve changed the caller's random state"
+    print("  ✅ PASSED: identical schedules for seed 1234")
+
+
+def test_multistart_picks_best_seed():
+    """Test that multi-start keeps the best run and that its seed regenerates it"""
+    print("\n" + "="*80)
+    print("TEST 3: Multi-start best-of selection")
+    print("="*80)
+
+    facilitators, context = build_synthetic_problem(200, facilitator_count=15, seed=3)
+    assignments, _ = generate_optimal_assignments(facilitators, context=context, seed=50, starts=4, workers=1)
+    info = context.stats['multistart']
+    print(f"  Runs: {[(run['seed'], run['unfilled_slots'], round(run['hours_std_dev'], 3)) for run in info['runs']]}")
+    print(f"  Chosen seed: {info['seed']}")
+
+    assert [run['seed'] for run in info['runs']] == [50, 51, 52, 53]
+    assert objective_key(info['objective']) == min(objective_key(run) for run in info['runs']), "❌ FAILED: not the best run"
+    assert objective_key(schedule_objective(assignments, context.sessions)) == objective_key(info['objective'])
+
+    facilitators_again, context_again = build_synthetic_problem(200, facilitator_count=15, seed=3)
+    replay, _ = generate_optimal_assignments(facilitators_again, context=context_again, seed=info['seed'])
+    assert _signature(replay) == _signature(assignments), "❌ FAILED: chosen seed did not regenerate the schedule"
+    print("  ✅ PASSED: best run returned and reproducible from its seed")
+
+
+def test_process_pool_matches_in_process():
+    """Test that worker processes return the same result as the in-process path"""
+    print("\n" + "="*80)
+    print("TEST 4: ProcessPoolExecutor vs in-process")
+    print("="*80)
+
+    results = []
+    for workers in (1, 2):
+        facilitators, context = build_synthetic_problem(150, facilitator_count=12, seed=4)
+        assignments, conflicts = generate_optimal_assignments(facilitators, context=context, seed=7, starts=3, workers=workers)
+        assert all(a['facilitator'] in facilitators for a in assignments), "❌ FAILED: assignments not rebuilt around caller dicts"
+        results.append((_signature(assignments), conflicts, context.stats['seed']))
+    assert results[0] == results[1], "❌ FAILED: pool and in-process results differ"
+    assert _pool_context().get_start_method() in ('forkserver', 'spawn'), "❌ FAILED: pool workers are forked"
+    print(f"  ✅ PASSED: same schedule and seed ({results[0][2]}) with 1 and 2 workers")
+
+
+if __name__ == "__main__":
+    try:
+        test_snapshot_is_picklable()
+        test_seeded_solve_is_reproducible()
+        test_multistart_picks_best_seed()
+        test_process_pool_matches_in_process()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
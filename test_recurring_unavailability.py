@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Test script for recurring unavailability stored as rules.
+
+This test verifies:
+1. recurring_dates() gives the dates the old row-per-occurrence generator wrote, and a
+   windowed expansion equals the filtered full expansion
+2. generate-recurring stores one row with a handful of queries, and the facilitator's
+   calendar lists the same dates the old generator produced
+3. Deleting or re-timing one date adds an exception that every reader honours: the
+   listing, ConstraintContext and check_availability
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+from datetime import date, time, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import db, RecurringPattern, Session, Unavailability, UnavailabilityException, recurring_dates
+from facilitator_routes import facilitator_bp
+from optimization_engine import ConstraintContext, check_availability, count_queries, get_real_sessions
+from test_auto_assign_jobs import _build_app, _client
+
+
+def _old_generator(anchor, pattern, interval, until):
+    """The date loop generate_recurring_unavailability used before rules were stored"""
+    dates = []
+    current = anchor
+    while current <= until:
+        dates.append(current)
+        if pattern == RecurringPattern.DAILY:
+            current += timedelta(days=interval)
+        elif pattern in (RecurringPattern.WEEKLY, RecurringPattern.CUSTOM):
+            current += timedelta(weeks=interval)
+        else:
+            year, month = current.year, current.month + interval
+            if month > 12:
+                year, month = year + 1, month - 12
+            current = current.replace(year=year, month=month)
+    return dates
+
+
+def test_recurring_dates():
+    """Test the expansion against the old generator"""
+    print("\n" + "="*80)
+    print("TEST 1: Rule expansion")
+    print("="*80)
+
+    anchor, until = date(2025, 7, 28), date(2025, 11, 21)
+    for pattern, interval in ((RecurringPattern.DAILY, 1), (RecurringPattern.DAILY, 3), (RecurringPattern.WEEKLY, 1),
+                              (RecurringPattern.CUSTOM, 2), (RecurringPattern.MONTHLY, 1), (RecurringPattern.MONTHLY, 5)):
+        expected = _old_generator(anchor, pattern, interval, until)
+        assert recurring_dates(anchor, pattern, interval, until) == expected, f"❌ FAILED: {pattern} every {interval}"
+        window = (date(2025, 9, 3), date(2025, 10, 9))
+        assert recurring_dates(anchor, pattern, interval, until, *window) == \
+            [d for d in expected if window[0] <= d <= window[1]]
+
+    assert recurring_dates(date(2025, 1, 31), RecurringPattern.MONTHLY, 1, date(2025, 4, 30)) == \
+        [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 28), date(2025, 4, 28)]
+    assert recurring_dates(anchor, None, 1, None) == [anchor]
+    print("  ✅ PASSED: same dates as the old generator, windows agree")
+
+
+def test_rule_is_stored_once():
+    """Test the write path and the facilitator's calendar"""
+    print("\n" + "="*80)
+    print("TEST 2: One row per rule")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='recurring_')
+    try:
+        app, (_, unit_id) = _build_app(os.path.join(workdir, 'recurring.db'))
+        app.register_blueprint(facilitator_bp)
+        client = _client(app, 2)
+        body = {'unit_id': unit_id, 'date': '2025-08-04', 'recurring_pattern': 'daily',
+                'recurring_end_date': '2025-11-10', 'recurring_interval': 1, 'is_full_day': False,
+                'start_time': '09:00', 'end_time': '10:00', 'reason': 'Class'}
+
+        with app.app_context():
+            counter = {}
+            with count_queries(counter, 'queries'):
+                result = client.post('/facilitator/unavailability/generate-recurring', json=body).get_json()
+            rows = Unavailability.query.count()
+        print(f"  {result['total_dates']} dates, {rows} row(s), {counter['queries']} queries")
+        assert rows == 1 and result['total_dates'] == 99
+        assert counter['queries'] < 15, "❌ FAILED: the write still scales with the number of dates"
+
+        listed = client.get(f'/facilitator/unavailability?unit_id={unit_id}').get_json()['unavailabilities']
+        expected = _old_generator(date(2025, 8, 4), RecurringPattern.DAILY, 1, date(2025, 11, 10))
+        assert [entry['date'] for entry in listed] == [d.isoformat() for d in expected]
+        assert all(entry['start_time'] == '09:00:00' and entry['recurring_pattern'] == 'daily' for entry in listed)
+        print("  ✅ PASSED: one row, same calendar")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_exceptions_reach_every_reader():
+    """Test per-date deletes and overrides"""
+    print("\n" + "="*80)
+    print("TEST 3: Per-date exceptions")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='recurring_')
+    try:
+        app, (_, unit_id) = _build_app(os.path.join(workdir, 'recurring.db'))
+        app.register_blueprint(facilitator_bp)
+        client = _client(app, 2)
+        with app.app_context():
+            # Sessions run 2025-08-04 .. 2025-08-08, 09:00-17:00 in two-hour blocks
+            first = db.session.get(Session, 1).start_time
+        rule_id = client.post('/facilitator/unavailability/generate-recurring', json={
+            'unit_id': unit_id, 'date': first.date().isoformat(), 'recurring_pattern': 'daily',
+            'recurring_end_date': (first.date() + timedelta(days=4)).isoformat(), 'is_full_day': True
+        }).get_json()['rule_id']
+
+        second_day = (first.date() + timedelta(days=1)).isoformat()
+        third_day = (first.date() + timedelta(days=2)).isoformat()
+        assert client.delete(f'/facilitator/unavailability/{rule_id}?date={second_day}').status_code == 200
+        assert client.put(f'/facilitator/unavailability/{rule_id}', json={
+            'occurrence_date': third_day, 'start_time': '09:00', 'end_time': '11:00'}).status_code == 200
+        assert client.delete(f'/facilitator/unavailability/{rule_id}?date=2030-01-01').status_code == 404
+
+        listed = client.get(f'/facilitator/unavailability?unit_id={unit_id}').get_json()['unavailabilities']
+        by_date = {entry['date']: entry for entry in listed}
+        assert len(listed) == 4 and second_day not in by_date
+        assert by_date[third_day]['start_time'] == '09:00:00' and not by_date[third_day]['is_full_day']
+
+        with app.app_context():
+            assert UnavailabilityException.query.count() == 2
+            sessions = get_real_sessions(unit_id)
+            context = ConstraintContext.load([{'id': 2}], unit_id)
+            free = sorted((s['date'].isoformat(), s['start_time'].strftime('%H:%M')) for s in sessions
+                          if context.is_available(2, s) == 1.0)
+            print(f"  Free sessions: {free}")
+            assert free == [(second_day, t) for t in ('09:00', '11:00', '13:00', '15:00')] + \
+                [(third_day, t) for t in ('11:00', '13:00', '15:00')]
+            for session in sessions:
+                assert check_availability({'id': 2}, session) == context.is_available(2, session)
+        print("  ✅ PASSED: deleted date freed, re-timed date narrowed for every reader")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    try:
+        test_recurring_dates()
+        test_rule_is_stored_once()
+        test_exceptions_reach_every_reader()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
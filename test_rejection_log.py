@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test script for the rejection-reason bitmasks recorded by the candidate scan.
+
+This test verifies:
+1. Every solver path records skill and availability bits that agree with the constraints
+2. Unstaffed-session diagnostics come from the log without any further constraint check
+3. summary() gives the per-session eligibility breakdown and to_data() round-trips
+4. Multi-start and cached solves hand the winning run's log back to the caller
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+from unittest import mock
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import optimization_engine
+from models import SkillLevel
+from benchmark_optimization_engine import build_synthetic_problem
+from optimization_engine import (
+    REJECT_NO_INTEREST,
+    REJECT_TIME_CONFLICT,
+    REJECT_UNAVAILABLE,
+    ConstraintContext,
+    RejectionLog,
+    SolveCache,
+    generate_optimal_assignments
+)
+
+
+def _static_mask(facilitator, session, context):
+    mask = 0
+    if facilitator['skills'].get(session['module_id']) == SkillLevel.NO_INTEREST:
+        mask |= REJECT_NO_INTEREST
+    if context.is_available(facilitator['id'], session) == 0.0:
+        mask |= REJECT_UNAVAILABLE
+    return mask
+
+
+def test_masks_recorded_by_every_path():
+    """Test that each scoring backend and solver mode fills in the skill and availability bits"""
+    print("\n" + "="*80)
+    print("TEST 1: Masks recorded during the candidate scan")
+    print("="*80)
+
+    for mode, scoring in (('greedy', 'scalar'), ('greedy', 'compiled'), ('greedy', 'vectorized'), ('assignment', 'scalar')):
+        facilitators, context = build_synthetic_problem(150, facilitator_count=8, seed=1)
+        generate_optimal_assignments(facilitators, context=context, seed=2, mode=mode, scoring=scoring)
+        log = context.rejections
+        assert len(log) == len(context.sessions), f"❌ FAILED: {mode}/{scoring} did not scan every session"
+        for session in context.sessions:
+            for facilitator in facilitators:
+                recorded = log.mask(session['id'], facilitator['id']) & (REJECT_NO_INTEREST | REJECT_UNAVAILABLE)
+                expected = _static_mask(facilitator, session, context)
+                # The eligibility index records NO_INTEREST alone, and a lead scan that stops
+                # early never reaches (and never records) lower skill tiers
+                allowed = {expected}
+                if expected & REJECT_NO_INTEREST:
+                    allowed.add(REJECT_NO_INTEREST)
+                elif expected:
+                    allowed.add(0)
+                assert recorded in allowed, \
+                    f"❌ FAILED: {mode}/{scoring} recorded {recorded} instead of {expected}"
+        print(f"  {mode}/{scoring}: {sum(len(log.masks(s['id'])) for s in context.sessions)} rejections")
+    print("  ✅ PASSED: no wrong skill or availability bits on any path")
+
+
+def test_diagnostics_from_log():
+    """Test the "No facilitators found" message without re-running any constraint"""
+    print("\n" + "="*80)
+    print("TEST 2: Diagnostics built from the log")
+    print("="*80)
+
+    start = datetime(2025, 8, 4, 9, 0)
+
+    def session(session_id, module_id, hours=2):
+        return {
+            'id': session_id, 'module_id': module_id, 'unit_id': 1, 'module_name': f"Module {module_id}",
+            'date': start.date(), 'start_time': start.time(), 'end_time': (start + timedelta(hours=hours)).time(),
+            'start_datetime': start, 'end_datetime': start + timedelta(hours=hours), 'duration_hours': float(hours),
+            'location': 'TBA', 'lead_staff_required': 1, 'support_staff_required': 0
+        }
+
+    sessions = [session(1, 10, hours=3), session(2, 10)]
+    facilitators = [
+        {'id': 1, 'name': 'Busy', 'min_hours': 0, 'max_hours': 20, 'skills': {10: SkillLevel.PROFICIENT}},
+        {'id': 2, 'name': 'Uninterested', 'min_hours': 0, 'max_hours': 20, 'skills': {10: SkillLevel.NO_INTEREST}},
+        {'id': 3, 'name': 'Away', 'min_hours': 0, 'max_hours': 20, 'skills': {10: SkillLevel.PROFICIENT}},
+    ]
+    context = ConstraintContext(sessions, {(3, 1, start.date()): [(True, None, None)]})
+
+    with mock.patch.object(optimization_engine, 'check_time_conflict', wraps=optimization_engine.check_time_conflict) as spy:
+        assignments, conflicts = generate_optimal_assignments(facilitators, context=context, seed=1, scoring='compiled')
+        assert not spy.called, "❌ FAILED: compiled diagnostics re-ran the time conflict check"
+
+    print(f"  Conflicts: {conflicts}")
+    assert [(a['session']['id'], a['facilitator']['id']) for a in assignments] == [(1, 1)]
+    assert conflicts[-1] == ("No facilitators found for Module 10 (Monday 2025-08-04 09:00-11:00) - Reasons: "
+                             "Busy is already assigned to another session at this time; "
+                             "Uninterested has no interest in this module; Away is unavailable at this time")
+
+    summary = context.rejections.summary(2)
+    print(f"  Session 2 breakdown: {summary}")
+    assert summary == {'facilitators': 3, 'eligible': 0, 'time_conflict': 1, 'location_conflict': 0,
+                       'no_interest': 1, 'unavailable': 1}
+    assert context.rejections.masks(2) == {1: REJECT_TIME_CONFLICT, 2: REJECT_NO_INTEREST, 3: REJECT_UNAVAILABLE}
+
+    restored = RejectionLog.from_data(context.rejections.to_data())
+    assert restored.summaries() == context.rejections.summaries(), "❌ FAILED: to_data() round trip lost masks"
+    print("  ✅ PASSED: reasons, breakdown and serialisation")
+
+
+def test_multistart_and_cache_keep_log():
+    """Test that the winning run's log survives the process boundary and the cache"""
+    print("\n" + "="*80)
+    print("TEST 3: Multi-start and cached solves")
+    print("="*80)
+
+    facilitators, context = build_synthetic_problem(120, facilitator_count=6, seed=3)
+    generate_optimal_assignments(facilitators, context=context, seed=5, starts=3, workers=1)
+    winner = context.stats['multistart']['seed']
+
+    replay_facilitators, replay_context = build_synthetic_problem(120, facilitator_count=6, seed=3)
+    generate_optimal_assignments(replay_facilitators, context=replay_context, seed=winner)
+    assert context.rejections.summaries() == replay_context.rejections.summaries(), "❌ FAILED: multi-start log is not the winner's"
+
+    cache = SolveCache()
+    for expected in ('miss', 'hit'):
+        facilitators, context = build_synthetic_problem(120, facilitator_count=6, seed=3)
+        generate_optimal_assignments(facilitators, context=context, seed=winner, cache=cache)
+        assert context.stats['cache'] == expected
+        assert context.rejections.summaries() == replay_context.rejections.summaries(), f"❌ FAILED: log lost on cache {expected}"
+    print("  ✅ PASSED: log carried through workers and the cache")
+
+
+if __name__ == "__main__":
+    try:
+        test_masks_recorded_by_every_path()
+        test_diagnostics_from_log()
+        test_multistart_and_cache_keep_log()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test script for repair mode, which re-solves only what changed since the last solve.
+
+This test verifies:
+1. Repairing an unchanged schedule keeps every assignment and changes nobody
+2. A new unavailability and a raised staffing requirement only touch the affected slots
+3. A slot that cannot be filled around the kept assignments releases its overlapping neighbours
+"""
+
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import SkillLevel
+from benchmark_optimization_engine import build_synthetic_problem
+from optimization_engine import (
+    ConstraintContext,
+    check_availability,
+    check_skill_constraint,
+    generate_optimal_assignments,
+    repair_assignments
+)
+
+
+def _rows(assignments):
+    return [
+        {'session_id': a['session']['id'], 'facilitator_id': a['facilitator']['id'], 'role': a['role']}
+        for a in assignments
+    ]
+
+
+def _assert_feasible(assignments, context):
+    per_facilitator = {}
+    for assignment in assignments:
+        facilitator, session = assignment['facilitator'], assignment['session']
+        assert check_skill_constraint(facilitator, session), "❌ FAILED: NO_INTEREST facilitator assigned"
+        assert check_availability(facilitator, session, context) == 1.0, "❌ FAILED: unavailable facilitator assigned"
+        per_facilitator.setdefault(facilitator['id'], []).append(session)
+    for sessions in per_facilitator.values():
+        sessions.sort(key=lambda s: s['start_datetime'])
+        for earlier, later in zip(sessions, sessions[1:]):
+            assert later['start_datetime'] >= earlier['end_datetime'], "❌ FAILED: facilitator double-booked"
+
+
+def test_unchanged_schedule_is_kept():
+    """Test that a repair with no changes is a no-op"""
+    print("\n" + "="*80)
+    print("TEST 1: Repair with nothing changed")
+    print("="*80)
+
+    facilitators, context = build_synthetic_problem(200, facilitator_count=40, seed=1)
+    assignments, conflicts = generate_optimal_assignments(facilitators, context=context, seed=1)
+    assert not conflicts, "Precondition: every slot filled"
+    repaired, conflicts, report = repair_assignments(facilitators, _rows(assignments), context)
+
+    assert report['kept'] == len(assignments), "❌ FAILED: valid assignments were dropped"
+    assert not report['added'] and not report['removed'] and not report['changed_facilitators']
+    print(f"  ✅ PASSED: all {report['kept']} assignments kept, no facilitator changed")
+
+
+def test_repair_touches_only_affected_slots():
+    """Test a new unavailability and an extra support slot"""
+    print("\n" + "="*80)
+    print("TEST 2: Repair after new unavailability and extra staffing")
+    print("="*80)
+
+    random.seed(3)
+    facilitators, context = build_synthetic_problem(400, facilitator_count=20, seed=3)
+    assignments, _ = generate_optimal_assignments(facilitators, context=context, seed=3)
+    previous = _rows(assignments)
+
+    victim = assignments[0]['facilitator']['id']
+    blocked_day = assignments[0]['session']['date']
+    context.unavailability[(victim, 1, blocked_day)] = [(True, None, None)]
+    context.sessions[5]['support_staff_required'] += 1
+
+    lost = [row for row, a in zip(previous, assignments) if row['facilitator_id'] == victim and a['session']['date'] == blocked_day]
+    repaired, conflicts, report = repair_assignments(facilitators, previous, context)
+    print(f"  Invalidated: {len(report['invalidated'])}, freed slots: {report['freed_slots']}")
+    print(f"  Added: {len(report['added'])}, removed: {len(report['removed'])}, "
+          f"facilitators changed: {len(report['changed_facilitators'])}/{len(facilitators)}")
+
+    assert len(report['invalidated']) == len(lost), "❌ FAILED: only the blocked facilitator's slots should be invalid"
+    assert all(row['reason'] == "facilitator is unavailable at this time" for row in report['invalidated'])
+    assert report['freed_slots'] == len(lost) + 1
+    assert report['kept'] == len(previous) - len(lost)
+    assert len(report['changed_facilitators']) < len(facilitators) / 2, "❌ FAILED: repair changed too many facilitators"
+    _assert_feasible(repaired, context)
+    print("  ✅ PASSED: only the affected slots were re-solved")
+
+
+def test_neighbourhood_is_released_when_needed():
+    """Test that an open slot can take a facilitator from an overlapping session"""
+    print("\n" + "="*80)
+    print("TEST 3: Conflict neighbourhood release")
+    print("="*80)
+
+    start = datetime(2025, 8, 4, 9, 0)
+
+    def session(session_id, module_id):
+        return {
+            'id': session_id, 'module_id': module_id, 'unit_id': 1, 'module_name': f"Module {module_id}",
+            'date': start.date(), 'start_time': start.time(), 'end_time': (start + timedelta(hours=2)).time(),
+            'start_datetime': start, 'end_datetime': start + timedelta(hours=2), 'duration_hours': 2.0,
+            'location': 'TBA', 'lead_staff_required': 1, 'support_staff_required': 0
+        }
+
+    sessions = [session(1, 10), session(2, 20)]
+    facilitators = [
+        {'id': 1, 'name': 'Both', 'min_hours': 0, 'max_hours': 20,
+         'skills': {10: SkillLevel.PROFICIENT, 20: SkillLevel.PROFICIENT}},
+        {'id': 2, 'name': 'Only ten', 'min_hours': 0, 'max_hours': 20,
+         'skills': {10: SkillLevel.HAVE_SOME_SKILL, 20: SkillLevel.NO_INTEREST}},
+    ]
+    context = ConstraintContext(sessions, {})
+    # Session 2 is new; facilitator 1 currently runs session 1 and is the only one who can run session 2
+    previous = [{'session_id': 1, 'facilitator_id': 1, 'role': 'lead'}]
+
+    repaired, conflicts, report = repair_assignments(facilitators, previous, context)
+    by_session = {a['session']['id']: a['facilitator']['id'] for a in repaired}
+    print(f"  Result: {by_session}, released neighbours: {report['released_neighbours']}")
+    assert by_session == {1: 2, 2: 1}, f"❌ FAILED: unexpected repair {by_session}"
+    assert report['released_neighbours'] == 1 and not conflicts
+    print("  ✅ PASSED: neighbour released and both sessions staffed")
+
+
+if __name__ == "__main__":
+    try:
+        test_unchanged_schedule_is_kept()
+        test_repair_touches_only_affected_slots()
+        test_neighbourhood_is_released_when_needed()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
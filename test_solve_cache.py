@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test script for the solver input fingerprint and the SolveCache.
+
+This test verifies:
+1. problem_fingerprint() is stable for equal inputs and changes with any input or option
+2. A cached seeded solve returns the same schedule without re-solving
+3. LRU eviction spills to disk and disk hits are promoted back
+4. A database write to a watched table invalidates the cache; a user profile edit does not
+5. Auto-assign without a seed draws a fresh one each run and skips the cache; a given
+   seed, or reuse, serves a re-run on unchanged data from the cache
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+from datetime import date
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+from models import db, SkillLevel, User, UserRole, Unit, Unavailability
+from benchmark_optimization_engine import build_synthetic_problem
+from optimization_engine import (
+    SolveCache,
+    generate_optimal_assignments,
+    invalidate_on_writes,
+    problem_fingerprint
+)
+
+
+def _signature(assignments):
+    return [(a['session']['id'], a['facilitator']['id'], a['role']) for a in assignments]
+
+
+def test_fingerprint_tracks_inputs():
+    """Test that the fingerprint changes exactly when the problem changes"""
+    print("\n" + "="*80)
+    print("TEST 1: problem_fingerprint()")
+    print("="*80)
+
+    facilitators, context = build_synthetic_problem(100, facilitator_count=8, seed=1)
+    base = problem_fingerprint(facilitators, context, seed=1)
+    again = problem_fingerprint(*build_synthetic_problem(100, facilitator_count=8, seed=1), seed=1)
+    assert base == again, "❌ FAILED: equal inputs gave different fingerprints"
+    assert problem_fingerprint(facilitators, context, seed=2) != base, "❌ FAILED: seed not part of the fingerprint"
+
+    facilitators[0]['skills'][1] = SkillLevel.NO_INTEREST if facilitators[0]['skills'][1] != SkillLevel.NO_INTEREST else SkillLevel.PROFICIENT
+    changed_skill = problem_fingerprint(facilitators, context, seed=1)
+    assert changed_skill != base, "❌ FAILED: skill change not detected"
+
+    context.unavailability[(facilitators[1]['id'], 1, date(2030, 1, 1))] = [(True, None, None)]
+    assert problem_fingerprint(facilitators, context, seed=1) != changed_skill, "❌ FAILED: unavailability change not detected"
+    print("  ✅ PASSED: stable for equal inputs, sensitive to seed, skills and unavailability")
+
+
+def test_cached_solve_and_spill():
+    """Test cache hits in memory and from the disk spill"""
+    print("\n" + "="*80)
+    print("TEST 2: SolveCache hits, eviction and disk spill")
+    print("="*80)
+
+    spill_dir = tempfile.mkdtemp(prefix='solve_cache_test_')
+    try:
+        cache = SolveCache(max_entries=1, spill_dir=spill_dir)
+        facilitators, context = build_synthetic_problem(150, facilitator_count=10, seed=2)
+        first, conflicts = generate_optimal_assignments(facilitators, context=context, seed=11, cache=cache)
+        assert context.stats['cache'] == 'miss'
+
+        facilitators, context = build_synthetic_problem(150, facilitator_count=10, seed=2)
+        second, _ = generate_optimal_assignments(facilitators, context=context, seed=11, cache=cache)
+        assert context.stats['cache'] == 'hit' and context.stats['seed'] == 11
+        assert _signature(first) == _signature(second), "❌ FAILED: cached schedule differs"
+        assert all(a['facilitator'] in facilitators for a in second), "❌ FAILED: cached result not rebuilt around caller dicts"
+
+        # A second key evicts the first one to disk
+        generate_optimal_assignments(facilitators, context=context, seed=12, cache=cache)
+        assert len(cache) == 1 and len(os.listdir(spill_dir)) == 1, "❌ FAILED: evicted entry was not spilled"
+
+        facilitators, context = build_synthetic_problem(150, facilitator_count=10, seed=2)
+        third, _ = generate_optimal_assignments(facilitators, context=context, seed=11, cache=cache)
+        assert context.stats['cache'] == 'hit' and cache.stats['disk_hits'] == 1
+        assert _signature(third) == _signature(first), "❌ FAILED: disk hit returned a different schedule"
+        print(f"  Cache stats: {cache.stats}")
+        print("  ✅ PASSED: memory hit, spill on eviction, disk hit")
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+
+def test_writes_invalidate_cache():
+    """Test that flushing a watched model clears the cache"""
+    print("\n" + "="*80)
+    print("TEST 3: Invalidation on database writes")
+    print("="*80)
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    cache = SolveCache()
+    invalidate_on_writes(cache)
+    with app.app_context():
+        db.create_all()
+        user = User(email='fac@example.com', first_name='Fac', last_name='One', role=UserRole.FACILITATOR)
+        db.session.add(user)
+        db.session.commit()
+        unit = Unit(unit_code='CITS1001', unit_name='Test', year=2025, semester='S1', created_by=user.id)
+        db.session.add(unit)
+        db.session.commit()
+
+        cache.put('key', {'assignments': [], 'conflicts': [], 'stats': {}})
+        # Logins and profile edits write to users; the fingerprint covers their solver inputs
+        user.first_name = 'Renamed'
+        db.session.commit()
+        assert cache.get('key') is not None, "❌ FAILED: a profile edit cleared the cache"
+        db.session.add(Unavailability(user_id=user.id, unit_id=unit.id, date=date(2025, 8, 4), is_full_day=True))
+        db.session.commit()
+        assert cache.get('key') is None, "❌ FAILED: unavailability write did not invalidate the cache"
+
+        db.session.remove()
+        db.drop_all()
+    print("  ✅ PASSED: cache cleared by a write to a watched table")
+
+
+def test_auto_assign_seeds():
+    """Test when the auto-assign route uses the cache"""
+    print("\n" + "="*80)
+    print("TEST 4: Auto-assign seeds and the cache")
+    print("="*80)
+
+    from test_auto_assign_jobs import _build_app, _client
+
+    workdir = tempfile.mkdtemp(prefix='solve_cache_')
+    try:
+        app, (coordinator_id, unit_id) = _build_app(os.path.join(workdir, 'cache.db'))
+        client = _client(app, coordinator_id)
+        url = f'/unitcoordinator/units/{unit_id}/auto_assign'
+
+        def run(**options):
+            body = client.post(url, json=options).get_json()
+            assert body['ok'], body.get('error')
+            return body['seed'], body['solver_stats'].get('cache')
+
+        fresh = [run(), run()]
+        print(f"  Unseeded runs: {fresh}")
+        assert fresh[0][0] != fresh[1][0] and fresh[0][1] is None and fresh[1][1] is None, \
+            "❌ FAILED: a run without a seed did not draw a fresh one"
+
+        reused = [run(reuse=True), run(reuse=True)]
+        assert reused[0][0] == reused[1][0] and reused[1][1] == 'hit', "❌ FAILED: reuse did not hit the cache"
+        assert run(seed=fresh[0][0]) == (fresh[0][0], 'miss') and run(seed=fresh[0][0]) == (fresh[0][0], 'hit')
+        print("  ✅ PASSED: fresh seed by default, cache only for a given seed or reuse")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    try:
+        test_fingerprint_tracks_inputs()
+        test_cached_solve_and_spill()
+        test_writes_invalidate_cache()
+        test_auto_assign_seeds()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Test script for solver deadlines and cancellation.
+
+This test verifies:
+1. Cancelling part-way through a greedy, compiled or assignment-mode solve keeps exactly
+   the schedule made so far and lists every other session as unfinished
+2. A deadline stops every solver path (including LocalSearch) on time with the result
+   flagged as partial
+3. Multi-start keeps the best finished run, a cancelled process pool returns promptly and
+   partial results are never cached
+4. The auto-assign route refuses to save a schedule cut short by its time_limit
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import db, Assignment
+from benchmark_optimization_engine import build_synthetic_problem
+from optimization_engine import CancellationToken, SolveCache, generate_optimal_assignments, warm_solver_pool
+from test_auto_assign_jobs import _build_app, _client
+
+
+def _pairs(assignments):
+    return sorted((a['session']['id'], a['facilitator']['id'], a['role']) for a in assignments)
+
+
+def test_cancel_keeps_schedule_so_far():
+    """Test that a cancelled solve returns the decisions made before the cancel"""
+    print("\n" + "="*80)
+    print("TEST 1: Cancelled solves keep their prefix")
+    print("="*80)
+
+    for mode, scoring in (('greedy', 'scalar'), ('greedy', 'compiled'), ('assignment', 'scalar')):
+        facilitators, context = build_synthetic_problem(400, facilitator_count=12, seed=3)
+        full, _ = generate_optimal_assignments(facilitators, context=context, seed=5, mode=mode, scoring=scoring)
+
+        facilitators, context = build_synthetic_problem(400, facilitator_count=12, seed=3)
+        token = CancellationToken()
+
+        def listener(event):
+            if event['event'] == 'session' and event['sessions_processed'] >= 150:
+                token.cancel()
+
+        partial, conflicts = generate_optimal_assignments(facilitators, context=context, seed=5, mode=mode, scoring=scoring,
+                                                          listener=listener, cancel=token)
+        report = context.stats['partial']
+        unfinished = set(report['unfinished_sessions'])
+        print(f"  {mode}/{scoring}: {len(partial)} assignments, {len(unfinished)} unfinished sessions")
+        assert report['reason'] == 'cancelled' and report['phase'] == 'solving'
+        assert 0 < len(unfinished) <= 250
+        assert _pairs(partial) == _pairs(a for a in full if a['session']['id'] not in unfinished), \
+            f"❌ FAILED: {mode}/{scoring} changed decisions made before the cancel"
+        assert not any(a['session']['id'] in unfinished for a in partial)
+        # Unfinished sessions are not reported as unfillable
+        open_slots = sum(s['lead_staff_required'] + s['support_staff_required']
+                         for s in context.sessions if s['id'] not in unfinished) - len(partial)
+        assert sum(1 for c in conflicts if c.startswith("Could not assign")) == open_slots
+    print("  ✅ PASSED: schedule so far returned, the rest listed as unfinished")
+
+
+def test_deadline_on_every_path():
+    """Test that each solver path returns by its deadline"""
+    print("\n" + "="*80)
+    print("TEST 2: Deadlines")
+    print("="*80)
+
+    for options in (dict(mode='greedy'), dict(scoring='compiled'), dict(mode='assignment'),
+                    dict(starts=3, workers=1), dict(decompose=True, workers=1)):
+        facilitators, context = build_synthetic_problem(3000, facilitator_count=40, seed=1)
+        started = time.monotonic()
+        assignments, _ = generate_optimal_assignments(facilitators, context=context, seed=1, deadline=started + 0.1, **options)
+        elapsed = time.monotonic() - started
+        report = context.stats['partial']
+        print(f"  {options}: {elapsed:.2f}s, {len(assignments)} assignments, {len(report['unfinished_sessions'])} unfinished")
+        assert elapsed < 0.5, f"❌ FAILED: {options} overran its deadline"
+        assert report['reason'] == 'deadline' and report['unfinished_sessions']
+
+    facilitators, context = build_synthetic_problem(300, facilitator_count=10, seed=1)
+    started = time.monotonic()
+    assignments, _ = generate_optimal_assignments(facilitators, context=context, seed=1, improve_seconds=10,
+                                                  deadline=started + 0.5)
+    elapsed = time.monotonic() - started
+    print(f"  local search: {elapsed:.2f}s, stopped {context.stats['local_search']['stopped']}")
+    assert elapsed < 1.0 and context.stats['local_search']['stopped'] == 'deadline'
+    assert context.stats['partial'] == {'reason': 'deadline', 'phase': 'improving', 'unfinished_sessions': []}
+    print("  ✅ PASSED: every path stopped on time and flagged the result")
+
+
+def test_multistart_and_cache():
+    """Test multi-start under cancellation and that partial results stay out of the cache"""
+    print("\n" + "="*80)
+    print("TEST 3: Multi-start and cache")
+    print("="*80)
+
+    # The one-off start of the pools' forkserver is not part of the cancel latency
+    warm_solver_pool(wait=True)
+    facilitators, context = build_synthetic_problem(3000, facilitator_count=40, seed=1)
+    token = CancellationToken()
+    threading.Timer(0.3, token.cancel).start()
+    started = time.monotonic()
+    assignments, _ = generate_optimal_assignments(facilitators, context=context, seed=1, starts=2, workers=2, cancel=token)
+    elapsed = time.monotonic() - started
+    print(f"  Cancelled process pool returned after {elapsed:.2f}s")
+    assert elapsed < 1.0 and context.stats['partial']['reason'] == 'cancelled'
+
+    facilitators, context = build_synthetic_problem(200, facilitator_count=8, seed=2)
+    token = CancellationToken()
+    token.cancel()
+    cache = SolveCache()
+    assert generate_optimal_assignments(facilitators, context=context, seed=4, cache=cache, cancel=token) == ([], [])
+    assert len(context.stats['partial']['unfinished_sessions']) == 200
+
+    facilitators, context = build_synthetic_problem(200, facilitator_count=8, seed=2)
+    assignments, _ = generate_optimal_assignments(facilitators, context=context, seed=4, cache=cache)
+    assert context.stats['cache'] == 'miss' and 'partial' not in context.stats and assignments, \
+        "❌ FAILED: a partial result was served from the cache"
+    print("  ✅ PASSED: pool abandoned on cancel, partial results not cached")
+
+
+def test_route_time_limit():
+    """Test the synchronous route with a time limit"""
+    print("\n" + "="*80)
+    print("TEST 4: Auto-assign time limit")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='auto_assign_deadline_')
+    try:
+        app, (coordinator_id, unit_id) = _build_app(os.path.join(workdir, 'jobs.db'))
+        client = _client(app, coordinator_id)
+        url = f'/unitcoordinator/units/{unit_id}/auto_assign'
+
+        assert client.post(url, json={'time_limit': 0}).status_code == 400
+        response = client.post(url, json={'time_limit': 1e-6})
+        body = response.get_json()
+        print(f"  Expired limit: {response.status_code} {body['error']}")
+        assert response.status_code == 409 and body['partial']['reason'] == 'deadline'
+        assert len(body['partial']['unfinished_sessions']) == 20
+        with app.app_context():
+            assert [(a.session_id, a.facilitator_id) for a in Assignment.query.all()] == [(1, 2)], \
+                "❌ FAILED: a partial schedule replaced the saved one"
+
+        app.config['AUTO_ASSIGN_TIME_LIMIT'] = 60
+        body = client.post(url, json={}).get_json()
+        assert body['ok'] and body['partial'] is None and len(body['assignments']) == 20
+        print("  ✅ PASSED: cut-short run refused, generous limit saved the full schedule")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    try:
+        test_cancel_keeps_schedule_so_far()
+        test_deadline_on_every_path()
+        test_multistart_and_cache()
+        test_route_time_limit()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Test script for the set-based swap availability oracle.
+
+This test verifies:
+1. Every candidate gets one status (unavailable, double_booked, no_interest, free) and
+   their skill level: assignments containing or inside the session, in any unit, are
+   double bookings while back-to-back ones are not, unavailability off the 15-minute grid
+   that only shares a slot with the session is not a conflict, and
+   check_facilitator_availability agrees with the oracle
+2. The swap picker returns the statuses with the same number of queries for a team of 6
+   or 26 facilitators
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+from datetime import datetime, time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import db, User, UserRole, Unit, Module, Session, Assignment, Unavailability, UnitFacilitator, \
+    FacilitatorSkill, SkillLevel
+from facilitator_routes import facilitator_bp, candidate_availability, check_facilitator_availability
+from optimization_engine import count_queries
+from test_auto_assign_jobs import _build_app, _client
+
+
+def _other_unit_session(coordinator_id, facilitator_id, start, end):
+    """Assign facilitator_id to a start..end session in a separate unit"""
+    unit = Unit.query.filter_by(unit_code='OTHER').first()
+    if unit is None:
+        unit = Unit(unit_code='OTHER', unit_name='Other', year=2025, semester='S2', created_by=coordinator_id)
+        db.session.add(unit)
+        db.session.flush()
+        db.session.add(Module(unit_id=unit.id, module_name='Elsewhere', module_type='lab'))
+        db.session.flush()
+    module = Module.query.filter_by(unit_id=unit.id).first()
+    session = Session(module_id=module.id, session_type='lab', start_time=start, end_time=end, location='Lab B')
+    db.session.add(session)
+    db.session.flush()
+    db.session.add(Assignment(session_id=session.id, facilitator_id=facilitator_id, role='lead'))
+
+
+def _prepare(workdir):
+    """
+    Session 1 runs 09:00-11:00 on 2025-08-04 (module 1); facilitator 7 asks for a swap.
+    2 already holds session 1, 3 works 09:30-10:30 elsewhere, 4 is away 10:00-10:30,
+    5 works 08:00-12:00 elsewhere, 6 has no interest in module 1, 8 works 11:00-13:00
+    elsewhere (back to back, so free)
+    """
+    app, (coordinator_id, unit_id) = _build_app(os.path.join(workdir, 'oracle.db'))
+    app.register_blueprint(facilitator_bp)
+    with app.app_context():
+        day = datetime(2025, 8, 4)
+        _other_unit_session(coordinator_id, 3, day.replace(hour=9, minute=30), day.replace(hour=10, minute=30))
+        _other_unit_session(coordinator_id, 5, day.replace(hour=8), day.replace(hour=12))
+        db.session.add(Unavailability(user_id=4, unit_id=unit_id, date=day.date(), start_time=time(10), end_time=time(10, 30)))
+        FacilitatorSkill.query.filter_by(facilitator_id=6, module_id=1).one().skill_level = SkillLevel.NO_INTEREST
+        newcomer = User(email='fac8@example.com', first_name='Fac', last_name='8', role=UserRole.FACILITATOR)
+        db.session.add(newcomer)
+        db.session.flush()
+        db.session.add(UnitFacilitator(unit_id=unit_id, user_id=newcomer.id))
+        db.session.add(FacilitatorSkill(facilitator_id=newcomer.id, module_id=1, skill_level=SkillLevel.HAVE_RUN_BEFORE))
+        _other_unit_session(coordinator_id, newcomer.id, day.replace(hour=11), day.replace(hour=13))
+        db.session.commit()
+    return app, coordinator_id, unit_id
+
+
+EXPECTED = {
+    2: 'double_booked', 3: 'double_booked', 4: 'unavailable', 5: 'double_booked', 6: 'no_interest', 8: 'free'
+}
+
+
+def test_overlap_statuses():
+    """Test the status of each candidate"""
+    print("\n" + "="*80)
+    print("TEST 1: Candidate statuses")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='oracle_')
+    try:
+        app, _, unit_id = _prepare(workdir)
+        with app.app_context():
+            session = db.session.get(Session, 1)
+            statuses = candidate_availability(sorted(EXPECTED), session.start_time, session.end_time, unit_id, 1)
+            print(f"  {({fid: status for fid, (status, _) in statuses.items()})}")
+            assert {fid: status for fid, (status, _) in statuses.items()} == EXPECTED, \
+                "❌ FAILED: overlap semantics wrong"
+            assert statuses[8][1] == SkillLevel.HAVE_RUN_BEFORE and statuses[6][1] == SkillLevel.NO_INTEREST
+
+            for facilitator_id, status in EXPECTED.items():
+                available, reason = check_facilitator_availability(
+                    facilitator_id, session.start_time.date(), session.start_time.time(), session.end_time.time(), unit_id)
+                # The single check does not look at skills
+                assert available == (status in ('free', 'no_interest')), f"❌ FAILED: facilitator {facilitator_id}"
+            assert check_facilitator_availability(3, session.start_time.date(), time(9), time(11), unit_id)[1] == \
+                "Facilitator has conflicting session assignment"
+
+            # 09:00-10:05 away and a 10:10 start share the 10:00 slot but do not overlap
+            day = datetime(2025, 8, 5)
+            db.session.add(Unavailability(user_id=4, unit_id=unit_id, date=day.date(), start_time=time(9), end_time=time(10, 5)))
+            db.session.commit()
+            for start, status in ((day.replace(hour=10, minute=10), 'free'), (day.replace(hour=10), 'unavailable')):
+                statuses = candidate_availability([4], start, day.replace(hour=11), unit_id, 1)
+                assert statuses[4][0] == status, f"❌ FAILED: a {start:%H:%M} start should be {status}"
+                available, _ = check_facilitator_availability(4, day.date(), start.time(), time(11), unit_id)
+                assert available == (status == 'free')
+        print("  ✅ PASSED: containing, contained and partial overlaps caught; back-to-back and adjacent off-grid free")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_picker_queries_are_constant():
+    """Test the swap picker's statuses and query count"""
+    print("\n" + "="*80)
+    print("TEST 2: Swap picker")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='oracle_')
+    try:
+        app, coordinator_id, unit_id = _prepare(workdir)
+        client = _client(app, 7)
+        url = '/facilitator/available-facilitators?session_id=1'
+
+        queries = []
+        for extra in (0, 20):
+            with app.app_context():
+                for i in range(extra):
+                    user = User(email=f'extra{i}@example.com', first_name='Extra', last_name=str(i), role=UserRole.FACILITATOR)
+                    db.session.add(user)
+                    db.session.flush()
+                    db.session.add(UnitFacilitator(unit_id=unit_id, user_id=user.id))
+                    db.session.add(FacilitatorSkill(facilitator_id=user.id, module_id=1, skill_level=SkillLevel.PROFICIENT))
+                    _other_unit_session(coordinator_id, user.id, datetime(2025, 8, 4, 11), datetime(2025, 8, 4, 12))
+                db.session.commit()
+                # The first request after a change compiles the unit's bitmaps
+                client.get(url)
+                counter = {}
+                with count_queries(counter, 'queries'):
+                    body = client.get(url).get_json()
+                queries.append(counter['queries'])
+            listed = {f['id']: f for f in body['facilitators']}
+            assert {fid: f['status'] for fid, f in listed.items() if fid in EXPECTED} == \
+                {fid: status for fid, status in EXPECTED.items() if status != 'no_interest'}
+            assert listed[8]['skill_level'] == 'Have Run Before' and 'available' not in listed[8]
+            assert listed[4]['available'] is False and listed[4]['reason'] == 'Facilitator has marked unavailability for this time'
+            assert len(listed) == 5 + extra
+        print(f"  Queries with 6 and 26 candidates: {queries}")
+        assert queries[0] == queries[1], "❌ FAILED: the picker still queries per facilitator"
+        print("  ✅ PASSED: statuses listed with a constant number of queries")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    try:
+        test_overlap_statuses()
+        test_picker_queries_are_constant()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk unavailability import.
+
+This test verifies:
+1. CSV and iCal files are read into entries: multi-day and overnight events are split
+   per day, recurring events become rules with EXDATE exceptions, free/cancelled events
+   are left out and unsupported rules are reported; UTC and TZID times are converted to
+   the app's time zone and unknown zones rejected
+2. Thousands of JSON entries are validated and upserted in one transaction in well under
+   a second with a handful of queries; invalid rows are reported by row number
+3. A re-import updates existing slots (full-day ones included) instead of duplicating
+   them; skip, atomic and dry_run modes write what they promise, and a slot inserted by
+   another transaction in the meantime is counted as updated or skipped, not created
+4. CSV and .ics uploads work for facilitators, the admin endpoint resolves users by email,
+   and the compiled availability sees the imported entries
+"""
+
+import sys
+import os
+import io
+import shutil
+import tempfile
+import time as timer
+from datetime import date, time, timedelta
+
+from sqlalchemy import event
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import db, User, UserRole, Unit, Unavailability, UnavailabilityException, RecurringPattern
+from admin_routes import admin_bp
+from facilitator_routes import facilitator_bp
+from optimization_engine import AVAILABILITY_CACHE, count_queries
+from unavailability_import import ImportRowError, read_csv_rows, read_ical_rows, upsert_unavailability, validate_rows
+from test_auto_assign_jobs import _build_app, _client
+
+ICAL = """BEGIN:VCALENDAR
+VERSION:2.0
+BEGIN:VEVENT
+SUMMARY:Conference
+DTSTART;VALUE=DATE:20250811
+DTEND;VALUE=DATE:20250813
+END:VEVENT
+BEGIN:VEVENT
+SUMMARY:Night shift
+DTSTART:20250814T220000
+DTEND:20250815T020000
+END:VEVENT
+BEGIN:VEVENT
+SUMMARY:Class
+DTSTART:20250804T090000
+DTEND:20250804T103000
+RRULE:FREQ=WEEKLY;BYDAY=MO;COUNT=4
+EXDATE:20250818T090000
+END:VEVENT
+BEGIN:VEVENT
+SUMMARY:Free to chat
+TRANSP:TRANSPARENT
+DTSTART:20250805T120000
+DTEND:20250805T130000
+END:VEVENT
+BEGIN:VEVENT
+SUMMARY:Odd
+DTSTART:20250806T120000
+DTEND:20250806T130000
+RRULE:FREQ=YEARLY;COUNT=2
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def _prepare(workdir):
+    app, (coordinator_id, unit_id) = _build_app(os.path.join(workdir, 'import.db'))
+    app.register_blueprint(facilitator_bp)
+    app.register_blueprint(admin_bp)
+    app.add_url_rule('/', 'index', lambda: 'index')
+    with app.app_context():
+        unit = db.session.get(Unit, unit_id)
+        unit.start_date, unit.end_date = date(2025, 7, 28), date(2025, 11, 30)
+        admin = User(email='admin@example.com', first_name='Ad', last_name='Min', role=UserRole.ADMIN)
+        db.session.add(admin)
+        db.session.commit()
+        admin_id = admin.id
+    return app, unit_id, admin_id
+
+
+def test_file_readers():
+    """Test the CSV and iCal readers"""
+    print("\n" + "="*80)
+    print("TEST 1: CSV and iCal readers")
+    print("="*80)
+
+    rows = read_csv_rows("\ufeffDate,Start_Time,End_Time,Reason\n2025-08-04,09:00,10:00,Class\n\n2025-08-05,,,Away\n")
+    assert rows == [(2, {'date': '2025-08-04', 'start_time': '09:00', 'end_time': '10:00', 'reason': 'Class'}),
+                    (4, {'date': '2025-08-05', 'reason': 'Away'})]
+
+    rows = read_ical_rows(ICAL)
+    entries = [(number, entry) for number, entry in rows if not isinstance(entry, ImportRowError)]
+    failures = [number for number, entry in rows if isinstance(entry, ImportRowError)]
+    by_event = {}
+    for number, entry in entries:
+        by_event.setdefault(number, []).append(entry)
+    print(f"  {len(entries)} entries from {len(by_event)} busy events, failed events: {failures}")
+    assert [e['date'] for e in by_event[1]] == ['2025-08-11', '2025-08-12'] and all(e['is_full_day'] for e in by_event[1])
+    assert [(e['date'], e['start_time'], e['end_time']) for e in by_event[2]] == [
+        ('2025-08-14', '22:00:00', '23:59:59'), ('2025-08-15', '00:00:00', '02:00:00')]
+    weekly = by_event[3][0]
+    assert weekly['recurring_pattern'] == 'weekly' and weekly['recurring_end_date'] == '2025-08-25'
+    assert weekly['exception_dates'] == ['2025-08-18'] and weekly['start_time'] == '09:00:00'
+    assert 4 not in by_event and failures == [5]
+
+    # Exported calendars mostly write UTC; entries hold Perth (UTC+8) wall-clock times
+    zoned = read_ical_rows("""BEGIN:VCALENDAR
+BEGIN:VEVENT
+DTSTART:20250804T010000Z
+DTEND:20250804T023000Z
+RRULE:FREQ=WEEKLY;UNTIL=20250825T155959Z
+EXDATE:20250818T010000Z
+END:VEVENT
+BEGIN:VEVENT
+DTSTART;TZID=Europe/London:20250805T090000
+DTEND;TZID=Europe/London:20250805T100000
+END:VEVENT
+BEGIN:VEVENT
+DTSTART;TZID=Mars/Olympus:20250806T090000
+DTEND;TZID=Mars/Olympus:20250806T100000
+END:VEVENT
+END:VCALENDAR
+""", 'Australia/Perth')
+    utc, london = zoned[0][1], zoned[1][1]
+    assert (utc['date'], utc['start_time'], utc['end_time']) == ('2025-08-04', '09:00:00', '10:30:00'), \
+        "❌ FAILED: UTC times were not converted"
+    assert utc['recurring_end_date'] == '2025-08-25' and utc['exception_dates'] == ['2025-08-18']
+    assert (london['date'], london['start_time'], london['end_time']) == ('2025-08-05', '16:00:00', '17:00:00')
+    assert zoned[2][0] == 3 and "Unknown time zone 'Mars/Olympus'" in str(zoned[2][1])
+    print("  ✅ PASSED: events split per day, rules and exceptions kept, times converted")
+
+
+def test_bulk_json_import():
+    """Test a large JSON import"""
+    print("\n" + "="*80)
+    print("TEST 2: Bulk JSON import")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='import_')
+    try:
+        app, unit_id, _ = _prepare(workdir)
+        client = _client(app, 2)
+        url = '/facilitator/unavailability/bulk'
+        # A full day plus 23 half-hour blocks for each of the unit's 126 days
+        entries = []
+        for offset in range(126):
+            day = (date(2025, 7, 28) + timedelta(days=offset)).isoformat()
+            entries.append({'date': day, 'is_full_day': True, 'reason': 'Whole day'})
+            for block in range(23):
+                minutes = 8 * 60 + 30 * block
+                entries.append({'date': day, 'start_time': f'{minutes // 60:02d}:{minutes % 60:02d}',
+                                'end_time': f'{(minutes + 30) // 60:02d}:{(minutes + 30) % 60:02d}'})
+        entries = entries[:3000]
+        entries[10] = {'date': '2025-13-01'}
+        entries[20] = {'date': '2026-01-05', 'is_full_day': True}
+        entries[30] = {'date': '2025-08-04', 'start_time': '11:00', 'end_time': '10:00'}
+
+        with app.app_context():
+            counter = {}
+            started = timer.perf_counter()
+            with count_queries(counter, 'queries'):
+                response = client.post(url, json={'unit_id': unit_id, 'entries': entries})
+            elapsed = timer.perf_counter() - started
+            body = response.get_json()
+            stored = Unavailability.query.filter_by(user_id=2).count()
+        print(f"  {body['created']} created, {len(body['errors'])} errors in {elapsed * 1000:.0f} ms, "
+              f"{counter['queries']} queries")
+        assert response.status_code == 200 and stored == body['created'] == body['valid']
+        assert [error['row'] for error in body['errors']] == [11, 21, 31]
+        assert 'unit end date' in body['errors'][1]['error']
+        assert elapsed < 1.0, "❌ FAILED: import is not well under a second"
+        assert counter['queries'] < 15, "❌ FAILED: import runs per-row queries"
+        print("  ✅ PASSED: thousands of rows in one pass, errors by row")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_upsert_modes():
+    """Test conflict handling and the atomic/dry-run options"""
+    print("\n" + "="*80)
+    print("TEST 3: Upsert modes")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='import_')
+    try:
+        app, unit_id, _ = _prepare(workdir)
+        client = _client(app, 2)
+        url = '/facilitator/unavailability/bulk'
+        entries = [{'date': '2025-08-04', 'is_full_day': True, 'reason': 'First'},
+                   {'date': '2025-08-05', 'start_time': '09:00', 'end_time': '10:00', 'reason': 'First'}]
+
+        assert client.post(url, json={'unit_id': unit_id, 'entries': entries}).get_json()['created'] == 2
+        again = client.post(url, json={'unit_id': unit_id, 'entries': [dict(e, reason='Second') for e in entries]}).get_json()
+        assert (again['created'], again['updated']) == (0, 2)
+        skipped = client.post(url, json={'unit_id': unit_id, 'on_conflict': 'skip',
+                                         'entries': [dict(e, reason='Third') for e in entries]}).get_json()
+        assert skipped['skipped'] == 2
+        with app.app_context():
+            reasons = sorted(u.reason for u in Unavailability.query.filter_by(user_id=2))
+        assert reasons == ['Second', 'Second'], "❌ FAILED: a re-import duplicated or skipped wrongly"
+
+        duplicate = client.post(url, json={'unit_id': unit_id, 'entries': [entries[0], entries[0]]}).get_json()
+        assert duplicate['errors'] == [{'row': 2, 'error': 'Same date and time as row 1 of this import'}]
+
+        bad = entries + [{'date': 'soon'}]
+        response = client.post(url, json={'unit_id': unit_id, 'atomic': True, 'entries': [dict(e, date='2025-09-01') for e in bad]})
+        assert response.status_code == 400 and not response.get_json()['written']
+        preview = client.post(url, json={'unit_id': unit_id, 'dry_run': True, 'entries': [dict(e, date='2025-09-02') for e in bad]}).get_json()
+        assert preview['valid'] == 2 and not preview['written']
+        with app.app_context():
+            assert Unavailability.query.filter_by(user_id=2).count() == 2, "❌ FAILED: atomic or dry run wrote rows"
+
+        # Slots another transaction inserts after the existing-slot lookup
+        with app.app_context():
+            racing = [{'date': '2025-08-06', 'start_time': '09:00', 'end_time': '10:00'},
+                      {'date': '2025-08-07', 'start_time': '09:00', 'end_time': '10:00'}]
+            for on_conflict, day in (('update', '2025-08-06'), ('skip', '2025-08-07')):
+                valid, _ = validate_rows(list(enumerate(racing, start=1)), user_id=2, unit_id=unit_id)
+
+                def concurrent_insert(conn, cursor, statement, parameters, context, executemany):
+                    if statement.startswith('INSERT INTO unavailability ') and not racing_done:
+                        racing_done.append(True)
+                        cursor.execute(
+                            "INSERT INTO unavailability (user_id, unit_id, date, start_time, end_time, is_full_day, "
+                            "created_at, updated_at) VALUES (2, ?, ?, '09:00:00.000000', '10:00:00.000000', 0, "
+                            "'2025-01-01 00:00:00.000000', '2025-01-01 00:00:00.000000')", (unit_id, day))
+
+                racing_done = []
+                event.listen(db.engine, 'before_cursor_execute', concurrent_insert)
+                try:
+                    counts = upsert_unavailability([v for v in valid if v['date'].isoformat() == day] +
+                                                   [dict(v, date=v['date'] + timedelta(days=30)) for v in valid[:1]],
+                                                   on_conflict)
+                finally:
+                    event.remove(db.engine, 'before_cursor_execute', concurrent_insert)
+                db.session.rollback()
+                assert racing_done and counts['created'] == 1, f"❌ FAILED: {on_conflict} over-reported created: {counts}"
+                assert counts['updated' if on_conflict == 'update' else 'skipped'] == 1
+
+        assert client.post(url, json={'unit_id': unit_id, 'on_conflict': 'merge', 'entries': []}).status_code == 400
+        assert _client(app, 1).post(url, json={'unit_id': unit_id, 'entries': []}).status_code != 200
+        with app.app_context():
+            outsider = User(email='out@example.com', role=UserRole.FACILITATOR)
+            db.session.add(outsider)
+            db.session.commit()
+            outsider_id = outsider.id
+        assert _client(app, outsider_id).post(url, json={'unit_id': unit_id, 'entries': entries}).status_code == 403
+        print("  ✅ PASSED: update, skip, atomic and dry run behave")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def test_uploads_and_admin():
+    """Test file uploads and the admin endpoint"""
+    print("\n" + "="*80)
+    print("TEST 4: Uploads and admin import")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='import_')
+    try:
+        app, unit_id, admin_id = _prepare(workdir)
+        client = _client(app, 3)
+        with app.app_context():
+            AVAILABILITY_CACHE.unit(unit_id)
+
+        body = client.post('/facilitator/unavailability/bulk', data={
+            'unit_id': str(unit_id), 'file': (io.BytesIO(ICAL.encode()), 'calendar.ics')
+        }, content_type='multipart/form-data').get_json()
+        print(f"  iCal: {body['created']} created, errors {body['errors']}")
+        assert body['created'] == 5 and [e['row'] for e in body['errors']] == [5]
+        with app.app_context():
+            rule = Unavailability.query.filter_by(user_id=3, recurring_pattern=RecurringPattern.WEEKLY).one()
+            assert [o.date for o in rule.occurrences()] == [date(2025, 8, 4), date(2025, 8, 11), date(2025, 8, 25)]
+            assert UnavailabilityException.query.count() == 1
+            compiled = AVAILABILITY_CACHE.unit(unit_id)
+            assert not compiled.is_free(3, date(2025, 8, 12)) and compiled.is_free(3, date(2025, 8, 18), time(9), time(10))
+
+        csv_text = "user_email,unit_id,date,start_time,end_time,reason\n" \
+                   f"FAC3@example.com,{unit_id},2025-08-06,13:00,15:00,Dentist\n" \
+                   f"nobody@example.com,{unit_id},2025-08-06,13:00,15:00,\n" \
+                   f"fac4@example.com,{unit_id},2025-08-07,,,Away\n"
+        admin = _client(app, admin_id)
+        response = admin.post('/admin/unavailability/bulk', data={
+            'file': (io.BytesIO(csv_text.encode()), 'busy.csv')}, content_type='multipart/form-data')
+        body = response.get_json()
+        print(f"  Admin CSV: {body['created']} created, errors {body['errors']}")
+        assert response.status_code == 200 and body['ok'] and body['created'] == 2
+        assert body['errors'] == [{'row': 3, 'error': 'User not found'}]
+        with app.app_context():
+            owners = {u.user_id for u in Unavailability.query.filter_by(date=date(2025, 8, 6))}
+            full_day = Unavailability.query.filter_by(date=date(2025, 8, 7)).one()
+            assert len(owners) == 1 and full_day.is_full_day and full_day.reason == 'Away'
+        assert admin.post('/admin/unavailability/bulk', json={'entries': [{'date': '2025-08-08'}]}).status_code == 400
+        print("  ✅ PASSED: uploads imported, admin resolves users by email")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    try:
+        test_file_readers()
+        test_bulk_json_import()
+        test_upsert_modes()
+        test_uploads_and_admin()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
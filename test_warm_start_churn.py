@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for minimal-churn warm starts (repair with a churn penalty).
+
+This test verifies:
+1. The LocalSearch churn term is tracked incrementally and a high penalty stops the
+   improvement pass from moving any previous assignment beyond what the repair needed,
+   while no penalty lets it
+2. changed_assignments counts a slot handed to someone else once
+3. A repair run through the route reports the changed assignments, and publish_preview
+   and a re-publish only include the facilitators whose schedule changed
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import db, Assignment, Notification, Session, Unavailability
+from benchmark_optimization_engine import build_synthetic_problem
+from optimization_engine import MAX_CHURN_PENALTY, LocalSearch, generate_optimal_assignments, repair_assignments
+from test_auto_assign_jobs import _build_app, _client
+
+
+def _rows(assignments):
+    return [
+        {'session_id': a['session']['id'], 'facilitator_id': a['facilitator']['id'], 'role': a['role']}
+        for a in assignments
+    ]
+
+
+def test_churn_penalty_in_local_search():
+    """Test the churn term of the LocalSearch objective"""
+    print("\n" + "="*80)
+    print("TEST 1: Churn penalty in the improvement pass")
+    print("="*80)
+
+    facilitators, context = build_synthetic_problem(300, facilitator_count=15, seed=4)
+    assignments, _ = generate_optimal_assignments(facilitators, context=context, seed=4)
+    anchors = {(row['session_id'], row['facilitator_id'], row['role']) for row in _rows(assignments)}
+
+    search = LocalSearch(assignments, facilitators, context, seed=1, anchors=anchors, churn_penalty=0.05)
+    _, report = search.run(1.0)
+    assert abs(search.objective - search.full_objective()) < 1e-6, "❌ FAILED: churn term drifted from the full objective"
+
+    # The unit is understaffed, so the repair itself already moves a few assignments to fill open slots
+    facilitators, context = build_synthetic_problem(300, facilitator_count=15, seed=4)
+    _, _, report = repair_assignments(facilitators, _rows(assignments), context, churn_penalty=MAX_CHURN_PENALTY)
+    needed = report['changed_assignments']
+    changed = {}
+    for penalty in (0.0, MAX_CHURN_PENALTY):
+        facilitators, context = build_synthetic_problem(300, facilitator_count=15, seed=4)
+        _, _, report = repair_assignments(facilitators, _rows(assignments), context, churn_penalty=penalty,
+                                          improve_seconds=1.0, seed=1)
+        changed[penalty] = report['changed_assignments']
+        print(f"  churn_penalty={penalty}: {report['changed_assignments']} changed ({needed} needed), "
+              f"local search stopped: {context.stats['local_search']['stopped']}")
+    assert changed[0.0] > needed, "Precondition: the improvement pass finds something to change"
+    assert changed[MAX_CHURN_PENALTY] == needed, "❌ FAILED: a high churn penalty still moved assignments"
+    print("  ✅ PASSED: churn is priced into every move")
+
+
+def test_changed_assignment_count():
+    """Test that a slot changing hands counts once"""
+    print("\n" + "="*80)
+    print("TEST 2: Changed assignment count")
+    print("="*80)
+
+    facilitators, context = build_synthetic_problem(300, facilitator_count=30, seed=2)
+    assignments, _ = generate_optimal_assignments(facilitators, context=context, seed=2)
+    victim = assignments[0]['facilitator']['id']
+    blocked_day = assignments[0]['session']['date']
+    context.unavailability[(victim, 1, blocked_day)] = [(True, None, None)]
+
+    repaired, conflicts, report = repair_assignments(facilitators, _rows(assignments), context)
+    print(f"  Removed {len(report['removed'])}, added {len(report['added'])}, changed {report['changed_assignments']}")
+    assert report['removed'] and len(report['removed']) == len(report['added'])
+    assert report['changed_assignments'] == len(report['removed'])
+    assert victim in report['changed_facilitators']
+    print("  ✅ PASSED: one change per reassigned slot")
+
+
+def test_repair_route_and_publish():
+    """Test the reported churn and the notifications of a re-publish"""
+    print("\n" + "="*80)
+    print("TEST 3: Warm start through the route and re-publish")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='warm_start_')
+    try:
+        app, (coordinator_id, unit_id) = _build_app(os.path.join(workdir, 'warm_start.db'))
+        client = _client(app, coordinator_id)
+        base = f'/unitcoordinator/units/{unit_id}'
+
+        assert client.post(f'{base}/auto_assign', json={'repair': True, 'churn_penalty': 'lots'}).status_code == 400
+        assert client.post(f'{base}/auto_assign', json={'allow_partial': True}).get_json()['ok']
+        preview = client.get(f'{base}/publish_preview').get_json()
+        assert preview['facilitators_unchanged'] == 0
+        assert client.post(f'{base}/publish').get_json()['ok']
+        with app.app_context():
+            first_publish = Notification.query.count()
+            # One facilitator becomes unavailable on the first day
+            victim = Assignment.query.filter_by(session_id=1).first().facilitator_id
+            first_day = db.session.get(Session, 1).start_time.date()
+            db.session.add(Unavailability(user_id=victim, unit_id=unit_id, date=first_day, is_full_day=True))
+            db.session.commit()
+
+        body = client.post(f'{base}/auto_assign', json={'repair': True, 'churn_penalty': 10}).get_json()
+        print(f"  {body['message']}")
+        assert body['ok'] and body['changed_assignments'] == body['repair']['changed_assignments'] > 0
+        assert body['repair']['churn_penalty'] == 10
+        affected = set(body['repair']['changed_facilitators'])
+
+        preview = client.get(f'{base}/publish_preview').get_json()
+        print(f"  Preview: notify {preview['facilitators_to_notify']}, {preview['facilitators_unchanged']} unchanged")
+        assert set(preview['facilitators_to_notify']) <= affected and preview['facilitators_unchanged'] > 0
+        published = client.post(f'{base}/publish').get_json()
+        assert published['facilitators_notified'] == len(preview['facilitators_to_notify'])
+        with app.app_context():
+            notified = {n.user_id for n in Notification.query.offset(first_publish).all()}
+        assert notified == set(preview['facilitators_to_notify']), "❌ FAILED: unaffected facilitators were re-notified"
+        print("  ✅ PASSED: only facilitators with changed assignments re-notified")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    try:
+        test_churn_penalty_in_local_search()
+        test_changed_assignment_count()
+        test_repair_route_and_publish()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
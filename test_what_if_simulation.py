@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test script for what-if schedule simulation.
+
+This test verifies:
+1. Every edit type changes only copies of the inputs, and invalid edits are rejected
+2. Extra facilitators reduce unfilled slots on an understaffed unit, lost availability
+   increases them, and unaffected assignments are kept
+3. A typical unit is simulated in well under a second
+4. The simulate endpoint returns the deltas and writes nothing
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models import db, User, Assignment, SkillLevel
+from benchmark_optimization_engine import build_synthetic_problem
+from optimization_engine import apply_what_if_edits, generate_optimal_assignments, simulate_schedule
+from test_auto_assign_jobs import _build_app, _client
+
+
+def _current_schedule(session_count, facilitator_count, seed):
+    facilitators, context = build_synthetic_problem(session_count, facilitator_count=facilitator_count, seed=seed)
+    assignments, _ = generate_optimal_assignments(facilitators, context=context, seed=1)
+    existing = [{'session_id': a['session']['id'], 'facilitator_id': a['facilitator']['id'], 'role': a['role']}
+                for a in assignments]
+    return facilitators, context, existing
+
+
+def test_edits_apply_to_copies():
+    """Test each edit type and the validation"""
+    print("\n" + "="*80)
+    print("TEST 1: Applying edits")
+    print("="*80)
+
+    facilitators, context = build_synthetic_problem(100, facilitator_count=6, seed=1)
+    fridays = [s for s in context.sessions if s['date'].weekday() == 4]
+    unavailability_before = {key: list(entries) for key, entries in context.unavailability.items()}
+    first_day = context.sessions[0]['date']
+    edits = [
+        {'type': 'add_facilitator', 'count': 2, 'skill': 'proficient', 'max_hours': 12},
+        {'type': 'remove_facilitator', 'facilitator_id': facilitators[0]['id']},
+        {'type': 'unavailable', 'facilitator_id': facilitators[1]['id'], 'from': str(first_day), 'to': str(first_day)},
+        {'type': 'move_sessions', 'weekday': 'friday', 'days': -1},
+        {'type': 'set_staffing', 'session_ids': [context.sessions[0]['id']], 'lead': 2, 'support': 1}
+    ]
+    edited_facilitators, edited = apply_what_if_edits(facilitators, context, edits)
+
+    assert [f['id'] for f in edited_facilitators][-2:] == [-1, -2]
+    assert all(level == SkillLevel.PROFICIENT for level in edited_facilitators[-1]['skills'].values())
+    assert facilitators[0]['id'] not in {f['id'] for f in edited_facilitators}
+    assert any(key[0] == facilitators[1]['id'] and key[2] == first_day for key in edited.unavailability)
+    moved = {s['id']: s for s in edited.sessions}
+    assert fridays and all(moved[s['id']]['date'].weekday() == 3 and moved[s['id']]['day_of_week'] == 3 for s in fridays)
+    assert edited.sessions[0]['lead_staff_required'] == 2 and edited.sessions[0]['support_staff_required'] == 1
+
+    # The inputs are untouched
+    assert len(facilitators) == 6 and all(s['date'].weekday() == 4 for s in fridays)
+    assert context.unavailability == unavailability_before
+
+    for bad in ({'type': 'teleport'}, {'type': 'remove_facilitator', 'facilitator_id': 999},
+                {'type': 'unavailable', 'facilitator_id': 1, 'date': 'next week'},
+                {'type': 'move_sessions', 'weekday': 'someday'}, {'type': 'set_staffing'}):
+        try:
+            apply_what_if_edits(facilitators, context, [{'type': 'add_facilitator'}, bad])
+        except ValueError as e:
+            assert str(e).startswith("Edit 2"), f"❌ FAILED: error does not name the edit: {e}"
+        else:
+            assert False, f"❌ FAILED: {bad} was accepted"
+    print("  ✅ PASSED: all edit types applied to copies, invalid edits rejected")
+
+
+def test_simulated_deltas():
+    """Test the direction of the deltas and that untouched assignments are kept"""
+    print("\n" + "="*80)
+    print("TEST 2: Metric deltas")
+    print("="*80)
+
+    facilitators, context, existing = _current_schedule(300, 4, seed=6)
+    result = simulate_schedule(facilitators, context, existing, [{'type': 'add_facilitator', 'count': 20, 'skill': 'proficient'}])
+    print(f"  +20 facilitators: unfilled {result['baseline']['unfilled_slots']} -> {result['simulated']['unfilled_slots']}, "
+          f"kept {result['changes']['kept']}/{len(existing)}")
+    assert result['baseline']['unfilled_slots'] > 0
+    assert result['delta']['unfilled_slots'] < 0, "❌ FAILED: extra facilitators did not fill any slot"
+    assert result['changes']['kept'] == len(existing) and result['changes']['removed'] == 0
+    assert sum(result['changes']['new_facilitator_hours'].values()) > 0
+    for key in ('unfilled_slots', 'hours_std_dev', 'skill_score'):
+        assert result['delta'][key] == result['simulated'][key] - result['baseline'][key]
+
+    facilitators, context, existing = _current_schedule(300, 30, seed=6)
+    first_day = context.sessions[0]['date']
+    result = simulate_schedule(facilitators, context, existing, [
+        {'type': 'unavailable', 'facilitator_id': f['id'], 'date': str(first_day)} for f in facilitators
+    ])
+    print(f"  Everyone away on {first_day}: unfilled +{result['delta']['unfilled_slots']}, removed {result['changes']['removed']}")
+    assert result['delta']['unfilled_slots'] > 0 and result['changes']['removed'] > 0
+    print("  ✅ PASSED: deltas follow the edits")
+
+
+def test_simulation_is_interactive():
+    """Test the response time on a typical unit"""
+    print("\n" + "="*80)
+    print("TEST 3: Simulation time")
+    print("="*80)
+
+    facilitators, context, existing = _current_schedule(600, 40, seed=2)
+    result = simulate_schedule(facilitators, context, existing, [
+        {'type': 'add_facilitator', 'count': 2},
+        {'type': 'move_sessions', 'weekday': 'friday', 'days': -1},
+        {'type': 'unavailable', 'facilitator_id': facilitators[0]['id'], 'from': str(context.sessions[0]['date']),
+         'to': str(context.sessions[-1]['date'])}
+    ])
+    print(f"  600 sessions / 40 facilitators: {result['elapsed_ms']} ms")
+    assert result['elapsed_ms'] < 1000, "❌ FAILED: simulation is not interactive"
+    print("  ✅ PASSED: answered in under a second")
+
+
+def test_simulate_endpoint():
+    """Test the endpoint end to end"""
+    print("\n" + "="*80)
+    print("TEST 4: Simulate endpoint")
+    print("="*80)
+
+    workdir = tempfile.mkdtemp(prefix='what_if_')
+    try:
+        app, (coordinator_id, unit_id) = _build_app(os.path.join(workdir, 'what_if.db'))
+        client = _client(app, coordinator_id)
+        url = f'/unitcoordinator/units/{unit_id}/auto_assign/simulate'
+
+        assert client.post(url, json={'edits': [{'type': 'teleport'}]}).status_code == 400
+        response = client.post(url, json={'edits': [{'type': 'add_facilitator', 'count': 2},
+                                                     {'type': 'remove_facilitator', 'facilitator_id': 3}]})
+        body = response.get_json()
+        print(f"  Delta: {body['delta']}")
+        assert response.status_code == 200 and body['ok']
+        assert body['baseline']['assignments'] == 1 and body['simulated']['unfilled_slots'] == 0
+        assert body['delta']['unfilled_slots'] == -body['baseline']['unfilled_slots']
+        with app.app_context():
+            assert [(a.session_id, a.facilitator_id) for a in Assignment.query.all()] == [(1, 2)]
+            assert User.query.count() == 7, "❌ FAILED: simulation wrote to the database"
+        print("  ✅ PASSED: deltas returned, database untouched")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    try:
+        test_edits_apply_to_copies()
+        test_simulated_deltas()
+        test_simulation_is_interactive()
+        test_simulate_endpoint()
+        print("\n✅ ALL TESTS PASSED SUCCESSFULLY!\n")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}\n")
+        sys.exit(1)
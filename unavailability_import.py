@@ -0,0 +1,591 @@
+"""
+Bulk import of unavailability entries
+
+Entries arrive as a JSON list, a CSV file or an iCalendar (.ics) file of busy times and
+share one shape: date, start_time, end_time, is_full_day, reason, recurring_pattern,
+recurring_end_date, recurring_interval (plus user_id/user_email and unit_id where the
+caller allows them). They are validated in memory against the units' date ranges, with
+one error per rejected row, and written in the caller's transaction:
+
+- a single query finds which slots of unique_unavailability_slot already exist
+- new slots go in with one INSERT .. ON CONFLICT against that constraint (SQLite and
+  PostgreSQL), so a row inserted concurrently is updated or skipped instead of failing
+- existing slots are updated (or skipped) with one bulk UPDATE by primary key
+
+Full-day entries have NULL times, which a unique constraint never treats as equal; the
+existing-slot lookup matches them in Python, so they are upserted like the rest.
+
+iCal times in UTC ('Z' suffix) or with a TZID are converted to the app's time zone
+(app.config['APP_TIMEZONE']), since entries store local wall-clock times; floating times
+are taken as they are, and an event in a time zone that is not known is rejected.
+Recurring events map onto recurrence rules (FREQ=DAILY/WEEKLY/MONTHLY with INTERVAL,
+UNTIL or COUNT, and a BYDAY naming the start's weekday); EXDATE dates become removal
+exceptions of the rule.
+"""
+
+import csv
+from datetime import date, datetime, time, timedelta, timezone
+from io import StringIO
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from flask import current_app
+from sqlalchemy import insert as sql_insert, update as sql_update
+
+from models import db, RecurringPattern, Unavailability, UnavailabilityException, Unit, User, recurring_dates
+
+# Largest number of entries accepted in one import
+MAX_IMPORT_ROWS = 10000
+
+# Longest reason stored with an entry (same limit as the single-entry endpoint)
+MAX_REASON_LENGTH = 500
+
+# Columns of the unique_unavailability_slot constraint
+SLOT_COLUMNS = ('user_id', 'unit_id', 'date', 'start_time', 'end_time')
+
+# Columns an upsert overwrites on an existing slot
+UPDATE_COLUMNS = ('is_full_day', 'recurring_pattern', 'recurring_end_date', 'recurring_interval', 'reason')
+
+ON_CONFLICT_MODES = ('update', 'skip')
+
+# Time zone imported calendar times are converted to when the app does not configure one
+DEFAULT_TIMEZONE = 'Australia/Perth'
+
+_ICAL_FREQUENCIES = {
+    'DAILY': RecurringPattern.DAILY,
+    'WEEKLY': RecurringPattern.WEEKLY,
+    'MONTHLY': RecurringPattern.MONTHLY,
+}
+_ICAL_WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+
+
+class ImportRowError(ValueError):
+    """A row that cannot be imported; the message goes into the error report"""
+
+
+def read_csv_rows(text):
+    """
+    (line number, entry) for every data row of a CSV file with a header row
+    Column names are matched case-insensitively; blank cells are left out
+    """
+    reader = csv.DictReader(StringIO(text.lstrip('\ufeff')))
+    rows = []
+    for record in reader:
+        entry = {
+            (key or '').strip().lower(): value.strip()
+            for key, value in record.items()
+            if isinstance(value, str) and value.strip()
+        }
+        if entry:
+            rows.append((reader.line_num, entry))
+    return rows
+
+
+def _unfold_ical(text):
+    lines = []
+    for line in text.replace('\r\n', '\n').replace('\r', '\n').split('\n'):
+        if line[:1] in (' ', '\t') and lines:
+            lines[-1] += line[1:]
+        elif line:
+            lines.append(line)
+    return lines
+
+
+def _zone(name):
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ImportRowError(f"Unknown time zone '{name}'")
+
+
+def _ical_value(value, params, local):
+    """
+    A DATE or DATE-TIME value as a date or a naive datetime in the local zone
+    UTC ('Z') and TZID times are converted; floating times are kept as they are
+    """
+    value = value.strip()
+    if 'T' not in value:
+        return datetime.strptime(value[:8], '%Y%m%d').date()
+    moment = datetime.strptime(value[:15], '%Y%m%dT%H%M%S')
+    if value.upper().endswith('Z'):
+        moment = moment.replace(tzinfo=timezone.utc)
+    elif params.get('TZID'):
+        moment = moment.replace(tzinfo=_zone(params['TZID'].strip('"')))
+    else:
+        return moment
+    return moment.astimezone(local).replace(tzinfo=None)
+
+
+def _ical_dates(value, params, local):
+    return [_ical_value(part, params, local) for part in value.split(',') if part.strip()]
+
+
+def _ical_property(line):
+    """(name, parameters, value) of an unfolded content line"""
+    head, value = line.split(':', 1)
+    name, *parameters = head.split(';')
+    params = {}
+    for parameter in parameters:
+        if '=' in parameter:
+            key, param_value = parameter.split('=', 1)
+            params[key.upper()] = param_value
+    return name.upper(), params, value
+
+
+def read_ical_rows(text, tz_name=DEFAULT_TIMEZONE):
+    """
+    (event number, entry or ImportRowError) for every busy VEVENT of an iCalendar file
+    One event can give several entries (an event spanning days gives one per day);
+    transparent and cancelled events are not busy time and are left out. Times are
+    converted to the tz_name zone (see the module docstring).
+    """
+    local = _zone(tz_name)
+    rows = []
+    event = None
+    number = 0
+    for line in _unfold_ical(text):
+        upper = line.upper()
+        if upper == 'BEGIN:VEVENT':
+            event = {}
+            number += 1
+        elif upper == 'END:VEVENT':
+            if event is not None:
+                try:
+                    rows.extend((number, entry) for entry in _ical_event_entries(event, local))
+                except (ImportRowError, ValueError) as e:
+                    rows.append((number, e if isinstance(e, ImportRowError) else ImportRowError(f"Invalid event: {e}")))
+            event = None
+        elif event is not None and ':' in line:
+            name, params, value = _ical_property(line)
+            event.setdefault(name, []).append((params, value))
+    return rows
+
+
+def _ical_text(event, name):
+    return event[name][0][1] if name in event else ''
+
+
+def _ical_event_entries(event, local):
+    if _ical_text(event, 'TRANSP').strip().upper() == 'TRANSPARENT':
+        return []
+    if _ical_text(event, 'STATUS').strip().upper() == 'CANCELLED':
+        return []
+    if 'DTSTART' not in event:
+        raise ImportRowError("Event has no DTSTART")
+
+    params, value = event['DTSTART'][0]
+    start = _ical_value(value, params, local)
+    all_day = not isinstance(start, datetime)
+    if 'DTEND' in event:
+        params, value = event['DTEND'][0]
+        end = _ical_value(value, params, local)
+    elif all_day:
+        end = start + timedelta(days=1)
+    else:
+        raise ImportRowError("Timed event has no DTEND")
+    if isinstance(end, datetime) == all_day or end <= start:
+        raise ImportRowError("DTEND must be of the same type as DTSTART and after it")
+    reason = _ical_text(event, 'SUMMARY').replace('\\,', ',').replace('\\n', ' ').strip()[:MAX_REASON_LENGTH]
+
+    # One window per calendar day the event touches (DTEND is exclusive)
+    windows = []
+    if all_day:
+        day = start
+        while day < end:
+            windows.append((day, None, None))
+            day += timedelta(days=1)
+    else:
+        day = start.date()
+        while datetime.combine(day, time.min) < end:
+            day_start = max(start, datetime.combine(day, time.min))
+            day_end = min(end, datetime.combine(day + timedelta(days=1), time.min))
+            if day_start == datetime.combine(day, time.min) and day_end == datetime.combine(day + timedelta(days=1), time.min):
+                windows.append((day, None, None))
+            else:
+                last = day_end.time() if day_end.date() == day else time(23, 59, 59)
+                windows.append((day, day_start.time(), last))
+            day += timedelta(days=1)
+
+    rule = {}
+    if 'RRULE' in event:
+        if len(windows) > 1:
+            raise ImportRowError("Recurring events spanning several days are not supported")
+        rule = _ical_rule(_ical_text(event, 'RRULE'), windows[0][0], local)
+        exceptions = sorted({
+            value if isinstance(value, date) and not isinstance(value, datetime) else value.date()
+            for params, values in event.get('EXDATE', ()) for value in _ical_dates(values, params, local)
+        })
+        if exceptions:
+            rule['exception_dates'] = [day.isoformat() for day in exceptions]
+
+    entries = []
+    for day, start_time, end_time in windows:
+        entry = {'date': day.isoformat(), 'is_full_day': start_time is None, 'reason': reason}
+        if start_time is not None:
+            entry['start_time'] = start_time.isoformat()
+            entry['end_time'] = end_time.isoformat()
+        entry.update(rule)
+        entries.append(entry)
+    return entries
+
+
+def _ical_rule(value, anchor, local):
+    parts = dict(part.split('=', 1) for part in value.upper().split(';') if '=' in part)
+    pattern = _ICAL_FREQUENCIES.get(parts.pop('FREQ', None))
+    if pattern is None:
+        raise ImportRowError("Only DAILY, WEEKLY and MONTHLY recurrences are supported")
+    interval = int(parts.pop('INTERVAL', '1'))
+    parts.pop('WKST', None)
+    if 'BYDAY' in parts and parts.pop('BYDAY') != _ICAL_WEEKDAYS[anchor.weekday()]:
+        raise ImportRowError("BYDAY must name the weekday of DTSTART")
+    if 'UNTIL' in parts:
+        until = _ical_value(parts.pop('UNTIL'), {}, local)
+        until = until.date() if isinstance(until, datetime) else until
+    elif 'COUNT' in parts:
+        count = int(parts.pop('COUNT'))
+        horizon = anchor + timedelta(days=max(count, 1) * interval * 31)
+        occurrences = recurring_dates(anchor, pattern, interval, horizon)
+        until = occurrences[min(count, len(occurrences)) - 1]
+    else:
+        raise ImportRowError("Recurring events need an UNTIL or COUNT")
+    if parts:
+        raise ImportRowError(f"Unsupported RRULE part {sorted(parts)[0]}")
+    return {'recurring_pattern': pattern.value, 'recurring_interval': interval, 'recurring_end_date': until.isoformat()}
+
+
+def _parse_date(value, field):
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    try:
+        return datetime.strptime(str(value).strip(), '%Y-%m-%d').date()
+    except ValueError:
+        raise ImportRowError(f"Invalid {field}; use YYYY-MM-DD")
+
+
+def _parse_time(value, field):
+    if isinstance(value, time):
+        return value
+    text = str(value).strip()
+    for fmt in ('%H:%M', '%H:%M:%S'):
+        try:
+            return datetime.strptime(text, fmt).time()
+        except ValueError:
+            continue
+    raise ImportRowError(f"Invalid {field}; use HH:MM")
+
+
+def _parse_flag(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def validate_rows(rows, user_id=None, unit_id=None, allowed_unit_ids=None):
+    """
+    Check (row number, entry) pairs in memory and resolve their owner and unit
+
+    user_id/unit_id are used for entries that do not name their own; entries may give
+    user_id or user_email (and unit_id) only when the matching default is None. Units
+    are limited to allowed_unit_ids when given. Owners and units are loaded with one
+    query each. Returns (entries ready for upsert_unavailability(), errors) where each
+    error is {'row': number, 'error': message}.
+    """
+    errors = []
+    parsed = []
+    for number, entry in rows:
+        if isinstance(entry, Exception):
+            errors.append({'row': number, 'error': str(entry)})
+        elif not isinstance(entry, dict):
+            errors.append({'row': number, 'error': "Entry must be an object"})
+        else:
+            parsed.append((number, entry))
+
+    emails = {str(e['user_email']).strip().lower() for _, e in parsed if user_id is None and not _blank(e.get('user_email'))}
+    user_ids = set()
+    unit_ids = {unit_id} if unit_id is not None else set()
+    for _, entry in parsed:
+        for field, default, found in (('user_id', user_id, user_ids), ('unit_id', unit_id, unit_ids)):
+            if default is None and not _blank(entry.get(field)):
+                try:
+                    found.add(int(entry[field]))
+                except (TypeError, ValueError):
+                    pass
+    users_by_email = {}
+    known_users = set(user_ids) if user_id is None else {user_id}
+    if user_id is None and (user_ids or emails):
+        query = db.session.query(User.id, User.email).filter(db.or_(User.id.in_(user_ids), db.func.lower(User.email).in_(emails)))
+        known_users = set()
+        for found_id, email in query:
+            known_users.add(found_id)
+            users_by_email[(email or '').lower()] = found_id
+    units = {unit.id: unit for unit in Unit.query.filter(Unit.id.in_(unit_ids))} if unit_ids else {}
+
+    entries = []
+    seen = {}
+    for number, entry in parsed:
+        try:
+            values = _validate_entry(entry, user_id, unit_id, known_users, users_by_email, units, allowed_unit_ids)
+        except ImportRowError as e:
+            errors.append({'row': number, 'error': str(e)})
+            continue
+        key = tuple(values[column] for column in SLOT_COLUMNS)
+        if key in seen:
+            errors.append({'row': number, 'error': f"Same date and time as row {seen[key]} of this import"})
+            continue
+        seen[key] = number
+        values['row'] = number
+        entries.append(values)
+    errors.sort(key=lambda error: error['row'])
+    return entries, errors
+
+
+def _validate_entry(entry, user_id, unit_id, known_users, users_by_email, units, allowed_unit_ids):
+    owner = user_id
+    if owner is None:
+        if not _blank(entry.get('user_id')):
+            try:
+                owner = int(entry['user_id'])
+            except (TypeError, ValueError):
+                raise ImportRowError("Invalid user_id")
+            if owner not in known_users:
+                raise ImportRowError("User not found")
+        elif not _blank(entry.get('user_email')):
+            owner = users_by_email.get(str(entry['user_email']).strip().lower())
+            if owner is None:
+                raise ImportRowError("User not found")
+        else:
+            raise ImportRowError("user_id or user_email is required")
+
+    target = unit_id
+    if target is None:
+        if _blank(entry.get('unit_id')):
+            raise ImportRowError("unit_id is required")
+        try:
+            target = int(entry['unit_id'])
+        except (TypeError, ValueError):
+            raise ImportRowError("Invalid unit_id")
+    unit = units.get(target)
+    if unit is None or (allowed_unit_ids is not None and target not in allowed_unit_ids):
+        raise ImportRowError("Unit not found or access denied")
+
+    if _blank(entry.get('date')):
+        raise ImportRowError("date is required")
+    day = _parse_date(entry['date'], 'date')
+    if unit.start_date and day < unit.start_date:
+        raise ImportRowError("Date is before unit start date")
+    if unit.end_date and day > unit.end_date:
+        raise ImportRowError("Date is after unit end date")
+
+    has_times = not _blank(entry.get('start_time')) or not _blank(entry.get('end_time'))
+    is_full_day = _parse_flag(entry['is_full_day']) if not _blank(entry.get('is_full_day')) else not has_times
+    start_time = end_time = None
+    if not is_full_day:
+        if _blank(entry.get('start_time')) or _blank(entry.get('end_time')):
+            raise ImportRowError("Start time and end time are required for partial day unavailability")
+        start_time = _parse_time(entry['start_time'], 'start_time')
+        end_time = _parse_time(entry['end_time'], 'end_time')
+        if start_time >= end_time:
+            raise ImportRowError("End time must be after start time")
+
+    pattern = None
+    end_date = None
+    interval = 1
+    exception_dates = []
+    if not _blank(entry.get('recurring_pattern')):
+        try:
+            pattern = RecurringPattern(str(entry['recurring_pattern']).strip().lower())
+        except ValueError:
+            raise ImportRowError("Invalid recurring pattern")
+        if _blank(entry.get('recurring_end_date')):
+            raise ImportRowError("Recurring end date is required for recurring unavailability")
+        end_date = _parse_date(entry['recurring_end_date'], 'recurring_end_date')
+        if end_date <= day:
+            raise ImportRowError("Recurring end date must be after the start date")
+        # Like generate-recurring, a rule stops at the end of the unit
+        if unit.end_date and end_date > unit.end_date:
+            end_date = unit.end_date
+        try:
+            interval = int(entry.get('recurring_interval') or 1)
+        except (TypeError, ValueError):
+            raise ImportRowError("Recurring interval must be between 1 and 52")
+        if interval < 1 or interval > 52:
+            raise ImportRowError("Recurring interval must be between 1 and 52")
+        exception_dates = [_parse_date(value, 'exception date') for value in entry.get('exception_dates') or ()]
+
+    reason = entry.get('reason') or ''
+    if not isinstance(reason, str):
+        raise ImportRowError("reason must be text")
+    if len(reason) > MAX_REASON_LENGTH:
+        raise ImportRowError(f"Reason must be {MAX_REASON_LENGTH} characters or less")
+
+    return {
+        'user_id': owner,
+        'unit_id': target,
+        'date': day,
+        'start_time': start_time,
+        'end_time': end_time,
+        'is_full_day': is_full_day,
+        'recurring_pattern': pattern,
+        'recurring_end_date': end_date,
+        'recurring_interval': interval,
+        'reason': reason.strip() or None,
+        'exception_dates': exception_dates,
+    }
+
+
+def _slot_key(values):
+    return tuple(values[column] for column in SLOT_COLUMNS)
+
+
+def upsert_unavailability(entries, on_conflict='update'):
+    """
+    Write validated entries (validate_rows()) in the current transaction, without committing
+
+    on_conflict='update' overwrites an existing slot's flags, recurrence and reason;
+    'skip' leaves it alone. Returns {'created': n, 'updated': n, 'skipped': n}, counting
+    a slot another transaction inserted meanwhile as updated or skipped.
+    """
+    counts = {'created': 0, 'updated': 0, 'skipped': 0}
+    if not entries:
+        return counts
+
+    slot = [getattr(Unavailability, column) for column in SLOT_COLUMNS]
+    existing = {
+        tuple(row[1:]): row[0]
+        for row in db.session.query(Unavailability.id, *slot).filter(
+            Unavailability.user_id.in_({e['user_id'] for e in entries}),
+            Unavailability.unit_id.in_({e['unit_id'] for e in entries}),
+            Unavailability.date.between(min(e['date'] for e in entries), max(e['date'] for e in entries))
+        )
+    }
+
+    now = datetime.utcnow()
+    inserts = []
+    updates = []
+    for entry in entries:
+        values = {column: entry[column] for column in SLOT_COLUMNS + UPDATE_COLUMNS}
+        row_id = existing.get(_slot_key(entry))
+        if row_id is None:
+            inserts.append(dict(values, created_at=now, updated_at=now))
+        elif on_conflict == 'update':
+            updates.append(dict({column: values[column] for column in UPDATE_COLUMNS}, id=row_id, updated_at=now))
+        else:
+            counts['skipped'] += 1
+
+    # The ORM batches consecutive rows with the same NULL columns into one statement
+    inserts.sort(key=lambda values: tuple(value is None for value in values.values()))
+    updates.sort(key=lambda values: tuple(value is None for value in values.values()))
+    
+    if inserts:
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            statement = insert(Unavailability)
+            if on_conflict == 'update':
+                statement = statement.on_conflict_do_update(
+                    index_elements=list(SLOT_COLUMNS),
+                    set_={column: statement.excluded[column] for column in UPDATE_COLUMNS + ('updated_at',)}
+                )
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=list(SLOT_COLUMNS))
+            # A slot inserted concurrently comes back with its own created_at when updated,
+            # and not at all when skipped
+            returned = db.session.execute(statement.returning(Unavailability.created_at), inserts).scalars().all()
+            counts['created'] = sum(1 for created_at in returned if created_at == now)
+            counts['updated'] += len(returned) - counts['created']
+            counts['skipped'] += len(inserts) - len(returned)
+        else:
+            db.session.execute(sql_insert(Unavailability), inserts)
+            counts['created'] = len(inserts)
+    if updates:
+        db.session.execute(sql_update(Unavailability), updates)
+        counts['updated'] += len(updates)
+
+    # EXDATE-style removals for recurring entries that carry them
+    excepted = [entry for entry in entries if entry.get('exception_dates')]
+    if excepted:
+        rule_ids = dict(
+            (tuple(row[1:]), row[0])
+            for row in db.session.query(Unavailability.id, *slot).filter(
+                Unavailability.user_id.in_({e['user_id'] for e in excepted}),
+                Unavailability.unit_id.in_({e['unit_id'] for e in excepted}),
+                Unavailability.recurring_pattern.isnot(None)
+            )
+        )
+        removals = []
+        for entry in excepted:
+            rule_id = rule_ids.get(_slot_key(entry))
+            if rule_id is None:
+                continue
+            dates = set(recurring_dates(entry['date'], entry['recurring_pattern'], entry['recurring_interval'],
+                                        entry['recurring_end_date']))
+            removals.extend(
+                {'unavailability_id': rule_id, 'date': day, 'is_removed': True, 'is_full_day': False, 'created_at': now}
+                for day in entry['exception_dates'] if day in dates
+            )
+        if removals:
+            known = set(
+                db.session.query(UnavailabilityException.unavailability_id, UnavailabilityException.date)
+                .filter(UnavailabilityException.unavailability_id.in_({r['unavailability_id'] for r in removals}))
+            )
+            removals = [r for r in removals if (r['unavailability_id'], r['date']) not in known]
+            if removals:
+                db.session.execute(sql_insert(UnavailabilityException), removals)
+    return counts
+
+
+def parse_import_request(req):
+    """
+    (options, rows) from a bulk import request: a JSON body with an `entries` list, or a
+    multipart upload of a CSV or iCalendar `file` with the options as form fields
+    Raises ImportRowError for a request that cannot be read at all
+    """
+    upload = req.files.get('file')
+    if upload is not None:
+        options = req.form.to_dict()
+        text = upload.read().decode('utf-8', errors='replace')
+        name = (upload.filename or '').lower()
+        if name.endswith(('.ics', '.ical', '.ifb')) or 'BEGIN:VCALENDAR' in text[:1000].upper():
+            rows = read_ical_rows(text, current_app.config.get('APP_TIMEZONE', DEFAULT_TIMEZONE))
+        else:
+            try:
+                rows = read_csv_rows(text)
+            except csv.Error as e:
+                raise ImportRowError(f"Failed to read CSV: {e}")
+    else:
+        options = req.get_json(silent=True)
+        if not isinstance(options, dict) or not isinstance(options.get('entries'), list):
+            raise ImportRowError("Send a JSON body with an entries list, or upload a CSV or .ics file")
+        rows = list(enumerate(options.pop('entries'), start=1))
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise ImportRowError(f"At most {MAX_IMPORT_ROWS} entries per import")
+
+    on_conflict = str(options.get('on_conflict') or 'update').lower()
+    if on_conflict not in ON_CONFLICT_MODES:
+        raise ImportRowError("on_conflict must be update or skip")
+    options['on_conflict'] = on_conflict
+    options['atomic'] = _parse_flag(options.get('atomic') or False)
+    options['dry_run'] = _parse_flag(options.get('dry_run') or False)
+    return options, rows
+
+
+def import_unavailability(rows, options, user_id=None, unit_id=None, allowed_unit_ids=None):
+    """
+    Validate and upsert rows (parse_import_request()) in the current transaction, without
+    committing. Nothing is written for a dry run, or for an atomic import with errors.
+    Returns the report: total, valid, created, updated, skipped, errors and written.
+    """
+    entries, errors = validate_rows(rows, user_id=user_id, unit_id=unit_id, allowed_unit_ids=allowed_unit_ids)
+    report = {'total': len(rows), 'valid': len(entries), 'created': 0, 'updated': 0, 'skipped': 0,
+              'errors': errors, 'written': False}
+    if options['dry_run'] or (options['atomic'] and errors) or not entries:
+        return report
+    report.update(upsert_unavailability(entries, options['on_conflict']))
+    report['written'] = True
+    return report
@@ -1,3 +1,4 @@
+import base64
 import logging
 import csv
 import re
@@ -12,14 +13,15 @@ from sqlalchemy import or_
 
 from flask import (
     Blueprint, render_template, redirect, url_for, flash, request,
-    jsonify, send_file
+    jsonify, send_file, current_app
 )
 
 from auth import login_required, get_current_user
 from utils import role_required
 from models import db
 
-from models import db, UserRole, Unit, User, Venue, UnitFacilitator, UnitVenue, Module, Session, Assignment, Unavailability, Facilitator, SwapRequest, SwapStatus, FacilitatorSkill, Notification
+from models import db, UserRole, Unit, User, Venue, UnitFacilitator, UnitVenue, Module, Session, Assignment, Unavailability, expand_unavailability, Facilitator, SwapRequest, SwapStatus, FacilitatorSkill, Notification, AutoAssignJob, JobStatus
+from optimization_engine import AVAILABILITY_CACHE, AVAILABILITY_SLOT_MINUTES, SLOTS_PER_DAY, FacilitatorIntervalIndex
 
 # ------------------------------------------------------------------------------
 # Setup
@@ -38,6 +40,9 @@ CSV_HEADERS = [
 
 EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 
+# Longest range (in weeks) the availability heat-map returns in one request
+MAX_HEATMAP_WEEKS = 26
+
 # ------------------------------------------------------------------------------
 # Helpers
 # ------------------------------------------------------------------------------
@@ -325,6 +330,34 @@ def _parse_recurrence(d: dict):
     }
 
 
+def _unavailability_conflicts(unit_id):
+    """
+    (assignment, occurrence, session, facilitator) for every assignment in the unit that
+    overlaps one of the facilitator's unavailable windows, answered from the unit's
+    compiled availability bitmaps (recurring rules included)
+    """
+    rows = (
+        db.session.query(Assignment, Session, User)
+        .join(Session, Session.id == Assignment.session_id)
+        .join(Module, Module.id == Session.module_id)
+        .join(User, User.id == Assignment.facilitator_id)
+        .filter(Module.unit_id == unit_id, Session.start_time.isnot(None), Session.end_time.isnot(None))
+        .all()
+    )
+    if not rows:
+        return []
+    availability = AVAILABILITY_CACHE.unit(unit_id)
+    
+    conflicts = []
+    for assignment, session, facilitator in rows:
+        day, start, end = session.start_time.date(), session.start_time.time(), session.end_time.time()
+        if availability.is_free(facilitator.id, day, start, end):
+            continue
+        for occurrence in availability.blocking(facilitator.id, day, start, end):
+            conflicts.append((assignment, occurrence, session, facilitator))
+    return conflicts
+
+
 def _within_unit_range(unit: Unit, dt: datetime) -> bool:
     """Check datetime against unit.start_date/end_date (if set)."""
     d = dt.date()
@@ -791,64 +824,17 @@ def dashboard():
         )
         
         # Check for facilitator double-booking conflicts
-        facilitator_sessions = {}
+        interval_index = FacilitatorIntervalIndex()
         for assignment, session, facilitator in assignments_query:
-            facilitator_id = facilitator.id
-            if facilitator_id not in facilitator_sessions:
-                facilitator_sessions[facilitator_id] = []
-            
-            facilitator_sessions[facilitator_id].append({
-                'assignment_id': assignment.id,
-                'session_id': session.id,
-                'start_time': session.start_time,
-                'end_time': session.end_time,
-                'facilitator_name': f"{facilitator.first_name} {facilitator.last_name}".strip()
-            })
+            interval_index.add(facilitator.id, session.start_time, session.end_time, session.location or 'TBA', session.id)
         
         # Detect overlapping sessions for each facilitator
-        for facilitator_id, sessions in facilitator_sessions.items():
-            sessions.sort(key=lambda x: x['start_time'])
-            
-            for i in range(len(sessions)):
-                current_session = sessions[i]
-                current_start = current_session['start_time']
-                current_end = current_session['end_time']
-                
-                # Check for overlaps with subsequent sessions
-                for j in range(i + 1, len(sessions)):
-                    next_session = sessions[j]
-                    next_start = next_session['start_time']
-                    next_end = next_session['end_time']
-                    
-                    # Check if sessions overlap
-                    if current_end > next_start:
-                        conflicts_count += 1
+        for facilitator_id in interval_index.facilitator_ids():
+            for _ in interval_index.overlapping_pairs(facilitator_id):
+                conflicts_count += 1
                         
         # Check for unavailability conflicts
-        unavailability_conflicts = (
-            db.session.query(Assignment, Unavailability, Session, User)
-            .join(Session, Session.id == Assignment.session_id)
-            .join(Module, Module.id == Session.module_id)
-            .join(User, User.id == Assignment.facilitator_id)
-            .join(Unavailability, 
-                  db.and_(
-                      Unavailability.user_id == Assignment.facilitator_id,
-                      Unavailability.unit_id == current_unit.id,
-                      db.func.date(Session.start_time) == Unavailability.date
-                  )
-            )
-            .filter(
-                Module.unit_id == current_unit.id,
-                db.or_(
-                    Unavailability.is_full_day == True,
-                    db.and_(
-                        Unavailability.start_time <= db.func.time(Session.start_time),
-                        Unavailability.end_time >= db.func.time(Session.end_time)
-                    )
-                )
-            )
-            .count()
-        )
+        unavailability_conflicts = len(_unavailability_conflicts(current_unit.id))
         
         conflicts_count += unavailability_conflicts
         
@@ -1135,64 +1121,17 @@ def admin_dashboard():
         )
         
         # Check for facilitator double-booking conflicts
-        facilitator_sessions = {}
+        interval_index = FacilitatorIntervalIndex()
         for assignment, session, facilitator in assignments_query:
-            facilitator_id = facilitator.id
-            if facilitator_id not in facilitator_sessions:
-                facilitator_sessions[facilitator_id] = []
-            
-            facilitator_sessions[facilitator_id].append({
-                'assignment_id': assignment.id,
-                'session_id': session.id,
-                'start_time': session.start_time,
-                'end_time': session.end_time,
-                'facilitator_name': f"{facilitator.first_name} {facilitator.last_name}".strip()
-            })
+            interval_index.add(facilitator.id, session.start_time, session.end_time, session.location or 'TBA', session.id)
         
         # Detect overlapping sessions for each facilitator
-        for facilitator_id, sessions in facilitator_sessions.items():
-            sessions.sort(key=lambda x: x['start_time'])
-            
-            for i in range(len(sessions)):
-                current_session = sessions[i]
-                current_start = current_session['start_time']
-                current_end = current_session['end_time']
-                
-                # Check for overlaps with subsequent sessions
-                for j in range(i + 1, len(sessions)):
-                    next_session = sessions[j]
-                    next_start = next_session['start_time']
-                    next_end = next_session['end_time']
-                    
-                    # Check if sessions overlap
-                    if current_end > next_start:
-                        conflicts_count += 1
+        for facilitator_id in interval_index.facilitator_ids():
+            for _ in interval_index.overlapping_pairs(facilitator_id):
+                conflicts_count += 1
                         
         # Check for unavailability conflicts
-        unavailability_conflicts = (
-            db.session.query(Assignment, Unavailability, Session, User)
-            .join(Session, Session.id == Assignment.session_id)
-            .join(Module, Module.id == Session.module_id)
-            .join(User, User.id == Assignment.facilitator_id)
-            .join(Unavailability, 
-                  db.and_(
-                      Unavailability.user_id == Assignment.facilitator_id,
-                      Unavailability.unit_id == current_unit.id,
-                      db.func.date(Session.start_time) == Unavailability.date
-                  )
-            )
-            .filter(
-                Module.unit_id == current_unit.id,
-                db.or_(
-                    Unavailability.is_full_day == True,
-                    db.and_(
-                        Unavailability.start_time <= db.func.time(Session.start_time),
-                        Unavailability.end_time >= db.func.time(Session.end_time)
-                    )
-                )
-            )
-            .count()
-        )
+        unavailability_conflicts = len(_unavailability_conflicts(current_unit.id))
         
         conflicts_count += unavailability_conflicts
         
@@ -1397,37 +1336,121 @@ def unit_unavailability(unit_id):
     if user_id:
         q = q.filter(Unavailability.user_id == user_id)
     try:
-        if start:
-            start_d = datetime.strptime(start, "%Y-%m-%d").date()
-            q = q.filter(Unavailability.date >= start_d)
-        if end:
-            end_d = datetime.strptime(end, "%Y-%m-%d").date()
-            q = q.filter(Unavailability.date <= end_d)
+        start_d = datetime.strptime(start, "%Y-%m-%d").date() if start else None
+        end_d = datetime.strptime(end, "%Y-%m-%d").date() if end else None
     except ValueError:
         return jsonify({"ok": False, "error": "Invalid date format; use YYYY-MM-DD"}), 400
+    q = q.filter(Unavailability.covering(start_d, end_d))
 
-    rows = (
-        q.order_by(Unavailability.date.asc(), Unavailability.start_time.asc().nulls_first()).all()
-    )
+    rows = q.all()
+    rules = {u.id: u for u in rows}
+    owners = {u.id: u for u in User.query.filter(User.id.in_({r.user_id for r in rows}))} if rows else {}
 
-    def serialize(u):
-        owner = User.query.get(u.user_id)
+    def serialize(o):
+        u = rules[o.unavailability_id]
+        owner = owners.get(u.user_id)
         return {
             "id": u.id,
             "user_id": u.user_id,
             "user": owner.full_name if owner else None,
             "unit_id": u.unit_id,
-            "date": u.date.isoformat(),
-            "is_full_day": bool(u.is_full_day),
-            "start_time": u.start_time.isoformat() if u.start_time else None,
-            "end_time": u.end_time.isoformat() if u.end_time else None,
+            "date": o.date.isoformat(),
+            "is_full_day": o.is_full_day,
+            "start_time": o.start_time.isoformat() if o.start_time else None,
+            "end_time": o.end_time.isoformat() if o.end_time else None,
             "recurring_pattern": u.recurring_pattern.value if u.recurring_pattern else None,
             "recurring_interval": u.recurring_interval,
             "recurring_end_date": u.recurring_end_date.isoformat() if u.recurring_end_date else None,
             "reason": u.reason or "",
         }
 
-    return jsonify({"ok": True, "items": [serialize(r) for r in rows]})
+    # Recurring rules are expanded into one item per date in the range
+    return jsonify({"ok": True, "items": [serialize(o) for o in expand_unavailability(rows, start_d, end_d)]})
+
+
+def _encode_bitset(bits: int, length: int) -> str:
+    """Base64 of the bitset's little-endian bytes: bit n of the result is slot n"""
+    return base64.b64encode(bits.to_bytes((length + 7) // 8, "little")).decode("ascii")
+
+
+def _run_lengths(values):
+    """[[value, run length], ...] for consecutive equal values"""
+    runs = []
+    for value in values:
+        if runs and runs[-1][0] == value:
+            runs[-1][1] += 1
+        else:
+            runs.append([value, 1])
+    return runs
+
+
+@unitcoordinator_bp.get("/units/<int:unit_id>/availability_heatmap")
+@login_required
+@role_required([UserRole.UNIT_COORDINATOR, UserRole.ADMIN])
+def availability_heatmap(unit_id):
+    """
+    Facilitator x 15-minute slot availability of the unit for the whole weeks (Monday to
+    Sunday) covering start..end (YYYY-MM-DD; defaults to the week of the unit's start date,
+    or this week).
+
+    Each facilitator's row is a base64 bitset (bit n set = free in slot n, slots counted
+    from 00:00 on the first day), and free_counts is the number of free facilitators per
+    slot, run-length encoded as [count, slots] pairs. Answered from the unit's compiled
+    availability; version is derived from the entries themselves, so it is the same on
+    every server and across restarts, and changes whenever a facilitator's entries do.
+    """
+    user = get_current_user()
+    unit = _get_user_unit_or_404(user, unit_id)
+    if not unit:
+        return jsonify({"ok": False, "error": "Unit not found or access denied"}), 404
+
+    try:
+        start = request.args.get("start")
+        end = request.args.get("end")
+        start_d = datetime.strptime(start, "%Y-%m-%d").date() if start else (unit.start_date or date.today())
+        end_d = datetime.strptime(end, "%Y-%m-%d").date() if end else start_d
+    except ValueError:
+        return jsonify({"ok": False, "error": "Invalid date format; use YYYY-MM-DD"}), 400
+    if end_d < start_d:
+        return jsonify({"ok": False, "error": "end must not be before start"}), 400
+    first_day = start_d - timedelta(days=start_d.weekday())
+    last_day = end_d + timedelta(days=6 - end_d.weekday())
+    weeks = ((last_day - first_day).days + 1) // 7
+    if weeks > MAX_HEATMAP_WEEKS:
+        return jsonify({"ok": False, "error": f"At most {MAX_HEATMAP_WEEKS} weeks per request"}), 400
+
+    facilitators = (
+        db.session.query(User.id, User.first_name, User.last_name, User.email)
+        .join(UnitFacilitator, UnitFacilitator.user_id == User.id)
+        .filter(UnitFacilitator.unit_id == unit.id)
+        .order_by(User.last_name.asc().nulls_last(), User.first_name.asc().nulls_last(), User.id)
+        .all()
+    )
+    availability = AVAILABILITY_CACHE.unit(unit.id)
+    free, counts = availability.heatmap([f.id for f in facilitators], first_day, last_day)
+    length = len(counts)
+
+    return jsonify({
+        "ok": True,
+        "unit_id": unit.id,
+        "version": availability.version,
+        "start": first_day.isoformat(),
+        "end": last_day.isoformat(),
+        "weeks": weeks,
+        "slot_minutes": AVAILABILITY_SLOT_MINUTES,
+        "slots_per_day": SLOTS_PER_DAY,
+        "slots": length,
+        "encoding": "base64-bitset-le",
+        "facilitators": [
+            {
+                "id": f.id,
+                "name": f"{f.first_name or ''} {f.last_name or ''}".strip() or f.email,
+                "free": _encode_bitset(free[f.id], length),
+            }
+            for f in facilitators
+        ],
+        "free_counts": _run_lengths(counts),
+    })
 
 
 
@@ -2370,13 +2393,26 @@ def check_auto_assign_validation(unit_id: int):
         
         can_run = len(facilitators_missing_skills) == 0
         
+        # Pre-solve bound on slots no schedule can fill, so infeasible runs are caught before they start
+        from optimization_engine import ConstraintContext, analyse_feasibility, prepare_facilitator_data
+        facilitators = prepare_facilitator_data(facilitators_from_db)
+        feasibility = analyse_feasibility(facilitators, ConstraintContext.load(facilitators, unit_id))
+        
+        if not can_run:
+            message = f"{len(facilitators_missing_skills)} facilitators need to declare their skills"
+        elif not feasibility['feasible']:
+            message = f"At least {feasibility['unfillable_slots']} of {feasibility['total_slots']} slots cannot be filled"
+        else:
+            message = "Auto-assignment ready"
+        
         return jsonify({
             "ok": True,
             "can_run": can_run,
             "total_facilitators": len(facilitators_from_db),
             "total_modules": len(unit_modules),
             "facilitators_missing_skills": facilitators_missing_skills,
-            "message": "Auto-assignment ready" if can_run else f"{len(facilitators_missing_skills)} facilitators need to declare their skills"
+            "feasibility": feasibility,
+            "message": message
         })
         
     except Exception as e:
@@ -2387,203 +2423,442 @@ def check_auto_assign_validation(unit_id: int):
             "error": "Error checking validation status"
         }), 500
 
+def _parse_auto_assign_options(options):
+    """
+    Validate the optional solver options of an auto-assign request body:
+    {"mode": "greedy" | "assignment", "improve_seconds": <local search budget, 0 = off>,
+     "starts": <number of seeded solves>, "seed": <seed to reproduce a previous schedule>,
+     "reuse": true to derive the seed from the inputs when none is given, so re-running on
+              unchanged data returns the same (cached) schedule instead of a fresh one,
+     "repair": true to keep still-valid assignments and re-solve only what changed,
+     "churn_penalty": <cost of each previous assignment a repair hands to someone else;
+                       with improve_seconds a repair only trades churn for larger gains>,
+     "allow_partial": true to solve even though some slots provably cannot be filled, and
+                      to save what a run stopped by time_limit managed to schedule,
+     "time_limit": <seconds the whole run may take; the best schedule so far is returned>,
+     "cross_unit": true to treat the facilitators' assignments in other units as busy time,
+     "co_units": [ids of further units to schedule in the same pass]}
+    Returns (options, None) with defaults filled in, or (None, error message)
+    """
+    from optimization_engine import (
+        SOLVER_MODES, MAX_IMPROVE_SECONDS, MAX_STARTS, MAX_TIME_LIMIT, MAX_CHURN_PENALTY, REPAIR_KEEP_BONUS
+    )
+    
+    mode = options.get('mode', 'greedy')
+    if mode not in SOLVER_MODES:
+        return None, f"Unknown solver mode '{mode}'. Expected one of: {', '.join(SOLVER_MODES)}"
+    try:
+        improve_seconds = min(max(float(options.get('improve_seconds', 0)), 0.0), MAX_IMPROVE_SECONDS)
+    except (TypeError, ValueError):
+        return None, "improve_seconds must be a number"
+    try:
+        starts = min(max(int(options.get('starts', 1)), 1), MAX_STARTS)
+        seed = int(options['seed']) if options.get('seed') is not None else None
+    except (TypeError, ValueError):
+        return None, "starts and seed must be integers"
+    try:
+        time_limit = min(float(options['time_limit']), MAX_TIME_LIMIT) if options.get('time_limit') is not None else None
+    except (TypeError, ValueError):
+        return None, "time_limit must be a number"
+    if time_limit is not None and time_limit <= 0:
+        return None, "time_limit must be positive"
+    try:
+        churn_penalty = min(max(float(options.get('churn_penalty', REPAIR_KEEP_BONUS)), 0.0), MAX_CHURN_PENALTY)
+    except (TypeError, ValueError):
+        return None, "churn_penalty must be a number"
+    try:
+        co_units = sorted({int(co_unit_id) for co_unit_id in options.get('co_units') or []})
+    except (TypeError, ValueError):
+        return None, "co_units must be a list of unit ids"
+    return {
+        'mode': mode,
+        'improve_seconds': improve_seconds,
+        'starts': starts,
+        'seed': seed,
+        'reuse': bool(options.get('reuse', False)),
+        'repair': bool(options.get('repair', False)),
+        'churn_penalty': churn_penalty,
+        'allow_partial': bool(options.get('allow_partial', False)),
+        'time_limit': time_limit,
+        'cross_unit': bool(options.get('cross_unit', False)),
+        'co_units': co_units
+    }, None
+
+
+def _check_co_units(user, unit, options):
+    """Error message if the user may not schedule one of the co-solved units, else None"""
+    options['co_units'] = [co_unit_id for co_unit_id in options['co_units'] if co_unit_id != unit.id]
+    for co_unit_id in options['co_units']:
+        if not _get_user_unit_or_404(user, co_unit_id):
+            return f"Unit {co_unit_id} not found or unauthorized"
+    return None
+
+
+def _run_auto_assign(unit, options, listener=None, cancel=None):
+    """
+    Solve a unit's schedule and stage the new Assignment rows in db.session
+    
+    Shared by the synchronous auto-assign route and the background job; nothing is
+    committed here, so the caller decides when the rewrite becomes visible. listener
+    gets the solver's progress events (see generate_optimal_assignments) plus 'phase'
+    events for loading, checking and saving. options['time_limit'] and the cancel token
+    stop the solve early; a schedule with unscheduled sessions is only staged when
+    options['allow_partial'] is set.
+    
+    options['co_units'] (checked by _check_co_units) are scheduled together with unit,
+    each facilitator only in the units they belong to; options['cross_unit'] makes
+    assignments in every other unit fixed busy time.
+    
+    Returns (response payload, HTTP status). A successful payload carries the CSV
+    report's temp file name under 'csv_report' (see _remember_schedule_report)
+    """
+    from optimization_engine import (
+        generate_optimal_assignments, 
+        calculate_metrics, 
+        format_session_time, 
+        prepare_facilitator_data,
+        generate_schedule_report_csv,
+        ConstraintContext,
+        analyse_feasibility,
+        SOLVE_CACHE,
+        problem_fingerprint,
+        repair_assignments,
+        REPAIR_KEEP_BONUS,
+        new_seed,
+        seed_from_fingerprint,
+        restrict_to_member_units
+    )
+    import time
+    
+    unit_id = unit.id
+    unit_ids = [unit_id] + list(options.get('co_units', ()))
+    mode = options['mode']
+    repair = options['repair']
+    seed = options['seed']
+    deadline = time.monotonic() + options['time_limit'] if options.get('time_limit') else None
+    if listener is not None:
+        listener({'event': 'phase', 'phase': 'loading'})
+    
+    # Get facilitators assigned to this unit (or any of the co-solved units), in id order:
+    # the seeded greedy pass shuffles them, so the same seed must see the same list
+    facilitators_from_db = (
+        db.session.query(User)
+        .join(UnitFacilitator, User.id == UnitFacilitator.user_id)
+        .filter(UnitFacilitator.unit_id.in_(unit_ids))
+        .filter(User.role == UserRole.FACILITATOR)
+        .order_by(User.id)
+        .all()
+    )
+    facilitators_from_db = list({facilitator.id: facilitator for facilitator in facilitators_from_db}.values())
+    member_units = {}
+    if len(unit_ids) > 1:
+        for user_id, member_unit_id in (
+            db.session.query(UnitFacilitator.user_id, UnitFacilitator.unit_id)
+            .filter(UnitFacilitator.unit_id.in_(unit_ids))
+        ):
+            member_units.setdefault(user_id, set()).add(member_unit_id)
+    
+    if not facilitators_from_db:
+        return {
+            "ok": False, 
+            "error": "No facilitators assigned to this unit"
+        }, 400
+    
+    # Validate that all facilitators have declared their skills and unavailability
+    validation_errors = []
+    
+    # Get all modules for this unit (excluding the default "General" module)
+    unit_modules = Module.query.filter(Module.unit_id.in_(unit_ids)).filter(Module.module_name != "General").all()
+    if not unit_modules:
+        return {
+            "ok": False,
+            "error": "No modules found for this unit. Please create modules first."
+        }, 400
+    
+    # Check skills declarations
+    facilitators_missing_skills = []
+    for facilitator in facilitators_from_db:
+        facilitator_skills = FacilitatorSkill.query.filter_by(facilitator_id=facilitator.id).all()
+        declared_module_ids = {skill.module_id for skill in facilitator_skills}
+        unit_module_ids = {module.id for module in unit_modules
+                           if not member_units or module.unit_id in member_units.get(facilitator.id, ())}
+        
+        # Check if facilitator has declared skills for all modules in this unit
+        missing_modules = unit_module_ids - declared_module_ids
+        if missing_modules:
+            missing_module_names = [Module.query.get(module_id).module_name for module_id in missing_modules if Module.query.get(module_id).module_name != "General"]
+            if missing_module_names:  # Only add if there are actual missing modules (not just General)
+                facilitators_missing_skills.append({
+                'name': facilitator.full_name,
+                'email': facilitator.email,
+                'missing_modules': missing_module_names
+            })
+    
+    if facilitators_missing_skills:
+        validation_errors.append({
+            'type': 'skills',
+            'message': 'Some facilitators have not declared their skills for all modules',
+            'facilitators': facilitators_missing_skills
+        })
+    
+    # Check unavailability declarations (optional - facilitators might not have any unavailability)
+    # We'll just log this for now but not block auto-assignment
+    facilitators_without_unavailability = []
+    for facilitator in facilitators_from_db:
+        unavailability_count = Unavailability.query.filter_by(user_id=facilitator.id, unit_id=unit_id).count()
+        if unavailability_count == 0:
+            facilitators_without_unavailability.append(facilitator.full_name)
+    
+    # Note: We don't block auto-assignment for missing unavailability since facilitators might be fully available
+    
+    if validation_errors:
+        return {
+            "ok": False,
+            "error": "Cannot run auto-assignment: Prerequisites not met",
+            "validation_errors": validation_errors,
+            "unavailability_note": f"Note: {len(facilitators_without_unavailability)} facilitators have not declared any unavailability (this is optional)"
+        }, 400
+    
+    # Prepare facilitator data for optimization
+    facilitators = prepare_facilitator_data(facilitators_from_db)
+    
+    # Bulk-load sessions, unavailability and (cross-unit) other units' assignments once so
+    # candidate checks run in memory
+    context = ConstraintContext.load(facilitators, unit_ids if len(unit_ids) > 1 else unit_id,
+                                     cross_unit=options.get('cross_unit', False))
+    if member_units:
+        facilitators = restrict_to_member_units(facilitators, context.sessions, member_units)
+    
+    # Never start a full solve that is known to leave slots empty unless the caller accepts it
+    if not repair and not options['allow_partial']:
+        if listener is not None:
+            listener({'event': 'phase', 'phase': 'checking', 'sessions_total': len(context.sessions)})
+        feasibility = analyse_feasibility(facilitators, context)
+        if not feasibility['feasible']:
+            return {
+                "ok": False,
+                "error": (f"At least {feasibility['unfillable_slots']} of {feasibility['total_slots']} slots cannot be filled "
+                          f"with the current facilitators. Send allow_partial to schedule the rest anyway."),
+                "feasibility": feasibility
+            }, 409
+    
+    # Each run without a seed draws a fresh one, so clicking auto-assign again can give a
+    # different schedule (ALGORITHM_RANDOMIZATION_UPDATE.md). The solve cache is only
+    # consulted for a given seed, or with reuse, where the seed is derived from the inputs
+    # and re-running on unchanged data is served from the cache
+    solve_cache = SOLVE_CACHE if seed is not None or options.get('reuse') else None
+    if seed is None:
+        seed = seed_from_fingerprint(problem_fingerprint(facilitators, context)) if options.get('reuse') else new_seed()
+    
+    # Existing assignments for this unit (replaced wholesale, or the starting point for a repair)
+    existing_assignments = (
+        Assignment.query
+        .join(Session, Assignment.session_id == Session.id)
+        .join(Module, Session.module_id == Module.id)
+        .filter(Module.unit_id.in_(unit_ids))
+        .all()
+    )
+    
+    repair_report = None
+    if repair:
+        # Keep still-valid assignments and re-solve only freed slots and their neighbourhood
+        previous = [
+            {'session_id': a.session_id, 'facilitator_id': a.facilitator_id, 'role': a.role or 'lead'}
+            for a in existing_assignments
+        ]
+        if listener is not None:
+            listener({'event': 'phase', 'phase': 'solving', 'sessions_total': len(context.sessions)})
+        assignments, conflicts, repair_report = repair_assignments(
+            facilitators, previous, context, churn_penalty=options.get('churn_penalty', REPAIR_KEEP_BONUS),
+            improve_seconds=options['improve_seconds'], seed=seed, deadline=deadline, cancel=cancel
+        )
+        logger.info(f"Auto-assign repair for unit {unit_id}: kept {repair_report['kept']}, "
+                    f"added {len(repair_report['added'])}, removed {len(repair_report['removed'])}, "
+                    f"changed {repair_report['changed_assignments']}")
+    else:
+        # Generate assignments using the optimization algorithm (filtered to this unit only)
+        assignments, conflicts = generate_optimal_assignments(
+            facilitators, unit_id, context=context, scoring='compiled', mode=mode,
+            improve_seconds=options['improve_seconds'], seed=seed, starts=options['starts'],
+            cache=solve_cache, listener=listener, deadline=deadline, cancel=cancel
+        )
+    logger.info(f"Auto-assign solver stats for unit {unit_id} ({'repair' if repair else mode}): {context.stats}")
+    # Per-session eligibility breakdown from the solver's rejection masks, for the UI
+    eligibility = context.rejections.summaries() if context.rejections is not None else {}
+    
+    # A run stopped before every session was scheduled would wipe the rest of the schedule
+    partial = context.stats.get('partial')
+    if partial and partial['unfinished_sessions'] and not options['allow_partial']:
+        return {
+            "ok": False,
+            "error": (f"Auto-assignment stopped ({partial['reason']}) with {len(partial['unfinished_sessions'])} of "
+                      f"{len(context.sessions)} sessions unscheduled; nothing was saved. Allow more time or send "
+                      f"allow_partial to save the partial schedule."),
+            "partial": partial,
+            "conflicts": conflicts
+        }, 409
+    
+    if not assignments:
+        return {
+            "ok": False,
+            "error": "No assignments could be generated. Check facilitator availability and skills.",
+            "conflicts": conflicts,
+            "eligibility": eligibility
+        }, 400
+    
+    if listener is not None:
+        listener({'event': 'phase', 'phase': 'saving'})
+    
+    if repair:
+        # Only touch the rows that changed
+        removed = set(repair_report['removed'])
+        seen = set()
+        deleted_count = 0
+        for existing in existing_assignments:
+            key = (existing.session_id, existing.facilitator_id, existing.role or 'lead')
+            if key in removed or key in seen:
+                db.session.delete(existing)
+                deleted_count += 1
+            seen.add(key)
+        added = set(repair_report['added'])
+        new_assignments = [
+            a for a in assignments
+            if (a['session']['id'], a['facilitator']['id'], a['role']) in added
+        ]
+    else:
+        # Clean up existing assignments for this unit before creating new ones
+        deleted_count = len(existing_assignments)
+        if deleted_count > 0:
+            logger.info(f"Removing {deleted_count} existing assignments for unit {unit_id}")
+            for assignment in existing_assignments:
+                db.session.delete(assignment)
+        new_assignments = assignments
+    
+    # Create actual Assignment records in the database
+    created_assignments = []
+    for assignment in new_assignments:
+        new_assignment = Assignment(
+            session_id=assignment['session']['id'],
+            facilitator_id=assignment['facilitator']['id'],
+            is_confirmed=True,  # Auto-confirm assignments
+            role=assignment.get('role', 'lead')  # Track lead vs support role
+        )
+        db.session.add(new_assignment)
+        created_assignments.append({
+            'facilitator_name': assignment['facilitator']['name'],
+            'session_name': assignment['session']['module_name'],
+            'time': format_session_time(assignment['session']),
+            'score': round(assignment['score'], 2),
+            'role': assignment.get('role', 'lead')
+        })
+    
+    # Calculate metrics
+    metrics = calculate_metrics(assignments)
+    
+    # Generate CSV report
+    unit_display_name = f"{unit.unit_code} - {unit.unit_name}" if unit else "Unit"
+    csv_report = generate_schedule_report_csv(
+        assignments, 
+        unit_display_name,
+        total_facilitators_in_pool=len(facilitators_from_db),
+        unit_id=unit_id,
+        all_facilitators=facilitators_from_db
+    )
+    
+    # Store CSV in a temporary file instead of session to avoid cookie size issues
+    import tempfile
+    import os
+    
+    # Create a temporary file for the CSV report
+    temp_dir = tempfile.gettempdir()
+    csv_filename = f"schedule_report_{unit_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    csv_filepath = os.path.join(temp_dir, csv_filename)
+    
+    # Write CSV to temporary file
+    with open(csv_filepath, 'w', encoding='utf-8') as f:
+        f.write(csv_report)
+    
+    # Clean up old temporary files to prevent disk space issues
+    _cleanup_old_temp_files(temp_dir, f"schedule_report_{unit_id}_")
+    
+    # Prepare success message
+    if repair:
+        message = (f"Repaired schedule: kept {repair_report['kept']} assignments, "
+                   f"created {len(created_assignments)}, removed {deleted_count} "
+                   f"({repair_report['changed_assignments']} changed, "
+                   f"{len(repair_report['changed_facilitators'])} facilitators affected)")
+    else:
+        message = f"Successfully created {len(created_assignments)} assignments"
+        if deleted_count > 0:
+            message += f" (removed {deleted_count} previous assignments)"
+        if partial and partial['unfinished_sessions']:
+            message += f"; stopped early ({partial['reason']}), {len(partial['unfinished_sessions'])} sessions left unscheduled"
+    
+    return {
+        "ok": True,
+        "message": message,
+        "assignments": created_assignments,
+        "conflicts": conflicts,
+        "metrics": metrics,
+        "solver_mode": 'repair' if repair else mode,
+        "seed": None if repair else context.stats.get('seed', seed),
+        "repair": repair_report,
+        "changed_assignments": repair_report['changed_assignments'] if repair else None,
+        "partial": partial,
+        "units": unit_ids,
+        "cross_unit": options.get('cross_unit', False),
+        "solver_stats": context.stats,
+        "eligibility": eligibility,
+        "csv_report": csv_filename,
+        "csv_available": True,
+        "csv_download_url": f"/unitcoordinator/units/{unit_id}/download_schedule_report"
+    }, 200
+
+
+def _remember_schedule_report(unit_id: int, payload: dict):
+    """Move the CSV report file name out of an auto-assign payload into the user's session"""
+    from flask import session as flask_session
+    
+    csv_filename = payload.pop('csv_report', None)
+    if csv_filename:
+        # Store only the filename in session (much smaller than the full CSV)
+        flask_session[f'schedule_report_{unit_id}'] = csv_filename
+        flask_session[f'schedule_report_timestamp_{unit_id}'] = datetime.now().isoformat()
+
+
 @unitcoordinator_bp.post("/units/<int:unit_id>/auto_assign")
 @login_required
 @role_required([UserRole.UNIT_COORDINATOR, UserRole.ADMIN])
 def auto_assign_facilitators(unit_id: int):
     """
     Auto-assign facilitators to sessions using the optimization algorithm
+    Runs inside the request; large units should use the background job endpoints below.
+    Without a time_limit in the body, app.config['AUTO_ASSIGN_TIME_LIMIT'] (if set) bounds
+    the run so it returns before the server's request timeout
     """
     user = get_current_user()
     unit = _get_user_unit_or_404(user, unit_id)
     if not unit:
         return jsonify({"ok": False, "error": "Unit not found or unauthorized"}), 404
     
+    body = request.get_json(silent=True) or {}
+    if body.get('time_limit') is None and current_app.config.get('AUTO_ASSIGN_TIME_LIMIT'):
+        body = dict(body, time_limit=current_app.config['AUTO_ASSIGN_TIME_LIMIT'])
+    options, error = _parse_auto_assign_options(body)
+    if not error:
+        error = _check_co_units(user, unit, options)
+    if error:
+        return jsonify({"ok": False, "error": error}), 400
+    
     try:
-        # Import the optimization engine
-        from optimization_engine import (
-            generate_optimal_assignments, 
-            calculate_metrics, 
-            format_session_time, 
-            prepare_facilitator_data,
-            generate_schedule_report_csv
-        )
-        from flask import session as flask_session
-        
-        # Get facilitators assigned to this unit
-        facilitators_from_db = (
-            db.session.query(User)
-            .join(UnitFacilitator, User.id == UnitFacilitator.user_id)
-            .filter(UnitFacilitator.unit_id == unit_id)
-            .filter(User.role == UserRole.FACILITATOR)
-            .all()
-        )
-        
-        if not facilitators_from_db:
-            return jsonify({
-                "ok": False, 
-                "error": "No facilitators assigned to this unit"
-            }), 400
-        
-        # Validate that all facilitators have declared their skills and unavailability
-        validation_errors = []
-        
-        # Get all modules for this unit (excluding the default "General" module)
-        unit_modules = Module.query.filter_by(unit_id=unit_id).filter(Module.module_name != "General").all()
-        if not unit_modules:
-            return jsonify({
-                "ok": False,
-                "error": "No modules found for this unit. Please create modules first."
-            }), 400
-        
-        # Check skills declarations
-        facilitators_missing_skills = []
-        for facilitator in facilitators_from_db:
-            facilitator_skills = FacilitatorSkill.query.filter_by(facilitator_id=facilitator.id).all()
-            declared_module_ids = {skill.module_id for skill in facilitator_skills}
-            unit_module_ids = {module.id for module in unit_modules}
-            
-            # Check if facilitator has declared skills for all modules in this unit
-            missing_modules = unit_module_ids - declared_module_ids
-            if missing_modules:
-                missing_module_names = [Module.query.get(module_id).module_name for module_id in missing_modules if Module.query.get(module_id).module_name != "General"]
-                if missing_module_names:  # Only add if there are actual missing modules (not just General)
-                    facilitators_missing_skills.append({
-                    'name': facilitator.full_name,
-                    'email': facilitator.email,
-                    'missing_modules': missing_module_names
-                })
-        
-        if facilitators_missing_skills:
-            validation_errors.append({
-                'type': 'skills',
-                'message': 'Some facilitators have not declared their skills for all modules',
-                'facilitators': facilitators_missing_skills
-            })
-        
-        # Check unavailability declarations (optional - facilitators might not have any unavailability)
-        # We'll just log this for now but not block auto-assignment
-        facilitators_without_unavailability = []
-        for facilitator in facilitators_from_db:
-            unavailability_count = Unavailability.query.filter_by(user_id=facilitator.id, unit_id=unit_id).count()
-            if unavailability_count == 0:
-                facilitators_without_unavailability.append(facilitator.full_name)
-        
-        # Note: We don't block auto-assignment for missing unavailability since facilitators might be fully available
-        
-        if validation_errors:
-            return jsonify({
-                "ok": False,
-                "error": "Cannot run auto-assignment: Prerequisites not met",
-                "validation_errors": validation_errors,
-                "unavailability_note": f"Note: {len(facilitators_without_unavailability)} facilitators have not declared any unavailability (this is optional)"
-            }), 400
-        
-        # Prepare facilitator data for optimization
-        facilitators = prepare_facilitator_data(facilitators_from_db)
-        
-        # Generate assignments using the optimization algorithm (filtered to this unit only)
-        assignments, conflicts = generate_optimal_assignments(facilitators, unit_id)
-        
-        if not assignments:
-            return jsonify({
-                "ok": False,
-                "error": "No assignments could be generated. Check facilitator availability and skills.",
-                "conflicts": conflicts
-            }), 400
-        
-        # Clean up existing assignments for this unit before creating new ones
-        # Get all sessions for this unit
-        unit_sessions = (
-            db.session.query(Session)
-            .join(Module)
-            .filter(Module.unit_id == unit_id)
-            .all()
-        )
-        
-        deleted_count = 0
-        if unit_sessions:
-            # Get session IDs for this unit
-            unit_session_ids = [session.id for session in unit_sessions]
-            
-            # Delete all existing assignments for sessions in this unit
-            existing_assignments = Assignment.query.filter(
-                Assignment.session_id.in_(unit_session_ids)
-            ).all()
-            
-            deleted_count = len(existing_assignments)
-            if deleted_count > 0:
-                logger.info(f"Removing {deleted_count} existing assignments for unit {unit_id}")
-                for assignment in existing_assignments:
-                    db.session.delete(assignment)
-        
-        # Create actual Assignment records in the database
-        created_assignments = []
-        for assignment in assignments:
-            new_assignment = Assignment(
-                session_id=assignment['session']['id'],
-                facilitator_id=assignment['facilitator']['id'],
-                is_confirmed=True,  # Auto-confirm assignments
-                role=assignment.get('role', 'lead')  # Track lead vs support role
-            )
-            db.session.add(new_assignment)
-            created_assignments.append({
-                'facilitator_name': assignment['facilitator']['name'],
-                'session_name': assignment['session']['module_name'],
-                'time': format_session_time(assignment['session']),
-                'score': round(assignment['score'], 2),
-                'role': assignment.get('role', 'lead')
-            })
+        payload, status = _run_auto_assign(unit, options)
+        if status != 200:
+            db.session.rollback()
+            return jsonify(payload), status
         
         db.session.commit()
-        
-        # Calculate metrics
-        metrics = calculate_metrics(assignments)
-        
-        # Generate CSV report and cache it in the session
-        unit_display_name = f"{unit.unit_code} - {unit.unit_name}" if unit else "Unit"
-        csv_report = generate_schedule_report_csv(
-            assignments, 
-            unit_display_name,
-            total_facilitators_in_pool=len(facilitators_from_db),
-            unit_id=unit_id,
-            all_facilitators=facilitators_from_db
-        )
-        
-        # Store CSV in a temporary file instead of session to avoid cookie size issues
-        import tempfile
-        import os
-        
-        # Create a temporary file for the CSV report
-        temp_dir = tempfile.gettempdir()
-        csv_filename = f"schedule_report_{unit_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        csv_filepath = os.path.join(temp_dir, csv_filename)
-        
-        # Write CSV to temporary file
-        with open(csv_filepath, 'w', encoding='utf-8') as f:
-            f.write(csv_report)
-        
-        # Clean up old temporary files to prevent disk space issues
-        _cleanup_old_temp_files(temp_dir, f"schedule_report_{unit_id}_")
-        
-        # Store only the filename in session (much smaller than the full CSV)
-        flask_session[f'schedule_report_{unit_id}'] = csv_filename
-        flask_session[f'schedule_report_timestamp_{unit_id}'] = datetime.now().isoformat()
-        
-        # Prepare success message
-        message = f"Successfully created {len(created_assignments)} assignments"
-        if deleted_count > 0:
-            message += f" (removed {deleted_count} previous assignments)"
-        
-        return jsonify({
-            "ok": True,
-            "message": message,
-            "assignments": created_assignments,
-            "conflicts": conflicts,
-            "metrics": metrics,
-            "csv_available": True,
-            "csv_download_url": f"/unitcoordinator/units/{unit_id}/download_schedule_report"
-        })
+        _remember_schedule_report(unit_id, payload)
+        return jsonify(payload)
         
     except Exception as e:
         db.session.rollback()
@@ -2594,6 +2869,298 @@ def auto_assign_facilitators(unit_id: int):
         }), 500
 
 
+@unitcoordinator_bp.post("/units/<int:unit_id>/auto_assign/simulate")
+@login_required
+@role_required([UserRole.UNIT_COORDINATOR, UserRole.ADMIN])
+def simulate_auto_assign(unit_id: int):
+    """
+    What-if analysis on the unit's current schedule; nothing is saved
+    Body: {"edits": [...] (see apply_what_if_edits), "cross_unit": true to keep other
+    units' assignments as busy time}. Returns the metric deltas from simulate_schedule
+    """
+    from optimization_engine import ConstraintContext, prepare_facilitator_data, simulate_schedule
+    
+    user = get_current_user()
+    unit = _get_user_unit_or_404(user, unit_id)
+    if not unit:
+        return jsonify({"ok": False, "error": "Unit not found or unauthorized"}), 404
+    
+    body = request.get_json(silent=True) or {}
+    edits = body.get('edits') or []
+    if not isinstance(edits, list) or not all(isinstance(edit, dict) for edit in edits):
+        return jsonify({"ok": False, "error": "edits must be a list of objects"}), 400
+    
+    facilitators_from_db = (
+        db.session.query(User)
+        .join(UnitFacilitator, User.id == UnitFacilitator.user_id)
+        .filter(UnitFacilitator.unit_id == unit_id)
+        .filter(User.role == UserRole.FACILITATOR)
+        .all()
+    )
+    facilitators = prepare_facilitator_data(facilitators_from_db)
+    context = ConstraintContext.load(facilitators, unit_id, cross_unit=bool(body.get('cross_unit', False)))
+    existing = [
+        {'session_id': session_id, 'facilitator_id': facilitator_id, 'role': role or 'lead'}
+        for session_id, facilitator_id, role in (
+            db.session.query(Assignment.session_id, Assignment.facilitator_id, Assignment.role)
+            .join(Session, Assignment.session_id == Session.id)
+            .join(Module, Session.module_id == Module.id)
+            .filter(Module.unit_id == unit_id)
+        )
+    ]
+    
+    try:
+        result = simulate_schedule(facilitators, context, existing, edits)
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    logger.info(f"What-if simulation for unit {unit_id}: {len(edits)} edits in {result['elapsed_ms']} ms")
+    return jsonify(dict(result, ok=True))
+
+
+def _auto_assign_job(job, progress, options):
+    """JobRunner target: solve and stage the unit's new schedule for the runner to commit"""
+    unit = Unit.query.get(job.unit_id)
+    if not unit:
+        return {"ok": False, "error": "Unit no longer exists"}, False
+    payload, status = _run_auto_assign(unit, options, listener=progress, cancel=progress.cancel_token)
+    return payload, status == 200
+
+
+def _get_unit_job_or_404(unit_id: int, job_id: str):
+    job = db.session.get(AutoAssignJob, job_id)
+    if not job or job.unit_id != unit_id:
+        return None
+    return job
+
+
+@unitcoordinator_bp.post("/units/<int:unit_id>/auto_assign/jobs")
+@login_required
+@role_required([UserRole.UNIT_COORDINATOR, UserRole.ADMIN])
+def submit_auto_assign_job(unit_id: int):
+    """
+    Queue auto-assign as a background job and return its id straight away
+    Takes the same options as the synchronous route; poll the status or progress URL
+    """
+    import json
+    from jobs import JOB_RUNNER, new_job_id
+    
+    user = get_current_user()
+    unit = _get_user_unit_or_404(user, unit_id)
+    if not unit:
+        return jsonify({"ok": False, "error": "Unit not found or unauthorized"}), 404
+    
+    options, error = _parse_auto_assign_options(request.get_json(silent=True) or {})
+    if not error:
+        error = _check_co_units(user, unit, options)
+    if error:
+        return jsonify({"ok": False, "error": error}), 400
+    
+    # One rewrite of a unit's schedule at a time (co-solved units included); jobs left
+    # behind by a process that died are closed rather than blocking the unit for good
+    active = None
+    for candidate in (
+        AutoAssignJob.query
+        .filter(AutoAssignJob.unit_id.in_([unit_id] + options['co_units']))
+        .filter(AutoAssignJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]))
+        .all()
+    ):
+        if JOB_RUNNER.is_orphaned(candidate):
+            JOB_RUNNER.close_orphaned(candidate)
+        elif active is None:
+            active = candidate
+    if active:
+        return jsonify({
+            "ok": False,
+            "error": "An auto-assign job is already running for this unit",
+            "job_id": active.id
+        }), 409
+    
+    job = AutoAssignJob(id=new_job_id(), unit_id=unit_id, created_by=user.id, options=json.dumps(options))
+    db.session.add(job)
+    db.session.commit()
+    
+    JOB_RUNNER.submit(job.id, _auto_assign_job, options)
+    
+    return jsonify({
+        "ok": True,
+        "job_id": job.id,
+        "status_url": url_for("unitcoordinator.auto_assign_job_status", unit_id=unit_id, job_id=job.id),
+        "progress_url": url_for("unitcoordinator.auto_assign_job_progress", unit_id=unit_id, job_id=job.id),
+        "events_url": url_for("unitcoordinator.auto_assign_job_events", unit_id=unit_id, job_id=job.id),
+        "cancel_url": url_for("unitcoordinator.cancel_auto_assign_job", unit_id=unit_id, job_id=job.id)
+    }), 202
+
+
+@unitcoordinator_bp.get("/units/<int:unit_id>/auto_assign/jobs/<job_id>")
+@login_required
+@role_required([UserRole.UNIT_COORDINATOR, UserRole.ADMIN])
+def auto_assign_job_status(unit_id: int, job_id: str):
+    """
+    Status of an auto-assign job, with the auto-assign response once it has finished
+    """
+    import json
+    
+    user = get_current_user()
+    unit = _get_user_unit_or_404(user, unit_id)
+    job = _get_unit_job_or_404(unit_id, job_id) if unit else None
+    if not job:
+        return jsonify({"ok": False, "error": "Job not found or unauthorized"}), 404
+    
+    response = {"ok": True, "job": job.progress()}
+    if job.result:
+        result = json.loads(job.result)
+        if job.status == JobStatus.SUCCEEDED:
+            _remember_schedule_report(unit_id, result)
+        result.pop('csv_report', None)
+        response["result"] = result
+    return jsonify(response)
+
+
+@unitcoordinator_bp.get("/units/<int:unit_id>/auto_assign/jobs/<job_id>/progress")
+@login_required
+@role_required([UserRole.UNIT_COORDINATOR, UserRole.ADMIN])
+def auto_assign_job_progress(unit_id: int, job_id: str):
+    """
+    Phase, sessions processed and current objective of an auto-assign job (cheap to poll)
+    """
+    user = get_current_user()
+    unit = _get_user_unit_or_404(user, unit_id)
+    job = _get_unit_job_or_404(unit_id, job_id) if unit else None
+    if not job:
+        return jsonify({"ok": False, "error": "Job not found or unauthorized"}), 404
+    return jsonify({"ok": True, "job": job.progress()})
+
+
+# Live job streams: longest silence before a keep-alive comment, pause between batches
+# (events arriving meanwhile are coalesced) and row polling interval for jobs running
+# in another process
+SSE_HEARTBEAT_SECONDS = 15
+SSE_BATCH_SECONDS = 0.2
+SSE_POLL_SECONDS = 0.5
+
+
+def _sse(event_type, data, event_id=None):
+    """Format one server-sent event"""
+    import json
+    
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+@unitcoordinator_bp.get("/units/<int:unit_id>/auto_assign/jobs/<job_id>/events")
+@login_required
+@role_required([UserRole.UNIT_COORDINATOR, UserRole.ADMIN])
+def auto_assign_job_events(unit_id: int, job_id: str):
+    """
+    Server-sent event stream of an auto-assign job's progress
+    
+    Relays the solver's events (phase, session, slot_failed, objective; see
+    generate_optimal_assignments) while the job runs in this process. Bursts of
+    'session' and 'objective' events are coalesced to the newest one, and 'session'
+    events get an 'eta' in seconds for the solving phase. A job running in another
+    process is followed through its row instead, as 'progress' events. The stream ends
+    with a 'done' event holding the job's final status.
+    """
+    import time
+    from flask import Response, stream_with_context
+    from jobs import JOB_RUNNER
+    
+    user = get_current_user()
+    unit = _get_user_unit_or_404(user, unit_id)
+    job = _get_unit_job_or_404(unit_id, job_id) if unit else None
+    if not job:
+        return jsonify({"ok": False, "error": "Job not found or unauthorized"}), 404
+    
+    try:
+        last_seen = int(request.headers.get('Last-Event-ID', 0))
+    except ValueError:
+        last_seen = 0
+    log = JOB_RUNNER.events(job_id)
+    
+    def relay():
+        seq = last_seen
+        solving_started = None
+        while True:
+            entries, closed = log.since(seq, timeout=SSE_HEARTBEAT_SECONDS)
+            if not entries and not closed:
+                yield ": keep-alive\n\n"
+                continue
+            # Only the newest progress counter of each kind in a batch is worth sending
+            newest = {event['event']: position for position, (_, event) in enumerate(entries)
+                      if event['event'] in ('session', 'objective')}
+            for position, (seq, event) in enumerate(entries):
+                kind = event['event']
+                if kind == 'phase' and event['phase'] == 'solving':
+                    solving_started = time.monotonic()
+                if kind in newest and newest[kind] != position:
+                    continue
+                if kind == 'session' and solving_started is not None:
+                    done, total = event['sessions_processed'], event['sessions_total']
+                    elapsed = time.monotonic() - solving_started
+                    event = dict(event, eta=round(elapsed / done * (total - done), 1) if done else None)
+                yield _sse(kind, event, seq)
+            if closed:
+                return
+            time.sleep(SSE_BATCH_SECONDS)
+    
+    def poll():
+        last = None
+        while True:
+            # End the read transaction so each pass sees the worker's latest commit
+            db.session.rollback()
+            current = db.session.get(AutoAssignJob, job_id)
+            if JOB_RUNNER.is_orphaned(current):
+                JOB_RUNNER.close_orphaned(current)
+            snapshot = current.progress()
+            if snapshot != last:
+                yield _sse('progress', snapshot)
+                last = snapshot
+            if current.is_finished:
+                return
+            time.sleep(SSE_POLL_SECONDS)
+    
+    def stream():
+        yield from (relay() if log is not None else poll())
+        db.session.rollback()
+        yield _sse('done', db.session.get(AutoAssignJob, job_id).progress())
+    
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@unitcoordinator_bp.post("/units/<int:unit_id>/auto_assign/jobs/<job_id>/cancel")
+@login_required
+@role_required([UserRole.UNIT_COORDINATOR, UserRole.ADMIN])
+def cancel_auto_assign_job(unit_id: int, job_id: str):
+    """
+    Cancel a queued or running auto-assign job; the current schedule is left as it is
+    A job whose runner has died (see JobRunner.is_orphaned) is closed as cancelled here
+    """
+    from jobs import JOB_RUNNER
+    
+    user = get_current_user()
+    unit = _get_user_unit_or_404(user, unit_id)
+    job = _get_unit_job_or_404(unit_id, job_id) if unit else None
+    if not job:
+        return jsonify({"ok": False, "error": "Job not found or unauthorized"}), 404
+    if job.is_finished:
+        return jsonify({"ok": False, "error": f"Job has already {job.status.value}", "job": job.progress()}), 409
+    
+    if JOB_RUNNER.is_orphaned(job):
+        JOB_RUNNER.close_orphaned(job, cancelled=True)
+        return jsonify({"ok": True, "job": job.progress()})
+    
+    job.cancel_requested = True
+    db.session.commit()
+    JOB_RUNNER.cancel(job_id)
+    return jsonify({"ok": True, "job": job.progress()})
+
+
 @unitcoordinator_bp.get("/units/<int:unit_id>/check_csv_availability")
 @login_required
 @role_required([UserRole.UNIT_COORDINATOR, UserRole.ADMIN])
@@ -3061,7 +3628,12 @@ def list_venues(unit_id: int):
 @login_required
 @role_required([UserRole.UNIT_COORDINATOR, UserRole.ADMIN])
 def publish_preview(unit_id: int):
-    """Get a preview of what will be published (session and facilitator counts)"""
+    """
+    Get a preview of what will be published (session and facilitator counts)
+    
+    facilitators_to_notify lists who a re-publish would notify: everyone on the first
+    publish, otherwise only those whose assignments changed since the last one
+    """
     user = get_current_user()
     unit = _get_user_unit_or_404(user, unit_id)
     if not unit:
@@ -3079,16 +3651,20 @@ def publish_preview(unit_id: int):
         )
         
         # Count unique facilitators
-        facilitator_ids = set()
-        for session in sessions:
-            assignments = Assignment.query.filter_by(session_id=session.id).all()
-            for assignment in assignments:
-                facilitator_ids.add(assignment.facilitator_id)
+        current_snapshot = _unit_assignment_snapshot(unit_id)
+        previous_snapshot = _published_assignment_snapshot(unit)
+        facilitator_ids = sorted(int(facilitator_id) for facilitator_id in current_snapshot)
+        to_notify = [
+            facilitator_id for facilitator_id in facilitator_ids
+            if previous_snapshot is None or previous_snapshot.get(str(facilitator_id)) != current_snapshot[str(facilitator_id)]
+        ]
         
         return jsonify({
             "ok": True,
             "session_count": len(sessions),
-            "facilitator_count": len(facilitator_ids)
+            "facilitator_count": len(facilitator_ids),
+            "facilitators_to_notify": to_notify,
+            "facilitators_unchanged": len(facilitator_ids) - len(to_notify)
         })
     except Exception as e:
         print(f"Error getting publish preview: {e}")
@@ -3126,45 +3702,47 @@ def assign_facilitators_to_session(unit_id: int, session_id: int):
         
         # Check for scheduling conflicts before creating assignments
         conflicts = []
-        for facilitator_id in facilitator_ids:
-            # Get all existing assignments for this facilitator
-            existing_assignments = (
-                db.session.query(Assignment, Session)
-                .join(Session, Session.id == Assignment.session_id)
-                .join(Module, Module.id == Session.module_id)
-                .filter(
-                    Assignment.facilitator_id == facilitator_id,
-                    Module.unit_id == unit_id,
-                    Session.id != session_id  # Exclude current session
-                )
-                .all()
+        
+        # Load existing assignments for all selected facilitators at once and index them by time
+        existing_assignments = (
+            db.session.query(Assignment, Session)
+            .join(Session, Session.id == Assignment.session_id)
+            .join(Module, Module.id == Session.module_id)
+            .filter(
+                Assignment.facilitator_id.in_(facilitator_ids),
+                Module.unit_id == unit_id,
+                Session.id != session_id  # Exclude current session
             )
-            
+            .all()
+        )
+        # Keyed by str() since the posted ids may arrive as numbers or strings
+        interval_index = FacilitatorIntervalIndex()
+        for assignment, existing_session in existing_assignments:
+            interval_index.add(str(assignment.facilitator_id), existing_session.start_time, existing_session.end_time,
+                               existing_session.location or 'TBA', existing_session)
+        
+        for facilitator_id in facilitator_ids:
             # Check for time overlaps with current session
-            for assignment, existing_session in existing_assignments:
-                # Check if sessions overlap
-                if (session.start_time < existing_session.end_time and 
-                    session.end_time > existing_session.start_time):
-                    
-                    facilitator = User.query.get(facilitator_id)
-                    facilitator_name = facilitator.full_name if facilitator else f"Facilitator {facilitator_id}"
-                    
-                    conflicts.append({
-                        'facilitator_id': facilitator_id,
-                        'facilitator_name': facilitator_name,
-                        'conflicting_session': {
-                            'id': existing_session.id,
-                            'name': existing_session.module.module_name,
-                            'start_time': existing_session.start_time.isoformat(),
-                            'end_time': existing_session.end_time.isoformat()
-                        },
-                        'current_session': {
-                            'id': session.id,
-                            'name': session.module.module_name,
-                            'start_time': session.start_time.isoformat(),
-                            'end_time': session.end_time.isoformat()
-                        }
-                    })
+            for _, _, _, existing_session in interval_index.overlapping(str(facilitator_id), session.start_time, session.end_time):
+                facilitator = User.query.get(facilitator_id)
+                facilitator_name = facilitator.full_name if facilitator else f"Facilitator {facilitator_id}"
+                
+                conflicts.append({
+                    'facilitator_id': facilitator_id,
+                    'facilitator_name': facilitator_name,
+                    'conflicting_session': {
+                        'id': existing_session.id,
+                        'name': existing_session.module.module_name,
+                        'start_time': existing_session.start_time.isoformat(),
+                        'end_time': existing_session.end_time.isoformat()
+                    },
+                    'current_session': {
+                        'id': session.id,
+                        'name': session.module.module_name,
+                        'start_time': session.start_time.isoformat(),
+                        'end_time': session.end_time.isoformat()
+                    }
+                })
         
         # If there are conflicts, return error with details
         if conflicts:
@@ -3232,17 +3810,79 @@ def assign_facilitators_to_session(unit_id: int, session_id: int):
         return jsonify({"ok": False, "error": f"Failed to assign facilitators: {str(e)}"}), 500
 
 
+def _unit_assignment_snapshot(unit_id):
+    """
+    Current assignments of a unit as {facilitator_id (str): sorted [[session_id, role, start, end, location], ...]}
+    Session times and location are included so a moved session counts as a change
+    """
+    rows = (
+        db.session.query(Assignment.facilitator_id, Assignment.role, Session.id, Session.start_time, Session.end_time, Session.location)
+        .join(Session, Assignment.session_id == Session.id)
+        .join(Module, Session.module_id == Module.id)
+        .filter(Module.unit_id == unit_id)
+        .all()
+    )
+    snapshot = {}
+    for facilitator_id, role, session_id, start_time, end_time, location in rows:
+        snapshot.setdefault(str(facilitator_id), []).append([
+            session_id,
+            role or 'lead',
+            start_time.isoformat() if start_time else None,
+            end_time.isoformat() if end_time else None,
+            location or 'TBA'
+        ])
+    for entries in snapshot.values():
+        entries.sort(key=lambda entry: (entry[0], entry[1]))
+    return snapshot
+
+
+def _published_assignment_snapshot(unit):
+    """The _unit_assignment_snapshot() stored in unit.version_history at the last publish, or None"""
+    import json
+    try:
+        history = json.loads(unit.version_history) if unit.version_history else {}
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(history, dict):
+        return None
+    return history.get('published_assignments')
+
+
+def _store_published_snapshot(unit, snapshot):
+    """Record the published assignments in unit.version_history, keeping any other keys"""
+    import json
+    try:
+        history = json.loads(unit.version_history) if unit.version_history else {}
+    except (TypeError, ValueError):
+        history = {}
+    if not isinstance(history, dict):
+        history = {}
+    history['published_assignments'] = snapshot
+    history['published_assignments_at'] = datetime.utcnow().isoformat()
+    unit.version_history = json.dumps(history)
+
+
 @unitcoordinator_bp.post("/units/<int:unit_id>/publish")
 @login_required
 @role_required([UserRole.UNIT_COORDINATOR, UserRole.ADMIN])
 def publish_schedule(unit_id: int):
-    """Publish the schedule and notify facilitators."""
+    """
+    Publish the schedule and notify facilitators.
+    
+    On a re-publish only facilitators whose assignments changed since the last publish
+    are notified; send {"notify": "all"} to notify everyone.
+    """
     user = get_current_user()
     unit = _get_user_unit_or_404(user, unit_id)
     if not unit:
         return jsonify({"ok": False, "error": "Unit not found or unauthorized"}), 404
     
     try:
+        options = request.get_json(silent=True) or {}
+        current_snapshot = _unit_assignment_snapshot(unit_id)
+        previous_snapshot = _published_assignment_snapshot(unit)
+        notify_all = options.get('notify') == 'all' or previous_snapshot is None
+        
         # Get all sessions for this unit that have facilitators assigned
         # Check for sessions with any assignments, regardless of status
         sessions = (
@@ -3328,7 +3968,12 @@ def publish_schedule(unit_id: int):
         
         print(f"DEBUG: Collected sessions for {len(facilitator_sessions)} facilitators")
         
+        facilitators_unchanged = 0
         for facilitator_id, sessions_list in facilitator_sessions.items():
+            # Facilitators whose schedule is exactly what they were last sent need no new notice
+            if not notify_all and previous_snapshot.get(str(facilitator_id)) == current_snapshot.get(str(facilitator_id)):
+                facilitators_unchanged += 1
+                continue
             try:
                 # Get facilitator user
                 facilitator = User.query.get(facilitator_id)
@@ -3381,13 +4026,21 @@ def publish_schedule(unit_id: int):
             # If enum not available for any reason, silently continue; sessions are still published
             pass
         
+        # Remember what was published so the next publish only notifies changed facilitators
+        _store_published_snapshot(unit, current_snapshot)
+        
         db.session.commit()
         
+        message = f"Schedule published successfully. {notifications_created} facilitators notified via email."
+        if facilitators_unchanged:
+            message += f" {facilitators_unchanged} facilitators with unchanged schedules were not re-notified."
+        
         return jsonify({
             "ok": True,
-            "message": f"Schedule published successfully. {notifications_created} facilitators notified via email.",
+            "message": message,
             "sessions_published": len(sessions),
             "facilitators_notified": notifications_created,
+            "facilitators_unchanged": facilitators_unchanged,
             "emails_sent": emails_sent
         })
         
@@ -4386,79 +5039,45 @@ def get_schedule_conflicts(unit_id: int):
             .all()
         )
         
-        # Group assignments by facilitator
-        facilitator_sessions = {}
+        # Index assignments per facilitator, sorted by start time
+        interval_index = FacilitatorIntervalIndex()
+        facilitator_names = {}
         for assignment, session, facilitator in assignments_query:
-            facilitator_id = facilitator.id
-            if facilitator_id not in facilitator_sessions:
-                facilitator_sessions[facilitator_id] = []
-            
-            facilitator_sessions[facilitator_id].append({
+            facilitator_names[facilitator.id] = f"{facilitator.first_name} {facilitator.last_name}".strip()
+            interval_index.add(facilitator.id, session.start_time, session.end_time, session.location or 'TBA', {
                 'assignment_id': assignment.id,
                 'session_id': session.id,
-                'start_time': session.start_time,
-                'end_time': session.end_time,
-                'module_name': session.module.module_name,
-                'facilitator_name': f"{facilitator.first_name} {facilitator.last_name}".strip()
+                'module_name': session.module.module_name
             })
         
         # Detect overlapping sessions
-        for facilitator_id, sessions in facilitator_sessions.items():
-            sessions.sort(key=lambda x: x['start_time'])
-            facilitator_name = sessions[0]['facilitator_name']
+        for facilitator_id in interval_index.facilitator_ids():
+            facilitator_name = facilitator_names[facilitator_id]
             
-            for i in range(len(sessions)):
-                current_session = sessions[i]
-                
-                for j in range(i + 1, len(sessions)):
-                    next_session = sessions[j]
-                    
-                    # Check for time overlap
-                    if current_session['end_time'] > next_session['start_time']:
-                        conflict = {
-                            'type': 'schedule_overlap',
-                            'facilitator_id': facilitator_id,
-                            'facilitator_name': facilitator_name,
-                            'session1': {
-                                'id': current_session['session_id'],
-                                'module': current_session['module_name'],
-                                'start_time': current_session['start_time'].isoformat(),
-                                'end_time': current_session['end_time'].isoformat()
-                            },
-                            'session2': {
-                                'id': next_session['session_id'],
-                                'module': next_session['module_name'],
-                                'start_time': next_session['start_time'].isoformat(),
-                                'end_time': next_session['end_time'].isoformat()
-                            }
-                        }
-                        conflicts.append(conflict)
+            for current_session, next_session in interval_index.overlapping_pairs(facilitator_id):
+                current_start, current_end, _, current_info = current_session
+                next_start, next_end, _, next_info = next_session
+                conflict = {
+                    'type': 'schedule_overlap',
+                    'facilitator_id': facilitator_id,
+                    'facilitator_name': facilitator_name,
+                    'session1': {
+                        'id': current_info['session_id'],
+                        'module': current_info['module_name'],
+                        'start_time': current_start.isoformat(),
+                        'end_time': current_end.isoformat()
+                    },
+                    'session2': {
+                        'id': next_info['session_id'],
+                        'module': next_info['module_name'],
+                        'start_time': next_start.isoformat(),
+                        'end_time': next_end.isoformat()
+                    }
+                }
+                conflicts.append(conflict)
         
         # Check for unavailability conflicts
-        unavailability_conflicts_query = (
-            db.session.query(Assignment, Unavailability, Session, User)
-            .join(Session, Session.id == Assignment.session_id)
-            .join(Module, Module.id == Session.module_id)
-            .join(User, User.id == Assignment.facilitator_id)
-            .join(Unavailability, 
-                  db.and_(
-                      Unavailability.user_id == Assignment.facilitator_id,
-                      Unavailability.unit_id == unit.id,
-                      db.func.date(Session.start_time) == Unavailability.date
-                  )
-            )
-            .filter(
-                Module.unit_id == unit.id,
-                db.or_(
-                    Unavailability.is_full_day == True,
-                    db.and_(
-                        Unavailability.start_time <= db.func.time(Session.start_time),
-                        Unavailability.end_time >= db.func.time(Session.end_time)
-                    )
-                )
-            )
-            .all()
-        )
+        unavailability_conflicts_query = _unavailability_conflicts(unit.id)
         
         for assignment, unavailability, session, facilitator in unavailability_conflicts_query:
             conflict = {